@@ -0,0 +1,181 @@
+# app/api/bulkhead.py - Cloisons de concurrence par famille de routes
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from app.config import settings
+from app.services import request_context
+
+
+class Bulkhead:
+    """
+    Cloison : au plus `max_concurrent` requêtes actives, au plus `max_queue`
+    en attente d'une place (FIFO). Au-delà, ou après `queue_timeout`
+    secondes d'attente, la requête est refusée en 503 avec Retry-After
+    au lieu de s'accumuler dans le threadpool partagé.
+
+    Les places sont prises avant l'entrée dans le threadpool : un trafic
+    IA lent ne peut occuper que les threads de sa propre cloison.
+    Utilisée depuis la boucle d'événements uniquement (pas de verrou).
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.max_active = 0
+        self.max_waiting = 0
+        self.wait_ms_total = 0.0
+        self.hold_seconds_avg = 0.0  # EWMA de la durée d'occupation d'une place
+
+    def retry_after(self) -> int:
+        """Secondes estimées avant qu'une place se libère pour une nouvelle requête."""
+        waves = (len(self._waiters) + 1) / self.max_concurrent
+        return max(1, math.ceil(self.hold_seconds_avg * waves))
+
+    def _reject(self, reason: str):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service saturé ({self.name} : {reason}), réessayer plus tard",
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    async def acquire(self):
+        """Prend une place ; lève HTTPException(503) si la cloison est saturée."""
+        if self.active < self.max_concurrent and not self._waiters:
+            self._admit(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_full += 1
+            self._reject("file d'attente pleine")
+
+        timeout = self.queue_timeout
+        left = request_context.remaining()
+        if left is not None:
+            timeout = max(0.0, min(timeout, left))
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        self.max_waiting = max(self.max_waiting, len(self._waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # La place a été transmise pendant l'abandon : la rendre
+                self.release(0.0)
+            else:
+                future.cancel()
+                self._waiters.remove(future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_timeout += 1
+            self._reject("attente trop longue")
+        # Place transmise par `release` (active déjà compté)
+        self.admitted += 1
+        self.wait_ms_total += (time.monotonic() - started) * 1000
+
+    def _admit(self, wait_ms: float):
+        self.active += 1
+        self.admitted += 1
+        self.max_active = max(self.max_active, self.active)
+        self.wait_ms_total += wait_ms
+
+    def release(self, held_seconds: float):
+        """Rend une place : transmise au premier en attente, sinon libérée."""
+        if held_seconds:
+            self.hold_seconds_avg = 0.2 * held_seconds + 0.8 * self.hold_seconds_avg
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "max_active": self.max_active,
+            "max_waiting": self.max_waiting,
+            "avg_wait_ms": round(self.wait_ms_total / self.admitted, 1) if self.admitted else 0.0,
+            "avg_hold_ms": round(self.hold_seconds_avg * 1000, 1)
+        }
+
+
+bulkheads: Dict[str, Bulkhead] = {
+    "catalog": Bulkhead("catalog", settings.BULKHEAD_CATALOG_CONCURRENCY, settings.BULKHEAD_CATALOG_QUEUE,
+                        settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS),
+    "writes": Bulkhead("writes", settings.BULKHEAD_WRITES_CONCURRENCY, settings.BULKHEAD_WRITES_QUEUE,
+                       settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS),
+    "analytics": Bulkhead("analytics", settings.BULKHEAD_ANALYTICS_CONCURRENCY, settings.BULKHEAD_ANALYTICS_QUEUE,
+                          settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS),
+    "ai": Bulkhead("ai", settings.BULKHEAD_AI_CONCURRENCY, settings.BULKHEAD_AI_QUEUE,
+                   settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS),
+}
+
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+_read_only_endpoints = set()
+
+
+def read_only(endpoint):
+    """
+    Décorateur (sous `@router.post`) d'un endpoint POST qui n'écrit rien
+    (comparaison, recherche avec corps) : il reste dans la cloison de
+    lecture de son routeur au lieu d'attendre une place parmi les écritures.
+    """
+    _read_only_endpoints.add(endpoint)
+    return endpoint
+
+
+def bulkhead(name: str, writes: Optional[str] = None):
+    """
+    Dépendance FastAPI plaçant un routeur dans une cloison
+    (ex. `dependencies=[Depends(bulkhead("catalog", writes="writes"))]`) ;
+    avec `writes`, les méthodes d'écriture vont dans cette autre cloison,
+    sauf pour les endpoints marqués `read_only`.
+    """
+    async def guard(request: Request):
+        if not settings.BULKHEAD_ENABLED:
+            yield
+            return
+        writing = request.method not in _READ_METHODS and request.scope.get("endpoint") not in _read_only_endpoints
+        target = bulkheads[writes if writes and writing else name]
+        await target.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            target.release(time.monotonic() - started)
+    return guard
+
+
+def thread_budget() -> int:
+    """Threads nécessaires pour que chaque cloison puisse être pleine en même temps."""
+    return sum(b.max_concurrent for b in bulkheads.values())
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "enabled": settings.BULKHEAD_ENABLED,
+        "bulkheads": {name: b.stats() for name, b in bulkheads.items()}
+    }
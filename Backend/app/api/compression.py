@@ -0,0 +1,201 @@
+# app/api/compression.py - Compression des réponses (gzip, brotli) selon leur taille
+
+import threading
+import zlib
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : gzip seul
+    brotli = None
+
+
+def _accepted(scope) -> Optional[str]:
+    """Encodage retenu d'après `Accept-Encoding` : br (si disponible), sinon gzip, sinon None."""
+    header = b""
+    for name, value in scope.get("headers", []):
+        if name == b"accept-encoding":
+            header = value
+            break
+    accepted = set()
+    for part in header.decode("latin-1").lower().split(","):
+        token, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compressible(headers) -> bool:
+    content_type = ""
+    for name, value in headers:
+        name = name.lower()
+        if name == b"content-encoding":
+            return False  # déjà encodée
+        if name == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return any(content_type.startswith(prefix) for prefix in settings.HTTP_COMPRESSION_CONTENT_TYPES)
+
+
+class _Encoder:
+    """Flux gzip ou brotli ; niveau rapide pour les gros corps et les flux (taille inconnue)."""
+
+    def __init__(self, encoding: str, large: bool):
+        self.encoding = encoding
+        if encoding == "br":
+            quality = settings.HTTP_BROTLI_QUALITY_LARGE if large else settings.HTTP_BROTLI_QUALITY
+            self._brotli = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+        else:
+            level = settings.HTTP_GZIP_LEVEL_LARGE if large else settings.HTTP_GZIP_LEVEL
+            self._gzip = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Morceau d'un flux : vidé aussitôt, le client le décode sans attendre la fin."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses: Dict[str, int] = {}
+        self.bytes_in: Dict[str, int] = {}
+        self.bytes_out: Dict[str, int] = {}
+        self.streamed = 0
+        self.small = 0
+        self.skipped_type = 0
+
+    def record(self, encoding: str, size_in: int, size_out: int):
+        with self._lock:
+            self.responses[encoding] = self.responses.get(encoding, 0) + 1
+            self.bytes_in[encoding] = self.bytes_in.get(encoding, 0) + size_in
+            self.bytes_out[encoding] = self.bytes_out.get(encoding, 0) + size_out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.HTTP_COMPRESSION_ENABLED,
+                "brotli_available": brotli is not None,
+                "min_size": settings.HTTP_COMPRESSION_MIN_SIZE,
+                "encodings": {
+                    encoding: {
+                        "responses": count,
+                        "bytes_in": self.bytes_in[encoding],
+                        "bytes_out": self.bytes_out[encoding],
+                        "ratio": round(self.bytes_out[encoding] / self.bytes_in[encoding], 3)
+                        if self.bytes_in[encoding] else None,
+                    }
+                    for encoding, count in self.responses.items()
+                },
+                "streamed": self.streamed,
+                "below_min_size": self.small,
+                "not_compressible": self.skipped_type,
+            }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """
+    Compresse les réponses dont le type figure dans
+    HTTP_COMPRESSION_CONTENT_TYPES, en brotli si le client l'accepte et
+    que le paquet est installé, sinon en gzip :
+    - sous HTTP_COMPRESSION_MIN_SIZE octets, la réponse part telle quelle
+      (en-têtes et CPU coûtent plus que le gain) ;
+    - jusqu'à HTTP_COMPRESSION_LARGE_SIZE, niveaux les plus denses
+      (HTTP_GZIP_LEVEL, HTTP_BROTLI_QUALITY), quelques millisecondes au plus ;
+    - au-delà, et pour les réponses en flux (listes sans LIMIT, taille
+      inconnue), niveaux rapides (…_LARGE) : la compression ne doit pas
+      coûter plus que les octets qu'elle économise. Chaque morceau d'un
+      flux est vidé aussitôt.
+
+    Placé sous CORS et au-dessus de ETagMiddleware (ETag faibles, valables
+    pour toutes les représentations ; les 304 n'ont pas de corps).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.HTTP_COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        encoder: Optional[_Encoder] = None
+        size_in = size_out = 0
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, size_in, size_out
+            if message["type"] == "http.response.start":
+                start = message  # différé : dépend du premier morceau du corps
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start is not None:
+                first, start = start, None
+                headers = list(first.get("headers", []))
+                if not _compressible(headers):
+                    compression_stats.skipped_type += 1
+                elif not more and len(body) < settings.HTTP_COMPRESSION_MIN_SIZE:
+                    compression_stats.small += 1
+                else:
+                    encoder = _Encoder(encoding, large=more or len(body) >= settings.HTTP_COMPRESSION_LARGE_SIZE)
+                    vary = [v for k, v in headers if k.lower() == b"vary"] + [b"Accept-Encoding"]
+                    headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"vary")]
+                    headers += [(b"content-encoding", encoding.encode("ascii")), (b"vary", b", ".join(vary))]
+                    size_in = len(body)
+                    if more:
+                        compression_stats.streamed += 1
+                        body = encoder.chunk(body)
+                    else:
+                        body = encoder.finish(body)
+                        headers.append((b"content-length", str(len(body)).encode("ascii")))
+                        compression_stats.record(encoding, size_in, len(body))
+                    size_out = len(body)
+                    first = {**first, "headers": headers}
+                    message = {**message, "body": body}
+                await send(first)
+                await send(message)
+                return
+
+            if encoder is not None:
+                size_in += len(body)
+                body = encoder.chunk(body) if more else encoder.finish(body)
+                size_out += len(body)
+                if not more:
+                    compression_stats.record(encoding, size_in, size_out)
+                message = {**message, "body": body}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def stats() -> Dict[str, Any]:
+    return compression_stats.stats()
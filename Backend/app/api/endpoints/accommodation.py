@@ -4,6 +4,11 @@ from pydantic import BaseModel
 from datetime import datetime
 from app.services.accommodation_recommender import AccommodationRecommender
 from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select
+from app.services.sparql_decoder import BindingDecoder, Column, XSD_BOOLEAN, XSD_DECIMAL, XSD_INTEGER
+from app.services.sparql_entity_update import EntityUpdate
+from app.services.sparql_templates import TemplateParamError
+from app.services import catalog_snapshot, catalog_columns
+from app.api.responses import fast_json
 
 router = APIRouter()
 
@@ -100,6 +105,13 @@ class AccommodationUpdateRequest(BaseModel):
     hasRestaurant: Optional[bool] = None
     roomService: Optional[bool] = None
 
+
+# Champs Pydantic -> propriétés eco: (les autres portent le nom de la propriété)
+ACCOMMODATION_UPDATE = EntityUpdate.from_model(
+    AccommodationUpdateRequest,
+    properties={"name": "accommodationName", "description": "accommodationDescription"}
+)
+
 # ============================================
 # HELPERS
 # ============================================
@@ -119,42 +131,90 @@ def _extract_value(val):
         return val['value']
     return val
 
-def _parse_accommodation(bind):
-    return {
-        "name": _extract_value(_safe_get(bind, 'accommodationName')),
-        "accommodationId": _extract_value(_safe_get(bind, 'accommodationId')),
-        "description": _extract_value(_safe_get(bind, 'accommodationDescription')),
-        "pricePerNight": float(_extract_value(_safe_get(bind, 'pricePerNight')) or 0) if _safe_get(bind, 'pricePerNight') else None,
-        "numberOfRooms": int(_extract_value(_safe_get(bind, 'numberOfRooms')) or 0) if _safe_get(bind, 'numberOfRooms') else None,
-        "maxGuests": int(_extract_value(_safe_get(bind, 'maxGuests')) or 0) if _safe_get(bind, 'maxGuests') else None,
-        "checkInTime": _extract_value(_safe_get(bind, 'checkInTime')),
-        "checkOutTime": _extract_value(_safe_get(bind, 'checkOutTime')),
-        "wifiAvailable": (_extract_value(_safe_get(bind, 'wifiAvailable')) == 'true') if _safe_get(bind, 'wifiAvailable') else None,
-        "parkingAvailable": (_extract_value(_safe_get(bind, 'parkingAvailable')) == 'true') if _safe_get(bind, 'parkingAvailable') else None,
-        "accommodationRating": float(_extract_value(_safe_get(bind, 'accommodationRating')) or 0) if _safe_get(bind, 'accommodationRating') else None,
-        "contactEmail": _extract_value(_safe_get(bind, 'contactEmail')),
-        "accommodationPhone": _extract_value(_safe_get(bind, 'accommodationPhone')),
-        "ecoCertified": (_extract_value(_safe_get(bind, 'ecoCertified')) == 'true') if _safe_get(bind, 'ecoCertified') else None,
-        "renewableEnergyPercent": float(_extract_value(_safe_get(bind, 'renewableEnergyPercent')) or 0) if _safe_get(bind, 'renewableEnergyPercent') else None,
-        "wasteRecyclingRate": float(_extract_value(_safe_get(bind, 'wasteRecyclingRate')) or 0) if _safe_get(bind, 'wasteRecyclingRate') else None,
-        "organicFoodOffered": (_extract_value(_safe_get(bind, 'organicFoodOffered')) == 'true') if _safe_get(bind, 'organicFoodOffered') else None,
-        "waterConservationSystem": (_extract_value(_safe_get(bind, 'waterConservationSystem')) == 'true') if _safe_get(bind, 'waterConservationSystem') else None,
-        "familyOwned": (_extract_value(_safe_get(bind, 'familyOwned')) == 'true') if _safe_get(bind, 'familyOwned') else None,
-        "traditionalArchitecture": (_extract_value(_safe_get(bind, 'traditionalArchitecture')) == 'true') if _safe_get(bind, 'traditionalArchitecture') else None,
-        "homeCookedMeals": (_extract_value(_safe_get(bind, 'homeCookedMeals')) == 'true') if _safe_get(bind, 'homeCookedMeals') else None,
-        "culturalExperiences": _extract_value(_safe_get(bind, 'culturalExperiences')),
-        "starRating": int(_extract_value(_safe_get(bind, 'starRating')) or 0) if _safe_get(bind, 'starRating') else None,
-        "hasSwimmingPool": (_extract_value(_safe_get(bind, 'hasSwimmingPool')) == 'true') if _safe_get(bind, 'hasSwimmingPool') else None,
-        "hasSpa": (_extract_value(_safe_get(bind, 'hasSpa')) == 'true') if _safe_get(bind, 'hasSpa') else None,
-        "hasRestaurant": (_extract_value(_safe_get(bind, 'hasRestaurant')) == 'true') if _safe_get(bind, 'hasRestaurant') else None,
-        "roomService": (_extract_value(_safe_get(bind, 'roomService')) == 'true') if _safe_get(bind, 'roomService') else None,
-        "uri": _extract_value(_safe_get(bind, 'accommodation'))
-    }
+# Schéma d'un binding SPARQL hébergement
+ACCOMMODATION_DECODER = BindingDecoder([
+    Column("name", var="accommodationName"),
+    Column("accommodationId"),
+    Column("description", var="accommodationDescription"),
+    Column("pricePerNight", XSD_DECIMAL),
+    Column("numberOfRooms", XSD_INTEGER),
+    Column("maxGuests", XSD_INTEGER),
+    Column("checkInTime"),
+    Column("checkOutTime"),
+    Column("wifiAvailable", XSD_BOOLEAN),
+    Column("parkingAvailable", XSD_BOOLEAN),
+    Column("accommodationRating", XSD_DECIMAL),
+    Column("contactEmail"),
+    Column("accommodationPhone"),
+    Column("ecoCertified", XSD_BOOLEAN),
+    Column("renewableEnergyPercent", XSD_DECIMAL),
+    Column("wasteRecyclingRate", XSD_DECIMAL),
+    Column("organicFoodOffered", XSD_BOOLEAN),
+    Column("waterConservationSystem", XSD_BOOLEAN),
+    Column("familyOwned", XSD_BOOLEAN),
+    Column("traditionalArchitecture", XSD_BOOLEAN),
+    Column("homeCookedMeals", XSD_BOOLEAN),
+    Column("culturalExperiences"),
+    Column("starRating", XSD_INTEGER),
+    Column("hasSwimmingPool", XSD_BOOLEAN),
+    Column("hasSpa", XSD_BOOLEAN),
+    Column("hasRestaurant", XSD_BOOLEAN),
+    Column("roomService", XSD_BOOLEAN),
+    Column("uri", var="accommodation")
+])
+_parse_accommodation = ACCOMMODATION_DECODER.row
 
 # ============================================
 # ENDPOINTS
 # ============================================
 
+def _search_query(type: Optional[str], limit: int) -> str:
+    """Liste des hébergements (tous, ou d'une classe eco:<type>), partagée avec le snapshot du catalogue"""
+    type_filter = f"a eco:{type} ;" if type else ""
+    return f"""
+    PREFIX eco: <http://www.ecotourism.org/ontology#>
+    SELECT ?accommodation ?accommodationId ?accommodationName ?accommodationDescription ?pricePerNight ?numberOfRooms 
+           ?maxGuests ?checkInTime ?checkOutTime ?wifiAvailable ?parkingAvailable ?accommodationRating 
+           ?contactEmail ?accommodationPhone ?ecoCertified ?renewableEnergyPercent ?wasteRecyclingRate 
+           ?organicFoodOffered ?waterConservationSystem ?familyOwned ?traditionalArchitecture ?homeCookedMeals 
+           ?culturalExperiences ?starRating ?hasSwimmingPool ?hasSpa ?hasRestaurant ?roomService
+    WHERE {{
+      ?accommodation {type_filter}
+                     eco:accommodationId ?accommodationId ;
+                     eco:accommodationName ?accommodationName .
+      OPTIONAL {{ ?accommodation eco:accommodationDescription ?accommodationDescription }}
+      OPTIONAL {{ ?accommodation eco:pricePerNight ?pricePerNight }}
+      OPTIONAL {{ ?accommodation eco:numberOfRooms ?numberOfRooms }}
+      OPTIONAL {{ ?accommodation eco:maxGuests ?maxGuests }}
+      OPTIONAL {{ ?accommodation eco:checkInTime ?checkInTime }}
+      OPTIONAL {{ ?accommodation eco:checkOutTime ?checkOutTime }}
+      OPTIONAL {{ ?accommodation eco:wifiAvailable ?wifiAvailable }}
+      OPTIONAL {{ ?accommodation eco:parkingAvailable ?parkingAvailable }}
+      OPTIONAL {{ ?accommodation eco:accommodationRating ?accommodationRating }}
+      OPTIONAL {{ ?accommodation eco:contactEmail ?contactEmail }}
+      OPTIONAL {{ ?accommodation eco:accommodationPhone ?accommodationPhone }}
+      OPTIONAL {{ ?accommodation eco:ecoCertified ?ecoCertified }}
+      OPTIONAL {{ ?accommodation eco:renewableEnergyPercent ?renewableEnergyPercent }}
+      OPTIONAL {{ ?accommodation eco:wasteRecyclingRate ?wasteRecyclingRate }}
+      OPTIONAL {{ ?accommodation eco:organicFoodOffered ?organicFoodOffered }}
+      OPTIONAL {{ ?accommodation eco:waterConservationSystem ?waterConservationSystem }}
+      OPTIONAL {{ ?accommodation eco:familyOwned ?familyOwned }}
+      OPTIONAL {{ ?accommodation eco:traditionalArchitecture ?traditionalArchitecture }}
+      OPTIONAL {{ ?accommodation eco:homeCookedMeals ?homeCookedMeals }}
+      OPTIONAL {{ ?accommodation eco:culturalExperiences ?culturalExperiences }}
+      OPTIONAL {{ ?accommodation eco:starRating ?starRating }}
+      OPTIONAL {{ ?accommodation eco:hasSwimmingPool ?hasSwimmingPool }}
+      OPTIONAL {{ ?accommodation eco:hasSpa ?hasSpa }}
+      OPTIONAL {{ ?accommodation eco:hasRestaurant ?hasRestaurant }}
+      OPTIONAL {{ ?accommodation eco:roomService ?roomService }}
+    }}
+    LIMIT {limit}
+    """
+
+
+catalog_snapshot.register("accommodations", lambda limit: _search_query(None, limit), subject="accommodation")
+
+
 # GET /accommodations  (filtre par type via query param)
 @router.get("/", summary="Rechercher des hébergements écotouristiques")
 def search_accommodations(
@@ -162,50 +222,14 @@ def search_accommodations(
     limit: int = Query(20, ge=1, le=100)
 ):
     try:
-        type_filter = f"a eco:{type} ;" if type else ""
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?accommodation ?accommodationId ?accommodationName ?accommodationDescription ?pricePerNight ?numberOfRooms 
-               ?maxGuests ?checkInTime ?checkOutTime ?wifiAvailable ?parkingAvailable ?accommodationRating 
-               ?contactEmail ?accommodationPhone ?ecoCertified ?renewableEnergyPercent ?wasteRecyclingRate 
-               ?organicFoodOffered ?waterConservationSystem ?familyOwned ?traditionalArchitecture ?homeCookedMeals 
-               ?culturalExperiences ?starRating ?hasSwimmingPool ?hasSpa ?hasRestaurant ?roomService
-        WHERE {{
-          ?accommodation {type_filter}
-                         eco:accommodationId ?accommodationId ;
-                         eco:accommodationName ?accommodationName .
-          OPTIONAL {{ ?accommodation eco:accommodationDescription ?accommodationDescription }}
-          OPTIONAL {{ ?accommodation eco:pricePerNight ?pricePerNight }}
-          OPTIONAL {{ ?accommodation eco:numberOfRooms ?numberOfRooms }}
-          OPTIONAL {{ ?accommodation eco:maxGuests ?maxGuests }}
-          OPTIONAL {{ ?accommodation eco:checkInTime ?checkInTime }}
-          OPTIONAL {{ ?accommodation eco:checkOutTime ?checkOutTime }}
-          OPTIONAL {{ ?accommodation eco:wifiAvailable ?wifiAvailable }}
-          OPTIONAL {{ ?accommodation eco:parkingAvailable ?parkingAvailable }}
-          OPTIONAL {{ ?accommodation eco:accommodationRating ?accommodationRating }}
-          OPTIONAL {{ ?accommodation eco:contactEmail ?contactEmail }}
-          OPTIONAL {{ ?accommodation eco:accommodationPhone ?accommodationPhone }}
-          OPTIONAL {{ ?accommodation eco:ecoCertified ?ecoCertified }}
-          OPTIONAL {{ ?accommodation eco:renewableEnergyPercent ?renewableEnergyPercent }}
-          OPTIONAL {{ ?accommodation eco:wasteRecyclingRate ?wasteRecyclingRate }}
-          OPTIONAL {{ ?accommodation eco:organicFoodOffered ?organicFoodOffered }}
-          OPTIONAL {{ ?accommodation eco:waterConservationSystem ?waterConservationSystem }}
-          OPTIONAL {{ ?accommodation eco:familyOwned ?familyOwned }}
-          OPTIONAL {{ ?accommodation eco:traditionalArchitecture ?traditionalArchitecture }}
-          OPTIONAL {{ ?accommodation eco:homeCookedMeals ?homeCookedMeals }}
-          OPTIONAL {{ ?accommodation eco:culturalExperiences ?culturalExperiences }}
-          OPTIONAL {{ ?accommodation eco:starRating ?starRating }}
-          OPTIONAL {{ ?accommodation eco:hasSwimmingPool ?hasSwimmingPool }}
-          OPTIONAL {{ ?accommodation eco:hasSpa ?hasSpa }}
-          OPTIONAL {{ ?accommodation eco:hasRestaurant ?hasRestaurant }}
-          OPTIONAL {{ ?accommodation eco:roomService ?roomService }}
-        }}
-        LIMIT {limit}
-        """
-        results = sparql_select(sparql)
+        snapshot_rows = catalog_snapshot.rows("accommodations", rdf_type=type, limit=limit)
+        if snapshot_rows is not None:
+            results = {"results": {"bindings": snapshot_rows}}
+        else:
+            results = sparql_select(_search_query(type, limit))
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         accommodations = [_parse_accommodation(b) for b in binds]
-        return {"status": "success", "count": len(accommodations), "accommodations": accommodations}
+        return fast_json({"status": "success", "count": len(accommodations), "accommodations": accommodations})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -479,6 +503,10 @@ def delete_accommodation(accommodation_id: str):
 # GET /accommodations/stats/top-rated
 @router.get("/stats/top-rated", summary="Top 10 hébergements les mieux notés")
 def get_top_rated():
+    sorted_rows = catalog_columns.answer("accommodations", lambda table: catalog_columns.ranking(
+        table, "accommodationRating", "rating", "accommodationName", descending=True))
+    if sorted_rows is not None:
+        return {"status": "success", "count": len(sorted_rows), "accommodations": sorted_rows, "ranking": "by_rating"}
     try:
         sparql = """
         PREFIX eco: <http://www.ecotourism.org/ontology#>
@@ -506,6 +534,10 @@ def get_top_rated():
 # GET /accommodations/stats/cheapest
 @router.get("/stats/cheapest", summary="Top 10 hébergements moins chers")
 def get_cheapest():
+    sorted_rows = catalog_columns.answer("accommodations", lambda table: catalog_columns.ranking(
+        table, "pricePerNight", "pricePerNight", "accommodationName"))
+    if sorted_rows is not None:
+        return {"status": "success", "count": len(sorted_rows), "accommodations": sorted_rows, "ranking": "by_price"}
     try:
         sparql = """
         PREFIX eco: <http://www.ecotourism.org/ontology#>
@@ -572,90 +604,12 @@ def update_accommodation(accommodation_id: str, updates: AccommodationUpdateRequ
         if not binds:
             raise HTTPException(status_code=404, detail=f"Accommodation '{accommodation_id}' not found")
 
-        # 2) Préparer les mises à jour
-        def esc(val: str) -> str:
-            return val.replace('\\', r'\\').replace('"', r'\\"') if isinstance(val, str) else val
-
-        updates_dict = updates.model_dump(exclude_none=True)
+        # 2) Une seule requête DELETE/INSERT pour tous les champs fournis
+        updates_dict = ACCOMMODATION_UPDATE.changes(updates)
         if not updates_dict:
             return {"status": "noop", "message": "No fields provided for update", "accommodationId": accommodation_id}
 
-        # mapping des champs Pydantic -> propriétés eco:
-        prop_map = {
-            "name": "accommodationName",
-            "description": "accommodationDescription",
-            "pricePerNight": "pricePerNight",
-            "numberOfRooms": "numberOfRooms",
-            "maxGuests": "maxGuests",
-            "checkInTime": "checkInTime",
-            "checkOutTime": "checkOutTime",
-            "wifiAvailable": "wifiAvailable",
-            "parkingAvailable": "parkingAvailable",
-            "accommodationRating": "accommodationRating",
-            "contactEmail": "contactEmail",
-            "accommodationPhone": "accommodationPhone",
-            "ecoCertified": "ecoCertified",
-            "renewableEnergyPercent": "renewableEnergyPercent",
-            "wasteRecyclingRate": "wasteRecyclingRate",
-            "organicFoodOffered": "organicFoodOffered",
-            "waterConservationSystem": "waterConservationSystem",
-            "familyOwned": "familyOwned",
-            "traditionalArchitecture": "traditionalArchitecture",
-            "homeCookedMeals": "homeCookedMeals",
-            "culturalExperiences": "culturalExperiences",
-            "starRating": "starRating",
-            "hasSwimmingPool": "hasSwimmingPool",
-            "hasSpa": "hasSpa",
-            "hasRestaurant": "hasRestaurant",
-            "roomService": "roomService"
-        }
-        bool_fields = {"wifiAvailable", "parkingAvailable", "ecoCertified", "organicFoodOffered", "waterConservationSystem", "familyOwned", "traditionalArchitecture", "homeCookedMeals", "hasSwimmingPool", "hasSpa", "hasRestaurant", "roomService"}
-        float_fields = {"pricePerNight", "accommodationRating", "renewableEnergyPercent", "wasteRecyclingRate"}
-        int_fields = {"numberOfRooms", "maxGuests", "starRating"}
-
-        deletes = []
-        inserts = []
-        optionals = []
-        for field, value in updates_dict.items():
-            eco_prop = prop_map.get(field)
-            if not eco_prop:
-                continue
-            var_old = f"?old_{eco_prop}"
-            deletes.append(f"?accommodation eco:{eco_prop} {var_old} .")
-
-            # Build insertion with appropriate datatype
-            if field in bool_fields:
-                bool_value = "true" if bool(value) else "false"
-                inserts.append(f"?accommodation eco:{eco_prop} \"{bool_value}\"^^xsd:boolean .")
-            elif field in float_fields:
-                inserts.append(f"?accommodation eco:{eco_prop} \"{value}\"^^xsd:float .")
-            elif field in int_fields:
-                inserts.append(f"?accommodation eco:{eco_prop} \"{value}\"^^xsd:integer .")
-            else:
-                inserts.append(f"?accommodation eco:{eco_prop} \"{esc(value)}\" .")
-
-            optionals.append(f"OPTIONAL {{ ?accommodation eco:{eco_prop} {var_old} . }}")
-
-        # 3) Construire la requête SPARQL UPDATE
-        delete_str = "\n          ".join(deletes) if deletes else ""
-        insert_str = "\n          ".join(inserts) if inserts else ""
-        optional_str = "\n          ".join(optionals) if optionals else ""
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        DELETE {{
-          {delete_str}
-        }}
-        INSERT {{
-          {insert_str}
-        }}
-        WHERE {{
-          ?accommodation eco:accommodationId \"{accommodation_id}\" .
-          {optional_str}
-        }}
-        """
-        result = sparql_update(sparql)
+        result = sparql_update(ACCOMMODATION_UPDATE.build(updates_dict, key=("accommodationId", accommodation_id)))
         return {
             "status": "success",
             "message": "Accommodation updated",
@@ -665,6 +619,8 @@ def update_accommodation(accommodation_id: str, updates: AccommodationUpdateRequ
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
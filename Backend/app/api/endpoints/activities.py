@@ -5,7 +5,14 @@ from datetime import datetime
 import re
 from app.services.advanced_recommender import EnhancedEcoRecommender
 from app.services.activity_comparateur import ActivityComparator
-from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select
+from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select, select_template, select_two_phase
+from app.services.sparql_templates import register, Param, TemplateParamError, IRI, STRING, INTEGER
+from app.services.sparql_decoder import BindingDecoder, Column, XSD_BOOLEAN, XSD_DECIMAL, XSD_INTEGER
+from app.services.sparql_entity_update import EntityUpdate
+from app.services import catalog_snapshot, catalog_columns
+from app.api.responses import fast_json
+from app.api.bulkhead import read_only
+from app.config import settings
 
 router = APIRouter()
 
@@ -109,6 +116,9 @@ class ActivityUpdateRequest(BaseModel):
     binocularsProvided: Optional[bool] = None
 
 
+ACTIVITY_UPDATE = EntityUpdate.from_model(ActivityUpdateRequest)
+
+
 class ActivityComparisonResponse(BaseModel):
     name: str
     uri: str
@@ -144,46 +154,35 @@ def _extract_value(val):
     return val
 
 
-def _parse_activity(bind):
-    """Parse un binding SPARQL en activité complète"""
-    return {
-        "activityId": _extract_value(_safe_get(bind, 'activityId')),
-        "activityName": _extract_value(_safe_get(bind, 'activityName')),
-        "activityDescription": _extract_value(_safe_get(bind, 'activityDescription')),
-        "durationHours": int(_extract_value(_safe_get(bind, 'durationHours')) or 0) if _safe_get(bind,
-                                                                                                 'durationHours') else None,
-        "pricePerPerson": float(_extract_value(_safe_get(bind, 'pricePerPerson')) or 0) if _safe_get(bind,
-                                                                                                     'pricePerPerson') else None,
-        "difficultyLevel": _extract_value(_safe_get(bind, 'difficultyLevel')),
-        "maxParticipants": int(_extract_value(_safe_get(bind, 'maxParticipants')) or 0) if _safe_get(bind,
-                                                                                                     'maxParticipants') else None,
-        "minAge": int(_extract_value(_safe_get(bind, 'minAge')) or 0) if _safe_get(bind, 'minAge') else None,
-        "activityRating": float(_extract_value(_safe_get(bind, 'activityRating')) or 0) if _safe_get(bind,
-                                                                                                     'activityRating') else None,
-        "schedule": _extract_value(_safe_get(bind, 'schedule')),
-        "activityLanguages": _extract_value(_safe_get(bind, 'activityLanguages')),
-        "activityType": _extract_value(_safe_get(bind, 'activityType', 'Unknown')),
-        # Adventure fields
-        "riskLevel": int(_extract_value(_safe_get(bind, 'riskLevel')) or 0) if _safe_get(bind, 'riskLevel') else None,
-        "requiredEquipment": _extract_value(_safe_get(bind, 'requiredEquipment')),
-        "physicalFitnessRequired": _extract_value(_safe_get(bind, 'physicalFitnessRequired')),
-        "safetyBriefingRequired": (_extract_value(_safe_get(bind, 'safetyBriefingRequired')) == 'true') if _safe_get(
-            bind, 'safetyBriefingRequired') else None,
-        # Cultural fields
-        "culturalTheme": _extract_value(_safe_get(bind, 'culturalTheme')),
-        "historicalPeriod": _extract_value(_safe_get(bind, 'historicalPeriod')),
-        "audioGuideAvailable": (_extract_value(_safe_get(bind, 'audioGuideAvailable')) == 'true') if _safe_get(bind,
-                                                                                                               'audioGuideAvailable') else None,
-        "photographyAllowed": (_extract_value(_safe_get(bind, 'photographyAllowed')) == 'true') if _safe_get(bind,
-                                                                                                             'photographyAllowed') else None,
-        # Nature fields
-        "ecosystemType": _extract_value(_safe_get(bind, 'ecosystemType')),
-        "wildlifeSpotting": _extract_value(_safe_get(bind, 'wildlifeSpotting')),
-        "bestTimeToVisit": _extract_value(_safe_get(bind, 'bestTimeToVisit')),
-        "binocularsProvided": (_extract_value(_safe_get(bind, 'binocularsProvided')) == 'true') if _safe_get(bind,
-                                                                                                             'binocularsProvided') else None,
-        "uri": _extract_value(_safe_get(bind, 'activity'))
-    }
+# Schéma d'un binding SPARQL activité (champs communs + Adventure / Cultural / Nature)
+ACTIVITY_DECODER = BindingDecoder([
+    Column("activityId"),
+    Column("activityName"),
+    Column("activityDescription"),
+    Column("durationHours", XSD_INTEGER),
+    Column("pricePerPerson", XSD_DECIMAL),
+    Column("difficultyLevel"),
+    Column("maxParticipants", XSD_INTEGER),
+    Column("minAge", XSD_INTEGER),
+    Column("activityRating", XSD_DECIMAL),
+    Column("schedule"),
+    Column("activityLanguages"),
+    Column("activityType", default="Unknown"),
+    Column("riskLevel", XSD_INTEGER),
+    Column("requiredEquipment"),
+    Column("physicalFitnessRequired"),
+    Column("safetyBriefingRequired", XSD_BOOLEAN),
+    Column("culturalTheme"),
+    Column("historicalPeriod"),
+    Column("audioGuideAvailable", XSD_BOOLEAN),
+    Column("photographyAllowed", XSD_BOOLEAN),
+    Column("ecosystemType"),
+    Column("wildlifeSpotting"),
+    Column("bestTimeToVisit"),
+    Column("binocularsProvided", XSD_BOOLEAN),
+    Column("uri", var="activity")
+])
+_parse_activity = ACTIVITY_DECODER.row
 
 
 def calculate_eco_score(price: float, difficulty: str, duration: int, rating: float) -> float:
@@ -214,6 +213,177 @@ def calculate_eco_score(price: float, difficulty: str, duration: int, rating: fl
     return round(total, 1)
 
 
+# ============================================
+# REQUÊTES PRÉPARÉES
+# ============================================
+
+ACTIVITY_TYPES = ["AdventureActivity", "CulturalActivity", "NatureActivity"]
+
+# Le bloc VALUES lie ?activityType à la classe trouvée (remplace l'UNION par type)
+ACTIVITY_SEARCH = register("activities.search", """
+SELECT DISTINCT ?activity ?activityId ?activityName ?activityDescription ?durationHours ?pricePerPerson
+       ?difficultyLevel ?maxParticipants ?minAge ?activityRating ?schedule ?activityLanguages
+       ?riskLevel ?requiredEquipment ?physicalFitnessRequired ?safetyBriefingRequired
+       ?culturalTheme ?historicalPeriod ?audioGuideAvailable ?photographyAllowed
+       ?ecosystemType ?wildlifeSpotting ?bestTimeToVisit ?binocularsProvided ?activityType
+WHERE {
+  VALUES ?activityType { ${activity_types} }
+  ?activity a ?activityType ;
+            eco:activityId ?activityId ;
+            eco:activityName ?activityName .
+  OPTIONAL { ?activity eco:activityDescription ?activityDescription }
+  OPTIONAL { ?activity eco:durationHours ?durationHours }
+  OPTIONAL { ?activity eco:pricePerPerson ?pricePerPerson }
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+  OPTIONAL { ?activity eco:maxParticipants ?maxParticipants }
+  OPTIONAL { ?activity eco:minAge ?minAge }
+  OPTIONAL { ?activity eco:activityRating ?activityRating }
+  OPTIONAL { ?activity eco:schedule ?schedule }
+  OPTIONAL { ?activity eco:activityLanguages ?activityLanguages }
+  OPTIONAL { ?activity eco:riskLevel ?riskLevel }
+  OPTIONAL { ?activity eco:requiredEquipment ?requiredEquipment }
+  OPTIONAL { ?activity eco:physicalFitnessRequired ?physicalFitnessRequired }
+  OPTIONAL { ?activity eco:safetyBriefingRequired ?safetyBriefingRequired }
+  OPTIONAL { ?activity eco:culturalTheme ?culturalTheme }
+  OPTIONAL { ?activity eco:historicalPeriod ?historicalPeriod }
+  OPTIONAL { ?activity eco:audioGuideAvailable ?audioGuideAvailable }
+  OPTIONAL { ?activity eco:photographyAllowed ?photographyAllowed }
+  OPTIONAL { ?activity eco:ecosystemType ?ecosystemType }
+  OPTIONAL { ?activity eco:wildlifeSpotting ?wildlifeSpotting }
+  OPTIONAL { ?activity eco:bestTimeToVisit ?bestTimeToVisit }
+  OPTIONAL { ?activity eco:binocularsProvided ?binocularsProvided }
+}
+LIMIT ${limit}
+""", activity_types=Param(IRI, values=True), limit=Param(INTEGER))
+
+# Recherche en deux temps (select_two_phase) : page des activités puis propriétés de la page.
+# Dans le détail, la partie obligatoire forme un sous-groupe à un seul VALUES : les
+# sujets de la page y sont liés avant les OPTIONAL (jointure par substitution).
+ACTIVITY_SEARCH_PAGE = register("activities.search.page", """
+SELECT DISTINCT ?activity
+WHERE {
+  VALUES ?activityType { ${activity_types} }
+  ?activity a ?activityType ;
+            eco:activityId ?activityId ;
+            eco:activityName ?activityName .
+}
+LIMIT ${limit}
+""", activity_types=Param(IRI, values=True), limit=Param(INTEGER))
+
+ACTIVITY_SEARCH_DETAIL = register("activities.search.detail", """
+SELECT DISTINCT ?activity ?activityId ?activityName ?activityDescription ?durationHours ?pricePerPerson
+       ?difficultyLevel ?maxParticipants ?minAge ?activityRating ?schedule ?activityLanguages
+       ?riskLevel ?requiredEquipment ?physicalFitnessRequired ?safetyBriefingRequired
+       ?culturalTheme ?historicalPeriod ?audioGuideAvailable ?photographyAllowed
+       ?ecosystemType ?wildlifeSpotting ?bestTimeToVisit ?binocularsProvided ?activityType
+WHERE {
+  {
+    VALUES ?activity { ${subjects} }
+    ?activity a ?activityType ;
+              eco:activityId ?activityId ;
+              eco:activityName ?activityName .
+    FILTER(?activityType IN (${activity_types}))
+  }
+  OPTIONAL { ?activity eco:activityDescription ?activityDescription }
+  OPTIONAL { ?activity eco:durationHours ?durationHours }
+  OPTIONAL { ?activity eco:pricePerPerson ?pricePerPerson }
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+  OPTIONAL { ?activity eco:maxParticipants ?maxParticipants }
+  OPTIONAL { ?activity eco:minAge ?minAge }
+  OPTIONAL { ?activity eco:activityRating ?activityRating }
+  OPTIONAL { ?activity eco:schedule ?schedule }
+  OPTIONAL { ?activity eco:activityLanguages ?activityLanguages }
+  OPTIONAL { ?activity eco:riskLevel ?riskLevel }
+  OPTIONAL { ?activity eco:requiredEquipment ?requiredEquipment }
+  OPTIONAL { ?activity eco:physicalFitnessRequired ?physicalFitnessRequired }
+  OPTIONAL { ?activity eco:safetyBriefingRequired ?safetyBriefingRequired }
+  OPTIONAL { ?activity eco:culturalTheme ?culturalTheme }
+  OPTIONAL { ?activity eco:historicalPeriod ?historicalPeriod }
+  OPTIONAL { ?activity eco:audioGuideAvailable ?audioGuideAvailable }
+  OPTIONAL { ?activity eco:photographyAllowed ?photographyAllowed }
+  OPTIONAL { ?activity eco:ecosystemType ?ecosystemType }
+  OPTIONAL { ?activity eco:wildlifeSpotting ?wildlifeSpotting }
+  OPTIONAL { ?activity eco:bestTimeToVisit ?bestTimeToVisit }
+  OPTIONAL { ?activity eco:binocularsProvided ?binocularsProvided }
+}
+""", subjects=Param(IRI, values=True), activity_types=Param(IRI, values=True, separator=", "))
+
+# Snapshot partagé du catalogue : toutes les activités des trois familles
+catalog_snapshot.register(
+    "activities", lambda limit: ACTIVITY_SEARCH.render(activity_types=ACTIVITY_TYPES, limit=limit), subject="activity"
+)
+
+ACTIVITY_EXISTS = register("activities.exists", """
+SELECT ?activity
+WHERE {
+  ?activity eco:activityId ${activity_id} .
+}
+LIMIT 1
+""", activity_id=Param(STRING))
+
+ACTIVITY_DETAIL = register("activities.detail", """
+SELECT ?activity ?activityId ?activityName ?activityDescription ?durationHours ?pricePerPerson
+       ?difficultyLevel ?maxParticipants ?minAge ?activityRating ?schedule ?activityLanguages
+       ?riskLevel ?requiredEquipment ?physicalFitnessRequired ?safetyBriefingRequired
+       ?culturalTheme ?historicalPeriod ?audioGuideAvailable ?photographyAllowed
+       ?ecosystemType ?wildlifeSpotting ?bestTimeToVisit ?binocularsProvided ?activityType
+WHERE {
+  ?activity eco:activityId ${activity_id} ;
+            eco:activityName ?activityName .
+  BIND(${activity_id} AS ?activityId)
+  OPTIONAL { ?activity a ?activityType }
+  OPTIONAL { ?activity eco:activityDescription ?activityDescription }
+  OPTIONAL { ?activity eco:durationHours ?durationHours }
+  OPTIONAL { ?activity eco:pricePerPerson ?pricePerPerson }
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+  OPTIONAL { ?activity eco:maxParticipants ?maxParticipants }
+  OPTIONAL { ?activity eco:minAge ?minAge }
+  OPTIONAL { ?activity eco:activityRating ?activityRating }
+  OPTIONAL { ?activity eco:schedule ?schedule }
+  OPTIONAL { ?activity eco:activityLanguages ?activityLanguages }
+  OPTIONAL { ?activity eco:riskLevel ?riskLevel }
+  OPTIONAL { ?activity eco:requiredEquipment ?requiredEquipment }
+  OPTIONAL { ?activity eco:physicalFitnessRequired ?physicalFitnessRequired }
+  OPTIONAL { ?activity eco:safetyBriefingRequired ?safetyBriefingRequired }
+  OPTIONAL { ?activity eco:culturalTheme ?culturalTheme }
+  OPTIONAL { ?activity eco:historicalPeriod ?historicalPeriod }
+  OPTIONAL { ?activity eco:audioGuideAvailable ?audioGuideAvailable }
+  OPTIONAL { ?activity eco:photographyAllowed ?photographyAllowed }
+  OPTIONAL { ?activity eco:ecosystemType ?ecosystemType }
+  OPTIONAL { ?activity eco:wildlifeSpotting ?wildlifeSpotting }
+  OPTIONAL { ?activity eco:bestTimeToVisit ?bestTimeToVisit }
+  OPTIONAL { ?activity eco:binocularsProvided ?binocularsProvided }
+}
+""", activity_id=Param(STRING))
+
+ACTIVITY_COMPARE = register("activities.compare", """
+SELECT ?activity ?activityId ?activityName ?pricePerPerson ?activityRating
+       ?difficultyLevel ?durationHours ?maxParticipants
+WHERE {
+  VALUES ?activityId { ${activity_ids} }
+  ?activity eco:activityId ?activityId ;
+            eco:activityName ?activityName .
+  OPTIONAL { ?activity eco:pricePerPerson ?pricePerPerson }
+  OPTIONAL { ?activity eco:activityRating ?activityRating }
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+  OPTIONAL { ?activity eco:durationHours ?durationHours }
+  OPTIONAL { ?activity eco:maxParticipants ?maxParticipants }
+}
+""", activity_ids=Param(STRING, values=True))
+
+ACTIVITY_BY_NAME = register("activities.by_name", """
+SELECT ?activity ?activityId ?activityName ?pricePerPerson ?activityRating ?difficultyLevel
+WHERE {
+  ?activity eco:activityName ?activityName .
+  FILTER(CONTAINS(LCASE(?activityName), LCASE(${name})))
+  OPTIONAL { ?activity eco:activityId ?activityId }
+  OPTIONAL { ?activity eco:pricePerPerson ?pricePerPerson }
+  OPTIONAL { ?activity eco:activityRating ?activityRating }
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+}
+""", name=Param(STRING))
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
@@ -226,69 +396,29 @@ def search_activities(
         limit: int = Query(20, ge=1, le=100)
 ):
     try:
-        # Construction du filtre de type
-        if type:
-            type_filter = f"?activity a eco:{type} ."
-            type_select = f"BIND(eco:{type} AS ?activityType)"
+        activity_types = [type] if type else ACTIVITY_TYPES
+        snapshot_rows = None
+        if type in (None, *ACTIVITY_TYPES):
+            # Dans le snapshot, ?activityType est lié à l'une des trois familles
+            snapshot_rows = catalog_snapshot.rows(
+                "activities", where=lambda b: not type or b["activityType"]["value"].endswith("#" + type), limit=limit
+            )
+        if snapshot_rows is not None:
+            results = {"results": {"bindings": snapshot_rows}}
+        elif settings.SPARQL_TWO_PHASE_ENABLED:
+            results = select_two_phase(
+                ACTIVITY_SEARCH_PAGE, ACTIVITY_SEARCH_DETAIL, "activity",
+                page_params={"activity_types": activity_types, "limit": limit},
+                detail_params={"activity_types": activity_types}
+            )
         else:
-            type_filter = """
-            {
-                ?activity a eco:AdventureActivity .
-                BIND(eco:AdventureActivity AS ?activityType)
-            } UNION {
-                ?activity a eco:CulturalActivity .
-                BIND(eco:CulturalActivity AS ?activityType)
-            } UNION {
-                ?activity a eco:NatureActivity .
-                BIND(eco:NatureActivity AS ?activityType)
-            }
-            """
-            type_select = ""
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-        SELECT DISTINCT ?activity ?activityId ?activityName ?activityDescription ?durationHours ?pricePerPerson
-               ?difficultyLevel ?maxParticipants ?minAge ?activityRating ?schedule ?activityLanguages
-               ?riskLevel ?requiredEquipment ?physicalFitnessRequired ?safetyBriefingRequired
-               ?culturalTheme ?historicalPeriod ?audioGuideAvailable ?photographyAllowed
-               ?ecosystemType ?wildlifeSpotting ?bestTimeToVisit ?binocularsProvided ?activityType
-        WHERE {{
-            {type_filter}
-            ?activity eco:activityId ?activityId ;
-                      eco:activityName ?activityName .
-            {type_select}
-            OPTIONAL {{ ?activity eco:activityDescription ?activityDescription }}
-            OPTIONAL {{ ?activity eco:durationHours ?durationHours }}
-            OPTIONAL {{ ?activity eco:pricePerPerson ?pricePerPerson }}
-            OPTIONAL {{ ?activity eco:difficultyLevel ?difficultyLevel }}
-            OPTIONAL {{ ?activity eco:maxParticipants ?maxParticipants }}
-            OPTIONAL {{ ?activity eco:minAge ?minAge }}
-            OPTIONAL {{ ?activity eco:activityRating ?activityRating }}
-            OPTIONAL {{ ?activity eco:schedule ?schedule }}
-            OPTIONAL {{ ?activity eco:activityLanguages ?activityLanguages }}
-            OPTIONAL {{ ?activity eco:riskLevel ?riskLevel }}
-            OPTIONAL {{ ?activity eco:requiredEquipment ?requiredEquipment }}
-            OPTIONAL {{ ?activity eco:physicalFitnessRequired ?physicalFitnessRequired }}
-            OPTIONAL {{ ?activity eco:safetyBriefingRequired ?safetyBriefingRequired }}
-            OPTIONAL {{ ?activity eco:culturalTheme ?culturalTheme }}
-            OPTIONAL {{ ?activity eco:historicalPeriod ?historicalPeriod }}
-            OPTIONAL {{ ?activity eco:audioGuideAvailable ?audioGuideAvailable }}
-            OPTIONAL {{ ?activity eco:photographyAllowed ?photographyAllowed }}
-            OPTIONAL {{ ?activity eco:ecosystemType ?ecosystemType }}
-            OPTIONAL {{ ?activity eco:wildlifeSpotting ?wildlifeSpotting }}
-            OPTIONAL {{ ?activity eco:bestTimeToVisit ?bestTimeToVisit }}
-            OPTIONAL {{ ?activity eco:binocularsProvided ?binocularsProvided }}
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+            results = select_template(ACTIVITY_SEARCH, activity_types=activity_types, limit=limit)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         activities = [_parse_activity(b) for b in binds]
 
-        return {"status": "success", "count": len(activities), "activities": activities}
+        return fast_json({"status": "success", "count": len(activities), "activities": activities})
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -298,59 +428,14 @@ def search_activities(
 def get_activity_by_id(activity_id: str):
     try:
         # Vérifier si l'activité existe
-        check_sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?activity
-        WHERE {{
-            ?activity eco:activityId "{activity_id}" .
-        }}
-        LIMIT 1
-        """
-
-        check_result = sparql_select(check_sparql)
+        check_result = select_template(ACTIVITY_EXISTS, activity_id=activity_id)
         binds = check_result.get('results', {}).get('bindings', []) if isinstance(check_result, dict) else []
 
         if not binds:
             raise HTTPException(status_code=404, detail=f"Activity with ID '{activity_id}' not found")
 
         # Récupérer tous les détails
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?activity ?activityId ?activityName ?activityDescription ?durationHours ?pricePerPerson
-               ?difficultyLevel ?maxParticipants ?minAge ?activityRating ?schedule ?activityLanguages
-               ?riskLevel ?requiredEquipment ?physicalFitnessRequired ?safetyBriefingRequired
-               ?culturalTheme ?historicalPeriod ?audioGuideAvailable ?photographyAllowed
-               ?ecosystemType ?wildlifeSpotting ?bestTimeToVisit ?binocularsProvided ?activityType
-        WHERE {{
-            ?activity eco:activityId "{activity_id}" ;
-                      eco:activityName ?activityName .
-            BIND("{activity_id}" AS ?activityId)
-            OPTIONAL {{ ?activity a ?activityType }}
-            OPTIONAL {{ ?activity eco:activityDescription ?activityDescription }}
-            OPTIONAL {{ ?activity eco:durationHours ?durationHours }}
-            OPTIONAL {{ ?activity eco:pricePerPerson ?pricePerPerson }}
-            OPTIONAL {{ ?activity eco:difficultyLevel ?difficultyLevel }}
-            OPTIONAL {{ ?activity eco:maxParticipants ?maxParticipants }}
-            OPTIONAL {{ ?activity eco:minAge ?minAge }}
-            OPTIONAL {{ ?activity eco:activityRating ?activityRating }}
-            OPTIONAL {{ ?activity eco:schedule ?schedule }}
-            OPTIONAL {{ ?activity eco:activityLanguages ?activityLanguages }}
-            OPTIONAL {{ ?activity eco:riskLevel ?riskLevel }}
-            OPTIONAL {{ ?activity eco:requiredEquipment ?requiredEquipment }}
-            OPTIONAL {{ ?activity eco:physicalFitnessRequired ?physicalFitnessRequired }}
-            OPTIONAL {{ ?activity eco:safetyBriefingRequired ?safetyBriefingRequired }}
-            OPTIONAL {{ ?activity eco:culturalTheme ?culturalTheme }}
-            OPTIONAL {{ ?activity eco:historicalPeriod ?historicalPeriod }}
-            OPTIONAL {{ ?activity eco:audioGuideAvailable ?audioGuideAvailable }}
-            OPTIONAL {{ ?activity eco:photographyAllowed ?photographyAllowed }}
-            OPTIONAL {{ ?activity eco:ecosystemType ?ecosystemType }}
-            OPTIONAL {{ ?activity eco:wildlifeSpotting ?wildlifeSpotting }}
-            OPTIONAL {{ ?activity eco:bestTimeToVisit ?bestTimeToVisit }}
-            OPTIONAL {{ ?activity eco:binocularsProvided ?binocularsProvided }}
-        }}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(ACTIVITY_DETAIL, activity_id=activity_id)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         if not binds:
@@ -465,6 +550,7 @@ def create_activity(data: ActivityCreateRequest):
 
 # POST /activities/compare
 @router.post("/compare", summary="Comparer deux activités")
+@read_only
 def compare_activities(activity_id1: str = Body(...), activity_id2: str = Body(...)):
     """
     Compare deux activités selon plusieurs critères :
@@ -475,23 +561,7 @@ def compare_activities(activity_id1: str = Body(...), activity_id2: str = Body(.
     - Capacité
     """
     try:
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?activity ?activityId ?activityName ?pricePerPerson ?activityRating
-               ?difficultyLevel ?durationHours ?maxParticipants
-        WHERE {{
-            VALUES ?activityId {{ "{activity_id1}" "{activity_id2}" }}
-            ?activity eco:activityId ?activityId ;
-                      eco:activityName ?activityName .
-            OPTIONAL {{ ?activity eco:pricePerPerson ?pricePerPerson }}
-            OPTIONAL {{ ?activity eco:activityRating ?activityRating }}
-            OPTIONAL {{ ?activity eco:difficultyLevel ?difficultyLevel }}
-            OPTIONAL {{ ?activity eco:durationHours ?durationHours }}
-            OPTIONAL {{ ?activity eco:maxParticipants ?maxParticipants }}
-        }}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(ACTIVITY_COMPARE, activity_ids=[activity_id1, activity_id2])
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         # Vérifier qu'on a bien 2 activités
@@ -637,81 +707,12 @@ def update_activity(activity_id: str, update_data: ActivityUpdateRequest):
         if not binds:
             raise HTTPException(status_code=404, detail=f"Activity '{activity_id}' not found")
 
-        activity_uri = _extract_value(_safe_get(binds[0], 'activity'))
-
-        # Construire les clauses DELETE et INSERT
-        delete_clauses = []
-        insert_clauses = []
-
-        def add_update(prop, val, is_bool=False, is_float=False, is_int=False):
-            if val is not None:
-                delete_clauses.append(f"?activity eco:{prop} ?old{prop} .")
-
-                if is_bool:
-                    insert_clauses.append(
-                        f'?activity eco:{prop} "{str(val).lower()}"^^<http://www.w3.org/2001/XMLSchema#boolean> .')
-                elif is_float:
-                    insert_clauses.append(f'?activity eco:{prop} "{val}"^^<http://www.w3.org/2001/XMLSchema#float> .')
-                elif is_int:
-                    insert_clauses.append(f'?activity eco:{prop} "{val}"^^<http://www.w3.org/2001/XMLSchema#integer> .')
-                elif isinstance(val, str):
-                    insert_clauses.append(f'?activity eco:{prop} "{val}" .')
-
-        # Ajouter toutes les modifications possibles
-        add_update("activityName", update_data.activityName)
-        add_update("activityDescription", update_data.activityDescription)
-        add_update("durationHours", update_data.durationHours, is_int=True)
-        add_update("pricePerPerson", update_data.pricePerPerson, is_float=True)
-        add_update("difficultyLevel", update_data.difficultyLevel)
-        add_update("maxParticipants", update_data.maxParticipants, is_int=True)
-        add_update("minAge", update_data.minAge, is_int=True)
-        add_update("activityRating", update_data.activityRating, is_float=True)
-        add_update("schedule", update_data.schedule)
-        add_update("activityLanguages", update_data.activityLanguages)
-        add_update("riskLevel", update_data.riskLevel, is_int=True)
-        add_update("requiredEquipment", update_data.requiredEquipment)
-        add_update("physicalFitnessRequired", update_data.physicalFitnessRequired)
-        add_update("safetyBriefingRequired", update_data.safetyBriefingRequired, is_bool=True)
-        add_update("culturalTheme", update_data.culturalTheme)
-        add_update("historicalPeriod", update_data.historicalPeriod)
-        add_update("audioGuideAvailable", update_data.audioGuideAvailable, is_bool=True)
-        add_update("photographyAllowed", update_data.photographyAllowed, is_bool=True)
-        add_update("ecosystemType", update_data.ecosystemType)
-        add_update("wildlifeSpotting", update_data.wildlifeSpotting)
-        add_update("bestTimeToVisit", update_data.bestTimeToVisit)
-        add_update("binocularsProvided", update_data.binocularsProvided, is_bool=True)
-
-        if not delete_clauses:
+        # Tous les champs modifiés en une seule requête (une transaction)
+        updated_fields = ACTIVITY_UPDATE.changes(update_data)
+        if not updated_fields:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        delete_str = "\n        ".join(delete_clauses)
-        insert_str = "\n        ".join(insert_clauses)
-
-        # Construire les clauses OPTIONAL pour le WHERE
-        optional_clauses = []
-        for clause in delete_clauses:
-            optional_clauses.append(f"OPTIONAL {{ {clause} }}")
-        optional_str = "\n        ".join(optional_clauses)
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-
-        DELETE {{
-            {delete_str}
-        }}
-        INSERT {{
-            {insert_str}
-        }}
-        WHERE {{
-            ?activity eco:activityId "{activity_id}" .
-            {optional_str}
-        }}
-        """
-
-        result = sparql_update(sparql)
-
-        # Récupérer les champs modifiés
-        updated_fields = {k: v for k, v in update_data.dict().items() if v is not None}
+        result = sparql_update(ACTIVITY_UPDATE.build(updated_fields, key=("activityId", activity_id)))
 
         return {
             "status": "success",
@@ -722,6 +723,8 @@ def update_activity(activity_id: str, update_data: ActivityUpdateRequest):
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -751,6 +754,10 @@ def delete_activity(activity_id: str):
 # GET /activities/stats/top-rated
 @router.get("/stats/top-rated", summary="Top 10 activités les mieux notées")
 def get_top_rated():
+    sorted_rows = catalog_columns.answer("activities", lambda table: catalog_columns.ranking(
+        table, "activityRating", "rating", "activityName", descending=True))
+    if sorted_rows is not None:
+        return {"status": "success", "count": len(sorted_rows), "activities": sorted_rows, "ranking": "by_rating"}
     try:
         sparql = """
         PREFIX eco: <http://www.ecotourism.org/ontology#>
@@ -783,6 +790,10 @@ def get_top_rated():
 # GET /activities/stats/cheapest
 @router.get("/stats/cheapest", summary="Top 10 activités les moins chères")
 def get_cheapest():
+    sorted_rows = catalog_columns.answer("activities", lambda table: catalog_columns.ranking(
+        table, "pricePerPerson", "pricePerPerson", "activityName"))
+    if sorted_rows is not None:
+        return {"status": "success", "count": len(sorted_rows), "activities": sorted_rows, "ranking": "by_price"}
     try:
         sparql = """
         PREFIX eco: <http://www.ecotourism.org/ontology#>
@@ -816,20 +827,7 @@ def get_cheapest():
 @router.get("/search/{name}", summary="Rechercher une activité par nom")
 def search_activity_by_name(name: str):
     try:
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?activity ?activityId ?activityName ?pricePerPerson ?activityRating ?difficultyLevel
-        WHERE {{
-            ?activity eco:activityName ?activityName .
-            FILTER(CONTAINS(LCASE(?activityName), LCASE("{name}")))
-            OPTIONAL {{ ?activity eco:activityId ?activityId }}
-            OPTIONAL {{ ?activity eco:pricePerPerson ?pricePerPerson }}
-            OPTIONAL {{ ?activity eco:activityRating ?activityRating }}
-            OPTIONAL {{ ?activity eco:difficultyLevel ?difficultyLevel }}
-        }}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(ACTIVITY_BY_NAME, name=name)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         activities = [_parse_activity(b) for b in binds]
 
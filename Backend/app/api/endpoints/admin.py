@@ -0,0 +1,77 @@
+# app/api/endpoints/admin.py - Opérations d'administration (chargement en masse)
+
+from fastapi import APIRouter, Depends, HTTPException, Path as PathParam
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.services import graph_loader
+from app.config import settings
+
+router = APIRouter()
+
+
+def require_bulk_load():
+    """Endpoints d'écriture en masse, désactivés sauf SPARQL_BULK_LOAD_ENABLED."""
+    if not settings.SPARQL_BULK_LOAD_ENABLED:
+        raise HTTPException(status_code=403, detail="Chargement en masse désactivé (SPARQL_BULK_LOAD_ENABLED)")
+
+
+class BulkLoadRequest(BaseModel):
+    files: List[str] = Field(..., min_length=1, example=["eco.ttl", "validationfinale.owl"])
+    graph: Optional[str] = Field(None, description="Graphe nommé cible (défaut : graphe par défaut)")
+    chunk_triples: int = Field(settings.SPARQL_BULK_LOAD_CHUNK_TRIPLES, ge=100, le=1_000_000)
+    workers: int = Field(settings.SPARQL_BULK_LOAD_WORKERS, ge=1, le=32)
+    resume: bool = Field(True, description="Reprendre un chargement interrompu après les paquets déjà envoyés")
+
+
+@router.post("/bulk-load", status_code=202, summary="Charger des fichiers RDF en masse",
+             dependencies=[Depends(require_bulk_load)])
+def start_bulk_load(request: BulkLoadRequest):
+    """
+    Charge des fichiers Turtle / N-Triples / RDF-XML du répertoire
+    SPARQL_BULK_LOAD_DIR par le Graph Store Protocol, en paquets envoyés en
+    parallèle. Le chargement tourne en arrière-plan : suivre sa progression
+    avec GET /admin/bulk-load/{job_id}.
+    """
+    try:
+        files = [graph_loader.resolve_file(name) for name in request.files]
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    checkpoint = None
+    if request.resume:
+        checkpoint = files[0].parent / ".bulk_load_checkpoint.json"
+    loader = graph_loader.GraphLoader(
+        files, graph=request.graph, chunk_triples=request.chunk_triples,
+        workers=request.workers, checkpoint=checkpoint
+    )
+    try:
+        job_id = graph_loader.start_job(loader)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"job_id": job_id, "status": "started", "files": request.files}
+
+
+@router.get("/bulk-load", summary="Chargements en masse")
+def list_bulk_loads():
+    """Progression de tous les chargements lancés depuis le démarrage de l'API"""
+    return graph_loader.list_jobs()
+
+
+@router.get("/bulk-load/{job_id}", summary="Progression d'un chargement en masse")
+def get_bulk_load(job_id: str = PathParam(..., description="Identifiant du chargement")):
+    """Triples envoyés, débit, paquets repris et erreurs éventuelles"""
+    job = graph_loader.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Chargement {job_id} introuvable")
+    return job.stats()
+
+
+@router.delete("/bulk-load/{job_id}", summary="Interrompre un chargement en masse",
+               dependencies=[Depends(require_bulk_load)])
+def cancel_bulk_load(job_id: str = PathParam(..., description="Identifiant du chargement")):
+    """Arrête l'envoi de nouveaux paquets ; le checkpoint permet de reprendre plus tard"""
+    job = graph_loader.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Chargement {job_id} introuvable")
+    job.cancel()
+    return {"job_id": job_id, "status": "cancelling"}
@@ -4,11 +4,15 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from app.services.gemini_query_agent import GeminiQueryAgent
 from app.services.ecotourism_client import EcotourismClient
+from app.api.streaming import raw_bindings_response
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Instance partagée (pas de construction par requête)
+client = EcotourismClient()
+
 
 class AIQueryInput(BaseModel):
     question: str = Field(
@@ -43,19 +47,15 @@ def ai_query(input_data: AIQueryInput):
         if not sparql_query:
             raise HTTPException(status_code=500, detail="❌ Impossible de générer une requête SPARQL valide")
 
-        client = EcotourismClient()
-        results = client.execute_query(sparql_query)
+        raw = client.execute_query_raw(sparql_query)
 
         method = "fallback" if "# Fallback" in sparql_query else "gemini"
 
-        return {
-            "question": question,
-            "sparql_query": sparql_query,
-            "results": results,
-            "count": len(results),
-            "method": method,
-            "status": "success"
-        }
+        return raw_bindings_response(
+            raw,
+            {"question": question, "sparql_query": sparql_query},
+            {"method": method, "status": "success"}
+        )
 
     except HTTPException:
         raise
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.gemini_query_agent import GeminiQueryAgent
-from app.services.sparql_helpers import execute_select_query
+from app.services.sparql_helpers import execute_select_raw
+from app.api.streaming import raw_bindings_response
 
 router = APIRouter()
 
@@ -25,15 +26,9 @@ def ai_query(request: AIQueryRequest):
 
     # Étape 2 : Exécution Fuseki
     try:
-        result_json = execute_select_query(sparql_query)
-        rows = result_json.get("results", {}).get("bindings", [])
+        raw = execute_select_raw(sparql_query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur SPARQL : {e}")
 
-    # Étape 3 : Retour client
-    return {
-        "question": question,
-        "sparql_query": sparql_query,
-        "results": rows,
-        "count": len(rows)
-    }
+    # Étape 3 : Retour client (bindings recopiés tels que reçus de Fuseki)
+    return raw_bindings_response(raw, {"question": question, "sparql_query": sparql_query})
@@ -8,11 +8,13 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Instance partagée (pas de construction par requête)
+dashboard = AnalyticsDashboard()
+
 @router.get("/carbon-stats", summary="Statistiques d'empreinte carbone")
 def get_carbon_statistics():
     """Statistiques globales d'empreinte carbone"""
     try:
-        dashboard = AnalyticsDashboard()
         stats = dashboard.get_carbon_statistics()
         return {"carbon_statistics": stats}
     except Exception as e:
@@ -23,7 +25,6 @@ def get_carbon_statistics():
 def get_statistics_by_region():
     """Analyse des activités par région"""
     try:
-        dashboard = AnalyticsDashboard()
         stats = dashboard.get_statistics_by_region()
         return {"regions": stats}
     except Exception as e:
@@ -34,7 +35,6 @@ def get_statistics_by_region():
 def get_top_eco_activities(limit: int = Query(10, ge=1, le=50)):
     """Activités les plus écologiques"""
     try:
-        dashboard = AnalyticsDashboard()
         top = dashboard.get_top_eco_activities(limit=limit)
         return {"top_activities": top}
     except Exception as e:
@@ -45,7 +45,6 @@ def get_top_eco_activities(limit: int = Query(10, ge=1, le=50)):
 def get_activity_types():
     """Répartition des activités par type"""
     try:
-        dashboard = AnalyticsDashboard()
         distribution = dashboard.get_activity_types_distribution()
         return {"activity_types": distribution}
     except Exception as e:
@@ -56,7 +55,6 @@ def get_activity_types():
 def get_accommodations_stats():
     """Statistiques des hébergements"""
     try:
-        dashboard = AnalyticsDashboard()
         stats = dashboard.get_accommodations_stats()
         return {"accommodations": stats}
     except Exception as e:
@@ -67,7 +65,6 @@ def get_accommodations_stats():
 def get_difficulty():
     """Distribution par niveau de difficulté"""
     try:
-        dashboard = AnalyticsDashboard()
         distribution = dashboard.get_activities_by_difficulty()
         return {"by_difficulty": distribution}
     except Exception as e:
@@ -78,7 +75,6 @@ def get_difficulty():
 def get_complete_dashboard():
     """Toutes les métriques"""
     try:
-        dashboard = AnalyticsDashboard()
         metrics = dashboard.get_all_metrics()
         
         return {
@@ -3,6 +3,9 @@ from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 import uuid
+from app.services.sparql_templates import register, Param, TemplateParamError, IRI, STRING
+from app.services.sparql_entity_update import EntityUpdate
+from app.services.sparql_decoder import XSD_DATETIME, XSD_STRING
 
 router = APIRouter()
 
@@ -15,6 +18,54 @@ PREFIX owl: <http://www.w3.org/2002/07/owl#>
 """
 
 
+# Requêtes préparées (les préfixes standard sont ajoutés par le registre)
+BOOKING_EXISTS = register("bookings.exists", """
+SELECT ?booking
+WHERE {
+  ?booking rdf:type eco:Booking ;
+           eco:bookingId ${booking_id} .
+}
+LIMIT 1
+""", booking_id=Param(STRING))
+
+BOOKING_PROPERTIES = register("bookings.properties", """
+SELECT ?property ?value
+WHERE {
+  ?booking rdf:type eco:Booking ;
+           eco:bookingId ${booking_id} ;
+           ?property ?value .
+}
+""", booking_id=Param(STRING))
+
+BOOKINGS_BY_TOURIST = register("bookings.by_tourist", """
+SELECT ?booking ?bookingId ?bookingDate ?status ?accommodation ?activity
+WHERE {
+  ?booking rdf:type eco:Booking ;
+           eco:bookingId ?bookingId ;
+           eco:madeBy ${tourist} ;
+           eco:bookingDate ?bookingDate ;
+           eco:bookingStatus ?status .
+
+  OPTIONAL { ?booking eco:concernsAccommodation ?accommodation . }
+  OPTIONAL { ?booking eco:concernsActivity ?activity . }
+}
+ORDER BY DESC(?bookingDate)
+""", tourist=Param(IRI))
+
+BOOKINGS_BY_ACCOMMODATION = register("bookings.by_accommodation", """
+SELECT ?booking ?bookingId ?bookingDate ?status ?tourist
+WHERE {
+  ?booking rdf:type eco:Booking ;
+           eco:bookingId ?bookingId ;
+           eco:concernsAccommodation ${accommodation} ;
+           eco:bookingDate ?bookingDate ;
+           eco:bookingStatus ?status ;
+           eco:madeBy ?tourist .
+}
+ORDER BY DESC(?bookingDate)
+""", accommodation=Param(IRI))
+
+
 class BookingCreate(BaseModel):
     booking_id: Optional[str] = Field(None, description="ID du booking (auto-généré si non fourni)")
     booking_date: str = Field(..., description="Date de booking (ISO format: YYYY-MM-DDTHH:MM:SS)")
@@ -33,6 +84,13 @@ class BookingUpdate(BaseModel):
     status: Optional[str] = Field(None, description="Statut du booking: pending, confirmed, cancelled")
 
 
+BOOKING_UPDATE = EntityUpdate.from_model(
+    BookingUpdate,
+    properties={"booking_date": "bookingDate", "status": "bookingStatus"},
+    types={"booking_date": XSD_DATETIME, "status": XSD_STRING}
+)
+
+
 def _extract_value(value):
     """
     Extrait la valeur d'une liaison SPARQL
@@ -107,7 +165,8 @@ def create_booking(booking: BookingCreate):
 
 @router.get("/all", summary="Lister tous les bookings")
 def list_all_bookings():
-    from app.services.sparql_helpers import sparql_select
+    from app.services.sparql_helpers import stream_select
+    from app.api.streaming import streaming_list_response
 
     try:
         sparql = PREFIXES + """
@@ -124,26 +183,9 @@ def list_all_bookings():
         """
         print(f"DEBUG: SPARQL SELECT:\n{sparql}")
 
-        results = sparql_select(sparql)
-        bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
-
-        bookings = []
-        for binding in bindings:
-            booking = {
-                "booking_uri": _extract_value(binding.get('booking')),
-                "booking_id": _extract_value(binding.get('bookingId')),
-                "booking_date": _extract_value(binding.get('bookingDate')),
-                "status": _extract_value(binding.get('status')),
-                "confirmation_code": _extract_value(binding.get('code')),
-                "tourist": _extract_value(binding.get('tourist'))
-            }
-            bookings.append(booking)
-
-        return {
-            "status": "success",
-            "count": len(bookings),
-            "bookings": bookings
-        }
+        # Liste sans LIMIT : les bindings sont décodés et renvoyés au fil de l'eau
+        bindings = stream_select(sparql)
+        return streaming_list_response("bookings", bindings, _booking_summary)
     except Exception as e:
         print(f"ERROR: {str(e)}")
         import traceback
@@ -151,39 +193,31 @@ def list_all_bookings():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _booking_summary(binding):
+    return {
+        "booking_uri": _extract_value(binding.get('booking')),
+        "booking_id": _extract_value(binding.get('bookingId')),
+        "booking_date": _extract_value(binding.get('bookingDate')),
+        "status": _extract_value(binding.get('status')),
+        "confirmation_code": _extract_value(binding.get('code')),
+        "tourist": _extract_value(binding.get('tourist'))
+    }
+
+
 @router.get("/{booking_id}", summary="Récupérer un booking par ID")
 def get_booking(booking_id: str):
-    from app.services.sparql_helpers import sparql_select
+    from app.services.sparql_helpers import select_template
 
     try:
         # Vérifier si le booking existe
-        check_sparql = PREFIXES + f"""
-        SELECT ?booking
-        WHERE {{
-          ?booking rdf:type eco:Booking ;
-                   eco:bookingId "{booking_id}" .
-        }}
-        LIMIT 1
-        """
-
-        check_result = sparql_select(check_sparql)
+        check_result = select_template(BOOKING_EXISTS, booking_id=booking_id)
         check_bindings = check_result.get('results', {}).get('bindings', []) if isinstance(check_result, dict) else []
 
         if not check_bindings:
             raise HTTPException(status_code=404, detail=f"Booking '{booking_id}' not found")
 
         # Récupérer toutes les propriétés
-        sparql = PREFIXES + f"""
-        SELECT ?property ?value
-        WHERE {{
-          ?booking rdf:type eco:Booking ;
-                   eco:bookingId "{booking_id}" ;
-                   ?property ?value .
-        }}
-        """
-        print(f"DEBUG: SPARQL SELECT:\n{sparql}")
-
-        results = sparql_select(sparql)
+        results = select_template(BOOKING_PROPERTIES, booking_id=booking_id)
         bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         properties = {}
@@ -214,79 +248,30 @@ def get_booking(booking_id: str):
 
 @router.put("/{booking_id}", summary="Mettre à jour un booking (date et status uniquement)")
 def update_booking(booking_id: str, booking_update: BookingUpdate):
-    from app.services.sparql_helpers import sparql_update, sparql_select
+    from app.services.sparql_helpers import sparql_update, select_template
 
     try:
         # Vérifier si le booking existe
-        check_sparql = PREFIXES + f"""
-        SELECT ?booking
-        WHERE {{
-          ?booking rdf:type eco:Booking ;
-                   eco:bookingId "{booking_id}" .
-        }}
-        LIMIT 1
-        """
-
-        check_result = sparql_select(check_sparql)
+        check_result = select_template(BOOKING_EXISTS, booking_id=booking_id)
         check_bindings = check_result.get('results', {}).get('bindings', []) if isinstance(check_result, dict) else []
 
         if not check_bindings:
             raise HTTPException(status_code=404, detail=f"Booking '{booking_id}' not found")
 
         # Vérifier qu'au moins un champ est fourni
-        if booking_update.booking_date is None and booking_update.status is None:
+        updated_fields = BOOKING_UPDATE.changes(booking_update)
+        if not updated_fields:
             raise HTTPException(
                 status_code=400,
                 detail="Au moins un champ doit être fourni (booking_date ou status)"
             )
 
-        # Construire la requête UPDATE
-        delete_clauses = []
-        insert_clauses = []
-        where_clauses = []
-
-        # Toujours vérifier que le booking existe
-        where_clauses.append(f'?booking eco:bookingId "{booking_id}" .')
-
-        # Mettre à jour booking_date si fourni
-        if booking_update.booking_date is not None:
-            delete_clauses.append("?booking eco:bookingDate ?oldDate .")
-            insert_clauses.append(f'?booking eco:bookingDate "{booking_update.booking_date}"^^xsd:dateTime .')
-            where_clauses.append("OPTIONAL { ?booking eco:bookingDate ?oldDate . }")
-
-        # Mettre à jour status si fourni
-        if booking_update.status is not None:
-            delete_clauses.append("?booking eco:bookingStatus ?oldStatus .")
-            insert_clauses.append(f'?booking eco:bookingStatus "{booking_update.status}"^^xsd:string .')
-            where_clauses.append("OPTIONAL { ?booking eco:bookingStatus ?oldStatus . }")
-
-        delete_str = "\n            ".join(delete_clauses)
-        insert_str = "\n            ".join(insert_clauses)
-        where_str = "\n            ".join(where_clauses)
-
-        sparql = PREFIXES + f"""
-        DELETE {{
-            {delete_str}
-        }}
-        INSERT {{
-            {insert_str}
-        }}
-        WHERE {{
-            {where_str}
-        }}
-        """
+        sparql = BOOKING_UPDATE.build(updated_fields, key=("bookingId", booking_id))
         print(f"DEBUG: SPARQL UPDATE:\n{sparql}")
 
         result = sparql_update(sparql)
         print(f"DEBUG: Update result = {result}")
 
-        # Construire la réponse avec les champs modifiés
-        updated_fields = {}
-        if booking_update.booking_date is not None:
-            updated_fields["booking_date"] = booking_update.booking_date
-        if booking_update.status is not None:
-            updated_fields["status"] = booking_update.status
-
         return {
             "status": "success",
             "message": f"Booking '{booking_id}' mis à jour avec succès",
@@ -295,6 +280,8 @@ def update_booking(booking_id: str, booking_update: BookingUpdate):
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"ERROR: {str(e)}")
         import traceback
@@ -330,26 +317,10 @@ def delete_booking(booking_id: str):
 
 @router.get("/by-tourist/{tourist_id}", summary="Lister les bookings d'un touriste")
 def get_bookings_by_tourist(tourist_id: str):
-    from app.services.sparql_helpers import sparql_select
+    from app.services.sparql_helpers import select_template
 
     try:
-        sparql = PREFIXES + f"""
-        SELECT ?booking ?bookingId ?bookingDate ?status ?accommodation ?activity
-        WHERE {{
-          ?booking rdf:type eco:Booking ;
-                   eco:bookingId ?bookingId ;
-                   eco:madeBy eco:{tourist_id} ;
-                   eco:bookingDate ?bookingDate ;
-                   eco:bookingStatus ?status .
-
-          OPTIONAL {{ ?booking eco:concernsAccommodation ?accommodation . }}
-          OPTIONAL {{ ?booking eco:concernsActivity ?activity . }}
-        }}
-        ORDER BY DESC(?bookingDate)
-        """
-        print(f"DEBUG: SPARQL SELECT:\n{sparql}")
-
-        results = sparql_select(sparql)
+        results = select_template(BOOKINGS_BY_TOURIST, tourist=tourist_id)
         bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         bookings = []
@@ -370,6 +341,8 @@ def get_bookings_by_tourist(tourist_id: str):
             "count": len(bookings),
             "bookings": bookings
         }
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"ERROR: {str(e)}")
         import traceback
@@ -379,24 +352,10 @@ def get_bookings_by_tourist(tourist_id: str):
 
 @router.get("/by-accommodation/{accommodation_id}", summary="Lister les bookings d'un logement")
 def get_bookings_by_accommodation(accommodation_id: str):
-    from app.services.sparql_helpers import sparql_select
+    from app.services.sparql_helpers import select_template
 
     try:
-        sparql = PREFIXES + f"""
-        SELECT ?booking ?bookingId ?bookingDate ?status ?tourist
-        WHERE {{
-          ?booking rdf:type eco:Booking ;
-                   eco:bookingId ?bookingId ;
-                   eco:concernsAccommodation eco:{accommodation_id} ;
-                   eco:bookingDate ?bookingDate ;
-                   eco:bookingStatus ?status ;
-                   eco:madeBy ?tourist .
-        }}
-        ORDER BY DESC(?bookingDate)
-        """
-        print(f"DEBUG: SPARQL SELECT:\n{sparql}")
-
-        results = sparql_select(sparql)
+        results = select_template(BOOKINGS_BY_ACCOMMODATION, accommodation=accommodation_id)
         bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         bookings = []
@@ -416,6 +375,8 @@ def get_bookings_by_accommodation(accommodation_id: str):
             "count": len(bookings),
             "bookings": bookings
         }
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"ERROR: {str(e)}")
         import traceback
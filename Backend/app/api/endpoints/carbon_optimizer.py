@@ -4,7 +4,8 @@ from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
-from app.services.sparql_helpers import execute_select_query
+from app.services.async_sparql import execute_select_query
+from app.services.type_closure import subclass_pattern
 import math
 import logging
 
@@ -84,7 +85,7 @@ class CarbonOptimizer:
         
         return R * c
     
-    def get_location_coords(self, location_uri: str) -> Optional[Dict]:
+    async def get_location_coords(self, location_uri: str) -> Optional[Dict]:
         """Récupère les coordonnées d'un lieu"""
         query = f"""
         PREFIX eco: <{self.ontology_ns}>
@@ -97,7 +98,7 @@ class CarbonOptimizer:
         """
         
         try:
-            result = execute_select_query(query)
+            result = await execute_select_query(query)
             bindings = result.get("results", {}).get("bindings", [])
             
             if bindings:
@@ -110,7 +111,7 @@ class CarbonOptimizer:
         
         return None
     
-    def get_available_transports(self) -> List[Dict[str, Any]]:
+    async def get_available_transports(self) -> List[Dict[str, Any]]:
         """Récupère tous les transports disponibles"""
         query = f"""
         PREFIX eco: <{self.ontology_ns}>
@@ -118,16 +119,8 @@ class CarbonOptimizer:
         SELECT DISTINCT ?transport ?transportName ?transportType 
                         ?pricePerKm ?carbonEmissionPerKm
         WHERE {{
-            {{
-                ?transport a eco:Bike .
-                BIND("Bike" AS ?transportType)
-            }} UNION {{
-                ?transport a eco:ElectricVehicle .
-                BIND("ElectricVehicle" AS ?transportType)
-            }} UNION {{
-                ?transport a eco:PublicTransport .
-                BIND("PublicTransport" AS ?transportType)
-            }}
+            {subclass_pattern("transport", "Transport", "transportClass")}
+            BIND(STRAFTER(STR(?transportClass), "#") AS ?transportType)
             
             ?transport eco:transportName ?transportName .
             
@@ -137,7 +130,7 @@ class CarbonOptimizer:
         """
         
         try:
-            result = execute_select_query(query)
+            result = await execute_select_query(query)
             bindings = result.get("results", {}).get("bindings", [])
             
             transports = []
@@ -243,7 +236,7 @@ class CarbonOptimizer:
             
             return min(options, key=balanced_score)
     
-    def get_compensation_products(self, co2_kg: float) -> List[Dict[str, Any]]:
+    async def get_compensation_products(self, co2_kg: float) -> List[Dict[str, Any]]:
         """Suggère des produits locaux pour compenser le carbone"""
         query = f"""
         PREFIX eco: <{self.ontology_ns}>
@@ -267,7 +260,7 @@ class CarbonOptimizer:
         """
         
         try:
-            result = execute_select_query(query)
+            result = await execute_select_query(query)
             bindings = result.get("results", {}).get("bindings", [])
             
             suggestions = []
@@ -328,7 +321,7 @@ async def optimize_carbon_neutral_trip(request: TripRequest) -> OptimizedTrip:
     
     try:
         # 1. Récupérer les transports disponibles
-        transports = optimizer.get_available_transports()
+        transports = await optimizer.get_available_transports()
         
         if not transports:
             # Utiliser des transports par défaut si la base est vide
@@ -423,7 +416,7 @@ async def optimize_carbon_neutral_trip(request: TripRequest) -> OptimizedTrip:
         avg_eco_score = int(sum(s.eco_score for s in all_segments) / len(all_segments))
         
         # 5. Suggestions de compensation
-        compensation = optimizer.get_compensation_products(total_co2)
+        compensation = await optimizer.get_compensation_products(total_co2)
         
         # 6. Construire l'itinéraire jour par jour
         daily_itinerary = [
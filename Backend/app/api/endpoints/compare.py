@@ -5,6 +5,9 @@ from app.services.activity_comparateur import ActivityComparator
 
 router = APIRouter()
 
+# Instance partagée (pas de construction par requête)
+comparator = ActivityComparator()
+
 @router.post("/", summary="Comparer plusieurs activités")
 def compare_activities(
     activity_uris: List[str] = Body(..., example=[
@@ -17,7 +20,6 @@ def compare_activities(
         if len(activity_uris) < 2:
             raise HTTPException(status_code=400, detail="Au moins 2 activités requises")
         
-        comparator = ActivityComparator()
         comparison_data = []
         
         for uri in activity_uris:
@@ -6,6 +6,9 @@ from datetime import datetime
 
 router = APIRouter()
 
+# Instance partagée (pas de construction par requête)
+manager = FeedbackManager()
+
 
 class FeedbackBase(BaseModel):
     activity_uri: str = Field(..., example="http://www.ecotourism.org/ontology#RandonneeIchkeul")
@@ -43,7 +46,6 @@ def get_all_feedbacks(
     - **sort_by**: Ordre de tri (date_desc, date_asc, rating_desc, rating_asc)
     """
     try:
-        manager = FeedbackManager()
 
         # Build filters dictionary
         filters = {}
@@ -81,7 +83,6 @@ def get_all_feedbacks(
 @router.post("/", summary="Soumettre un avis utilisateur")
 def submit_feedback(feedback: FeedbackCreate):
     try:
-        manager = FeedbackManager()
         new_id = manager.add_feedback(
             activity_uri=feedback.activity_uri,
             user_name=feedback.user_name,
@@ -103,7 +104,6 @@ def submit_feedback(feedback: FeedbackCreate):
 @router.get("/activity/{activity_uri:path}", summary="Avis d'une activité")
 def get_activity_feedback(activity_uri: str):
     try:
-        manager = FeedbackManager()
         feedbacks = manager.get_feedback_for_activity(activity_uri)
         stats = manager.get_feedback_statistics(activity_uri)
         return {
@@ -118,7 +118,6 @@ def get_activity_feedback(activity_uri: str):
 @router.get("/{feedback_id}", summary="Récupérer un feedback par ID")
 def get_feedback(feedback_id: int = Path(..., ge=1)):
     try:
-        manager = FeedbackManager()
         feedback = manager.get_feedback_by_id(feedback_id)
         if not feedback:
             raise HTTPException(status_code=404, detail="Feedback non trouvé")
@@ -130,7 +129,6 @@ def get_feedback(feedback_id: int = Path(..., ge=1)):
 @router.put("/{feedback_id}", summary="Mettre à jour un feedback par ID")
 def update_feedback(feedback_id: int, update_data: FeedbackUpdate):
     try:
-        manager = FeedbackManager()
         updated = manager.update_feedback(feedback_id, update_data.dict(exclude_unset=True))
         if not updated:
             raise HTTPException(status_code=404, detail="Feedback non trouvé ou rien à mettre à jour")
@@ -142,7 +140,6 @@ def update_feedback(feedback_id: int, update_data: FeedbackUpdate):
 @router.delete("/{feedback_id}", summary="Supprimer un feedback par ID")
 def delete_feedback(feedback_id: int):
     try:
-        manager = FeedbackManager()
         deleted = manager.delete_feedback(feedback_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Feedback non trouvé")
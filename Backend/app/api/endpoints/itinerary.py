@@ -3,7 +3,13 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from enum import Enum
-from app.services.sparql_helpers import sparql_select
+from app.config import settings
+from app.services.sparql_helpers import sparql_select, select_two_phase
+from app.services.sparql_templates import register, Param, IRI, STRING, INTEGER
+from app.services.type_closure import subclass_pattern
+from app.services.request_context import DeadlineExceeded
+from app.api.endpoints.activities import ACTIVITY_DECODER
+from app.api.endpoints.accommodation import ACCOMMODATION_DECODER
 
 router = APIRouter()
 
@@ -47,21 +53,9 @@ class DifficultyLevel(str, Enum):
 # HELPERS
 # ============================================
 
-def _safe_get(obj: Dict[str, Any], key: str, default: Any = None) -> Any:
-    try:
-        if isinstance(obj, dict):
-            return obj.get(key, default)
-        return default
-    except:
-        return default
-
-
-def _extract_value(value: Any) -> Any:
-    if value is None:
-        return None
-    if isinstance(value, dict) and 'value' in value:
-        return value['value']
-    return value
+def _or_default(value: Any, default: Any) -> Any:
+    """Valeur décodée, ou `default` si la variable n'est pas liée (OPTIONAL vide)."""
+    return default if value is None else value
 
 
 def calculate_eco_score(price: float, rating: float, eco_certified: bool) -> float:
@@ -127,7 +121,7 @@ def select_accommodation(budget_per_night: Optional[float] = None) -> Dict[str,
         PREFIX eco: <http://www.ecotourism.org/ontology#>
         SELECT ?accommodation ?accommodationId ?accommodationName ?pricePerNight 
                ?accommodationRating ?ecoCertified ?numberOfRooms ?maxGuests
-               ?wifiAvailable ?parkingAvailable ?description
+               ?wifiAvailable ?parkingAvailable ?accommodationDescription
         WHERE {{
           ?accommodation eco:accommodationId ?accommodationId ;
                         eco:accommodationName ?accommodationName .
@@ -138,7 +132,7 @@ def select_accommodation(budget_per_night: Optional[float] = None) -> Dict[str,
           OPTIONAL {{ ?accommodation eco:maxGuests ?maxGuests . }}
           OPTIONAL {{ ?accommodation eco:wifiAvailable ?wifiAvailable . }}
           OPTIONAL {{ ?accommodation eco:parkingAvailable ?parkingAvailable . }}
-          OPTIONAL {{ ?accommodation eco:accommodationDescription ?description . }}
+          OPTIONAL {{ ?accommodation eco:accommodationDescription ?accommodationDescription . }}
           {f'FILTER(?pricePerNight <= {budget_per_night})' if budget_per_night else ''}
         }}
         ORDER BY DESC(?accommodationRating)
@@ -149,23 +143,23 @@ def select_accommodation(budget_per_night: Optional[float] = None) -> Dict[str,
         bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         if bindings:
-            b = bindings[0]
-            price = float(_extract_value(_safe_get(b, 'pricePerNight')) or 100)
-            rating = float(_extract_value(_safe_get(b, 'accommodationRating')) or 4.0)
-            eco_certified = _extract_value(_safe_get(b, 'ecoCertified')) == 'true'
+            row = ACCOMMODATION_DECODER.row(bindings[0])
+            price = _or_default(row["pricePerNight"], 100.0)
+            rating = _or_default(row["accommodationRating"], 4.0)
+            eco_certified = bool(row["ecoCertified"])
 
             return {
-                "accommodationId": _extract_value(_safe_get(b, 'accommodationId')),
-                "name": _extract_value(_safe_get(b, 'accommodationName')),
-                "description": _extract_value(_safe_get(b, 'description')),
+                "accommodationId": row["accommodationId"],
+                "name": row["name"],
+                "description": row["description"],
                 "pricePerNight": price,
                 "rating": rating,
                 "ecoCertified": eco_certified,
-                "numberOfRooms": int(_extract_value(_safe_get(b, 'numberOfRooms')) or 10),
-                "maxGuests": int(_extract_value(_safe_get(b, 'maxGuests')) or 20),
-                "wifiAvailable": _extract_value(_safe_get(b, 'wifiAvailable')) == 'true',
-                "parkingAvailable": _extract_value(_safe_get(b, 'parkingAvailable')) == 'true',
-                "uri": _extract_value(_safe_get(b, 'accommodation')),
+                "numberOfRooms": _or_default(row["numberOfRooms"], 10),
+                "maxGuests": _or_default(row["maxGuests"], 20),
+                "wifiAvailable": bool(row["wifiAvailable"]),
+                "parkingAvailable": bool(row["parkingAvailable"]),
+                "uri": row["uri"],
                 "eco_score": calculate_eco_score(price, rating, eco_certified)
             }
 
@@ -184,6 +178,8 @@ def select_accommodation(budget_per_night: Optional[float] = None) -> Dict[str,
             "uri": "eco:EcoResort",
             "eco_score": 90.0
         }
+    except DeadlineExceeded:
+        raise  # pas de valeur par défaut : la requête est abandonnée (504)
     except Exception as e:
         print(f"ERROR selecting accommodation: {str(e)}")
         return {
@@ -202,78 +198,139 @@ def select_accommodation(budget_per_night: Optional[float] = None) -> Dict[str,
         }
 
 
-def select_activities_for_day(
-        day_index: int,
-        difficulty: str,
-        season: Optional[str] = None
-) -> List[Dict[str, Any]]:
-    """Sélectionne des activités DIFFÉRENTES pour chaque jour avec tous les attributs"""
-    try:
-        # Construire le filtre de difficulté
-        difficulty_filter = f'FILTER(CONTAINS(LCASE(?difficultyLevel), LCASE("{difficulty}")))' if difficulty else ''
+ACTIVITIES_PER_DAY = 3
+
+# Sélection en deux temps (select_two_phase) : la page du jour ne porte que les
+# variables de filtre et de tri ; les propriétés ne sont lues que pour ses 3 activités.
+# Un filtre vide ("") ne contraint rien (et n'exige pas la propriété).
+DAY_ACTIVITY_PAGE = register("itinerary.day_activities.page", """
+SELECT DISTINCT ?activity ?activityId
+WHERE {
+  VALUES ?activityType { eco:AdventureActivity eco:CulturalActivity eco:NatureActivity }
+  ?activity a ?activityType ;
+            eco:activityId ?activityId ;
+            eco:activityName ?activityName .
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+  OPTIONAL { ?activity eco:bestTimeToVisit ?bestTimeToVisit }
+  FILTER(${difficulty} = "" || CONTAINS(LCASE(?difficultyLevel), LCASE(${difficulty})))
+  FILTER(${season} = "" || CONTAINS(LCASE(?bestTimeToVisit), LCASE(${season})))
+}
+ORDER BY ?activityId
+OFFSET ${offset}
+LIMIT ${limit}
+""", difficulty=Param(STRING, default=""), season=Param(STRING, default=""),
+    offset=Param(INTEGER), limit=Param(INTEGER, default=ACTIVITIES_PER_DAY))
+
+DAY_ACTIVITY_DETAIL = register("itinerary.day_activities.detail", """
+SELECT DISTINCT ?activity ?activityId ?activityName ?activityDescription
+       ?pricePerPerson ?activityRating ?difficultyLevel ?durationHours
+       ?schedule ?activityLanguages ?activityType ?bestTimeToVisit
+WHERE {
+  {
+    VALUES ?activity { ${subjects} }
+    ?activity a ?activityType ;
+              eco:activityId ?activityId ;
+              eco:activityName ?activityName .
+    FILTER(?activityType IN (eco:AdventureActivity, eco:CulturalActivity, eco:NatureActivity))
+  }
+  OPTIONAL { ?activity eco:activityDescription ?activityDescription }
+  OPTIONAL { ?activity eco:pricePerPerson ?pricePerPerson }
+  OPTIONAL { ?activity eco:activityRating ?activityRating }
+  OPTIONAL { ?activity eco:difficultyLevel ?difficultyLevel }
+  OPTIONAL { ?activity eco:durationHours ?durationHours }
+  OPTIONAL { ?activity eco:schedule ?schedule }
+  OPTIONAL { ?activity eco:activityLanguages ?activityLanguages }
+  OPTIONAL { ?activity eco:bestTimeToVisit ?bestTimeToVisit }
+  FILTER(${difficulty} = "" || CONTAINS(LCASE(?difficultyLevel), LCASE(${difficulty})))
+  FILTER(${season} = "" || CONTAINS(LCASE(?bestTimeToVisit), LCASE(${season})))
+}
+ORDER BY ?activityId
+""", subjects=Param(IRI, values=True), difficulty=Param(STRING, default=""), season=Param(STRING, default=""))
+
+
+def _unique_by_activity_id(bindings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Première ligne de chaque activityId, dans l'ordre reçu, décodée par ACTIVITY_DECODER."""
+    seen_ids = set()
+    unique_rows = []
+    for row in ACTIVITY_DECODER.rows(bindings):
+        activity_id = row["activityId"]
+        if activity_id and activity_id not in seen_ids:
+            seen_ids.add(activity_id)
+            unique_rows.append(row)
+    return unique_rows
+
+
+def _select_activities_single_query(day_index: int, difficulty: str,
+                                    season: Optional[str]) -> List[Dict[str, Any]]:
+    """Requête unique (SPARQL_TWO_PHASE_ENABLED désactivé) : 50 lignes complètes, puis découpage du jour."""
+    # Construire le filtre de difficulté
+    difficulty_filter = f'FILTER(CONTAINS(LCASE(?difficultyLevel), LCASE("{difficulty}")))' if difficulty else ''
+
+    # Construire le filtre de saison
+    season_filter = f'FILTER(CONTAINS(LCASE(?bestTimeToVisit), LCASE("{season}")))' if season else ''
+
+    # CORRECTION: Utiliser DISTINCT et filtrer les types corrects uniquement
+    sparql = f"""
+    PREFIX eco: <http://www.ecotourism.org/ontology#>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+    SELECT DISTINCT ?activity ?activityId ?activityName ?activityDescription 
+           ?pricePerPerson ?activityRating ?difficultyLevel ?durationHours
+           ?schedule ?activityLanguages ?activityType ?bestTimeToVisit
+    WHERE {{
+        {subclass_pattern("activity", "Activity", "activityType")}
+
+        ?activity eco:activityId ?activityId ;
+                 eco:activityName ?activityName .
+        OPTIONAL {{ ?activity eco:activityDescription ?activityDescription . }}
+        OPTIONAL {{ ?activity eco:pricePerPerson ?pricePerPerson . }}
+        OPTIONAL {{ ?activity eco:activityRating ?activityRating . }}
+        OPTIONAL {{ ?activity eco:difficultyLevel ?difficultyLevel . }}
+        OPTIONAL {{ ?activity eco:durationHours ?durationHours . }}
+        OPTIONAL {{ ?activity eco:schedule ?schedule . }}
+        OPTIONAL {{ ?activity eco:activityLanguages ?activityLanguages . }}
+        OPTIONAL {{ ?activity eco:bestTimeToVisit ?bestTimeToVisit . }}
+        {difficulty_filter}
+        {season_filter}
+    }}
+    ORDER BY ?activityId
+    LIMIT 50
+    """
 
-        # Construire le filtre de saison
-        season_filter = f'FILTER(CONTAINS(LCASE(?bestTimeToVisit), LCASE("{season}")))' if season else ''
+    results = sparql_select(sparql)
+    bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
-        # CORRECTION: Utiliser DISTINCT et filtrer les types corrects uniquement
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    print(f"DEBUG: Day {day_index} - Total activities found: {len(bindings)}")
 
-        SELECT DISTINCT ?activity ?activityId ?activityName ?activityDescription 
-               ?pricePerPerson ?activityRating ?difficultyLevel ?durationHours
-               ?schedule ?activityLanguages ?activityType ?bestTimeToVisit
-        WHERE {{
-            {{
-                ?activity a eco:AdventureActivity .
-                BIND(eco:AdventureActivity AS ?activityType)
-            }} UNION {{
-                ?activity a eco:CulturalActivity .
-                BIND(eco:CulturalActivity AS ?activityType)
-            }} UNION {{
-                ?activity a eco:NatureActivity .
-                BIND(eco:NatureActivity AS ?activityType)
-            }}
-
-            ?activity eco:activityId ?activityId ;
-                     eco:activityName ?activityName .
-            OPTIONAL {{ ?activity eco:activityDescription ?activityDescription . }}
-            OPTIONAL {{ ?activity eco:pricePerPerson ?pricePerPerson . }}
-            OPTIONAL {{ ?activity eco:activityRating ?activityRating . }}
-            OPTIONAL {{ ?activity eco:difficultyLevel ?difficultyLevel . }}
-            OPTIONAL {{ ?activity eco:durationHours ?durationHours . }}
-            OPTIONAL {{ ?activity eco:schedule ?schedule . }}
-            OPTIONAL {{ ?activity eco:activityLanguages ?activityLanguages . }}
-            OPTIONAL {{ ?activity eco:bestTimeToVisit ?bestTimeToVisit . }}
-            {difficulty_filter}
-            {season_filter}
-        }}
-        ORDER BY ?activityId
-        LIMIT 50
-        """
-
-        results = sparql_select(sparql)
-        bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
+    # IMPORTANT: éviter les doublons par activityId
+    unique_bindings = _unique_by_activity_id(bindings)
 
-        print(f"DEBUG: Day {day_index} - Total activities found: {len(bindings)}")
+    print(f"DEBUG: Day {day_index} - Unique activities after dedup: {len(unique_bindings)}")
 
-        # IMPORTANT: Utiliser un ensemble pour éviter les doublons par activityId
-        seen_ids = set()
-        unique_bindings = []
-        for b in bindings:
-            activity_id = _extract_value(_safe_get(b, 'activityId'))
-            if activity_id and activity_id not in seen_ids:
-                seen_ids.add(activity_id)
-                unique_bindings.append(b)
+    # Sélectionner des activités différentes pour chaque jour
+    start_idx = day_index * ACTIVITIES_PER_DAY
+    return unique_bindings[start_idx:start_idx + ACTIVITIES_PER_DAY]
 
-        print(f"DEBUG: Day {day_index} - Unique activities after dedup: {len(unique_bindings)}")
 
-        # Sélectionner des activités différentes pour chaque jour
-        start_idx = day_index * 3
-        end_idx = start_idx + 3
-        day_bindings = unique_bindings[start_idx:end_idx]
+def select_activities_for_day(
+        day_index: int,
+        difficulty: str,
+        season: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Sélectionne des activités DIFFÉRENTES pour chaque jour avec tous les attributs"""
+    try:
+        if settings.SPARQL_TWO_PHASE_ENABLED:
+            results = select_two_phase(
+                DAY_ACTIVITY_PAGE, DAY_ACTIVITY_DETAIL, "activity",
+                page_params={"difficulty": difficulty or "", "season": season or "",
+                             "offset": day_index * ACTIVITIES_PER_DAY},
+                detail_params={"difficulty": difficulty or "", "season": season or ""}
+            )
+            day_bindings = _unique_by_activity_id(results["results"]["bindings"])
+        else:
+            day_bindings = _select_activities_single_query(day_index, difficulty, season)
 
-        print(f"DEBUG: Day {day_index} - Selected activities (indices {start_idx} to {end_idx}): {len(day_bindings)}")
+        print(f"DEBUG: Day {day_index} - Selected activities: {len(day_bindings)}")
 
         activities = []
         time_slots = {
@@ -282,31 +339,28 @@ def select_activities_for_day(
             2: ["09:30 - 11:30", "13:00 - 15:00", "16:00 - 18:00"]  # Jour 3
         }
 
-        for idx, b in enumerate(day_bindings):
-            if not isinstance(b, dict):
-                continue
-
-            price = float(_extract_value(_safe_get(b, 'pricePerPerson')) or 50)
-            rating = float(_extract_value(_safe_get(b, 'activityRating')) or 4.0)
-            duration = int(_extract_value(_safe_get(b, 'durationHours')) or 2)
+        for idx, row in enumerate(day_bindings):
+            price = _or_default(row["pricePerPerson"], 50.0)
+            rating = _or_default(row["activityRating"], 4.0)
+            duration = _or_default(row["durationHours"], 2)
 
-            activity_type = _extract_value(_safe_get(b, 'activityType'))
-            if activity_type and '#' in str(activity_type):
-                activity_type = str(activity_type).split('#')[-1]
+            activity_type = row["activityType"]
+            if '#' in activity_type:
+                activity_type = activity_type.split('#')[-1]
 
             activity_data = {
-                "activityId": _extract_value(_safe_get(b, 'activityId')),
-                "name": _extract_value(_safe_get(b, 'activityName')),
-                "description": _extract_value(_safe_get(b, 'activityDescription')),
+                "activityId": row["activityId"],
+                "name": row["activityName"],
+                "description": row["activityDescription"],
                 "pricePerPerson": price,
                 "rating": rating,
-                "difficultyLevel": _extract_value(_safe_get(b, 'difficultyLevel')),
+                "difficultyLevel": row["difficultyLevel"],
                 "durationHours": duration,
-                "schedule": _extract_value(_safe_get(b, 'schedule')),
-                "activityLanguages": _extract_value(_safe_get(b, 'activityLanguages')),
+                "schedule": row["schedule"],
+                "activityLanguages": row["activityLanguages"],
                 "activityType": activity_type,
-                "bestTimeToVisit": _extract_value(_safe_get(b, 'bestTimeToVisit')),
-                "uri": _extract_value(_safe_get(b, 'activity')),
+                "bestTimeToVisit": row["bestTimeToVisit"],
+                "uri": row["uri"],
                 "time_slot": time_slots.get(day_index, ["09:00 - 11:00"])[idx % 3],
                 "eco_score": calculate_activity_score(price, rating, duration)
             }
@@ -315,6 +369,8 @@ def select_activities_for_day(
             print(f"DEBUG: Day {day_index} - Added activity: {activity_data['activityId']} - {activity_data['name']}")
 
         return activities
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"ERROR selecting activities for day {day_index}: {str(e)}")
         import traceback
@@ -3,7 +3,14 @@ from fastapi.responses import JSONResponse
 from typing import Optional, List
 from pydantic import BaseModel
 from math import radians, cos, sin, asin, sqrt
+import numpy as np
 from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select
+from app.services.sparql_entity_update import EntityUpdate
+from app.services.sparql_templates import TemplateParamError
+from app.services.type_closure import type_pattern, subclasses
+from app.services import catalog_snapshot, catalog_columns
+from app.api.responses import fast_json
+from app.config import settings
 
 router = APIRouter()
 
@@ -86,6 +93,11 @@ class RegionUpdate(BaseModel):
     mainAttractions: Optional[str] = None
 
 
+CITY_UPDATE = EntityUpdate.from_model(CityUpdate, rdf_type="City")
+NATURAL_SITE_UPDATE = EntityUpdate.from_model(NaturalSiteUpdate, rdf_type="NaturalSite")
+REGION_UPDATE = EntityUpdate.from_model(RegionUpdate, rdf_type="Region")
+
+
 # ============================================
 # CITY ENDPOINTS
 # ============================================
@@ -176,6 +188,41 @@ def create_region(region: RegionCreate):
 # GET ALL LOCATIONS
 # ============================================
 
+def _typed_query(type_clause: str, limit: int) -> str:
+    """Locations matching `type_clause`, with every type-specific property (shared with the catalog snapshot)"""
+    return f"""
+    PREFIX eco: <http://www.ecotourism.org/ontology#>
+    SELECT * WHERE {{
+        {type_clause}
+        OPTIONAL {{ ?location eco:locationId ?locationId . }}
+        OPTIONAL {{ ?location eco:locationName ?locationName . }}
+        OPTIONAL {{ ?location eco:latitude ?latitude . }}
+        OPTIONAL {{ ?location eco:longitude ?longitude . }}
+        OPTIONAL {{ ?location eco:address ?address . }}
+        OPTIONAL {{ ?location eco:locationDescription ?locationDescription . }}
+        OPTIONAL {{ ?location eco:population ?population . }}
+        OPTIONAL {{ ?location eco:postalCode ?postalCode . }}
+        OPTIONAL {{ ?location eco:touristAttractions ?touristAttractions . }}
+        OPTIONAL {{ ?location eco:protectedStatus ?protectedStatus . }}
+        OPTIONAL {{ ?location eco:biodiversityIndex ?biodiversityIndex . }}
+        OPTIONAL {{ ?location eco:areaSizeHectares ?areaSizeHectares . }}
+        OPTIONAL {{ ?location eco:entryFee ?entryFee . }}
+        OPTIONAL {{ ?location eco:climateType ?climateType . }}
+        OPTIONAL {{ ?location eco:regionArea ?regionArea . }}
+        OPTIONAL {{ ?location eco:mainAttractions ?mainAttractions . }}
+    }}
+    LIMIT {limit}
+    """
+
+
+# Columns returned by the untyped listing
+_SUMMARY_COLUMNS = ("location", "locationId", "locationName", "latitude", "longitude", "address", "locationDescription")
+
+catalog_snapshot.register(
+    "locations", lambda limit: _typed_query(type_pattern("location", "Location"), limit), subject="location"
+)
+
+
 @router.get("/", summary="Get all locations")
 def get_all_locations(
         location_type: Optional[str] = Query(None, description="Type: City, Region, NaturalSite"),
@@ -183,39 +230,20 @@ def get_all_locations(
 ):
     """Retrieve all locations, optionally filtered by type"""
     try:
+        snapshot_rows = catalog_snapshot.rows("locations", rdf_type=location_type, limit=limit)
+        if snapshot_rows is not None:
+            columns = None if location_type else _SUMMARY_COLUMNS
+            locations = [{k: v.get('value') for k, v in binding.items() if columns is None or k in columns}
+                         for binding in snapshot_rows]
+            return fast_json({"locations": locations, "count": len(locations)})
+
         if location_type:
-            sparql = f"""
-            PREFIX eco: <http://www.ecotourism.org/ontology#>
-            SELECT * WHERE {{
-                ?location a eco:{location_type} .
-                OPTIONAL {{ ?location eco:locationId ?locationId . }}
-                OPTIONAL {{ ?location eco:locationName ?locationName . }}
-                OPTIONAL {{ ?location eco:latitude ?latitude . }}
-                OPTIONAL {{ ?location eco:longitude ?longitude . }}
-                OPTIONAL {{ ?location eco:address ?address . }}
-                OPTIONAL {{ ?location eco:locationDescription ?locationDescription . }}
-                OPTIONAL {{ ?location eco:population ?population . }}
-                OPTIONAL {{ ?location eco:postalCode ?postalCode . }}
-                OPTIONAL {{ ?location eco:touristAttractions ?touristAttractions . }}
-                OPTIONAL {{ ?location eco:protectedStatus ?protectedStatus . }}
-                OPTIONAL {{ ?location eco:biodiversityIndex ?biodiversityIndex . }}
-                OPTIONAL {{ ?location eco:areaSizeHectares ?areaSizeHectares . }}
-                OPTIONAL {{ ?location eco:entryFee ?entryFee . }}
-                OPTIONAL {{ ?location eco:climateType ?climateType . }}
-                OPTIONAL {{ ?location eco:regionArea ?regionArea . }}
-                OPTIONAL {{ ?location eco:mainAttractions ?mainAttractions . }}
-            }}
-            LIMIT {limit}
-            """
+            sparql = _typed_query(f"?location a eco:{location_type} .", limit)
         else:
             sparql = f"""
             PREFIX eco: <http://www.ecotourism.org/ontology#>
             SELECT * WHERE {{
-                {{ ?location a eco:City . }}
-                UNION
-                {{ ?location a eco:NaturalSite . }}
-                UNION
-                {{ ?location a eco:Region . }}
+                {type_pattern("location", "Location")}
 
                 OPTIONAL {{ ?location eco:locationId ?locationId . }}
                 OPTIONAL {{ ?location eco:locationName ?locationName . }}
@@ -235,7 +263,7 @@ def get_all_locations(
                 location = {k: v.get('value') for k, v in binding.items()}
                 locations.append(location)
 
-        return {"locations": locations, "count": len(locations)}
+        return fast_json({"locations": locations, "count": len(locations)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -352,31 +380,21 @@ def get_regions(limit: int = Query(100, ge=1, le=500)):
 def update_city(location_id: str, city: CityUpdate):
     """Update city-specific fields"""
     try:
-        updated_fields = []
-
-        for field, value in city.dict(exclude_none=True).items():
-            if value is not None:
-                datatype = ""
-                if field in ["latitude", "longitude"]:
-                    datatype = "^^<http://www.w3.org/2001/XMLSchema#float>"
-                elif field == "population":
-                    datatype = "^^<http://www.w3.org/2001/XMLSchema#integer>"
-
-                sparql = f"""
-                PREFIX eco: <http://www.ecotourism.org/ontology#>
-                DELETE {{ eco:{location_id} eco:{field} ?old . }}
-                INSERT {{ eco:{location_id} eco:{field} "{value}"{datatype} . }}
-                WHERE {{ OPTIONAL {{ eco:{location_id} eco:{field} ?old . }} }}
-                """
-                sparql_update(sparql)
-                updated_fields.append(field)
-
-        if not updated_fields:
+        # Tous les champs fournis en une seule requête (une transaction)
+        changes = CITY_UPDATE.changes(city)
+        if not changes:
             raise HTTPException(status_code=400, detail="No fields to update")
 
+        if not sparql_select(CITY_UPDATE.exists_query(location_id))["results"]["bindings"]:
+            raise HTTPException(status_code=404, detail=f"City '{location_id}' not found")
+        sparql_update(CITY_UPDATE.build(changes, iri=location_id))
+        updated_fields = list(changes)
+
         return {"status": "updated", "location_id": location_id, "updated_fields": updated_fields}
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -385,32 +403,21 @@ def update_city(location_id: str, city: CityUpdate):
 def update_natural_site(location_id: str, site: NaturalSiteUpdate):
     """Update natural site-specific fields"""
     try:
-        updated_fields = []
-
-        for field, value in site.dict(exclude_none=True).items():
-            if value is not None:
-                datatype = ""
-                if field in ["latitude", "longitude", "biodiversityIndex", "areaSizeHectares", "entryFee"]:
-                    datatype = "^^<http://www.w3.org/2001/XMLSchema#float>"
-                elif field == "protectedStatus":
-                    value = str(value).lower()
-                    datatype = "^^<http://www.w3.org/2001/XMLSchema#boolean>"
-
-                sparql = f"""
-                PREFIX eco: <http://www.ecotourism.org/ontology#>
-                DELETE {{ eco:{location_id} eco:{field} ?old . }}
-                INSERT {{ eco:{location_id} eco:{field} "{value}"{datatype} . }}
-                WHERE {{ OPTIONAL {{ eco:{location_id} eco:{field} ?old . }} }}
-                """
-                sparql_update(sparql)
-                updated_fields.append(field)
-
-        if not updated_fields:
+        # Tous les champs fournis en une seule requête (une transaction)
+        changes = NATURAL_SITE_UPDATE.changes(site)
+        if not changes:
             raise HTTPException(status_code=400, detail="No fields to update")
 
+        if not sparql_select(NATURAL_SITE_UPDATE.exists_query(location_id))["results"]["bindings"]:
+            raise HTTPException(status_code=404, detail=f"Natural site '{location_id}' not found")
+        sparql_update(NATURAL_SITE_UPDATE.build(changes, iri=location_id))
+        updated_fields = list(changes)
+
         return {"status": "updated", "location_id": location_id, "updated_fields": updated_fields}
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -419,29 +426,21 @@ def update_natural_site(location_id: str, site: NaturalSiteUpdate):
 def update_region(location_id: str, region: RegionUpdate):
     """Update region-specific fields"""
     try:
-        updated_fields = []
-
-        for field, value in region.dict(exclude_none=True).items():
-            if value is not None:
-                datatype = ""
-                if field in ["latitude", "longitude", "regionArea"]:
-                    datatype = "^^<http://www.w3.org/2001/XMLSchema#float>"
-
-                sparql = f"""
-                PREFIX eco: <http://www.ecotourism.org/ontology#>
-                DELETE {{ eco:{location_id} eco:{field} ?old . }}
-                INSERT {{ eco:{location_id} eco:{field} "{value}"{datatype} . }}
-                WHERE {{ OPTIONAL {{ eco:{location_id} eco:{field} ?old . }} }}
-                """
-                sparql_update(sparql)
-                updated_fields.append(field)
-
-        if not updated_fields:
+        # Tous les champs fournis en une seule requête (une transaction)
+        changes = REGION_UPDATE.changes(region)
+        if not changes:
             raise HTTPException(status_code=400, detail="No fields to update")
 
+        if not sparql_select(REGION_UPDATE.exists_query(location_id))["results"]["bindings"]:
+            raise HTTPException(status_code=404, detail=f"Region '{location_id}' not found")
+        sparql_update(REGION_UPDATE.build(changes, iri=location_id))
+        updated_fields = list(changes)
+
         return {"status": "updated", "location_id": location_id, "updated_fields": updated_fields}
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -598,11 +597,16 @@ def find_nearby_locations(
         location_type: Optional[str] = Query(None, description="Type: City, Region, NaturalSite")
 ):
     """Find all locations within specified radius using Haversine formula"""
+    nearby = catalog_columns.answer(
+        "locations", lambda table: _nearby_from_columns(table, latitude, longitude, radius_km, location_type))
+    if nearby is not None:
+        return nearby
+
     sparql = f"""
     PREFIX eco: <http://www.ecotourism.org/ontology#>
     SELECT ?location ?locationName ?latitude ?longitude ?distance
     WHERE {{
-        {'{ ?location a eco:' + location_type + ' . }' if location_type else '{ { ?location a eco:City . } UNION { ?location a eco:NaturalSite . } UNION { ?location a eco:Region . } }'}
+        {'?location a eco:' + location_type + ' .' if location_type else type_pattern("location", "Location")}
         ?location eco:locationName ?locationName .
         ?location eco:latitude ?latitude .
         ?location eco:longitude ?longitude .
@@ -639,6 +643,34 @@ def find_nearby_locations(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _nearby_from_columns(table, latitude: float, longitude: float, radius_km: float, location_type: Optional[str]):
+    """Same answer as the SPARQL path, computed over the memory-mapped location columns"""
+    if location_type:
+        classes = [location_type]
+    elif settings.SPARQL_TYPE_CLOSURE_ENABLED:
+        classes = ["Location"]
+    else:
+        classes = subclasses("Location") or ["Location"]  # same classes as type_pattern's UNION
+    mask = catalog_columns.has_type(table, classes) & (table["locationName"] != "")
+    distances = catalog_columns.haversine_km(latitude, longitude, table["latitude"], table["longitude"])
+    within = np.flatnonzero(mask & (distances <= radius_km))
+    within = within[np.argsort(distances[within], kind="stable")]
+
+    nearby_locations = [{
+        "location": str(table["iri"][i]),
+        "locationName": str(table["locationName"][i]),
+        "latitude": str(table["latitude_text"][i]),
+        "longitude": str(table["longitude_text"][i]),
+        "distance_km": round(float(distances[i]), 2),
+    } for i in within]
+    return {
+        "center": {"lat": latitude, "lon": longitude},
+        "radius_km": radius_km,
+        "locations": nearby_locations,
+        "count": len(nearby_locations)
+    }
+
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two points using Haversine formula"""
     lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
@@ -0,0 +1,50 @@
+# app/api/endpoints/metrics.py - Métriques d'exécution de la couche SPARQL
+
+from fastapi import APIRouter
+from datetime import datetime
+from app.services.sparql_gateway import gateway
+from app.services.sparql_cache import result_cache
+from app.services import sparql_singleflight, sparql_breaker, sparql_templates, sparql_replicas, sparql_batcher, sparql_refresh, embedded_store, dataset_versions, catalog_snapshot, catalog_columns
+from app.config import settings
+from app.api import bulkhead, compression, responses
+
+router = APIRouter()
+
+
+@router.get("/sparql", summary="Métriques SPARQL par appelant")
+def get_sparql_metrics():
+    """Appels, erreurs, retries et latences de la passerelle SPARQL, par service appelant, état du cache et de sa relecture en arrière-plan, coalescence, disjoncteur, réplicas, lots d'écriture, versions des données (ETag), snapshot partagé du catalogue et catalogue en colonnes"""
+    return {
+        "backend": embedded_store.stats() if embedded_store.enabled() else {"backend": settings.SPARQL_BACKEND},
+        "gateway": gateway.stats(),
+        "cache": result_cache.stats(),
+        "refresh": sparql_refresh.stats(),
+        "single_flight": sparql_singleflight.stats(),
+        "circuit_breaker": sparql_breaker.stats(),
+        "templates": sparql_templates.stats(),
+        "replicas": sparql_replicas.stats(),
+        "update_batches": sparql_batcher.stats(),
+        "dataset_versions": dataset_versions.stats(),
+        "catalog_snapshot": catalog_snapshot.stats(),
+        "catalog_columns": catalog_columns.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.get("/bulkheads", summary="Occupation des cloisons de concurrence")
+def get_bulkhead_metrics():
+    """Places actives, file d'attente, refus (file pleine / attente trop longue) et temps d'attente par cloison"""
+    return {
+        **bulkhead.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.get("/http", summary="Sérialisation et compression des réponses")
+def get_http_metrics():
+    """Sérialiseur JSON des listes (orjson ou json) et compression par encodage : réponses, octets avant / après, réponses non compressées"""
+    return {
+        "fast_json": responses.enabled(),
+        "compression": compression.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
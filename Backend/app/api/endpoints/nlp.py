@@ -4,11 +4,15 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from app.services.nlp_query_processor import NLPQueryProcessor, AdvancedNLPProcessor
 from app.services.ecotourism_client import EcotourismClient
+from app.api.streaming import raw_bindings_response
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Instance partagée (pas de construction par requête)
+client = EcotourismClient()
+
 
 class QuestionInput(BaseModel):
     question: str = Field(..., example="Trouvez-moi des activités faciles pour l'été")
@@ -23,20 +27,17 @@ def nlp_query(input_data: QuestionInput):
         processor = AdvancedNLPProcessor() if input_data.use_advanced_nlp else NLPQueryProcessor()
         nlp_result = processor.process_question(input_data.question)
 
-        # 2. Exécuter la requête SPARQL générée
-        client = EcotourismClient()
-        results = client.execute_query(nlp_result["sparql_query"])
+        # 2. Exécuter la requête SPARQL générée (bindings renvoyés tels que reçus de Fuseki)
+        raw = client.execute_query_raw(nlp_result["sparql_query"])
 
-        return {
+        return raw_bindings_response(raw, {
             "question": input_data.question,
             "query_type": nlp_result["query_type"],
             "filters": nlp_result["filters"],
             "entities": nlp_result["entities"],
             "confidence": nlp_result["confidence"],
-            "sparql_query": nlp_result["sparql_query"],  # Ajout pour debug
-            "results": results,
-            "count": len(results)
-        }
+            "sparql_query": nlp_result["sparql_query"]  # Ajout pour debug
+        })
     except Exception as e:
         logger.error(f"Erreur NLP: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,6 +2,10 @@ from fastapi import APIRouter, Query, HTTPException, Body
 from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
+from app.services.sparql_decoder import BindingDecoder, Column, XSD_BOOLEAN, XSD_DECIMAL, XSD_DATETIME
+from app.services.sparql_entity_update import EntityUpdate
+from app.services.sparql_templates import TemplateParamError
+from app.services import catalog_snapshot
 
 router = APIRouter()
 
@@ -26,6 +30,12 @@ class SeasonUpdateRequest(BaseModel):
     peakTourismSeason: Optional[bool] = None
 
 
+# Dates reçues en chaînes ISO, stockées en xsd:dateTime
+SEASON_UPDATE = EntityUpdate.from_model(
+    SeasonUpdateRequest, types={"startDate": XSD_DATETIME, "endDate": XSD_DATETIME}
+)
+
+
 class SeasonResponse(BaseModel):
     uri: str
     seasonName: str
@@ -56,47 +66,55 @@ def _extract_value(val):
     return val
 
 
-def _parse_season(binding):
-    """Parse un binding SPARQL en saison"""
-    return {
-        "uri": _extract_value(_safe_get(binding, 'season')),
-        "seasonName": _extract_value(_safe_get(binding, 'seasonName')),
-        "startDate": _extract_value(_safe_get(binding, 'startDate')),
-        "endDate": _extract_value(_safe_get(binding, 'endDate')),
-        "averageTemperature": float(_extract_value(_safe_get(binding, 'averageTemperature')) or 0) if _safe_get(binding,
-                                                                                                                'averageTemperature') else None,
-        "peakTourismSeason": (_extract_value(_safe_get(binding, 'peakTourismSeason')) == 'true') if _safe_get(binding,
-                                                                                                              'peakTourismSeason') else None
-    }
+# Schéma d'un binding SPARQL saison
+SEASON_DECODER = BindingDecoder([
+    Column("uri", var="season"),
+    Column("seasonName"),
+    Column("startDate"),
+    Column("endDate"),
+    Column("averageTemperature", XSD_DECIMAL),
+    Column("peakTourismSeason", XSD_BOOLEAN)
+])
+_parse_season = SEASON_DECODER.row
 
 
 # ============================================
 # ENDPOINTS
 # ============================================
 
+def _search_query(limit: int) -> str:
+    """Liste des saisons, partagée avec le snapshot du catalogue"""
+    return f"""
+    PREFIX eco: <http://www.ecotourism.org/ontology#>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+    SELECT ?season ?seasonName ?startDate ?endDate ?averageTemperature ?peakTourismSeason
+    WHERE {{
+        ?season rdf:type eco:Season ;
+                eco:seasonName ?seasonName .
+        OPTIONAL {{ ?season eco:startDate ?startDate . }}
+        OPTIONAL {{ ?season eco:endDate ?endDate . }}
+        OPTIONAL {{ ?season eco:averageTemperature ?averageTemperature . }}
+        OPTIONAL {{ ?season eco:peakTourismSeason ?peakTourismSeason . }}
+    }}
+    LIMIT {limit}
+    """
+
+
+catalog_snapshot.register("seasons", _search_query, subject="season")
+
+
 @router.get("/", summary="Rechercher toutes les saisons")
 def search_seasons(limit: int = Query(10, ge=1, le=100)):
     """Retourne toutes les saisons disponibles"""
     from app.services.sparql_helpers import sparql_select
 
     try:
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-        SELECT ?season ?seasonName ?startDate ?endDate ?averageTemperature ?peakTourismSeason
-        WHERE {{
-            ?season rdf:type eco:Season ;
-                    eco:seasonName ?seasonName .
-            OPTIONAL {{ ?season eco:startDate ?startDate . }}
-            OPTIONAL {{ ?season eco:endDate ?endDate . }}
-            OPTIONAL {{ ?season eco:averageTemperature ?averageTemperature . }}
-            OPTIONAL {{ ?season eco:peakTourismSeason ?peakTourismSeason . }}
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+        snapshot_rows = catalog_snapshot.rows("seasons", limit=limit)
+        if snapshot_rows is not None:
+            results = {"results": {"bindings": snapshot_rows}}
+        else:
+            results = sparql_select(_search_query(limit))
         bindings = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         seasons = [_parse_season(b) for b in bindings]
@@ -223,61 +241,12 @@ def update_season(season_id: str, update_data: SeasonUpdateRequest):
         if not binds:
             raise HTTPException(status_code=404, detail=f"Season '{season_id}' not found")
 
-        season_uri = _extract_value(_safe_get(binds[0], 'season'))
-
-        # Construire les clauses DELETE et INSERT
-        delete_clauses = []
-        insert_clauses = []
-        optional_clauses = []
-
-        def add_update(prop, val, is_bool=False, is_float=False, is_datetime=False):
-            if val is not None:
-                delete_clauses.append(f"?season eco:{prop} ?old{prop} .")
-                optional_clauses.append(f"OPTIONAL {{ ?season eco:{prop} ?old{prop} . }}")
-
-                if is_bool:
-                    insert_clauses.append(
-                        f'?season eco:{prop} "{str(val).lower()}"^^<http://www.w3.org/2001/XMLSchema#boolean> .')
-                elif is_float:
-                    insert_clauses.append(f'?season eco:{prop} "{val}"^^<http://www.w3.org/2001/XMLSchema#float> .')
-                elif is_datetime:
-                    insert_clauses.append(f'?season eco:{prop} "{val}"^^<http://www.w3.org/2001/XMLSchema#dateTime> .')
-                elif isinstance(val, str):
-                    insert_clauses.append(f'?season eco:{prop} "{val}" .')
-
-        # Ajouter toutes les modifications possibles
-        add_update("seasonName", update_data.seasonName)
-        add_update("startDate", update_data.startDate, is_datetime=True)
-        add_update("endDate", update_data.endDate, is_datetime=True)
-        add_update("averageTemperature", update_data.averageTemperature, is_float=True)
-        add_update("peakTourismSeason", update_data.peakTourismSeason, is_bool=True)
-
-        if not delete_clauses:
+        # Tous les champs modifiés en une seule requête (une transaction)
+        updated_fields = SEASON_UPDATE.changes(update_data)
+        if not updated_fields:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        delete_str = "\n        ".join(delete_clauses)
-        insert_str = "\n        ".join(insert_clauses)
-        optional_str = "\n        ".join(optional_clauses)
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-
-        DELETE {{
-            {delete_str}
-        }}
-        INSERT {{
-            {insert_str}
-        }}
-        WHERE {{
-            ?season eco:seasonName "{season_id}" .
-            {optional_str}
-        }}
-        """
-
-        result = sparql_update(sparql)
-
-        # Récupérer les champs modifiés
-        updated_fields = {k: v for k, v in update_data.dict().items() if v is not None}
+        result = sparql_update(SEASON_UPDATE.build(updated_fields, key=("seasonName", season_id)))
 
         return {
             "status": "success",
@@ -287,6 +256,8 @@ def update_season(season_id: str, update_data: SeasonUpdateRequest):
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,7 +3,13 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from enum import Enum
-from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select
+from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select, stream_select, select_template
+from app.services.sparql_templates import register, Param, TemplateParamError, IRI, STRING, INTEGER, BOOLEAN
+from app.api.streaming import streaming_list_response
+from app.services.sparql_decoder import BindingDecoder, Column, XSD_BOOLEAN, XSD_DECIMAL, XSD_INTEGER
+from app.services.sparql_entity_update import EntityUpdate
+from app.services.type_closure import type_pattern
+from app.services import catalog_snapshot
 
 router = APIRouter()
 
@@ -121,6 +127,10 @@ class IndicatorUpdate(BaseModel):
     targetValue: Optional[float] = None
 
 
+PRODUCT_UPDATE = EntityUpdate.from_model(LocalProductUpdate)
+INDICATOR_UPDATE = EntityUpdate.from_model(IndicatorUpdate)
+
+
 # ============================================
 # HELPERS
 # ============================================
@@ -142,32 +152,39 @@ def _extract_value(val):
     return val
 
 
-def _parse_product(bind):
-    """Parse un binding SPARQL en produit"""
-    return {
-        "productId": _extract_value(_safe_get(bind, 'productId')),
-        "productName": _extract_value(_safe_get(bind, 'productName')),
-        "productDescription": _extract_value(_safe_get(bind, 'productDescription')),
-        "productPrice": float(_extract_value(_safe_get(bind, 'productPrice')) or 0) if _safe_get(bind,
-                                                                                                 'productPrice') else None,
-        "productCategory": _extract_value(_safe_get(bind, 'productCategory')),
-        "isOrganic": (_extract_value(_safe_get(bind, 'isOrganic')) == 'true') if _safe_get(bind,
-                                                                                           'isOrganic') else False,
-        "isHandmade": (_extract_value(_safe_get(bind, 'isHandmade')) == 'true') if _safe_get(bind,
-                                                                                             'isHandmade') else False,
-        "producerName": _extract_value(_safe_get(bind, 'producerName')),
-        "stockQuantity": int(_extract_value(_safe_get(bind, 'stockQuantity')) or 0) if _safe_get(bind,
-                                                                                                 'stockQuantity') else 0,
-        "fairTradeCertified": (_extract_value(_safe_get(bind, 'fairTradeCertified')) == 'true') if _safe_get(bind,
-                                                                                                             'fairTradeCertified') else False,
-        "uri": _extract_value(_safe_get(bind, 'product'))
-    }
+# Schéma d'un binding SPARQL produit
+PRODUCT_DECODER = BindingDecoder([
+    Column("productId"),
+    Column("productName"),
+    Column("productDescription"),
+    Column("productPrice", XSD_DECIMAL),
+    Column("productCategory"),
+    Column("isOrganic", XSD_BOOLEAN, default=False),
+    Column("isHandmade", XSD_BOOLEAN, default=False),
+    Column("producerName"),
+    Column("stockQuantity", XSD_INTEGER, default=0),
+    Column("fairTradeCertified", XSD_BOOLEAN, default=False),
+    Column("uri", var="product")
+])
+_parse_product = PRODUCT_DECODER.row
+
+
+# Schéma d'un binding SPARQL indicateur (le type est déduit de l'URI)
+INDICATOR_DECODER = BindingDecoder([
+    Column("indicatorId"),
+    Column("indicatorName"),
+    Column("indicatorValue", XSD_DECIMAL),
+    Column("measurementUnit"),
+    Column("measurementDate"),
+    Column("targetValue", XSD_DECIMAL)
+])
 
 
 def _parse_indicator(bind):
     """Parse un binding SPARQL en indicateur"""
+    indicator = INDICATOR_DECODER.row(bind)
     indicator_type = "Unknown"
-    indicator_uri = _extract_value(_safe_get(bind, 'indicator'))
+    indicator_uri = _extract_value(bind.get('indicator'))
     if indicator_uri:
         if 'CarbonFootprint' in indicator_uri or 'Carbon' in indicator_uri:
             indicator_type = "CarbonFootprint"
@@ -175,19 +192,135 @@ def _parse_indicator(bind):
             indicator_type = "RenewableEnergyUsage"
         elif 'Water' in indicator_uri:
             indicator_type = "WaterConsumption"
+    indicator["indicatorType"] = indicator_type
+    indicator["uri"] = indicator_uri
+    return indicator
+
+
+# ============================================
+# REQUÊTES PRÉPARÉES
+# ============================================
 
-    return {
-        "indicatorId": _extract_value(_safe_get(bind, 'indicatorId')),
-        "indicatorName": _extract_value(_safe_get(bind, 'indicatorName')),
-        "indicatorValue": float(_extract_value(_safe_get(bind, 'indicatorValue')) or 0) if _safe_get(bind,
-                                                                                                     'indicatorValue') else None,
-        "measurementUnit": _extract_value(_safe_get(bind, 'measurementUnit')),
-        "measurementDate": _extract_value(_safe_get(bind, 'measurementDate')),
-        "targetValue": float(_extract_value(_safe_get(bind, 'targetValue')) or 0) if _safe_get(bind,
-                                                                                               'targetValue') else None,
-        "indicatorType": indicator_type,
-        "uri": indicator_uri
-    }
+PRODUCT_SEARCH = register("products.search", """
+SELECT ?product ?productId ?productName ?productDescription ?productPrice
+       ?productCategory ?isOrganic ?isHandmade ?producerName ?stockQuantity ?fairTradeCertified
+WHERE {
+  VALUES ?productCategory { ${category} }
+  ?product a eco:LocalProduct ;
+           eco:productId ?productId ;
+           eco:productName ?productName ;
+           eco:productPrice ?productPrice ;
+           eco:productCategory ?productCategory ;
+           eco:isOrganic ?isOrganic ;
+           eco:isHandmade ?isHandmade ;
+           eco:producerName ?producerName ;
+           eco:stockQuantity ?stockQuantity ;
+           eco:fairTradeCertified ?fairTradeCertified .
+  OPTIONAL { ?product eco:productDescription ?productDescription }
+  FILTER(!${organic_only} || ?isOrganic = "true"^^xsd:boolean)
+}
+LIMIT ${limit}
+""", category=Param(STRING, values=True, default=None), organic_only=Param(BOOLEAN, default=False),
+    limit=Param(INTEGER))
+
+catalog_snapshot.register(
+    "products", lambda limit: PRODUCT_SEARCH.render(category=None, organic_only=False, limit=limit), subject="product"
+)
+
+# Produits filtrés sur un drapeau booléen (artisanal, commerce équitable)
+PRODUCT_BY_FLAG = {
+    flag: register(f"products.{flag}", """
+SELECT ?product ?productId ?productName ?productPrice ?productCategory ?producerName
+WHERE {
+  ?product a eco:LocalProduct ;
+           eco:productId ?productId ;
+           eco:productName ?productName ;
+           eco:productPrice ?productPrice ;
+           eco:productCategory ?productCategory ;
+           eco:producerName ?producerName ;
+           eco:%s "true"^^xsd:boolean .
+}
+LIMIT ${limit}
+""" % flag, limit=Param(INTEGER))
+    for flag in ("isHandmade", "fairTradeCertified")
+}
+
+PRODUCT_LOW_STOCK = register("products.low_stock", """
+SELECT ?product ?productId ?productName ?stockQuantity ?productPrice
+WHERE {
+  ?product a eco:LocalProduct ;
+           eco:productId ?productId ;
+           eco:productName ?productName ;
+           eco:stockQuantity ?stockQuantity ;
+           eco:productPrice ?productPrice .
+  FILTER(?stockQuantity < ${threshold})
+}
+ORDER BY ASC(?stockQuantity)
+""", threshold=Param(INTEGER))
+
+PRODUCT_EXISTS = register("products.exists", """
+SELECT ?product
+WHERE {
+  ?product eco:productId ${product_id} .
+}
+LIMIT 1
+""", product_id=Param(STRING))
+
+PRODUCT_DETAIL = register("products.detail", """
+SELECT ?product ?productId ?productName ?productDescription ?productPrice
+       ?productCategory ?isOrganic ?isHandmade ?producerName ?stockQuantity ?fairTradeCertified
+WHERE {
+  ?product eco:productId ${product_id} ;
+           eco:productName ?productName ;
+           eco:productPrice ?productPrice ;
+           eco:productCategory ?productCategory ;
+           eco:isOrganic ?isOrganic ;
+           eco:isHandmade ?isHandmade ;
+           eco:producerName ?producerName ;
+           eco:stockQuantity ?stockQuantity ;
+           eco:fairTradeCertified ?fairTradeCertified .
+  BIND(${product_id} AS ?productId)
+  OPTIONAL { ?product eco:productDescription ?productDescription }
+}
+""", product_id=Param(STRING))
+
+INDICATOR_SEARCH = register("indicators.search", """
+SELECT ?indicator ?indicatorId ?indicatorName ?indicatorValue ?measurementUnit
+       ?measurementDate ?targetValue
+WHERE {
+  VALUES ?indicatorClass { ${indicator_types} }
+  ?indicator a ?indicatorClass ;
+             eco:indicatorId ?indicatorId ;
+             eco:indicatorName ?indicatorName ;
+             eco:indicatorValue ?indicatorValue ;
+             eco:measurementUnit ?measurementUnit ;
+             eco:measurementDate ?measurementDate .
+  OPTIONAL { ?indicator eco:targetValue ?targetValue }
+}
+LIMIT ${limit}
+""", indicator_types=Param(IRI, values=True), limit=Param(INTEGER))
+
+INDICATOR_EXISTS = register("indicators.exists", """
+SELECT ?indicator
+WHERE {
+  ?indicator eco:indicatorId ${indicator_id} .
+}
+LIMIT 1
+""", indicator_id=Param(STRING))
+
+INDICATOR_DETAIL = register("indicators.detail", """
+SELECT ?indicator ?indicatorId ?indicatorName ?indicatorValue ?measurementUnit
+       ?measurementDate ?targetValue
+WHERE {
+  ?indicator eco:indicatorId ${indicator_id} ;
+             eco:indicatorName ?indicatorName ;
+             eco:indicatorValue ?indicatorValue ;
+             eco:measurementUnit ?measurementUnit ;
+             eco:measurementDate ?measurementDate .
+  BIND(${indicator_id} AS ?indicatorId)
+  OPTIONAL { ?indicator eco:targetValue ?targetValue }
+}
+""", indicator_id=Param(STRING))
 
 
 # ============================================
@@ -202,41 +335,21 @@ def search_local_products(
 ):
     """Retourne tous les produits locaux avec filtres optionnels"""
     try:
-        filters = []
-        if category:
-            filters.append(f'FILTER(?productCategory = "{category}")')
-        if organic_only:
-            filters.append('FILTER(?isOrganic = "true"^^xsd:boolean)')
-
-        filter_str = "\n          ".join(filters) if filters else ""
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        SELECT ?product ?productId ?productName ?productDescription ?productPrice 
-               ?productCategory ?isOrganic ?isHandmade ?producerName ?stockQuantity ?fairTradeCertified
-        WHERE {{
-          ?product a eco:LocalProduct ;
-                   eco:productId ?productId ;
-                   eco:productName ?productName ;
-                   eco:productPrice ?productPrice ;
-                   eco:productCategory ?productCategory ;
-                   eco:isOrganic ?isOrganic ;
-                   eco:isHandmade ?isHandmade ;
-                   eco:producerName ?producerName ;
-                   eco:stockQuantity ?stockQuantity ;
-                   eco:fairTradeCertified ?fairTradeCertified .
-          OPTIONAL {{ ?product eco:productDescription ?productDescription }}
-          {filter_str}
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+        snapshot_rows = catalog_snapshot.rows(
+            "products", limit=limit,
+            where=lambda b: (category is None or b["productCategory"]["value"] == category)
+            and (not organic_only or b["isOrganic"]["value"] in ("true", "1"))
+        )
+        if snapshot_rows is not None:
+            results = {"results": {"bindings": snapshot_rows}}
+        else:
+            results = select_template(PRODUCT_SEARCH, category=category, organic_only=organic_only, limit=limit)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         products = [_parse_product(b) for b in binds]
 
         return {"status": "success", "count": len(products), "products": products}
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -245,23 +358,7 @@ def search_local_products(
 def get_handmade_products(limit: int = Query(20, ge=1, le=100)):
     """Retourne tous les produits faits main"""
     try:
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        SELECT ?product ?productId ?productName ?productPrice ?productCategory ?producerName
-        WHERE {{
-          ?product a eco:LocalProduct ;
-                   eco:productId ?productId ;
-                   eco:productName ?productName ;
-                   eco:productPrice ?productPrice ;
-                   eco:productCategory ?productCategory ;
-                   eco:producerName ?producerName ;
-                   eco:isHandmade "true"^^xsd:boolean .
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(PRODUCT_BY_FLAG["isHandmade"], limit=limit)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         products = [_parse_product(b) for b in binds]
 
@@ -274,23 +371,7 @@ def get_handmade_products(limit: int = Query(20, ge=1, le=100)):
 def get_fair_trade_products(limit: int = Query(20, ge=1, le=100)):
     """Retourne tous les produits certifiés commerce équitable"""
     try:
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        SELECT ?product ?productId ?productName ?productPrice ?productCategory ?producerName
-        WHERE {{
-          ?product a eco:LocalProduct ;
-                   eco:productId ?productId ;
-                   eco:productName ?productName ;
-                   eco:productPrice ?productPrice ;
-                   eco:productCategory ?productCategory ;
-                   eco:producerName ?producerName ;
-                   eco:fairTradeCertified "true"^^xsd:boolean .
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(PRODUCT_BY_FLAG["fairTradeCertified"], limit=limit)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         products = [_parse_product(b) for b in binds]
 
@@ -330,21 +411,7 @@ def get_cheapest_products():
 def get_low_stock_products(threshold: int = Query(50, description="Seuil de stock")):
     """Retourne les produits avec un stock inférieur au seuil"""
     try:
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?product ?productId ?productName ?stockQuantity ?productPrice
-        WHERE {{
-          ?product a eco:LocalProduct ;
-                   eco:productId ?productId ;
-                   eco:productName ?productName ;
-                   eco:stockQuantity ?stockQuantity ;
-                   eco:productPrice ?productPrice .
-          FILTER(?stockQuantity < {threshold})
-        }}
-        ORDER BY ASC(?stockQuantity)
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(PRODUCT_LOW_STOCK, threshold=threshold)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         products = [_parse_product(b) for b in binds]
 
@@ -456,11 +523,8 @@ def get_all_products():
         }
         """
 
-        results = sparql_select(sparql)
-        binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
-        products = [_parse_product(b) for b in binds]
-
-        return {"status": "success", "count": len(products), "products": products}
+        # Pas de LIMIT : décodage et sérialisation au fil de l'eau
+        return streaming_list_response("products", stream_select(sparql), _parse_product)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -469,41 +533,13 @@ def get_all_products():
 def get_local_product(product_id: str):
     """Récupère les détails d'un produit local"""
     try:
-        check_sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?product
-        WHERE {{
-          ?product eco:productId "{product_id}" .
-        }}
-        LIMIT 1
-        """
-
-        check_result = sparql_select(check_sparql)
+        check_result = select_template(PRODUCT_EXISTS, product_id=product_id)
         binds = check_result.get('results', {}).get('bindings', []) if isinstance(check_result, dict) else []
 
         if not binds:
             raise HTTPException(status_code=404, detail=f"Product '{product_id}' not found")
 
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?product ?productId ?productName ?productDescription ?productPrice 
-               ?productCategory ?isOrganic ?isHandmade ?producerName ?stockQuantity ?fairTradeCertified
-        WHERE {{
-          ?product eco:productId "{product_id}" ;
-                   eco:productName ?productName ;
-                   eco:productPrice ?productPrice ;
-                   eco:productCategory ?productCategory ;
-                   eco:isOrganic ?isOrganic ;
-                   eco:isHandmade ?isHandmade ;
-                   eco:producerName ?producerName ;
-                   eco:stockQuantity ?stockQuantity ;
-                   eco:fairTradeCertified ?fairTradeCertified .
-          BIND("{product_id}" AS ?productId)
-          OPTIONAL {{ ?product eco:productDescription ?productDescription }}
-        }}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(PRODUCT_DETAIL, product_id=product_id)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         if not binds:
@@ -580,49 +616,11 @@ def update_local_product(product_id: str, update: LocalProductUpdate):
         if not binds:
             raise HTTPException(status_code=404, detail=f"Product '{product_id}' not found")
 
-        if all(v is None for v in update.dict().values()):
+        updated_fields = PRODUCT_UPDATE.changes(update)
+        if not updated_fields:
             raise HTTPException(status_code=400, detail="Au moins un champ doit être fourni")
 
-        delete_clauses = []
-        insert_clauses = []
-        where_clauses = [f'?product eco:productId "{product_id}" .']
-
-        if update.productPrice is not None:
-            delete_clauses.append("?product eco:productPrice ?oldPrice .")
-            insert_clauses.append(f'?product eco:productPrice "{update.productPrice}"^^xsd:float .')
-            where_clauses.append("OPTIONAL { ?product eco:productPrice ?oldPrice . }")
-
-        if update.stockQuantity is not None:
-            delete_clauses.append("?product eco:stockQuantity ?oldStock .")
-            insert_clauses.append(f'?product eco:stockQuantity "{update.stockQuantity}"^^xsd:integer .')
-            where_clauses.append("OPTIONAL { ?product eco:stockQuantity ?oldStock . }")
-
-        if update.productDescription is not None:
-            escaped = update.productDescription.replace('"', '\\"')
-            delete_clauses.append("?product eco:productDescription ?oldDesc .")
-            insert_clauses.append(f'?product eco:productDescription "{escaped}" .')
-            where_clauses.append("OPTIONAL { ?product eco:productDescription ?oldDesc . }")
-
-        delete_str = "\n            ".join(delete_clauses)
-        insert_str = "\n            ".join(insert_clauses)
-        where_str = "\n            ".join(where_clauses)
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        DELETE {{
-            {delete_str}
-        }}
-        INSERT {{
-            {insert_str}
-        }}
-        WHERE {{
-            {where_str}
-        }}
-        """
-
-        result = sparql_update(sparql)
-        updated_fields = {k: v for k, v in update.dict().items() if v is not None}
+        result = sparql_update(PRODUCT_UPDATE.build(updated_fields, key=("productId", product_id)))
 
         return {
             "status": "success",
@@ -632,6 +630,8 @@ def update_local_product(product_id: str, update: LocalProductUpdate):
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -661,32 +661,23 @@ def delete_local_product(product_id: str):
 def get_all_sustainability_indicators():
     """Retourne tous les indicateurs de durabilité (Carbon, Renewable Energy, Water)"""
     try:
-        sparql = """
+        sparql = f"""
         PREFIX eco: <http://www.ecotourism.org/ontology#>
         SELECT ?indicator ?indicatorId ?indicatorName ?indicatorValue ?measurementUnit ?measurementDate ?targetValue
-        WHERE {
-          {
-            ?indicator a eco:CarbonFootprint .
-          } UNION {
-            ?indicator a eco:RenewableEnergyUsage .
-          } UNION {
-            ?indicator a eco:WaterConsumption .
-          }
+        WHERE {{
+          {type_pattern("indicator", "SustainabilityIndicator")}
           ?indicator eco:indicatorId ?indicatorId ;
                      eco:indicatorName ?indicatorName ;
                      eco:indicatorValue ?indicatorValue ;
                      eco:measurementUnit ?measurementUnit ;
                      eco:measurementDate ?measurementDate .
-          OPTIONAL { ?indicator eco:targetValue ?targetValue }
-        }
+          OPTIONAL {{ ?indicator eco:targetValue ?targetValue }}
+        }}
         ORDER BY ?indicatorId
         """
 
-        results = sparql_select(sparql)
-        binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
-        indicators = [_parse_indicator(b) for b in binds]
-
-        return {"status": "success", "count": len(indicators), "indicators": indicators}
+        # Pas de LIMIT : décodage et sérialisation au fil de l'eau
+        return streaming_list_response("indicators", stream_select(sparql), _parse_indicator)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -698,29 +689,14 @@ def search_sustainability_indicators(
 ):
     """Retourne tous les indicateurs de durabilité avec filtre optionnel par type"""
     try:
-        type_filter = f"a eco:{indicator_type} ;" if indicator_type else "?type ;"
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?indicator ?indicatorId ?indicatorName ?indicatorValue ?measurementUnit 
-               ?measurementDate ?targetValue
-        WHERE {{
-          ?indicator {type_filter}
-                     eco:indicatorId ?indicatorId ;
-                     eco:indicatorName ?indicatorName ;
-                     eco:indicatorValue ?indicatorValue ;
-                     eco:measurementUnit ?measurementUnit ;
-                     eco:measurementDate ?measurementDate .
-          OPTIONAL {{ ?indicator eco:targetValue ?targetValue }}
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+        indicator_types = [indicator_type] if indicator_type else [t.value for t in IndicatorType]
+        results = select_template(INDICATOR_SEARCH, indicator_types=indicator_types, limit=limit)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         indicators = [_parse_indicator(b) for b in binds]
 
         return {"status": "success", "count": len(indicators), "indicators": indicators}
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -729,37 +705,13 @@ def search_sustainability_indicators(
 def get_sustainability_indicator(indicator_id: str):
     """Récupère les détails d'un indicateur spécifique"""
     try:
-        check_sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?indicator
-        WHERE {{
-          ?indicator eco:indicatorId "{indicator_id}" .
-        }}
-        LIMIT 1
-        """
-
-        check_result = sparql_select(check_sparql)
+        check_result = select_template(INDICATOR_EXISTS, indicator_id=indicator_id)
         binds = check_result.get('results', {}).get('bindings', []) if isinstance(check_result, dict) else []
 
         if not binds:
             raise HTTPException(status_code=404, detail=f"Indicator '{indicator_id}' not found")
 
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?indicator ?indicatorId ?indicatorName ?indicatorValue ?measurementUnit 
-               ?measurementDate ?targetValue
-        WHERE {{
-          ?indicator eco:indicatorId "{indicator_id}" ;
-                     eco:indicatorName ?indicatorName ;
-                     eco:indicatorValue ?indicatorValue ;
-                     eco:measurementUnit ?measurementUnit ;
-                     eco:measurementDate ?measurementDate .
-          BIND("{indicator_id}" AS ?indicatorId)
-          OPTIONAL {{ ?indicator eco:targetValue ?targetValue }}
-        }}
-        """
-
-        results = sparql_select(sparql)
+        results = select_template(INDICATOR_DETAIL, indicator_id=indicator_id)
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         if not binds:
@@ -867,46 +819,13 @@ def update_sustainability_indicator(indicator_id: str, update: IndicatorUpdate):
         if not binds:
             raise HTTPException(status_code=404, detail=f"Indicator '{indicator_id}' not found")
 
-        if all(v is None for v in update.dict().values()):
+        updated_fields = INDICATOR_UPDATE.changes(update)
+        if not updated_fields:
             raise HTTPException(status_code=400, detail="Au moins un champ doit être fourni")
 
-        delete_clauses = []
-        insert_clauses = []
-        where_clauses = [f'?indicator eco:indicatorId "{indicator_id}" .']
-
-        if update.indicatorValue is not None:
-            delete_clauses.append("?indicator eco:indicatorValue ?oldValue .")
-            delete_clauses.append("?indicator eco:measurementDate ?oldDate .")
-            insert_clauses.append(f'?indicator eco:indicatorValue "{update.indicatorValue}"^^xsd:float .')
-            insert_clauses.append(f'?indicator eco:measurementDate "{datetime.now().isoformat()}"^^xsd:dateTime .')
-            where_clauses.append("OPTIONAL { ?indicator eco:indicatorValue ?oldValue . }")
-            where_clauses.append("OPTIONAL { ?indicator eco:measurementDate ?oldDate . }")
-
-        if update.targetValue is not None:
-            delete_clauses.append("?indicator eco:targetValue ?oldTarget .")
-            insert_clauses.append(f'?indicator eco:targetValue "{update.targetValue}"^^xsd:float .')
-            where_clauses.append("OPTIONAL { ?indicator eco:targetValue ?oldTarget . }")
-
-        delete_str = "\n            ".join(delete_clauses)
-        insert_str = "\n            ".join(insert_clauses)
-        where_str = "\n            ".join(where_clauses)
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        DELETE {{
-            {delete_str}
-        }}
-        INSERT {{
-            {insert_str}
-        }}
-        WHERE {{
-            {where_str}
-        }}
-        """
-
-        result = sparql_update(sparql)
-        updated_fields = {k: v for k, v in update.dict().items() if v is not None}
+        # Une nouvelle valeur mesurée date la mesure
+        extra = {"measurementDate": datetime.now()} if "indicatorValue" in updated_fields else None
+        result = sparql_update(INDICATOR_UPDATE.build(updated_fields, key=("indicatorId", indicator_id), extra=extra))
 
         return {
             "status": "success",
@@ -916,6 +835,8 @@ def update_sustainability_indicator(indicator_id: str, update: IndicatorUpdate):
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
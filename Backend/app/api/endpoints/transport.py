@@ -1,7 +1,13 @@
 from fastapi import APIRouter, Query, HTTPException, Body
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 from pydantic import BaseModel, Field
+import numpy as np
 from app.services.sparql_helpers import sparql_insert, sparql_update, sparql_delete, sparql_select
+from app.services.sparql_decoder import BindingDecoder, Column, XSD_BOOLEAN, XSD_DECIMAL, XSD_INTEGER
+from app.services.sparql_entity_update import EntityUpdate
+from app.services.sparql_templates import TemplateParamError
+from app.services import catalog_snapshot, catalog_columns
+from app.api.responses import fast_json
 
 router = APIRouter()
 
@@ -105,81 +111,95 @@ class TransportUpdate(BaseModel):
     operatingHours: Optional[str] = None
 
 
+TRANSPORT_UPDATE = EntityUpdate.from_model(TransportUpdate)
+
+
 # ============================================
 # HELPERS
 # ============================================
 
-def _safe_get(obj: Dict[str, Any], key: str, default=None):
-    try:
-        if isinstance(obj, dict):
-            return obj.get(key, default)
-        return default
-    except:
-        return default
+# Schéma d'un binding SPARQL transport (champs communs + Bike / EV / PT)
+TRANSPORT_DECODER = BindingDecoder([
+    Column("transportId"),
+    Column("transportName"),
+    Column("transportType"),
+    Column("pricePerKm", XSD_DECIMAL),
+    Column("carbonEmissionPerKm", XSD_DECIMAL),
+    Column("capacity", XSD_INTEGER),
+    Column("availability", XSD_BOOLEAN),
+    Column("operatingHours"),
+    Column("averageSpeed", XSD_DECIMAL),
+    Column("contactPhone"),
+    Column("bikeModel"),
+    Column("isElectric", XSD_BOOLEAN),
+    Column("batteryRange", XSD_DECIMAL),
+    Column("rentalPricePerHour", XSD_DECIMAL),
+    Column("frameSize"),
+    Column("vehicleModel"),
+    Column("vehicleBatteryRange", XSD_DECIMAL),
+    Column("chargingTime", XSD_INTEGER),
+    Column("seatingCapacity", XSD_INTEGER),
+    Column("dailyRentalPrice", XSD_DECIMAL),
+    Column("hasAirConditioning", XSD_BOOLEAN),
+    Column("lineNumber"),
+    Column("routeDescription"),
+    Column("ticketPrice", XSD_DECIMAL),
+    Column("frequencyMinutes", XSD_INTEGER),
+    Column("accessibleForDisabled", XSD_BOOLEAN),
+    Column("uri", var="transport")
+])
+_parse_transport = TRANSPORT_DECODER.row
 
 
-def _extract_value(val):
-    if val is None:
-        return None
-    if isinstance(val, dict) and 'value' in val:
-        return val['value']
-    return val
+# ============================================
+# ENDPOINTS CRUD DE BASE
+# ============================================
 
+def _search_query(type: Optional[str], limit: int) -> str:
+    """Liste des transports (tous, ou d'une classe eco:<type>), partagée avec le snapshot du catalogue"""
+    type_filter = f"a eco:{type} ;" if type else ""
+    return f"""
+    PREFIX eco: <http://www.ecotourism.org/ontology#>
+    SELECT ?transport ?transportId ?transportName ?transportType ?pricePerKm ?carbonEmissionPerKm 
+           ?capacity ?availability ?operatingHours ?averageSpeed ?contactPhone
+           ?bikeModel ?isElectric ?batteryRange ?rentalPricePerHour ?frameSize
+           ?vehicleModel ?vehicleBatteryRange ?chargingTime ?seatingCapacity ?dailyRentalPrice ?hasAirConditioning
+           ?lineNumber ?routeDescription ?ticketPrice ?frequencyMinutes ?accessibleForDisabled
+    WHERE {{
+      ?transport {type_filter}
+                 eco:transportId ?transportId ;
+                 eco:transportName ?transportName .
+      OPTIONAL {{ ?transport eco:transportType ?transportType }}
+      OPTIONAL {{ ?transport eco:pricePerKm ?pricePerKm }}
+      OPTIONAL {{ ?transport eco:carbonEmissionPerKm ?carbonEmissionPerKm }}
+      OPTIONAL {{ ?transport eco:capacity ?capacity }}
+      OPTIONAL {{ ?transport eco:availability ?availability }}
+      OPTIONAL {{ ?transport eco:operatingHours ?operatingHours }}
+      OPTIONAL {{ ?transport eco:averageSpeed ?averageSpeed }}
+      OPTIONAL {{ ?transport eco:contactPhone ?contactPhone }}
+      OPTIONAL {{ ?transport eco:bikeModel ?bikeModel }}
+      OPTIONAL {{ ?transport eco:isElectric ?isElectric }}
+      OPTIONAL {{ ?transport eco:batteryRange ?batteryRange }}
+      OPTIONAL {{ ?transport eco:rentalPricePerHour ?rentalPricePerHour }}
+      OPTIONAL {{ ?transport eco:frameSize ?frameSize }}
+      OPTIONAL {{ ?transport eco:vehicleModel ?vehicleModel }}
+      OPTIONAL {{ ?transport eco:vehicleBatteryRange ?vehicleBatteryRange }}
+      OPTIONAL {{ ?transport eco:chargingTime ?chargingTime }}
+      OPTIONAL {{ ?transport eco:seatingCapacity ?seatingCapacity }}
+      OPTIONAL {{ ?transport eco:dailyRentalPrice ?dailyRentalPrice }}
+      OPTIONAL {{ ?transport eco:hasAirConditioning ?hasAirConditioning }}
+      OPTIONAL {{ ?transport eco:lineNumber ?lineNumber }}
+      OPTIONAL {{ ?transport eco:routeDescription ?routeDescription }}
+      OPTIONAL {{ ?transport eco:ticketPrice ?ticketPrice }}
+      OPTIONAL {{ ?transport eco:frequencyMinutes ?frequencyMinutes }}
+      OPTIONAL {{ ?transport eco:accessibleForDisabled ?accessibleForDisabled }}
+    }}
+    LIMIT {limit}
+    """
 
-def _parse_transport(bind):
-    """Parse un binding SPARQL en transport complet"""
-    return {
-        "transportId": _extract_value(_safe_get(bind, 'transportId')),
-        "transportName": _extract_value(_safe_get(bind, 'transportName')),
-        "transportType": _extract_value(_safe_get(bind, 'transportType')),
-        "pricePerKm": float(_extract_value(_safe_get(bind, 'pricePerKm')) or 0) if _safe_get(bind,
-                                                                                             'pricePerKm') else None,
-        "carbonEmissionPerKm": float(_extract_value(_safe_get(bind, 'carbonEmissionPerKm')) or 0) if _safe_get(bind,
-                                                                                                               'carbonEmissionPerKm') else None,
-        "capacity": int(_extract_value(_safe_get(bind, 'capacity')) or 0) if _safe_get(bind, 'capacity') else None,
-        "availability": (_extract_value(_safe_get(bind, 'availability')) == 'true') if _safe_get(bind,
-                                                                                                 'availability') else None,
-        "operatingHours": _extract_value(_safe_get(bind, 'operatingHours')),
-        "averageSpeed": float(_extract_value(_safe_get(bind, 'averageSpeed')) or 0) if _safe_get(bind,
-                                                                                                 'averageSpeed') else None,
-        "contactPhone": _extract_value(_safe_get(bind, 'contactPhone')),
-        # Bike fields
-        "bikeModel": _extract_value(_safe_get(bind, 'bikeModel')),
-        "isElectric": (_extract_value(_safe_get(bind, 'isElectric')) == 'true') if _safe_get(bind,
-                                                                                             'isElectric') else None,
-        "batteryRange": float(_extract_value(_safe_get(bind, 'batteryRange')) or 0) if _safe_get(bind,
-                                                                                                 'batteryRange') else None,
-        "rentalPricePerHour": float(_extract_value(_safe_get(bind, 'rentalPricePerHour')) or 0) if _safe_get(bind,
-                                                                                                             'rentalPricePerHour') else None,
-        "frameSize": _extract_value(_safe_get(bind, 'frameSize')),
-        # EV fields
-        "vehicleModel": _extract_value(_safe_get(bind, 'vehicleModel')),
-        "vehicleBatteryRange": float(_extract_value(_safe_get(bind, 'vehicleBatteryRange')) or 0) if _safe_get(bind,
-                                                                                                               'vehicleBatteryRange') else None,
-        "chargingTime": int(_extract_value(_safe_get(bind, 'chargingTime')) or 0) if _safe_get(bind,
-                                                                                               'chargingTime') else None,
-        "seatingCapacity": int(_extract_value(_safe_get(bind, 'seatingCapacity')) or 0) if _safe_get(bind,
-                                                                                                     'seatingCapacity') else None,
-        "dailyRentalPrice": float(_extract_value(_safe_get(bind, 'dailyRentalPrice')) or 0) if _safe_get(bind,
-                                                                                                         'dailyRentalPrice') else None,
-        "hasAirConditioning": (_extract_value(_safe_get(bind, 'hasAirConditioning')) == 'true') if _safe_get(bind,
-                                                                                                             'hasAirConditioning') else None,
-        # PT fields
-        "lineNumber": _extract_value(_safe_get(bind, 'lineNumber')),
-        "routeDescription": _extract_value(_safe_get(bind, 'routeDescription')),
-        "ticketPrice": float(_extract_value(_safe_get(bind, 'ticketPrice')) or 0) if _safe_get(bind,
-                                                                                               'ticketPrice') else None,
-        "frequencyMinutes": int(_extract_value(_safe_get(bind, 'frequencyMinutes')) or 0) if _safe_get(bind,
-                                                                                                       'frequencyMinutes') else None,
-        "accessibleForDisabled": (_extract_value(_safe_get(bind, 'accessibleForDisabled')) == 'true') if _safe_get(bind,
-                                                                                                                   'accessibleForDisabled') else None,
-        "uri": _extract_value(_safe_get(bind, 'transport'))
-    }
 
+catalog_snapshot.register("transports", lambda limit: _search_query(None, limit), subject="transport")
 
-# ============================================
-# ENDPOINTS CRUD DE BASE
-# ============================================
 
 # GET /transports/ - Rechercher tous les transports
 @router.get("/", summary="Rechercher tous les transports")
@@ -190,52 +210,15 @@ def search_transports(
     """Retourne les transports filtrés par type"""
     try:
         # If a type is provided, filter by rdf:type eco:Type. Otherwise, no type triple.
-        type_filter = f"a eco:{type} ;" if type else ""
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        SELECT ?transport ?transportId ?transportName ?transportType ?pricePerKm ?carbonEmissionPerKm 
-               ?capacity ?availability ?operatingHours ?averageSpeed ?contactPhone
-               ?bikeModel ?isElectric ?batteryRange ?rentalPricePerHour ?frameSize
-               ?vehicleModel ?vehicleBatteryRange ?chargingTime ?seatingCapacity ?dailyRentalPrice ?hasAirConditioning
-               ?lineNumber ?routeDescription ?ticketPrice ?frequencyMinutes ?accessibleForDisabled
-        WHERE {{
-          ?transport {type_filter}
-                     eco:transportId ?transportId ;
-                     eco:transportName ?transportName .
-          OPTIONAL {{ ?transport eco:transportType ?transportType }}
-          OPTIONAL {{ ?transport eco:pricePerKm ?pricePerKm }}
-          OPTIONAL {{ ?transport eco:carbonEmissionPerKm ?carbonEmissionPerKm }}
-          OPTIONAL {{ ?transport eco:capacity ?capacity }}
-          OPTIONAL {{ ?transport eco:availability ?availability }}
-          OPTIONAL {{ ?transport eco:operatingHours ?operatingHours }}
-          OPTIONAL {{ ?transport eco:averageSpeed ?averageSpeed }}
-          OPTIONAL {{ ?transport eco:contactPhone ?contactPhone }}
-          OPTIONAL {{ ?transport eco:bikeModel ?bikeModel }}
-          OPTIONAL {{ ?transport eco:isElectric ?isElectric }}
-          OPTIONAL {{ ?transport eco:batteryRange ?batteryRange }}
-          OPTIONAL {{ ?transport eco:rentalPricePerHour ?rentalPricePerHour }}
-          OPTIONAL {{ ?transport eco:frameSize ?frameSize }}
-          OPTIONAL {{ ?transport eco:vehicleModel ?vehicleModel }}
-          OPTIONAL {{ ?transport eco:vehicleBatteryRange ?vehicleBatteryRange }}
-          OPTIONAL {{ ?transport eco:chargingTime ?chargingTime }}
-          OPTIONAL {{ ?transport eco:seatingCapacity ?seatingCapacity }}
-          OPTIONAL {{ ?transport eco:dailyRentalPrice ?dailyRentalPrice }}
-          OPTIONAL {{ ?transport eco:hasAirConditioning ?hasAirConditioning }}
-          OPTIONAL {{ ?transport eco:lineNumber ?lineNumber }}
-          OPTIONAL {{ ?transport eco:routeDescription ?routeDescription }}
-          OPTIONAL {{ ?transport eco:ticketPrice ?ticketPrice }}
-          OPTIONAL {{ ?transport eco:frequencyMinutes ?frequencyMinutes }}
-          OPTIONAL {{ ?transport eco:accessibleForDisabled ?accessibleForDisabled }}
-        }}
-        LIMIT {limit}
-        """
-
-        results = sparql_select(sparql)
+        snapshot_rows = catalog_snapshot.rows("transports", rdf_type=type, limit=limit)
+        if snapshot_rows is not None:
+            results = {"results": {"bindings": snapshot_rows}}
+        else:
+            results = sparql_select(_search_query(type, limit))
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
         transports = [_parse_transport(b) for b in binds]
 
-        return {"status": "success", "count": len(transports), "transports": transports}
+        return fast_json({"status": "success", "count": len(transports), "transports": transports})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -484,54 +467,11 @@ def update_transport(transport_id: str, update: TransportUpdate):
             raise HTTPException(status_code=404, detail=f"Transport '{transport_id}' not found")
 
         # Vérifier qu'au moins un champ est fourni
-        if all(v is None for v in update.dict().values()):
+        updated_fields = TRANSPORT_UPDATE.changes(update)
+        if not updated_fields:
             raise HTTPException(status_code=400, detail="Au moins un champ doit être fourni")
 
-        delete_clauses = []
-        insert_clauses = []
-        where_clauses = [f'?transport eco:transportId "{transport_id}" .']
-
-        if update.transportName is not None:
-            delete_clauses.append("?transport eco:transportName ?oldName .")
-            insert_clauses.append(f'?transport eco:transportName "{update.transportName}" .')
-            where_clauses.append("OPTIONAL { ?transport eco:transportName ?oldName . }")
-
-        if update.availability is not None:
-            delete_clauses.append("?transport eco:availability ?oldAvail .")
-            insert_clauses.append(f'?transport eco:availability "{str(update.availability).lower()}"^^xsd:boolean .')
-            where_clauses.append("OPTIONAL { ?transport eco:availability ?oldAvail . }")
-
-        if update.pricePerKm is not None:
-            delete_clauses.append("?transport eco:pricePerKm ?oldPrice .")
-            insert_clauses.append(f'?transport eco:pricePerKm "{update.pricePerKm}"^^xsd:float .')
-            where_clauses.append("OPTIONAL { ?transport eco:pricePerKm ?oldPrice . }")
-
-        if update.operatingHours is not None:
-            delete_clauses.append("?transport eco:operatingHours ?oldHours .")
-            insert_clauses.append(f'?transport eco:operatingHours "{update.operatingHours}" .')
-            where_clauses.append("OPTIONAL { ?transport eco:operatingHours ?oldHours . }")
-
-        delete_str = "\n            ".join(delete_clauses)
-        insert_str = "\n            ".join(insert_clauses)
-        where_str = "\n            ".join(where_clauses)
-
-        sparql = f"""
-        PREFIX eco: <http://www.ecotourism.org/ontology#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        DELETE {{
-            {delete_str}
-        }}
-        INSERT {{
-            {insert_str}
-        }}
-        WHERE {{
-            {where_str}
-        }}
-        """
-
-        result = sparql_update(sparql)
-
-        updated_fields = {k: v for k, v in update.dict().items() if v is not None}
+        result = sparql_update(TRANSPORT_UPDATE.build(updated_fields, key=("transportId", transport_id)))
 
         return {
             "status": "success",
@@ -541,6 +481,8 @@ def update_transport(transport_id: str, update: TransportUpdate):
         }
     except HTTPException:
         raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -678,6 +620,9 @@ def get_fastest_transports():
 @router.get("/stats/eco-score", summary="Classement par score écologique")
 def get_eco_score_ranking():
     """Classe les transports par score écologique (bas carbone + prix abordable)"""
+    ranking = catalog_columns.answer("transports", _eco_score_from_columns)
+    if ranking is not None:
+        return ranking
     try:
         sparql = """
         PREFIX eco: <http://www.ecotourism.org/ontology#>
@@ -695,18 +640,18 @@ def get_eco_score_ranking():
         binds = results.get('results', {}).get('bindings', []) if isinstance(results, dict) else []
 
         transports = []
-        for b in binds:
-            carbon = float(_extract_value(_safe_get(b, 'carbonEmissionPerKm')) or 0)
-            price = float(_extract_value(_safe_get(b, 'pricePerKm')) or 0)
+        for row in TRANSPORT_DECODER.rows(binds):
+            carbon = row["carbonEmissionPerKm"] or 0.0
+            price = row["pricePerKm"] or 0.0
 
             # Score écologique = moins de carbone + prix raisonnable
             # (0 carbone = 100 points, prix bas = points supplémentaires)
             eco_score = (100 - (carbon * 1000)) + (10 - min(price, 10))
 
             transports.append({
-                "transportId": _extract_value(_safe_get(b, 'transportId')),
-                "transportName": _extract_value(_safe_get(b, 'transportName')),
-                "transportType": _extract_value(_safe_get(b, 'transportType')),
+                "transportId": row["transportId"],
+                "transportName": row["transportName"],
+                "transportType": row["transportType"],
                 "carbonEmissionPerKm": carbon,
                 "pricePerKm": price,
                 "eco_score": round(eco_score, 2)
@@ -724,6 +669,27 @@ def get_eco_score_ranking():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _eco_score_from_columns(table):
+    """Même classement que la requête SPARQL, calculé sur les colonnes mappées des transports"""
+    carbon = np.nan_to_num(table["carbonEmissionPerKm"], nan=0.0)
+    price = np.nan_to_num(table["pricePerKm"], nan=0.0)
+    eco_score = np.round((100 - (carbon * 1000)) + (10 - np.minimum(price, 10)), 2)
+    sorted_transports = [{
+        "transportId": catalog_columns.text(table["transportId"][i]),
+        "transportName": catalog_columns.text(table["transportName"][i]),
+        "transportType": catalog_columns.text(table["transportType"][i]),
+        "carbonEmissionPerKm": float(carbon[i]),
+        "pricePerKm": float(price[i]),
+        "eco_score": float(eco_score[i])
+    } for i in catalog_columns.top(eco_score, 10, descending=True)]
+    return {
+        "status": "success",
+        "count": len(sorted_transports),
+        "transports": sorted_transports,
+        "ranking": "by_eco_score"
+    }
+
+
 # GET /transports/search/{name} - Recherche par nom
 @router.get("/search/{name}", summary="Rechercher un transport par nom")
 def search_transport_by_name(name: str):
@@ -4,6 +4,8 @@ from typing import Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
+from app.services.sparql_entity_update import EntityUpdate, RDFS_LABEL
+from app.services.sparql_templates import TemplateParamError
 
 router = APIRouter()
 
@@ -45,6 +47,17 @@ class GuideUpdate(BaseModel):
     certification: Optional[str] = Field(None)
     experience_years: Optional[int] = Field(None, ge=0)
 
+# Namespace des profils créés par ce routeur
+USERS_NAMESPACE = "http://www.example.org/ecotourism#"
+
+TOURIST_UPDATE = EntityUpdate.from_model(
+    TouristUpdate, properties={"name": RDFS_LABEL}, namespace=USERS_NAMESPACE, rdf_type="Tourist"
+)
+GUIDE_UPDATE = EntityUpdate.from_model(
+    GuideUpdate, properties={"name": RDFS_LABEL, "experience_years": "experienceYears"}, namespace=USERS_NAMESPACE,
+    rdf_type="Guide"
+)
+
 # Helper function to escape SPARQL strings
 def escape_sparql_string(s):
     if s is None:
@@ -188,49 +201,18 @@ def create_tourist(tourist: TouristCreate):
 @router.put("/{tourist_id}", summary="Mettre à jour un profil touriste")
 def update_tourist(tourist_id: str, update_data: TouristUpdate):
     """Met à jour les informations d'un touriste"""
-    from app.services.sparql_helpers import sparql_update
-
-    updates = []
-
-    if update_data.name:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        DELETE {{ eco:{tourist_id} rdfs:label ?old . }}
-        INSERT {{ eco:{tourist_id} rdfs:label "{escape_sparql_string(update_data.name)}" . }}
-        WHERE {{ eco:{tourist_id} rdfs:label ?old . }}
-        ''')
+    from app.services.sparql_helpers import sparql_select, sparql_update
 
-    if update_data.email is not None:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        DELETE {{ eco:{tourist_id} eco:email ?old . }}
-        INSERT {{ eco:{tourist_id} eco:email "{escape_sparql_string(update_data.email)}" . }}
-        WHERE {{ OPTIONAL {{ eco:{tourist_id} eco:email ?old . }} }}
-        ''')
-
-    if update_data.nationality is not None:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        DELETE {{ eco:{tourist_id} eco:nationality ?old . }}
-        INSERT {{ eco:{tourist_id} eco:nationality "{escape_sparql_string(update_data.nationality)}" . }}
-        WHERE {{ OPTIONAL {{ eco:{tourist_id} eco:nationality ?old . }} }}
-        ''')
-
-    if update_data.preferences is not None:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        DELETE {{ eco:{tourist_id} eco:preferences ?old . }}
-        INSERT {{ eco:{tourist_id} eco:preferences "{escape_sparql_string(update_data.preferences)}" . }}
-        WHERE {{ OPTIONAL {{ eco:{tourist_id} eco:preferences ?old . }} }}
-        ''')
-
-    if not updates:
+    # Tous les champs fournis en une seule requête (une transaction)
+    changes = TOURIST_UPDATE.changes(update_data)
+    if not changes:
         raise HTTPException(status_code=400, detail="No fields to update")
 
     try:
-        for sparql in updates:
-            sparql_update(sparql)
+        if not sparql_select(TOURIST_UPDATE.exists_query(tourist_id))["results"]["bindings"]:
+            raise HTTPException(status_code=404, detail=f"Tourist '{tourist_id}' not found")
+        # Motif `a eco:Tourist` exigé : sans effet si le profil est supprimé entre-temps
+        sparql_update(TOURIST_UPDATE.build(changes, iri=tourist_id))
 
         return JSONResponse(
             status_code=200,
@@ -240,6 +222,10 @@ def update_tourist(tourist_id: str, update_data: TouristUpdate):
                 "message": "Profil mis à jour avec succès"
             }
         )
+    except HTTPException:
+        raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -418,50 +404,18 @@ def create_guide(guide: GuideCreate):
 @router.put("/guides/{guide_id}", summary="Mettre à jour un profil guide")
 def update_guide(guide_id: str, update_data: GuideUpdate):
     """Met à jour les informations d'un guide"""
-    from app.services.sparql_helpers import sparql_update
+    from app.services.sparql_helpers import sparql_select, sparql_update
 
-    updates = []
-
-    if update_data.name:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        DELETE {{ eco:{guide_id} rdfs:label ?old . }}
-        INSERT {{ eco:{guide_id} rdfs:label "{escape_sparql_string(update_data.name)}" . }}
-        WHERE {{ eco:{guide_id} rdfs:label ?old . }}
-        ''')
-
-    if update_data.language:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        DELETE {{ eco:{guide_id} eco:language ?old . }}
-        INSERT {{ eco:{guide_id} eco:language "{escape_sparql_string(update_data.language)}" . }}
-        WHERE {{ eco:{guide_id} eco:language ?old . }}
-        ''')
-
-    if update_data.experience_years is not None:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        DELETE {{ eco:{guide_id} eco:experienceYears ?old . }}
-        INSERT {{ eco:{guide_id} eco:experienceYears "{update_data.experience_years}"^^xsd:integer . }}
-        WHERE {{ eco:{guide_id} eco:experienceYears ?old . }}
-        ''')
-
-    if update_data.certification is not None:
-        updates.append(f'''
-        PREFIX eco: <http://www.example.org/ecotourism#>
-        DELETE {{ eco:{guide_id} eco:certification ?old . }}
-        INSERT {{ eco:{guide_id} eco:certification "{escape_sparql_string(update_data.certification)}" . }}
-        WHERE {{ OPTIONAL {{ eco:{guide_id} eco:certification ?old . }} }}
-        ''')
-
-    if not updates:
+    # Tous les champs fournis en une seule requête (une transaction)
+    changes = GUIDE_UPDATE.changes(update_data)
+    if not changes:
         raise HTTPException(status_code=400, detail="No fields to update")
 
     try:
-        for sparql in updates:
-            sparql_update(sparql)
+        if not sparql_select(GUIDE_UPDATE.exists_query(guide_id))["results"]["bindings"]:
+            raise HTTPException(status_code=404, detail=f"Guide '{guide_id}' not found")
+        # Motif `a eco:Guide` exigé : sans effet si le profil est supprimé entre-temps
+        sparql_update(GUIDE_UPDATE.build(changes, iri=guide_id))
 
         return JSONResponse(
             status_code=200,
@@ -471,6 +425,10 @@ def update_guide(guide_id: str, update_data: GuideUpdate):
                 "message": "Profil guide mis à jour avec succès"
             }
         )
+    except HTTPException:
+        raise
+    except TemplateParamError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,206 @@
+# app/api/middleware.py - Middlewares ASGI de l'API
+
+import json
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.services import dataset_versions, request_context
+
+DEADLINE_HEADER = b"x-request-timeout"
+
+
+def _header_budget(scope) -> Optional[float]:
+    """Budget demandé par le client (`X-Request-Timeout: <secondes>`), plafonné."""
+    for name, value in scope.get("headers", []):
+        if name == DEADLINE_HEADER:
+            try:
+                seconds = float(value.decode("latin-1"))
+            except ValueError:
+                return None
+            if seconds > 0:
+                return min(seconds, settings.REQUEST_DEADLINE_MAX_SECONDS)
+    return None
+
+
+# En-têtes décrivant le corps d'origine : faux pour le corps JSON du 504
+_BODY_HEADERS = (b"content-type", b"content-length", b"content-encoding", b"vary", b"etag")
+
+
+async def _send_gateway_timeout(send, detail: str, headers=()):
+    """Réponse 504 JSON ; `headers` : en-têtes d'origine à conserver (CORS...)."""
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    kept = [(k, v) for k, v in headers if k.lower() not in _BODY_HEADERS]
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": kept + [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def deadline_exceeded_handler(request, exc: request_context.DeadlineExceeded):
+    """
+    Gestionnaire d'exception (`app.add_exception_handler`) : l'échéance qui
+    remonte d'un endpoint devient un 504 construit sous CORSMiddleware, donc
+    avec ses en-têtes `Access-Control-*` (sinon le navigateur signale une
+    erreur CORS au lieu du délai dépassé).
+    """
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
+def route_deadline(seconds: float):
+    """
+    Dépendance FastAPI fixant le budget par défaut d'une route ou d'un
+    routeur (ex. `dependencies=[Depends(route_deadline(20))]`) ; un budget
+    envoyé par le client en en-tête reste prioritaire.
+    """
+    def apply():
+        state = request_context.current()
+        if state is not None and not state.deadline_from_header:
+            state.set_budget(seconds)
+    return apply
+
+
+class RequestContextMiddleware:
+    """
+    Ouvre un `RequestState` pour chaque requête HTTP et, si la couche SPARQL
+    a servi un résultat de repli (Fuseki indisponible), ajoute l'en-tête
+    `X-Data-Stale: true` à la réponse.
+
+    Fixe aussi l'échéance de la requête (en-tête `X-Request-Timeout`, sinon
+    REQUEST_DEADLINE_SECONDS ou le défaut de la route) : les appels SPARQL
+    et Gemini reçoivent le temps restant comme timeout. Une fois le budget
+    épuisé, la réponse d'erreur est remplacée par un 504 explicite, même si
+    l'endpoint a converti l'exception en HTTPException 500 (en-têtes CORS
+    conservés). Une DeadlineExceeded non rattrapée est convertie par
+    `deadline_exceeded_handler` ; celle qui échapperait encore aux
+    middlewares internes reçoit ici un 504 sans en-têtes CORS.
+
+    Middleware ASGI pur (pas BaseHTTPMiddleware) : le contexte est partagé
+    avec l'endpoint et les réponses en streaming ne sont pas mises en tampon.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state, token = request_context.begin_request()
+        budget = _header_budget(scope)
+        if budget is not None:
+            state.set_budget(budget)
+            state.deadline_from_header = True
+        elif settings.REQUEST_DEADLINE_SECONDS > 0:
+            state.set_budget(settings.REQUEST_DEADLINE_SECONDS)
+
+        started = False
+        replaced = False
+
+        async def send_wrapper(message):
+            nonlocal started, replaced
+            if replaced:
+                return  # corps de la réponse d'erreur d'origine
+            if message["type"] == "http.response.start":
+                if state.deadline_exceeded and message["status"] >= 500:
+                    replaced = True
+                    await _send_gateway_timeout(send, "Délai de la requête dépassé", message.get("headers", []))
+                    return
+                started = True
+                if state.stale:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-data-stale", b"true"))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except request_context.DeadlineExceeded as e:
+            if started or replaced:
+                raise
+            await _send_gateway_timeout(send, str(e))
+        finally:
+            request_context.end_request(token)
+
+
+def _if_none_match(scope) -> Optional[bytes]:
+    for name, value in scope.get("headers", []):
+        if name == b"if-none-match":
+            return value
+    return None
+
+
+def _matches(header: bytes, etag: str) -> bool:
+    """Comparaison faible (RFC 9110) de l'ETag avec la liste de `If-None-Match`."""
+    if header.strip() == b"*":
+        return True
+    opaque = etag.encode("ascii")[2:]  # sans le préfixe W/
+    return any(tag.strip().removeprefix(b"W/") == opaque for tag in header.split(b","))
+
+
+class ETagMiddleware:
+    """
+    ETag des réponses GET du catalogue (préfixes de HTTP_ETAG_ROUTES),
+    calculé avant l'appel de l'endpoint à partir du chemin, des paramètres
+    et de la version des familles d'entités lues par la route
+    (dataset_versions). Si `If-None-Match` correspond, la réponse est un
+    304 immédiat : ni Fuseki, ni cloison, ni sérialisation.
+
+    Pour toutes les méthodes, la famille de la route est notée dans le
+    `RequestState` : les écritures SPARQL faites pendant la requête
+    incrémentent sa version. Une réponse servie depuis le repli
+    (X-Data-Stale) ou en erreur ne reçoit pas d'ETag.
+
+    Doit être placé sous RequestContextMiddleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.HTTP_ETAG_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        family = dataset_versions.family_of(path)
+        state = request_context.current()
+        if family is None or state is None:
+            await self.app(scope, receive, send)
+            return
+        state.dataset = family
+        if scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        versions = dataset_versions.versions
+        etag = dataset_versions.etag(path, scope.get("query_string", b""), settings.HTTP_ETAG_ROUTES["/" + family])
+        header = _if_none_match(scope)
+        if header is not None and _matches(header, etag):
+            versions.not_modified += 1
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag.encode("ascii")), (b"cache-control", b"no-cache")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200 and not state.stale:
+                headers = list(message.get("headers", []))
+                names = {name.lower() for name, _ in headers}
+                if b"etag" not in names:
+                    headers.append((b"etag", etag.encode("ascii")))
+                    if b"cache-control" not in names:
+                        # le navigateur revalide à chaque affichage au lieu de réutiliser sa copie
+                        headers.append((b"cache-control", b"no-cache"))
+                    message = {**message, "headers": headers}
+                    versions.tagged += 1
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,62 @@
+# app/api/responses.py - Sérialisation JSON rapide des réponses (orjson)
+
+import json
+from typing import Any, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle : repli sur json
+    orjson = None
+
+_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def enabled() -> bool:
+    return settings.HTTP_FAST_JSON_ENABLED and orjson is not None
+
+
+def _default(value: Any) -> Any:
+    """Types hors JSON natif (modèles pydantic, Decimal, Enum, set...) : comme FastAPI."""
+    encoded = jsonable_encoder(value)
+    if encoded is value:
+        raise TypeError(f"Type non sérialisable en JSON : {type(value).__name__}")
+    return encoded
+
+
+def dumps(content: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    JSON compact en UTF-8 ; orjson si disponible et HTTP_FAST_JSON_ENABLED,
+    sinon json (même sortie que JSONResponse, NaN refusés).
+    """
+    if enabled():
+        return orjson.dumps(content, default=default or _default, option=_OPTIONS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=default or _default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse sérialisée par `dumps`. Renvoyée directement par un
+    endpoint (voir `fast_json`), elle évite aussi le passage de FastAPI
+    par `jsonable_encoder`, qui recopie chaque dict et chaque valeur.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content: Any):
+    """
+    Réponse d'un endpoint de liste volumineuse : FastJSONResponse si la
+    sérialisation rapide est active, sinon le contenu tel quel (chemin
+    FastAPI habituel). Le contenu doit être déjà composé de types JSON
+    (dict, list, str, nombres, None) ou de types couverts par `_default`.
+    """
+    if not enabled():
+        return content
+    return FastJSONResponse(content)
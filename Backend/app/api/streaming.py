@@ -0,0 +1,72 @@
+# app/api/streaming.py - Réponses JSON produites au fil de l'eau
+
+import json
+import logging
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi.responses import Response, StreamingResponse
+
+from app.api.responses import dumps
+from app.services.sparql_raw import RawBindings
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_BYTES = 64 * 1024
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def streaming_list_response(key: str, items: Iterator[Any],
+                            transform: Optional[Callable[[Any], Any]] = None,
+                            status: str = "success") -> StreamingResponse:
+    """
+    Sérialise `{"status": ..., "<key>": [...], "count": N}` élément par
+    élément, sans jamais matérialiser la liste : `count` est écrit à la fin.
+    Le JSON reste identique (à l'ordre des clés près) à celui des endpoints
+    qui renvoient une liste complète ; les éléments sont sérialisés par
+    `responses.dumps` (orjson si HTTP_FAST_JSON_ENABLED).
+    """
+    def body() -> Iterator[bytes]:
+        buffer = [f'{{"status": {_encode(status)}, {_encode(key)}: ['.encode("utf-8")]
+        size = 0
+        count = 0
+        try:
+            for item in items:
+                if transform is not None:
+                    item = transform(item)
+                part = (b"," if count else b"") + dumps(item, default=str)
+                buffer.append(part)
+                size += len(part)
+                count += 1
+                if size >= _FLUSH_BYTES:
+                    yield b"".join(buffer)
+                    buffer, size = [], 0
+        except Exception as e:
+            # Statut HTTP déjà envoyé : on ferme proprement le document
+            logger.error(f"Flux '{key}' interrompu après {count} éléments : {e}")
+            buffer.append(f'], "count": {count}, "truncated": true, "error": {_encode(str(e))}}}'.encode("utf-8"))
+        else:
+            buffer.append(f'], "count": {count}}}'.encode("utf-8"))
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+        yield b"".join(buffer)
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+def raw_bindings_response(raw: RawBindings, head: Dict[str, Any],
+                          tail: Optional[Dict[str, Any]] = None, key: str = "results") -> Response:
+    """
+    `{**head, "<key>": [bindings], "count": N, **tail}` où les bindings sont
+    les octets JSON de Fuseki recopiés tels quels : seule la petite
+    enveloppe (question, requête, compteur) est sérialisée par l'API.
+    """
+    fields = {"count": raw.count, **(tail or {})}
+    opening = _encode(head)[:-1] + (", " if head else "") + _encode(key) + ": "
+    closing = ", " + _encode(fields)[1:]
+    body = b"".join((opening.encode("utf-8"), raw.bindings, closing.encode("utf-8")))
+    return Response(content=body, media_type="application/json")
@@ -1,4 +1,6 @@
 import os
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -10,12 +12,145 @@ class Settings(BaseSettings):
     SPARQL_ENDPOINT: str = "http://localhost:3030/Eco-Tourism/sparql"
     SPARQL_UPDATE_ENDPOINT: str = "http://localhost:3030/Eco-Tourism/update"
 
+    # Réplicas de lecture (séparés par des virgules ; vide = SPARQL_ENDPOINT seul)
+    SPARQL_READ_ENDPOINTS: str = ""
+    SPARQL_REPLICA_EWMA_ALPHA: float = 0.3          # poids de la dernière mesure de latence
+    SPARQL_REPLICA_EJECT_AFTER: int = 3             # échecs consécutifs avant éjection
+    SPARQL_REPLICA_EJECT_SECONDS: float = 10.0      # remise à l'essai sans health check
+    SPARQL_REPLICA_HEALTH_INTERVAL: float = 5.0     # secondes entre health checks (0 = désactivé)
+    SPARQL_READ_YOUR_WRITES_SECONDS: float = 2.0    # lectures sur le primaire après une écriture
+
+    # Backend SPARQL : "fuseki" (HTTP) ou "embedded" (graphe rdflib en mémoire, dev/CI/edge)
+    SPARQL_BACKEND: str = "fuseki"
+    SPARQL_EMBEDDED_FILES: str = "data/eco.ttl,data/validationfinale.owl"  # relatifs à app/
+
+    # Chargement en masse (Graph Store Protocol, POST N-Triples par paquets)
+    SPARQL_BULK_LOAD_ENABLED: bool = False          # endpoints /admin/bulk-load (écriture sans authentification)
+    SPARQL_GRAPH_STORE_ENDPOINT: str = "http://localhost:3030/Eco-Tourism/data"
+    SPARQL_BULK_LOAD_DIR: str = "data"              # fichiers chargeables par l'API (relatif à app/)
+    SPARQL_BULK_LOAD_CHUNK_TRIPLES: int = 50000     # triples par requête
+    SPARQL_BULK_LOAD_WORKERS: int = 4               # envois parallèles
+    SPARQL_BULK_LOAD_TIMEOUT: float = 120.0         # secondes (lecture) par paquet
+
+    # Pool de connexions HTTP vers Fuseki (keep-alive)
+    SPARQL_POOL_CONNECTIONS: int = 4       # nombre d'hôtes Fuseki gardés en cache
+    SPARQL_POOL_MAXSIZE: int = 32          # connexions simultanées max par hôte
+    SPARQL_POOL_BLOCK: bool = True         # attendre une connexion libre au lieu d'en ouvrir une de plus
+    SPARQL_CONNECT_TIMEOUT: float = 3.0    # secondes
+    SPARQL_READ_TIMEOUT: float = 10.0      # secondes
+
+    # Format des résultats SELECT demandés à Fuseki
+    SPARQL_ACCEPT_ENCODING: str = "gzip, deflate"   # "identity" pour désactiver la compression
+    SPARQL_RESULT_FORMAT: str = "json"              # "json", "tsv" ou "csv" (csv : valeurs seules, sans types)
+    SPARQL_SCAN_FORMAT: str = "json"                # stream_select (grandes listes) : "json" ou "tsv"
+
+    # Politique de retry des lectures (passerelle SPARQL)
+    SPARQL_MAX_RETRIES: int = 2
+    SPARQL_RETRY_BACKOFF: float = 0.2      # secondes, doublé à chaque tentative
+
+    # Cache des résultats SELECT (invalidé à chaque écriture)
+    SPARQL_CACHE_ENABLED: bool = True
+    SPARQL_CACHE_TTL_SECONDS: float = 300.0
+    SPARQL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Relecture en arrière-plan des SELECT les plus lus (stale-while-revalidate)
+    SPARQL_REFRESH_ENABLED: bool = True
+    SPARQL_REFRESH_INTERVAL_SECONDS: float = 5.0
+    SPARQL_REFRESH_AHEAD_SECONDS: float = 30.0      # relit les entrées chaudes qui expirent dans ce délai
+    SPARQL_REFRESH_MIN_HITS: int = 3                # lectures depuis le remplissage pour être « chaude »
+    SPARQL_REFRESH_CONCURRENCY: int = 2             # relectures simultanées max
+    SPARQL_REFRESH_MAX_FOREGROUND: int = 8          # aucune relecture si autant de SELECT HTTP sont en cours
+    SPARQL_CACHE_MAX_STALE_SECONDS: float = 60.0    # péremption max servie pendant une relecture
+
+    # Coalescence des SELECT identiques concurrents (single-flight)
+    SPARQL_SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Disjoncteur devant Fuseki + repli sur le dernier bon résultat
+    SPARQL_BREAKER_ENABLED: bool = True
+    SPARQL_BREAKER_WINDOW_SECONDS: float = 30.0     # fenêtre glissante d'observation
+    SPARQL_BREAKER_MIN_CALLS: int = 10              # appels minimum avant de juger
+    SPARQL_BREAKER_ERROR_RATE: float = 0.5          # taux d'erreurs qui ouvre le circuit
+    SPARQL_BREAKER_SLOW_CALL_SECONDS: float = 5.0   # au-delà, un appel est "lent"
+    SPARQL_BREAKER_SLOW_RATE: float = 0.8           # taux d'appels lents qui ouvre le circuit
+    SPARQL_BREAKER_OPEN_SECONDS: float = 15.0       # durée d'ouverture avant sonde
+    SPARQL_BREAKER_HALF_OPEN_CALLS: int = 1         # sondes simultanées en demi-ouverture
+    SPARQL_STALE_MAX_BYTES: int = 32 * 1024 * 1024  # mémoire du repli (0 = désactivé)
+
+    # Regroupement des INSERT DATA concurrents en une requête UPDATE (opt-in)
+    SPARQL_UPDATE_BATCH_ENABLED: bool = False
+    SPARQL_UPDATE_BATCH_WINDOW_MS: float = 5.0      # attente max après la première opération du lot
+    SPARQL_UPDATE_BATCH_MAX: int = 50               # opérations max par lot
+
+    # Cloisons de concurrence par famille de routes (503 + Retry-After si saturée)
+    BULKHEAD_ENABLED: bool = True
+    BULKHEAD_CATALOG_CONCURRENCY: int = 24          # lectures du catalogue (CRUD GET)
+    BULKHEAD_CATALOG_QUEUE: int = 100
+    BULKHEAD_WRITES_CONCURRENCY: int = 8            # POST / PUT / DELETE du catalogue
+    BULKHEAD_WRITES_QUEUE: int = 50
+    BULKHEAD_ANALYTICS_CONCURRENCY: int = 4         # tableaux de bord, itinéraires, optimisation carbone
+    BULKHEAD_ANALYTICS_QUEUE: int = 10
+    BULKHEAD_AI_CONCURRENCY: int = 4                # Gemini / NLP
+    BULKHEAD_AI_QUEUE: int = 8
+    BULKHEAD_QUEUE_TIMEOUT_SECONDS: float = 5.0     # attente max d'une place (bornée par l'échéance)
+
+    # Requêtes préparées : vérification syntaxique (rdflib) au chargement
+    SPARQL_TEMPLATE_VALIDATE: bool = True
+    # Recherches paginées : page d'IRIs d'abord, puis propriétés via VALUES (2 requêtes)
+    SPARQL_TWO_PHASE_ENABLED: bool = True
+    # Fermeture de la hiérarchie de classes : rdf:type des super-classes matérialisés
+    # (python -m app.scripts.materialize_types), requêtes sur un seul triplet de type
+    SPARQL_TYPE_CLOSURE_ENABLED: bool = False
+    SPARQL_TYPE_CLOSURE_ONTOLOGY: str = "data/validationfinale.owl"  # relatif à app/
+
+    # ETag des GET du catalogue (304 sur If-None-Match sans interroger Fuseki)
+    HTTP_ETAG_ENABLED: bool = True
+    # préfixe de route → familles d'entités dont ses réponses dépendent
+    HTTP_ETAG_ROUTES: Dict[str, List[str]] = {
+        "/activities": ["activities"],
+        "/accommodations": ["accommodations"],
+        "/seasons": ["seasons", "activities"],      # /seasons/current/activities
+        "/transport": ["transport"],
+        "/locations": ["locations"],
+    }
+    HTTP_ETAG_TTL_SECONDS: float = 300.0            # revalidation complète au plus tard (0 = jamais)
+
+    # Sérialisation rapide (orjson) des listes volumineuses et compression des réponses (gzip, brotli si installé)
+    HTTP_FAST_JSON_ENABLED: bool = True
+    HTTP_COMPRESSION_ENABLED: bool = True
+    HTTP_COMPRESSION_MIN_SIZE: int = 1024           # octets ; en dessous, réponse envoyée telle quelle
+    HTTP_COMPRESSION_LARGE_SIZE: int = 256 * 1024   # au-delà (et pour les flux) : niveaux rapides
+    HTTP_GZIP_LEVEL: int = 6
+    HTTP_GZIP_LEVEL_LARGE: int = 4
+    HTTP_BROTLI_QUALITY: int = 5
+    HTTP_BROTLI_QUALITY_LARGE: int = 3
+    HTTP_COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "application/sparql-results+json", "text/"]
+
+    # Snapshot du catalogue partagé entre workers uvicorn (mémoire partagée, meneur élu par flock)
+    CATALOG_SNAPSHOT_ENABLED: bool = True
+    CATALOG_SNAPSHOT_NAME: str = "ecotourism-catalog"   # segments /dev/shm/<nom> et <nom>-<version>
+    CATALOG_SNAPSHOT_LOCK_FILE: str = ""                # vide = <tmp>/<nom>.lock
+    CATALOG_SNAPSHOT_POLL_SECONDS: float = 1.0          # détection des écritures / reprise du rôle de meneur
+    CATALOG_SNAPSHOT_MAX_AGE_SECONDS: float = 300.0     # reconstruction même sans écriture (écritures hors API)
+    CATALOG_SNAPSHOT_RETRY_SECONDS: float = 30.0        # après un échec de construction
+    CATALOG_SNAPSHOT_MAX_ROWS: int = 50000              # par famille (au-delà : repli SPARQL si nécessaire)
+
+    # Catalogue en colonnes (.npy mappés en mémoire) : classements et distances sans SPARQL
+    CATALOG_COLUMNS_ENABLED: bool = True
+    CATALOG_COLUMNS_PATH: str = ""                      # vide = <tmp>/ecotourism-catalog-columns ; relatif à app/ sinon
+    CATALOG_COLUMNS_AUTO_EXPORT: bool = False           # réexport par le meneur du snapshot après chaque reconstruction
+    CATALOG_COLUMNS_MAX_AGE_SECONDS: float = 3600.0     # export plus ancien non servi (écritures hors API)
+
     # Namespace RDF
     ONTOLOGY_NAMESPACE: str = "http://www.ecotourism.org/ontology#"
     ONTOLOGY_PREFIX: str = "eco"
 
     # Clé API Google Gemini (depuis ton .env)
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "VOTRE_CLE_API_ICI")
+    GEMINI_TIMEOUT_SECONDS: float = 30.0            # borné par l'échéance de la requête HTTP
+
+    # Échéance par requête HTTP (en-tête X-Request-Timeout en secondes, sinon défaut de la route)
+    REQUEST_DEADLINE_SECONDS: float = 30.0          # défaut global (0 = pas d'échéance)
+    REQUEST_DEADLINE_MAX_SECONDS: float = 120.0     # plafond d'un budget demandé par le client
 
     # Variables optionnelles
     AUTO_INIT_DATA: bool = False
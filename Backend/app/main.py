@@ -4,7 +4,7 @@ App principale FastAPI avec tous les routers intégrés
 Version: 3.0.0
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 
@@ -27,6 +27,21 @@ from app.api.endpoints.nlp import router as nlp_router
 from app.api.endpoints.ai_nlp import router as ai_router
 from app.api.endpoints.ai_debug import router as debug_router
 from app.api.endpoints import carbon_optimizer
+from app.api.endpoints.metrics import router as metrics_router
+from app.api.endpoints.admin import router as admin_router
+from app.api.middleware import ETagMiddleware, RequestContextMiddleware, deadline_exceeded_handler, route_deadline
+from app.api.compression import CompressionMiddleware
+from app.api.bulkhead import bulkhead, thread_budget
+from app.services.sparql_helpers import close_session
+from app.services.async_sparql import close_client
+from app.services import embedded_store, catalog_columns, request_context
+from app.services.sparql_replicas import router as replica_router
+from app.services.sparql_batcher import update_batcher
+from app.services.sparql_refresh import scheduler as refresh_scheduler
+from app.services.catalog_snapshot import snapshot as catalog_snapshot
+from app.config import settings
+from starlette.concurrency import run_in_threadpool
+import anyio
 
 
 # 🆕 NOUVEAU: Import du router itinéraires
@@ -79,18 +94,33 @@ app = FastAPI(
 #     "http://localhost:3001",  # Another port if needed
 # ]
 
+# ETag des GET du catalogue, 304 sur If-None-Match (sous CORS : les 304 reçoivent aussi ses en-têtes)
+app.add_middleware(ETagMiddleware)
+
+# Compression gzip / brotli selon la taille (au-dessus de ETag : les 304 passent tels quels)
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:3001"],  # Add your frontend URLs
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Data-Stale"],  # lisible par le frontend
 )
 
+# Contexte par requête (marqueur X-Data-Stale, échéance X-Request-Timeout → 504)
+app.add_middleware(RequestContextMiddleware)
+
 # ============================================
 # ENREGISTREMENT DES ROUTERS - CRUDL
 # ============================================
 
+# Cloisons de concurrence : chaque famille de routes a ses propres places
+CATALOG = Depends(bulkhead("catalog", writes="writes"))  # GET → catalog, écritures → writes
+ANALYTICS = Depends(bulkhead("analytics"))
+AI = Depends(bulkhead("ai"))
+
 # 📍 DONNÉES PRINCIPALES
 # =====================
 
@@ -98,28 +128,32 @@ app.add_middleware(
 app.include_router(
     accommodation_router,
     prefix="/accommodations",
-    tags=["🏠 Hébergements"]
+    tags=["🏠 Hébergements"],
+    dependencies=[CATALOG]
 )
 
 # Activités - CRUD complet
 app.include_router(
     activities_router,
     prefix="/activities",
-    tags=["🎯 Activités"]
+    tags=["🎯 Activités"],
+    dependencies=[CATALOG]
 )
 
 # Géolocalisation - CRUD complet
 app.include_router(
     location_router,
     prefix="/locations",
-    tags=["🗺️ Lieux & Géolocalisation"]
+    tags=["🗺️ Lieux & Géolocalisation"],
+    dependencies=[CATALOG]
 )
 
 # Saisons - CRUD complet
 app.include_router(
     season_router,
     prefix="/seasons",
-    tags=["🌡️ Saisons"]
+    tags=["🌡️ Saisons"],
+    dependencies=[CATALOG]
 )
 
 # 📅 RÉSERVATIONS ET RETOURS D'EXPÉRIENCE
@@ -129,14 +163,16 @@ app.include_router(
 app.include_router(
     booking_router,
     prefix="/bookings",
-    tags=["📅 Réservations"]
+    tags=["📅 Réservations"],
+    dependencies=[CATALOG]
 )
 
 # Avis et Feedback - CRUD complet
 app.include_router(
     feedback_router,
     prefix="/feedback",
-    tags=["⭐ Avis & Feedback"]
+    tags=["⭐ Avis & Feedback"],
+    dependencies=[CATALOG]
 )
 
 # 👥 UTILISATEURS
@@ -146,7 +182,8 @@ app.include_router(
 app.include_router(
     users_router,
     prefix="/users",
-    tags=["👥 Utilisateurs"]
+    tags=["👥 Utilisateurs"],
+    dependencies=[CATALOG]
 )
 #app.include_router(users.router, prefix="/tourists", tags=["tourists"])
 
@@ -157,14 +194,16 @@ app.include_router(
 app.include_router(
     transport_router,
     prefix="/transport",
-    tags=["🚗 Transport Écologique"]
+    tags=["🚗 Transport Écologique"],
+    dependencies=[CATALOG]
 )
 
 # Durabilité et Produits locaux - CRUD complet
 app.include_router(
     sustainability_products_router,
     prefix="/sustainability",
-    tags=["♻️ Durabilité & Produits Locaux"]
+    tags=["♻️ Durabilité & Produits Locaux"],
+    dependencies=[CATALOG]
 )
 
 # 🔄 FONCTIONNALITÉS AVANCÉES
@@ -175,35 +214,55 @@ app.include_router(
 app.include_router(
     analytics_router,
     prefix="/analytics",
-    tags=["📊 Analytics & Reporting"]
+    tags=["📊 Analytics & Reporting"],
+    dependencies=[ANALYTICS]
 )
 
 # NLP local
 app.include_router(
     nlp_router,
     prefix="/nlp",
-    tags=["🧠 NLP/IA (Local)"]
+    tags=["🧠 NLP/IA (Local)"],
+    dependencies=[AI]
 )
 
 # IA avec Gemini
 app.include_router(
     ai_router,
     prefix="/ai",
-    tags=["🤖 IA/Gemini (SPARQL)"]
+    tags=["🤖 IA/Gemini (SPARQL)"],
+    dependencies=[Depends(route_deadline(60)), AI]  # génération Gemini + requête SPARQL
 )
 
 # Debug IA
 app.include_router(
     debug_router,
     prefix="/debug",
-    tags=["🔧 Debug IA"]
+    tags=["🔧 Debug IA"],
+    dependencies=[AI]
 )
 
 
 app.include_router(
     carbon_optimizer.router,
     prefix="/carbon-optimizer",
-    tags=["🌍 Optimisation Carbone"]
+    tags=["🌍 Optimisation Carbone"],
+    dependencies=[ANALYTICS]
+)
+
+# Métriques de la couche SPARQL
+app.include_router(
+    metrics_router,
+    prefix="/metrics",
+    tags=["📈 Métriques"]
+)
+
+# Administration - chargement en masse de fichiers RDF
+app.include_router(
+    admin_router,
+    prefix="/admin",
+    tags=["🛠️ Administration"],
+    dependencies=[CATALOG]  # POST / DELETE → cloison writes
 )
 
 
@@ -214,7 +273,8 @@ if itinerary_router:
     app.include_router(
         itinerary_router,
         prefix="/itineraries",
-        tags=["🗺️ Itinéraires Écologiques 3 Jours"]
+        tags=["🗺️ Itinéraires Écologiques 3 Jours"],
+        dependencies=[Depends(route_deadline(20)), ANALYTICS]  # 4 SELECT séquentiels au plus
     )
 
 # ============================================
@@ -499,6 +559,10 @@ async def not_found_exception_handler(request, exc):
     }
 
 
+# Échéance de la requête : 504 construit sous CORS (voir deadline_exceeded_handler)
+app.add_exception_handler(request_context.DeadlineExceeded, deadline_exceeded_handler)
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Gestionnaire pour les erreurs générales"""
@@ -519,6 +583,27 @@ async def general_exception_handler(request, exc):
 async def startup_event():
     """Événement de démarrage de l'API"""
     print("🚀 Starting Eco-Tourism Semantic API v3.0.0...")
+    # Assez de threads pour que toutes les cloisons soient pleines à la fois (+ routes hors cloison)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, thread_budget() + 8)
+    if embedded_store.enabled():
+        store = await run_in_threadpool(embedded_store.get_store)
+        report = store.report
+        print(f"🗄️  Embedded RDF store: {report['triples']} triples "
+              f"(load {report['load_ms']} ms, warmup {report['warmup_ms']} ms)")
+        for f in report["files"]:
+            print(f"   • {f['file']}: {f['triples']} triples in {f['load_ms']} ms")
+    elif replica_router.enabled:
+        replica_router.start_health_checks(settings.SPARQL_REPLICA_HEALTH_INTERVAL)
+        print(f"🔀 SPARQL reads routed across {len(replica_router.replicas)} endpoints")
+    # Relecture en arrière-plan des SELECT les plus lus avant leur expiration
+    refresh_scheduler.start()
+    # Catalogue partagé entre workers : construit par le meneur, lu par tous
+    catalog_snapshot.start()
+    # Catalogue en colonnes du dernier export, mappé en mémoire (aucune requête au démarrage)
+    columns = catalog_columns.load()
+    if columns:
+        print(f"🧮 Columnar catalog mapped: {columns}")
     print("📊 All modules loaded successfully")
     print("🌍 Ready for eco-tourism data management")
 
@@ -527,6 +612,12 @@ async def startup_event():
 async def shutdown_event():
     """Événement d'arrêt de l'API"""
     print("🛑 Shutting down Eco-Tourism Semantic API...")
+    replica_router.stop_health_checks()
+    refresh_scheduler.stop()
+    catalog_snapshot.stop()
+    update_batcher.close()
+    close_session()
+    await close_client()
 
 
 # ============================================
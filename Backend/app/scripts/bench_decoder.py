@@ -0,0 +1,137 @@
+# app/scripts/bench_decoder.py - Benchmark du décodage des bindings SPARQL
+"""
+Compare l'ancien parseur ligne à ligne (`_safe_get` / `_extract_value`
+appelés plusieurs fois par champ) avec `BindingDecoder` sur un résultat
+SPARQL JSON synthétique d'activités.
+
+Usage :
+    python -m app.scripts.bench_decoder
+    python -m app.scripts.bench_decoder --rows 100000 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.api.endpoints.activities import ACTIVITY_DECODER
+
+
+def _safe_get(obj, key, default=None):
+    try:
+        if isinstance(obj, dict):
+            return obj.get(key, default)
+        return default
+    except:
+        return default
+
+
+def _extract_value(val):
+    if val is None:
+        return None
+    if isinstance(val, dict) and 'value' in val:
+        return val['value']
+    return val
+
+
+def _legacy_parse_activity(bind):
+    """Copie de l'ancien activities._parse_activity (référence)."""
+    return {
+        "activityId": _extract_value(_safe_get(bind, 'activityId')),
+        "activityName": _extract_value(_safe_get(bind, 'activityName')),
+        "activityDescription": _extract_value(_safe_get(bind, 'activityDescription')),
+        "durationHours": int(_extract_value(_safe_get(bind, 'durationHours')) or 0) if _safe_get(bind, 'durationHours') else None,
+        "pricePerPerson": float(_extract_value(_safe_get(bind, 'pricePerPerson')) or 0) if _safe_get(bind, 'pricePerPerson') else None,
+        "difficultyLevel": _extract_value(_safe_get(bind, 'difficultyLevel')),
+        "maxParticipants": int(_extract_value(_safe_get(bind, 'maxParticipants')) or 0) if _safe_get(bind, 'maxParticipants') else None,
+        "minAge": int(_extract_value(_safe_get(bind, 'minAge')) or 0) if _safe_get(bind, 'minAge') else None,
+        "activityRating": float(_extract_value(_safe_get(bind, 'activityRating')) or 0) if _safe_get(bind, 'activityRating') else None,
+        "schedule": _extract_value(_safe_get(bind, 'schedule')),
+        "activityLanguages": _extract_value(_safe_get(bind, 'activityLanguages')),
+        "activityType": _extract_value(_safe_get(bind, 'activityType', 'Unknown')),
+        "riskLevel": int(_extract_value(_safe_get(bind, 'riskLevel')) or 0) if _safe_get(bind, 'riskLevel') else None,
+        "requiredEquipment": _extract_value(_safe_get(bind, 'requiredEquipment')),
+        "physicalFitnessRequired": _extract_value(_safe_get(bind, 'physicalFitnessRequired')),
+        "safetyBriefingRequired": (_extract_value(_safe_get(bind, 'safetyBriefingRequired')) == 'true') if _safe_get(bind, 'safetyBriefingRequired') else None,
+        "culturalTheme": _extract_value(_safe_get(bind, 'culturalTheme')),
+        "historicalPeriod": _extract_value(_safe_get(bind, 'historicalPeriod')),
+        "audioGuideAvailable": (_extract_value(_safe_get(bind, 'audioGuideAvailable')) == 'true') if _safe_get(bind, 'audioGuideAvailable') else None,
+        "photographyAllowed": (_extract_value(_safe_get(bind, 'photographyAllowed')) == 'true') if _safe_get(bind, 'photographyAllowed') else None,
+        "ecosystemType": _extract_value(_safe_get(bind, 'ecosystemType')),
+        "wildlifeSpotting": _extract_value(_safe_get(bind, 'wildlifeSpotting')),
+        "bestTimeToVisit": _extract_value(_safe_get(bind, 'bestTimeToVisit')),
+        "binocularsProvided": (_extract_value(_safe_get(bind, 'binocularsProvided')) == 'true') if _safe_get(bind, 'binocularsProvided') else None,
+        "uri": _extract_value(_safe_get(bind, 'activity'))
+    }
+
+
+def _literal(value, datatype=None):
+    cell = {"type": "literal", "value": value}
+    if datatype:
+        cell["datatype"] = "http://www.w3.org/2001/XMLSchema#" + datatype
+    return cell
+
+
+def _synthetic_bindings(rows: int):
+    """Activités de trois familles (Adventure / Cultural / Nature), OPTIONAL partiellement liés."""
+    rng = random.Random(42)
+    bindings = []
+    for i in range(rows):
+        b = {
+            "activity": {"type": "uri", "value": f"http://www.ecotourism.org/ontology#Activity_{i}"},
+            "activityId": _literal(f"ACT-{i:06d}"),
+            "activityName": _literal(f"Activité {i}"),
+            "activityDescription": _literal("Randonnée guidée dans le parc national"),
+            "durationHours": _literal(str(rng.randint(1, 8)), "integer"),
+            "pricePerPerson": _literal(f"{rng.uniform(10, 200):.2f}", "decimal"),
+            "difficultyLevel": _literal(rng.choice(["Easy", "Moderate", "Hard"])),
+            "maxParticipants": _literal(str(rng.randint(4, 30)), "integer"),
+            "activityRating": _literal(f"{rng.uniform(1, 5):.1f}", "decimal"),
+        }
+        family = i % 3
+        if family == 0:
+            b["riskLevel"] = _literal(str(rng.randint(1, 5)), "integer")
+            b["safetyBriefingRequired"] = _literal("true", "boolean")
+        elif family == 1:
+            b["culturalTheme"] = _literal("Patrimoine")
+            b["audioGuideAvailable"] = _literal(rng.choice(["true", "false"]), "boolean")
+        else:
+            b["ecosystemType"] = _literal("Oasis")
+            b["binocularsProvided"] = _literal("false", "boolean")
+        bindings.append(b)
+    return bindings
+
+
+def _time(label, fn, bindings, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(bindings)
+        durations.append(time.perf_counter() - start)
+    best = min(durations)
+    print(f"{label:<34} médiane {statistics.median(durations) * 1000:8.1f} ms   "
+          f"meilleur {best * 1000:8.1f} ms   {best / len(bindings) * 1e6:6.2f} µs/ligne")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du décodage des bindings SPARQL")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bindings = _synthetic_bindings(args.rows)
+    assert [_legacy_parse_activity(b) for b in bindings[:1000]] == ACTIVITY_DECODER.rows(bindings[:1000])
+
+    print("=" * 60)
+    print(f"🧮 BENCHMARK DÉCODAGE SPARQL ({args.rows} lignes, {len(ACTIVITY_DECODER.columns)} colonnes)")
+    print("=" * 60)
+    legacy = _time("1️⃣ _parse_activity (ancien)", lambda bs: [_legacy_parse_activity(b) for b in bs],
+                   bindings, args.repeat)
+    rows = _time("2️⃣ BindingDecoder.rows", ACTIVITY_DECODER.rows, bindings, args.repeat)
+    _time("3️⃣ BindingDecoder.to_columns", ACTIVITY_DECODER.to_columns, bindings, args.repeat)
+    print(f"\n   gain lignes : x{legacy / rows:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# app/scripts/bench_responses.py - Benchmark de la sérialisation et de la compression des listes
+"""
+Pour les listes les plus volumineuses (/activities/, /bookings/all,
+/locations/), compare sur des lignes synthétiques de la forme réelle :
+- le CPU de sérialisation : chemin FastAPI par défaut (`jsonable_encoder`
+  puis `JSONResponse.render`, json) contre `FastJSONResponse` renvoyée
+  directement (orjson, sans jsonable_encoder) ; pour /bookings/all, servie
+  en flux, `json.dumps` contre `responses.dumps` élément par élément ;
+- les octets envoyés : JSON brut, puis gzip et brotli aux niveaux choisis
+  par CompressionMiddleware pour cette taille, avec leur coût CPU.
+
+Usage :
+    python -m app.scripts.bench_responses
+    python -m app.scripts.bench_responses --rows 10000 --repeat 7
+"""
+
+import argparse
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api import compression, responses
+from app.api.compression import _Encoder
+from app.api.endpoints.activities import ACTIVITY_DECODER
+from app.config import settings
+from app.scripts.bench_decoder import _synthetic_bindings
+
+
+def _activities(rows: int):
+    activities = ACTIVITY_DECODER.rows(_synthetic_bindings(rows))
+    return {"status": "success", "count": len(activities), "activities": activities}
+
+
+def _bookings(rows: int):
+    rng = random.Random(7)
+    namespace = settings.ONTOLOGY_NAMESPACE
+    bookings = [{
+        "booking_uri": f"{namespace}Booking_{i}",
+        "booking_id": f"BK-{i:06d}",
+        "booking_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "status": rng.choice(["Confirmed", "Pending", "Cancelled"]),
+        "confirmation_code": f"CONF{rng.randint(0, 10 ** 8):08d}",
+        "tourist": f"{namespace}Tourist_{rng.randint(0, rows // 5)}",
+    } for i in range(rows)]
+    return {"status": "success", "bookings": bookings, "count": len(bookings)}
+
+
+def _locations(rows: int):
+    rng = random.Random(11)
+    namespace = settings.ONTOLOGY_NAMESPACE
+    locations = [{
+        "location": f"{namespace}Location_{i}",
+        "locationId": f"LOC-{i:05d}",
+        "locationName": f"Lieu {i}",
+        "latitude": f"{rng.uniform(30.2, 37.3):.4f}",
+        "longitude": f"{rng.uniform(7.5, 11.6):.4f}",
+        "address": f"{rng.randint(1, 200)} avenue Habib Bourguiba",
+        "locationDescription": "Site écotouristique du nord-ouest tunisien",
+    } for i in range(rows)]
+    return {"locations": locations, "count": len(locations)}
+
+
+def _best(fn, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def _bench(label: str, content, repeat: int, streamed: str = None):
+    """`streamed` : clé de la liste d'une réponse en flux (streaming_list_response)."""
+    if streamed:
+        items = content[streamed]
+        baseline = lambda: b"[" + b",".join(  # noqa: E731
+            json.dumps(item, ensure_ascii=False, default=str).encode("utf-8") for item in items) + b"]"
+        fast = lambda: b"[" + b",".join(responses.dumps(item, default=str) for item in items) + b"]"  # noqa: E731
+        reference = "json.dumps par élément"
+    else:
+        baseline = lambda: JSONResponse(jsonable_encoder(content)).body  # noqa: E731
+        fast = lambda: responses.FastJSONResponse(content).body  # noqa: E731
+        reference = "json + jsonable_encoder"
+    raw = baseline()
+    assert json.loads(fast()) == json.loads(raw)
+    before, after = _best(baseline, repeat), _best(fast, repeat)
+
+    print(f"\n{label}")
+    print(f"   sérialisation  {reference:<23} {before * 1000:8.2f} ms   "
+          f"{'orjson' if responses.enabled() else 'json'} {after * 1000:8.2f} ms   x{before / after:.1f}")
+    large = bool(streamed) or len(raw) >= settings.HTTP_COMPRESSION_LARGE_SIZE
+    print(f"   octets         brut {len(raw) / 1024:10.1f} Ko")
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for encoding in encodings:
+        encoded = _Encoder(encoding, large).finish(raw)
+        cost = _best(lambda: _Encoder(encoding, large).finish(raw), repeat)
+        print(f"                  {encoding:<4} {len(encoded) / 1024:10.1f} Ko   "
+              f"({len(encoded) / len(raw):6.1%})  compression {cost * 1000:7.2f} ms"
+              f"{'  [niveau rapide]' if large else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sérialisation et de la compression des listes")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not responses.enabled():
+        print("⚠️  orjson indisponible ou HTTP_FAST_JSON_ENABLED désactivé : les deux chemins utilisent json")
+    print("=" * 60)
+    print(f"📦 BENCHMARK RÉPONSES JSON ({args.rows} lignes par liste, "
+          f"brotli {'disponible' if compression.brotli is not None else 'absent'})")
+    print("=" * 60)
+    _bench(f"/activities/    ({len(ACTIVITY_DECODER.columns)} champs)", _activities(args.rows), args.repeat)
+    _bench("/bookings/all   (6 champs, en flux)", _bookings(args.rows), args.repeat, streamed="bookings")
+    _bench("/locations/     (7 champs)", _locations(args.rows), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# app/scripts/bench_result_formats.py - Benchmark des formats de résultats SELECT
+"""
+Compare, sur les requêtes réelles des routeurs (recherche d'activités,
+produits, indicateurs, liste des produits en streaming), les octets
+transférés et le temps de décodage de chaque format :
+JSON / TSV / CSV, non compressés ou gzip.
+
+Par défaut, les réponses sont produites localement à partir des données de
+app/data (rdflib, sérialisation conforme à Fuseki), dupliquées --copies
+fois pour simuler un catalogue plus grand. Avec --endpoint, les réponses
+sont demandées à un vrai Fuseki (octets mesurés avant décompression).
+
+Usage :
+    python -m app.scripts.bench_result_formats
+    python -m app.scripts.bench_result_formats --copies 200 --repeat 5
+    python -m app.scripts.bench_result_formats --endpoint http://localhost:3030/Eco-Tourism/sparql
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+import zlib
+from pathlib import Path
+
+from rdflib import BNode, Graph, Literal, RDF, URIRef
+
+from app.config import settings
+from app.services import sparql_formats
+from app.services.embedded_store import _term_json
+from app.services.sparql_helpers import get_session
+from app.api.endpoints.activities import ACTIVITY_SEARCH, ACTIVITY_TYPES
+from app.api.endpoints.sustainability import PRODUCT_SEARCH, INDICATOR_SEARCH, IndicatorType
+
+_APP_DIR = Path(__file__).resolve().parent.parent
+XSD = "http://www.w3.org/2001/XMLSchema#"
+# Lexique numérique abrégé en TSV (grammaire Turtle), comme Fuseki
+_BARE = {XSD + "integer", XSD + "decimal", XSD + "double", XSD + "boolean"}
+
+PRODUCTS_SCAN = """PREFIX eco: <http://www.ecotourism.org/ontology#>
+SELECT ?product ?productId ?productName ?price ?category
+WHERE {
+  ?product a eco:LocalProduct ;
+           eco:productId ?productId ;
+           eco:productName ?productName .
+  OPTIONAL { ?product eco:price ?price }
+  OPTIONAL { ?product eco:category ?category }
+}
+"""
+
+
+def _queries():
+    return {
+        "activities.search": ACTIVITY_SEARCH.render(activity_types=ACTIVITY_TYPES, limit=100000),
+        "products.search": PRODUCT_SEARCH.render(limit=100000),
+        "indicators.search": INDICATOR_SEARCH.render(indicator_types=[t.value for t in IndicatorType], limit=100000),
+        "products (stream)": PRODUCTS_SCAN,
+    }
+
+
+# ---------- Réponses locales ----------
+
+def _load_graph(copies: int) -> Graph:
+    graph = Graph()
+    for name in settings.SPARQL_EMBEDDED_FILES.split(","):
+        graph.parse(str(_APP_DIR / name.strip()))
+    eco = settings.ONTOLOGY_NAMESPACE
+    classes = {URIRef(eco + c) for c in ACTIVITY_TYPES + ["LocalProduct"] + [t.value for t in IndicatorType]}
+    subjects = {s for s, o in graph.subject_objects(RDF.type) if o in classes}
+    clones = []
+    for i in range(1, copies):
+        for s in subjects:
+            clone = URIRef(f"{s}_copy{i}")
+            for p, o in graph.predicate_objects(s):
+                # Chaînes rendues uniques : sinon gzip compresse des doublons exacts
+                if isinstance(o, Literal) and (o.datatype is None or str(o.datatype) == XSD + "string"):
+                    o = Literal(f"{o} {i}", lang=o.language, datatype=o.datatype)
+                clones.append((clone, p, o))
+    for triple in clones:
+        graph.add(triple)
+    return graph
+
+
+def _tsv_cell(term) -> str:
+    if term is None:
+        return ""
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    if term.datatype is not None and str(term.datatype) in _BARE:
+        try:
+            sparql_formats._tsv_term(str(term))  # forme abrégée valide ?
+            return str(term)
+        except Exception:
+            pass
+    text = (str(term).replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t"))
+    if term.language:
+        return f'"{text}"@{term.language}'
+    if term.datatype is not None:
+        return f'"{text}"^^<{term.datatype}>'
+    return f'"{text}"'
+
+
+def _local_bodies(graph: Graph, query: str):
+    result = graph.query(query)
+    variables = [str(v) for v in result.vars]
+    rows = list(result)
+    as_json = {"head": {"vars": variables}, "results": {"bindings": [
+        {name: _term_json(term) for name, term in zip(variables, row) if term is not None} for row in rows
+    ]}}
+    tsv = "\t".join("?" + v for v in variables) + "\n" + "".join(
+        "\t".join(_tsv_cell(term) for term in row) + "\n" for row in rows
+    )
+    return {
+        "json": json.dumps(as_json, ensure_ascii=False, indent=2).encode("utf-8"),  # Fuseki indente son JSON
+        "tsv": tsv.encode("utf-8"),
+        "csv": result.serialize(format="csv"),
+    }
+
+
+# ---------- Réponses d'un vrai Fuseki ----------
+
+def _remote_body(endpoint: str, query: str, fmt: str, encoding: str):
+    response = get_session().post(
+        endpoint, data={"query": query},
+        headers={"Accept": sparql_formats.ACCEPT[fmt], "Accept-Encoding": encoding},
+        stream=True, timeout=(settings.SPARQL_CONNECT_TIMEOUT, 120)
+    )
+    response.raise_for_status()
+    wire = response.raw.read(decode_content=False)
+    return wire, response.headers.get("Content-Encoding", "identity")
+
+
+# ---------- Mesures ----------
+
+def _decoder(fmt: str):
+    if fmt == "json":
+        return lambda body: json.loads(body)
+    return lambda body: sparql_formats.decode(fmt, body)
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _inflate(wire: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(wire)
+    if encoding == "deflate":
+        return zlib.decompress(wire)
+    return wire
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des formats de résultats SELECT")
+    parser.add_argument("--endpoint", help="Endpoint SPARQL réel (sinon réponses produites localement)")
+    parser.add_argument("--copies", type=int, default=100, help="duplication des données locales")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"📦 BENCHMARK FORMATS DE RÉSULTATS → {args.endpoint or f'données locales × {args.copies}'}")
+    print("=" * 78)
+
+    graph = None if args.endpoint else _load_graph(args.copies)
+    for label, query in _queries().items():
+        if graph is not None:
+            bodies = {fmt: (body, "identity") for fmt, body in _local_bodies(graph, query).items()}
+            gzipped = {fmt: (gzip.compress(body, 6), "gzip") for fmt, (body, _) in bodies.items()}
+        else:
+            bodies = {fmt: _remote_body(args.endpoint, query, fmt, "identity") for fmt in sparql_formats.ACCEPT}
+            gzipped = {fmt: _remote_body(args.endpoint, query, fmt, "gzip") for fmt in sparql_formats.ACCEPT}
+
+        reference = json.loads(_inflate(*bodies["json"]))
+        rows = len(reference["results"]["bindings"])
+        print(f"\n{label} — {rows} lignes")
+        print(f"   {'format':<10} {'octets':>12} {'vs json':>8} {'décodage':>11} {'dont inflate':>13}  identique")
+        for variant in (bodies, gzipped):
+            for fmt, (wire, encoding) in variant.items():
+                decode = _decoder(fmt)
+                plain = _inflate(wire, encoding)
+                inflate_ms = _time(lambda: _inflate(wire, encoding), args.repeat)
+                total_ms = _time(lambda: decode(_inflate(wire, encoding)), args.repeat)
+                same = decode(plain)["results"]["bindings"] == reference["results"]["bindings"]
+                name = fmt + ("+gzip" if encoding != "identity" else "")
+                ratio = len(wire) / len(bodies["json"][0])
+                print(f"   {name:<10} {len(wire):>12,} {ratio:>7.0%} {total_ms:>9.2f}ms {inflate_ms:>11.2f}ms  "
+                      f"{'oui' if same else 'non (valeurs seules)' if fmt == 'csv' else 'NON'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# app/scripts/bench_sparql_pool.py - Benchmark du pool de connexions SPARQL
+"""
+Compare des appels `requests.post` nus (une connexion TCP par requête)
+avec le transport mutualisé de `sparql_helpers` (keep-alive).
+
+Par défaut, un faux Fuseki local est démarré pour compter les connexions
+TCP ouvertes. Avec --endpoint, le benchmark vise un vrai Fuseki (seules
+les latences sont alors mesurées).
+
+Usage :
+    python -m app.scripts.bench_sparql_pool
+    python -m app.scripts.bench_sparql_pool --requests 500 --threads 16
+    python -m app.scripts.bench_sparql_pool --endpoint http://localhost:3030/Eco-Tourism/sparql
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.config import settings
+from app.services import sparql_helpers
+
+QUERY = "SELECT ?s WHERE { ?s ?p ?o } LIMIT 1"
+
+FAKE_RESULT = json.dumps({
+    "head": {"vars": ["s"]},
+    "results": {"bindings": [
+        {"s": {"type": "uri", "value": "http://www.ecotourism.org/ontology#Demo"}}
+    ]}
+}).encode("utf-8")
+
+
+class _FakeFusekiHandler(BaseHTTPRequestHandler):
+    """Répond à tout POST par un petit résultat SPARQL JSON, en HTTP/1.1."""
+
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1  # en-têtes + corps en un seul envoi (évite Nagle / delayed ACK)
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _FakeFusekiHandler.lock:
+            _FakeFusekiHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/sparql-results+json")
+        self.send_header("Content-Length", str(len(FAKE_RESULT)))
+        self.end_headers()
+        self.wfile.write(FAKE_RESULT)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_fake_fuseki():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeFusekiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/Eco-Tourism/sparql"
+
+
+def _bare_post(endpoint: str):
+    response = requests.post(
+        endpoint,
+        data={"query": QUERY},
+        headers={"Accept": "application/sparql-results+json"},
+        timeout=10
+    )
+    return response.json()
+
+
+def _pooled_post(endpoint: str):
+    return sparql_helpers.execute_select_query(QUERY)
+
+
+def _run(label: str, call, endpoint: str, total: int, threads: int, count_connections: bool):
+    before = _FakeFusekiHandler.connections
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        call(endpoint)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    connections = _FakeFusekiHandler.connections - before
+
+    print(f"\n{label}")
+    print("-" * 60)
+    print(f"   requêtes        : {total} ({threads} threads)")
+    if count_connections:
+        print(f"   connexions TCP  : {connections}")
+    print(f"   débit           : {total / wall:.0f} req/s")
+    print(f"   latence p50     : {statistics.median(latencies):.2f} ms")
+    print(f"   latence p95     : {p95:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keep-alive du transport SPARQL")
+    parser.add_argument("--endpoint", help="Endpoint SPARQL réel (sinon faux Fuseki local)")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        server, endpoint = _start_fake_fuseki()
+    settings.SPARQL_ENDPOINT = endpoint
+
+    print("=" * 60)
+    print(f"🔌 BENCHMARK POOL SPARQL → {endpoint}")
+    print("=" * 60)
+
+    count_connections = server is not None
+    _run("1️⃣ requests.post (sans pool)", _bare_post, endpoint,
+         args.requests, args.threads, count_connections)
+    _run("2️⃣ sparql_helpers (pool keep-alive)", _pooled_post, endpoint,
+         args.requests, args.threads, count_connections)
+
+    if server is not None:
+        server.shutdown()
+    sparql_helpers.close_session()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# app/scripts/bench_two_phase.py - Benchmark requête unique vs exécution en deux temps
+"""
+Compare, pour la recherche d'activités et la sélection des activités d'un
+jour d'itinéraire, la requête unique (tous les OPTIONAL évalués pour chaque
+candidat avant LIMIT) et l'exécution en deux temps de select_two_phase
+(page d'IRIs, puis propriétés de la seule page via VALUES), à mesure que
+le catalogue grossit.
+
+Par défaut, les requêtes sont exécutées par le store embarqué (rdflib) sur
+les données de app/data dupliquées --sizes fois ; avec --endpoint, par un
+vrai Fuseki déjà chargé (--sizes est alors ignoré). Le cache de résultats
+est désactivé pendant les mesures.
+
+Usage :
+    python -m app.scripts.bench_two_phase
+    python -m app.scripts.bench_two_phase --sizes 1,20,100,400 --repeat 5
+    python -m app.scripts.bench_two_phase --endpoint http://localhost:3030/Eco-Tourism/sparql
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from app.config import settings
+from app.services import embedded_store
+from app.api.endpoints import activities, itinerary
+from app.scripts.bench_result_formats import _load_graph
+
+
+def _scenarios():
+    def search(limit):
+        return lambda: activities.search_activities(type=None, limit=limit)["activities"]
+
+    def three_days(difficulty):
+        def run():
+            # select_activities_for_day trace ses sélections sur stdout
+            with contextlib.redirect_stdout(io.StringIO()):
+                return [a["activityId"] for day in range(3)
+                        for a in itinerary.select_activities_for_day(day, difficulty)]
+        return run
+
+    return {
+        "activities.search limit=20": search(20),
+        "activities.search limit=100": search(100),
+        "itinerary 3 jours": three_days(""),
+        "itinerary 3 jours (easy)": three_days("easy"),
+    }
+
+
+def _time(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def _use_graph(copies: int) -> int:
+    store = embedded_store.EmbeddedStore([])
+    store.graph = _load_graph(copies)
+    embedded_store._store = store
+    return len(store.graph)
+
+
+def _measure(scenarios, repeat: int):
+    for label, fn in scenarios.items():
+        timings = {}
+        rows = {}
+        for two_phase in (False, True):
+            settings.SPARQL_TWO_PHASE_ENABLED = two_phase
+            fn()  # préparation des requêtes (analyse rdflib) hors mesure
+            timings[two_phase], rows[two_phase] = _time(fn, repeat)
+        speedup = timings[False] / timings[True] if timings[True] else float("inf")
+        print(f"   {label:<30} {timings[False]:>10.1f}ms {timings[True]:>10.1f}ms {speedup:>7.1f}x"
+              f"   {len(rows[True])} lignes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark requête unique vs deux temps (page puis VALUES)")
+    parser.add_argument("--endpoint", help="Endpoint SPARQL réel (sinon store embarqué)")
+    parser.add_argument("--sizes", default="1,10,50,200", help="facteurs de duplication du catalogue")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    settings.SPARQL_CACHE_ENABLED = False
+    settings.SPARQL_SINGLE_FLIGHT_ENABLED = False
+    enabled = settings.SPARQL_TWO_PHASE_ENABLED
+
+    print("=" * 78)
+    print(f"🔀 BENCHMARK DEUX TEMPS → {args.endpoint or 'store embarqué'}")
+    print("=" * 78)
+    print(f"   {'scénario':<30} {'1 requête':>12} {'2 temps':>12} {'gain':>8}")
+    scenarios = _scenarios()
+    try:
+        if args.endpoint:
+            settings.SPARQL_ENDPOINT = args.endpoint
+            _measure(scenarios, args.repeat)
+            return
+        settings.SPARQL_BACKEND = "embedded"
+        for copies in (int(size) for size in args.sizes.split(",")):
+            triples = _use_graph(copies)
+            print(f"\n   catalogue × {copies} ({triples} triples)")
+            _measure(scenarios, args.repeat)
+    finally:
+        settings.SPARQL_TWO_PHASE_ENABLED = enabled
+
+
+if __name__ == "__main__":
+    main()
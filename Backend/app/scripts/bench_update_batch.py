@@ -0,0 +1,135 @@
+# app/scripts/bench_update_batch.py - Benchmark du regroupement des INSERT DATA
+"""
+Compare N créations concurrentes envoyées une par une (une transaction
+Fuseki chacune) avec le regroupement de `sparql_batcher`.
+
+Par défaut, un faux endpoint d'update local simule le coût d'un commit
+(les écritures y sont sérialisées, comme dans Fuseki/TDB2). Avec
+--endpoint, le benchmark vise un vrai Fuseki : des triples de test
+`eco:BenchBatch_*` y sont insérés puis supprimés.
+
+Usage :
+    python -m app.scripts.bench_update_batch
+    python -m app.scripts.bench_update_batch --requests 500 --threads 32 --commit-ms 5
+    python -m app.scripts.bench_update_batch --endpoint http://localhost:3030/Eco-Tourism/update
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.config import settings
+from app.services import sparql_helpers, sparql_batcher
+
+PREFIXES = """PREFIX eco: <http://www.ecotourism.org/ontology#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
+
+
+class _FakeUpdateHandler(BaseHTTPRequestHandler):
+    """Endpoint d'update factice : chaque requête coûte `commit_seconds`, une à la fois."""
+
+    protocol_version = "HTTP/1.1"
+    commit_seconds = 0.01
+    commit_lock = threading.Lock()
+    transactions = 0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with _FakeUpdateHandler.commit_lock:
+            time.sleep(_FakeUpdateHandler.commit_seconds)
+            _FakeUpdateHandler.transactions += 1
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_fake_update_endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeUpdateHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/Eco-Tourism/update"
+
+
+def _insert(run_id: str, i: int):
+    sparql_helpers.sparql_insert(PREFIXES + f"""
+    INSERT DATA {{
+        eco:BenchBatch_{run_id}_{i} a eco:Booking ;
+            eco:bookingId "BenchBatch_{run_id}_{i}"^^xsd:string ;
+            eco:bookingStatus "pending"^^xsd:string .
+    }}
+    """)
+
+
+def _run(label: str, batched: bool, total: int, threads: int, count_transactions: bool):
+    settings.SPARQL_UPDATE_BATCH_ENABLED = batched
+    run_id = uuid.uuid4().hex[:8]  # identifiants distincts entre les deux passes
+    before = _FakeUpdateHandler.transactions
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        _insert(run_id, i)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    print(f"\n{label}")
+    print("-" * 60)
+    print(f"   créations       : {total} ({threads} threads)")
+    if count_transactions:
+        print(f"   transactions    : {_FakeUpdateHandler.transactions - before}")
+    print(f"   débit           : {total / wall:.0f} créations/s")
+    print(f"   latence p50     : {statistics.median(latencies):.2f} ms")
+    print(f"   latence p95     : {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du regroupement des INSERT DATA")
+    parser.add_argument("--endpoint", help="Endpoint SPARQL Update réel (sinon faux endpoint local)")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--commit-ms", type=float, default=10.0, help="coût simulé d'un commit (faux endpoint)")
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        _FakeUpdateHandler.commit_seconds = args.commit_ms / 1000
+        server, endpoint = _start_fake_update_endpoint()
+    settings.SPARQL_UPDATE_ENDPOINT = endpoint
+
+    print("=" * 60)
+    print(f"📦 BENCHMARK LOTS D'INSERT DATA → {endpoint}")
+    print("=" * 60)
+
+    count_transactions = server is not None
+    _run("1️⃣ une requête UPDATE par création", False, args.requests, args.threads, count_transactions)
+    _run("2️⃣ sparql_batcher (lots)", True, args.requests, args.threads, count_transactions)
+    print(f"\n   {sparql_batcher.stats()}")
+
+    if server is None:
+        sparql_helpers.sparql_delete(PREFIXES + """
+        DELETE { ?b ?p ?o }
+        WHERE { ?b eco:bookingId ?id ; ?p ?o . FILTER(STRSTARTS(?id, "BenchBatch_")) }
+        """)
+    else:
+        server.shutdown()
+    sparql_batcher.update_batcher.close()
+    sparql_helpers.close_session()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# app/scripts/bulk_load.py - Chargement en masse de fichiers RDF dans Fuseki
+"""
+Envoie des fichiers Turtle / N-Triples / RDF-XML à Fuseki par le Graph
+Store Protocol (SPARQL_GRAPH_STORE_ENDPOINT), en paquets N-Triples envoyés
+en parallèle, avec progression, débit et reprise.
+
+Les fichiers .nt sont lus au fil de l'eau (mémoire bornée, adapté aux
+jeux de plusieurs millions de triples) ; les autres formats sont d'abord
+analysés par rdflib. Le checkpoint (--checkpoint) mémorise les paquets
+déjà envoyés : relancer la même commande reprend après une interruption.
+
+Usage :
+    python -m app.scripts.bulk_load app/data/eco.ttl app/data/validationfinale.owl
+    python -m app.scripts.bulk_load partenaires.nt --chunk 100000 --workers 8
+    python -m app.scripts.bulk_load partenaires.nt --graph http://www.ecotourism.org/graph/partenaires
+    python -m app.scripts.bulk_load partenaires.nt --endpoint http://fuseki:3030/Eco-Tourism/data
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.services.graph_loader import GraphLoader
+from app.services.sparql_helpers import close_session
+
+
+def _progress_printer(interval: float):
+    """Affiche la progression au plus une fois par `interval` secondes."""
+    lock = threading.Lock()
+    last = [0.0]
+
+    def show(stats):
+        now = time.monotonic()
+        with lock:
+            if now - last[0] < interval and stats["state"] == "running":
+                return
+            last[0] = now
+        print(f"   {stats['current_file']}: {stats['triples_sent']:>10} triples "
+              f"| {stats['chunks_sent']} paquets (+{stats['chunks_skipped']} repris) "
+              f"| {stats['megabytes_sent']} Mo | {stats['triples_per_s']} triples/s", flush=True)
+
+    return show
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement en masse de fichiers RDF (Graph Store Protocol)")
+    parser.add_argument("files", nargs="+", type=Path, help="Fichiers .ttl / .nt / .owl / .rdf")
+    parser.add_argument("--graph", help="Graphe nommé cible (défaut : graphe par défaut)")
+    parser.add_argument("--endpoint", help=f"Endpoint Graph Store (défaut : {settings.SPARQL_GRAPH_STORE_ENDPOINT})")
+    parser.add_argument("--chunk", type=int, default=settings.SPARQL_BULK_LOAD_CHUNK_TRIPLES, help="triples par requête")
+    parser.add_argument("--workers", type=int, default=settings.SPARQL_BULK_LOAD_WORKERS, help="envois parallèles")
+    parser.add_argument("--checkpoint", type=Path, default=Path(".bulk_load_checkpoint.json"),
+                        help="fichier de reprise")
+    parser.add_argument("--no-resume", action="store_true", help="ignorer et ne pas écrire de checkpoint")
+    args = parser.parse_args()
+
+    missing = [str(f) for f in args.files if not f.is_file()]
+    if missing:
+        parser.error(f"fichiers introuvables : {', '.join(missing)}")
+    if args.endpoint:
+        settings.SPARQL_GRAPH_STORE_ENDPOINT = args.endpoint
+
+    print("=" * 60)
+    print(f"📥 CHARGEMENT EN MASSE → {settings.SPARQL_GRAPH_STORE_ENDPOINT}")
+    print(f"   {len(args.files)} fichier(s), paquets de {args.chunk} triples, {args.workers} envois parallèles")
+    print("=" * 60)
+
+    loader = GraphLoader(
+        args.files, graph=args.graph, chunk_triples=args.chunk, workers=args.workers,
+        checkpoint=None if args.no_resume else args.checkpoint,
+        progress=_progress_printer(interval=2.0)
+    )
+    try:
+        report = loader.run()
+    except KeyboardInterrupt:
+        loader.cancel()
+        print("\n⏸️  Interrompu : relancer la même commande pour reprendre")
+        sys.exit(130)
+    finally:
+        close_session()
+
+    print("-" * 60)
+    print(f"   état            : {report['state']}")
+    print(f"   triples envoyés : {report['triples_sent']}")
+    print(f"   paquets         : {report['chunks_sent']} envoyés, {report['chunks_skipped']} déjà chargés")
+    print(f"   durée           : {report['elapsed_s']} s")
+    print(f"   débit           : {report['triples_per_s']} triples/s")
+    for error in report["errors"]:
+        print(f"   ❌ {error}")
+    sys.exit(0 if report["state"] == "done" else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,17 @@
 # app/scripts/diagnose.py - Diagnostic complet du problème
 
-from SPARQLWrapper import SPARQLWrapper, JSON
+from app.services.sparql_gateway import gateway
 import json
 
 class Diagnostic:
     
     def __init__(self):
-        self.select_endpoint = "http://localhost:3030/Eco-Tourism/sparql"
-        self.sparql = SPARQLWrapper(self.select_endpoint)
-        self.sparql.setReturnFormat(JSON)
+        self.gateway = gateway
     
     def run_query(self, query_str):
         """Exécute une requête et affiche le résultat"""
-        self.sparql.setQuery(query_str)
         try:
-            results = self.sparql.query().convert()
+            results = self.gateway.select(query_str, caller="diagnostic")
             return results
         except Exception as e:
             print(f"❌ Erreur: {e}")
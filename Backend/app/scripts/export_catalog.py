@@ -0,0 +1,67 @@
+# app/scripts/export_catalog.py - Export du catalogue en colonnes (NumPy .npy, mappés en mémoire par l'API)
+"""
+Relit dans Fuseki les familles du catalogue (activités, hébergements,
+transports, lieux) et écrit un tableau structuré NumPy par
+famille dans CATALOG_COLUMNS_PATH, plus le manifeste `catalog.json`
+(écrit en dernier : un worker en cours ne voit que des exports complets).
+
+L'API mappe ces fichiers au démarrage (`np.load(mmap_mode="r")`) : les
+classements /stats et la recherche /locations/nearby sont alors calculés
+sur les colonnes, sans requête ni décodage JSON, tant qu'aucune écriture
+SPARQL n'a eu lieu depuis l'export et qu'il a moins de
+CATALOG_COLUMNS_MAX_AGE_SECONDS (repli SPARQL sinon). Avec
+CATALOG_COLUMNS_AUTO_EXPORT et le snapshot partagé actif, le meneur
+réexporte après chaque reconstruction ; sinon, relancer la commande après
+les écritures (tâche planifiée) et après un import direct dans Fuseki.
+
+Usage :
+    python -m app.scripts.export_catalog
+    python -m app.scripts.export_catalog --output /var/lib/ecotourism/catalog
+    python -m app.scripts.export_catalog --endpoint http://fuseki:3030/Eco-Tourism/sparql
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services import catalog_columns
+from app.services.sparql_helpers import close_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export du catalogue en colonnes NumPy")
+    parser.add_argument("--endpoint", help=f"Endpoint SELECT (défaut : {settings.SPARQL_ENDPOINT})")
+    parser.add_argument("--output", help=f"Répertoire de sortie (défaut : {settings.CATALOG_COLUMNS_PATH})")
+    args = parser.parse_args()
+
+    if args.endpoint:
+        settings.SPARQL_ENDPOINT = args.endpoint
+    if args.output:
+        settings.CATALOG_COLUMNS_PATH = args.output
+    settings.SPARQL_CACHE_ENABLED = False
+
+    directory = catalog_columns._directory()
+    print("=" * 60)
+    print(f"🧮 EXPORT DU CATALOGUE EN COLONNES → {directory}")
+    print("=" * 60)
+    try:
+        start = time.perf_counter()
+        counts = catalog_columns.export()
+        elapsed = time.perf_counter() - start
+    finally:
+        close_session()
+
+    start = time.perf_counter()
+    tables = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in counts}
+    mapped_ms = (time.perf_counter() - start) * 1000
+    for name, array in tables.items():
+        size = (directory / f"{name}.npy").stat().st_size
+        print(f"   {name:<16} {len(array):>8} lignes  {size / 1024:>8.1f} Ko  {', '.join(array.dtype.names)}")
+    print("-" * 60)
+    print(f"   ✅ Export en {elapsed:.2f} s ; mappage des {len(tables)} tables en {mapped_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
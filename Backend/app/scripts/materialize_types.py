@@ -0,0 +1,72 @@
+# app/scripts/materialize_types.py - Matérialisation des rdf:type des super-classes
+"""
+Lit la hiérarchie de classes de l'ontologie (rdfs:subClassOf, fichier
+SPARQL_TYPE_CLOSURE_ONTOLOGY) et ajoute dans Fuseki, pour chaque instance
+d'une sous-classe, les rdf:type de toutes ses super-classes :
+eco:Hotel → eco:Accommodation, eco:Bike → eco:Transport, ...
+
+La passe est idempotente (FILTER NOT EXISTS) et peut être relancée après
+un import. Une fois faite, activer SPARQL_TYPE_CLOSURE_ENABLED : les
+requêtes testent alors un seul triplet (`?x a eco:Activity`) au lieu d'une
+UNION par sous-classe, et chaque INSERT DATA reçoit les types des
+super-classes de ses sujets (les chargements en masse relancent la passe).
+
+Usage :
+    python -m app.scripts.materialize_types --dry-run
+    python -m app.scripts.materialize_types
+    python -m app.scripts.materialize_types --endpoint http://fuseki:3030/Eco-Tourism/sparql \\
+        --update-endpoint http://fuseki:3030/Eco-Tourism/update
+"""
+
+import argparse
+import time
+
+from app.config import settings
+from app.services import type_closure
+from app.services.sparql_helpers import close_session, execute_select_query
+
+
+def _missing():
+    namespace = settings.ONTOLOGY_NAMESPACE
+    rows = execute_select_query(type_closure.missing_query())["results"]["bindings"]
+    return {row["superclass"]["value"].replace(namespace, "eco:"): int(row["missing"]["value"]) for row in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matérialisation de la fermeture de la hiérarchie de classes")
+    parser.add_argument("--endpoint", help=f"Endpoint SELECT (défaut : {settings.SPARQL_ENDPOINT})")
+    parser.add_argument("--update-endpoint", help=f"Endpoint UPDATE (défaut : {settings.SPARQL_UPDATE_ENDPOINT})")
+    parser.add_argument("--dry-run", action="store_true", help="afficher les types manquants sans rien écrire")
+    args = parser.parse_args()
+
+    if args.endpoint:
+        settings.SPARQL_ENDPOINT = args.endpoint
+    if args.update_endpoint:
+        settings.SPARQL_UPDATE_ENDPOINT = args.update_endpoint
+    settings.SPARQL_CACHE_ENABLED = False
+
+    print("=" * 60)
+    print(f"🌳 FERMETURE DE LA HIÉRARCHIE → {settings.SPARQL_UPDATE_ENDPOINT}")
+    print("=" * 60)
+    namespace = settings.ONTOLOGY_NAMESPACE
+    for cls, parents in sorted(type_closure.hierarchy().items()):
+        print(f"   eco:{cls[len(namespace):]:<24} → {', '.join('eco:' + p[len(namespace):] for p in parents)}")
+
+    try:
+        start = time.perf_counter()
+        missing = _missing() if args.dry_run else type_closure.materialize()
+        elapsed = time.perf_counter() - start
+        print("-" * 60)
+        for superclass, count in sorted(missing.items()):
+            print(f"   {superclass:<28} {count:>8} types {'manquants' if args.dry_run else 'ajoutés'}")
+        if not any(missing.values()):
+            print("   ✅ Fermeture déjà complète")
+        elif not args.dry_run:
+            print(f"   ✅ {sum(missing.values())} types ajoutés en {elapsed:.2f} s "
+                  f"({sum(_missing().values())} restants)")
+    finally:
+        close_session()
+
+
+if __name__ == "__main__":
+    main()
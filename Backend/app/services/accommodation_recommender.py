@@ -1,5 +1,4 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
-from app.config import settings
+from app.services.sparql_gateway import gateway
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,24 +6,12 @@ logger = logging.getLogger(__name__)
 class AccommodationRecommender:
     
     def __init__(self):
-        self.endpoint = settings.SPARQL_ENDPOINT
-        self.sparql = SPARQLWrapper(self.endpoint)
-        self.sparql.setReturnFormat(JSON)
-        
-        self.prefixes = f"""
-        PREFIX eco: <{settings.ONTOLOGY_NAMESPACE}>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        """
+        self.gateway = gateway
     
     def execute_query(self, query: str):
         """Exécute une requête SPARQL"""
-        full_query = self.prefixes + query
-        self.sparql.setQuery(full_query)
-        
         try:
-            results = self.sparql.query().convert()
-            return results["results"]["bindings"]
+            return self.gateway.bindings(query, caller="accommodation_recommender")
         except Exception as e:
             logger.error(f"Erreur SPARQL: {e}")
             raise Exception(f"Erreur: {str(e)}")
@@ -1,12 +1,11 @@
 # activity_comparator.py - Comparaison d'Activités
-from SPARQLWrapper import SPARQLWrapper, JSON
+from app.services.sparql_gateway import gateway
 import re
 
 class ActivityComparator:
     def __init__(self):
-        self.endpoint = "http://localhost:3030/Eco-Tourism/sparql"
-        self.sparql = SPARQLWrapper(self.endpoint)
-        self.sparql.setReturnFormat(JSON)
+        # Endpoint, pool de connexions et retries fournis par la passerelle partagée
+        self.gateway = gateway
     
     def get_activity_details(self, activity_uri):
         """Récupère les détails complets d'une activité"""
@@ -24,9 +23,8 @@ class ActivityComparator:
         }}
         """
         
-        self.sparql.setQuery(query)
         try:
-            results = self.sparql.query().convert()
+            results = self.gateway.select(query, caller="activity_comparator", with_prefixes=False)
             if results["results"]["bindings"]:
                 return results["results"]["bindings"][0]
             return None
@@ -153,9 +151,8 @@ class ActivityComparator:
         LIMIT 5
         """
         
-        self.sparql.setQuery(query)
         try:
-            results = self.sparql.query().convert()
+            results = self.gateway.select(query, caller="activity_comparator", with_prefixes=False)
             return results["results"]["bindings"]
         except Exception as e:
             print(f"❌ Erreur : {e}")
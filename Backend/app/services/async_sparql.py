@@ -0,0 +1,215 @@
+import asyncio
+import time
+from functools import partial
+import httpx
+from typing import Optional
+from app.config import settings
+from app.services.sparql_cache import result_cache, cache_key, MISS
+from app.services.sparql_singleflight import async_select_flight
+from app.services.sparql_errors import SparqlError
+from app.services.sparql_breaker import breaker, last_good, stale_or_raise
+from app.services import request_context, embedded_store, sparql_helpers, sparql_formats
+from app.services.sparql_replicas import router as replica_router
+from app.services.sparql_batcher import update_batcher, is_insert_data
+
+
+# ============================================
+# CLIENT SPARQL ASYNCHRONE (httpx)
+# ============================================
+# Même surface que sparql_helpers, mais awaitable : à utiliser depuis les
+# endpoints `async def` pour ne jamais bloquer la boucle d'événements.
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Retourne le client HTTP asynchrone partagé (créé au premier appel,
+    dans la boucle d'événements du worker uvicorn).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.SPARQL_POOL_MAXSIZE,
+                max_keepalive_connections=settings.SPARQL_POOL_MAXSIZE
+            ),
+            timeout=httpx.Timeout(
+                settings.SPARQL_READ_TIMEOUT,
+                connect=settings.SPARQL_CONNECT_TIMEOUT
+            ),
+            headers={"Accept-Encoding": settings.SPARQL_ACCEPT_ENCODING}
+        )
+    return _client
+
+
+async def close_client():
+    """Ferme le pool asynchrone (appelé à l'arrêt de l'API)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _timeout(what: str) -> httpx.Timeout:
+    """Timeout de l'appel, borné par le temps restant de la requête HTTP en cours."""
+    read = request_context.budget(settings.SPARQL_READ_TIMEOUT, what)
+    return httpx.Timeout(read, connect=min(settings.SPARQL_CONNECT_TIMEOUT, read))
+
+
+def _transport_error(message: str, error: Exception) -> Exception:
+    if request_context.expired():
+        return request_context.deadline_exceeded("SPARQL")
+    return SparqlError(f"{message} : {error}", retryable=True)
+
+
+async def _fetch_select(query: str):
+    """Envoie le SELECT à Fuseki ; retourne (résultat JSON, taille de la réponse en octets)."""
+    if embedded_store.enabled():
+        # Évaluation rdflib (CPU) hors de la boucle d'événements
+        request_context.budget(settings.SPARQL_READ_TIMEOUT, "SPARQL")
+        result = await asyncio.to_thread(embedded_store.get_store().select, query)
+        return result, embedded_store.estimate_size(result)
+    replica = replica_router.acquire() if replica_router.enabled else None
+    url = replica.url if replica is not None else settings.SPARQL_ENDPOINT
+    fmt = settings.SPARQL_RESULT_FORMAT
+    start = time.monotonic()
+    failed = True
+    try:
+        response = await get_client().post(
+            url,
+            data={"query": query},
+            headers={"Accept": sparql_formats.ACCEPT[fmt]},
+            timeout=_timeout("SPARQL")
+        )
+        failed = response.status_code >= 500
+    except httpx.HTTPError as e:
+        failed = not request_context.expired()
+        raise _transport_error("Erreur lors de la requête SPARQL", e) from e
+    finally:
+        if replica is not None:
+            replica_router.release(replica, time.monotonic() - start, failed)
+    if response.status_code != 200:
+        raise SparqlError(
+            f"Erreur lors de la requête SPARQL : Erreur SPARQL ({response.status_code}): {response.text}",
+            retryable=response.status_code >= 500
+        )
+    try:
+        if fmt == "json":
+            return response.json(), len(response.content)
+        return sparql_formats.decode(fmt, response.content), len(response.content)
+    except ValueError as e:
+        raise SparqlError(f"Erreur lors de la requête SPARQL : {e}")
+
+
+async def _post_update(query: str):
+    if embedded_store.enabled():
+        request_context.budget(settings.SPARQL_READ_TIMEOUT, "SPARQL UPDATE")
+        return await asyncio.to_thread(embedded_store.get_store().update, query)
+    headers = {"Content-Type": "application/sparql-update"}
+    try:
+        response = await get_client().post(
+            settings.SPARQL_UPDATE_ENDPOINT,
+            content=query.encode("utf-8"),
+            headers=headers,
+            timeout=_timeout("SPARQL UPDATE")
+        )
+    except httpx.HTTPError as e:
+        raise _transport_error("Erreur lors de la requête SPARQL UPDATE", e) from e
+    if response.status_code not in (200, 204):
+        raise SparqlError(
+            f"Erreur lors de la requête SPARQL UPDATE : Erreur SPARQL UPDATE ({response.status_code}): {response.text}",
+            retryable=response.status_code >= 500
+        )
+    return {"success": True}
+
+
+async def _guarded(fn, *args):
+    """Version awaitable de sparql_helpers._guarded (même disjoncteur partagé)."""
+    if not settings.SPARQL_BREAKER_ENABLED:
+        return await fn(*args)
+    probe = breaker.before_call()
+    start = time.monotonic()
+    try:
+        result = await fn(*args)
+    except SparqlError as e:
+        breaker.record(time.monotonic() - start, failed=e.retryable, probe=probe)
+        raise
+    except BaseException:
+        # asyncio.CancelledError compris : la sonde éventuelle est rendue
+        breaker.abandon(probe)
+        raise
+    breaker.record(time.monotonic() - start, failed=False, probe=probe)
+    return result
+
+
+async def execute_select_query(query: str):
+    """
+    Exécute une requête SPARQL SELECT sur Apache Fuseki sans bloquer la boucle.
+    Retourne une réponse JSON formatée (cache partagé avec sparql_helpers :
+    le résultat ne doit pas être modifié).
+    """
+    key = cache_key(settings.SPARQL_ENDPOINT, query)
+    if settings.SPARQL_CACHE_ENABLED:
+        cached = result_cache.get(key)
+        if cached is not MISS:
+            return cached
+    generation = result_cache.generation
+
+    async def fetch():
+        try:
+            result, size = await _guarded(_fetch_select, query)
+        except SparqlError as e:
+            return stale_or_raise(key, e)
+        if settings.SPARQL_CACHE_ENABLED:
+            # Même clé que le client sync : la relecture en arrière-plan passe par lui
+            result_cache.put(key, result, size, generation, refresh=partial(
+                sparql_helpers._guarded, sparql_helpers._fetch_select, query, None))
+        if settings.SPARQL_BREAKER_ENABLED:
+            last_good.put(key, result, size)
+        return result, False
+
+    if not settings.SPARQL_SINGLE_FLIGHT_ENABLED:
+        result, stale = await fetch()
+    else:
+        result, stale = await async_select_flight.do((key, generation), fetch)
+    if stale:
+        request_context.mark_stale()
+    return result
+
+
+async def execute_update_query(query: str):
+    """
+    Exécute une requête SPARQL UPDATE (INSERT/DELETE) sur Apache Fuseki sans bloquer la boucle.
+    """
+    query = sparql_helpers.prepare_update(query)
+    if settings.SPARQL_UPDATE_BATCH_ENABLED and is_insert_data(query):
+        submitted = update_batcher.submit(query)
+        sparql_helpers.after_write_when_done(submitted)
+        future = asyncio.wrap_future(submitted)
+        try:
+            # shield : l'opération reste dans son lot même si l'appelant abandonne
+            return await asyncio.wait_for(asyncio.shield(future), request_context.remaining())
+        except asyncio.TimeoutError:
+            raise request_context.deadline_exceeded("SPARQL UPDATE (lot)")
+    try:
+        return await _guarded(_post_update, query)
+    finally:
+        sparql_helpers.after_write()
+
+
+# helpers utilisables dans les endpoints async
+async def sparql_select(query: str):
+    return await execute_select_query(query)
+
+async def sparql_insert(query: str):
+    # Requête INSERT DATA
+    return await execute_update_query(query)
+
+async def sparql_delete(query: str):
+    # Requête DELETE DATA/DELETE WHERE
+    return await execute_update_query(query)
+
+async def sparql_update(query: str):
+    # Requête DELETE/INSERT WHERE (UPDATE)
+    return await execute_update_query(query)
@@ -0,0 +1,325 @@
+# app/services/catalog_columns.py - Catalogue en colonnes (tableaux NumPy sur disque, mappés en mémoire)
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.services import embedded_store
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = Path(__file__).resolve().parent.parent
+MANIFEST = "catalog.json"
+DIRTY = "catalog.dirty"
+EARTH_RADIUS_KM = 6371.0
+
+
+class Table:
+    """
+    Famille du catalogue exportée en tableau structuré NumPy : une ligne par
+    entité (`iri`, `types` = noms locaux des classes déclarées entourés
+    d'espaces), colonnes texte en Unicode de largeur fixe et colonnes
+    numériques en float64 (NaN si la propriété est absente). Chaque colonne
+    porte le nom local de la propriété eco lue ; une colonne numérique de
+    `lexical` garde aussi sa forme lexicale, telle que renvoyée par SPARQL,
+    dans la colonne texte `<nom>_text`.
+    """
+
+    def __init__(self, name: str, key: str, strings: Sequence[str] = (), numbers: Sequence[str] = (),
+                 lexical: Sequence[str] = ()):
+        self.name = name
+        self.key = key          # motif obligatoire liant ?entity
+        self.strings = tuple(strings)
+        self.numbers = tuple(numbers)
+        self.lexical = tuple(lexical)
+
+    def query(self) -> str:
+        columns = self.strings + self.numbers
+        optional = "\n".join(
+            f"  OPTIONAL {{ ?entity eco:{column} ?{column} }}" for column in columns if f"?{column}" not in self.key
+        )
+        return f"""PREFIX eco: <{settings.ONTOLOGY_NAMESPACE}>
+SELECT ?entity {" ".join("?" + column for column in columns)}
+WHERE {{
+  {self.key}
+{optional}
+}}"""
+
+    def types_query(self) -> str:
+        return f"""PREFIX eco: <{settings.ONTOLOGY_NAMESPACE}>
+SELECT ?entity ?type
+WHERE {{
+  {self.key}
+  ?entity a ?type .
+  FILTER(STRSTARTS(STR(?type), "{settings.ONTOLOGY_NAMESPACE}"))
+}}"""
+
+
+TABLES = [
+    Table("activities", "?entity eco:activityName ?activityName .",
+          strings=("activityId", "activityName"), numbers=("pricePerPerson", "activityRating", "durationHours")),
+    Table("accommodations", "?entity eco:accommodationName ?accommodationName .",
+          strings=("accommodationId", "accommodationName"), numbers=("pricePerNight", "accommodationRating")),
+    Table("transports", "?entity eco:transportId ?transportId ; eco:transportName ?transportName .",
+          strings=("transportId", "transportName", "transportType"),
+          numbers=("pricePerKm", "carbonEmissionPerKm", "averageSpeed")),
+    Table("locations", "?entity eco:latitude ?latitude ; eco:longitude ?longitude .",
+          strings=("locationId", "locationName"), numbers=("latitude", "longitude"),
+          lexical=("latitude", "longitude")),
+]
+
+
+def _directory() -> Path:
+    if not settings.CATALOG_COLUMNS_PATH:
+        return Path(tempfile.gettempdir()) / "ecotourism-catalog-columns"
+    path = Path(settings.CATALOG_COLUMNS_PATH)
+    return path if path.is_absolute() else _APP_DIR / path
+
+
+def _build(table: Table, select) -> np.ndarray:
+    """Résultats SPARQL → tableau structuré (première valeur retenue pour une propriété multiple)."""
+    rows: Dict[str, Dict[str, str]] = {}
+    for binding in select(table.query())["results"]["bindings"]:
+        row = rows.setdefault(binding["entity"]["value"], {})
+        for column, term in binding.items():
+            row.setdefault(column, term["value"])
+    types: Dict[str, list] = {}
+    namespace = settings.ONTOLOGY_NAMESPACE
+    for binding in select(table.types_query())["results"]["bindings"]:
+        types.setdefault(binding["entity"]["value"], []).append(binding["type"]["value"][len(namespace):])
+
+    iris = list(rows)
+    texts = {
+        "iri": iris,
+        "types": [" " + " ".join(sorted(set(types.get(iri, ())))) + " " for iri in iris],
+        **{column: [rows[iri].get(column, "") for iri in iris] for column in table.strings},
+        **{f"{column}_text": [rows[iri].get(column, "") for iri in iris] for column in table.lexical},
+    }
+    dtype = [(column, f"U{max([1] + [len(value) for value in values])}") for column, values in texts.items()]
+    dtype += [(column, "f8") for column in table.numbers]
+    array = np.empty(len(iris), dtype=dtype)
+    for column, values in texts.items():
+        array[column] = values
+    for column in table.numbers:
+        array[column] = [_number(rows[iri].get(column)) for iri in iris]
+    return array
+
+
+def _number(value: Optional[str]) -> float:
+    try:
+        return float(value) if value else np.nan
+    except ValueError:
+        return np.nan
+
+
+class CatalogColumns:
+    """
+    Catalogue en colonnes pour les classements, filtres et calculs de
+    distance : un fichier `.npy` par famille (TABLES), généré par
+    `python -m app.scripts.export_catalog` (et, si
+    CATALOG_COLUMNS_AUTO_EXPORT, par le meneur du snapshot partagé après
+    chaque reconstruction),
+    puis mappé en lecture seule (`np.load(mmap_mode="r")`) : au démarrage,
+    aucun JSON à décoder ni requête à envoyer, et les pages sont partagées
+    entre workers par le cache du système.
+
+    Un export n'est servi que s'il est postérieur à la dernière écriture
+    SPARQL, datée par le fichier `catalog.dirty` (tous workers et
+    redémarrages confondus), et plus récent que
+    CATALOG_COLUMNS_MAX_AGE_SECONDS (écritures faites hors de l'API) ;
+    sinon `table` retourne None et l'appelant interroge SPARQL. Un nouvel
+    export (manifeste modifié) est remappé à la lecture suivante.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[str, np.ndarray] = {}
+        self._manifest_mtime: Optional[float] = None
+        self.exported_at: Optional[float] = None
+        self.hits = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.exports = 0
+
+    def load(self) -> Dict[str, int]:
+        """Mappe le dernier export s'il a changé ; retourne le nombre de lignes par table."""
+        directory = _directory()
+        try:
+            mtime = (directory / MANIFEST).stat().st_mtime
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                try:
+                    manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+                    tables = {name: np.load(directory / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+                              for name in manifest["tables"]}
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Catalogue en colonnes illisible ({directory}) : {e}")
+                    return {}
+                self._tables, self._manifest_mtime = tables, mtime
+                self.exported_at = manifest["exported_at"]
+            return {name: len(array) for name, array in self._tables.items()}
+
+    def _dirty_since(self) -> float:
+        try:
+            return (_directory() / DIRTY).stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _fresh(self) -> bool:
+        exported_at = self.exported_at
+        return exported_at is not None and self._dirty_since() < exported_at \
+            and time.time() - exported_at < settings.CATALOG_COLUMNS_MAX_AGE_SECONDS
+
+    def table(self, name: str) -> Optional[np.ndarray]:
+        """Table mappée `name`, ou None (pas d'export, export trop ancien ou écriture depuis : repli SPARQL)."""
+        if not settings.CATALOG_COLUMNS_ENABLED or embedded_store.enabled():
+            return None  # magasin embarqué : un export peut inclure des écritures non persistées
+        self.load()
+        array = self._tables.get(name)
+        if array is None or not self._fresh():
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return array
+
+    def answer(self, name: str, compute: Callable[[np.ndarray], Any]) -> Optional[Any]:
+        """
+        `compute(table)` sur la table mappée `name`, ou None : pas d'export
+        servable, ou export illisible (fichier tronqué, colonne absente d'un
+        export plus ancien...), journalisé ; l'appelant interroge SPARQL.
+        """
+        array = self.table(name)
+        if array is None:
+            return None
+        try:
+            return compute(array)
+        except Exception as e:
+            logger.warning(f"Catalogue en colonnes inutilisable ({name}), repli SPARQL : {e}")
+            self.errors += 1
+            return None
+
+    def note_write(self):
+        """Appelé après chaque écriture SPARQL : l'export courant n'est plus servi."""
+        directory = _directory()
+        if directory.is_dir():
+            (directory / DIRTY).touch()
+
+    def export(self, select=None) -> Dict[str, int]:
+        """
+        Relit le catalogue et réécrit les fichiers (remplacements atomiques,
+        manifeste en dernier) ; `select` : exécuteur de SELECT (défaut :
+        appel direct au primaire Fuseki, hors cache et hors réplicas).
+        """
+        if select is None:
+            from app.services.sparql_helpers import _fetch_select_primary, _guarded
+            select = lambda query: _guarded(_fetch_select_primary, query, None)[0]  # noqa: E731
+
+        exported_at = time.time()
+        directory = _directory()
+        directory.mkdir(parents=True, exist_ok=True)
+        counts = {}
+        for table in TABLES:
+            array = _build(table, select)
+            tmp = directory / f"{table.name}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(tmp, directory / f"{table.name}.npy")
+            counts[table.name] = len(array)
+        manifest = {"exported_at": exported_at, "tables": counts}
+        tmp = directory / f"{MANIFEST}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, directory / MANIFEST)
+        self.exports += 1
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.CATALOG_COLUMNS_ENABLED,
+            "path": str(_directory()),
+            "tables": {name: len(array) for name, array in self._tables.items()},
+            "exported_at": self.exported_at,
+            "fresh": self._fresh(),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "exports": self.exports,
+        }
+
+
+columns = CatalogColumns()
+
+
+# ============================================
+# CALCULS VECTORISÉS
+# ============================================
+
+def has_type(array: np.ndarray, classes: Iterable[str]) -> np.ndarray:
+    """Masque des lignes déclarées d'au moins une des classes (noms locaux)."""
+    mask = np.zeros(len(array), dtype=bool)
+    for cls in classes:
+        mask |= np.char.find(array["types"], f" {cls} ") >= 0
+    return mask
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Distances (km) du point à chaque ligne, formule de Haversine sur les colonnes entières."""
+    lat1, lon1 = np.radians(latitude), np.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def top(values: np.ndarray, n: int, descending: bool = False, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices des `n` meilleures valeurs (NaN exclues), ordre stable en cas d'égalité."""
+    valid = ~np.isnan(values)
+    if mask is not None:
+        valid &= mask
+    candidates = np.flatnonzero(valid)
+    keys = -values[candidates] if descending else values[candidates]
+    return candidates[np.argsort(keys, kind="stable")[:n]]
+
+
+def ranking(array: np.ndarray, column: str, label: str, name_column: str,
+            descending: bool = False, n: int = 10) -> List[Dict[str, Any]]:
+    """Classement `{"name", <label>, "uri"}` des routes /stats (lignes sans valeur exclues)."""
+    return [{"name": str(array[name_column][i]), label: float(array[column][i]), "uri": str(array["iri"][i])}
+            for i in top(array[column], n, descending)]
+
+
+def text(value: str) -> Optional[str]:
+    """Cellule texte d'une table (chaîne vide = propriété absente)."""
+    return str(value) or None
+
+
+def load() -> Dict[str, int]:
+    return columns.load()
+
+
+def table(name: str) -> Optional[np.ndarray]:
+    return columns.table(name)
+
+
+def answer(name: str, compute: Callable[[np.ndarray], Any]) -> Optional[Any]:
+    return columns.answer(name, compute)
+
+
+def note_write():
+    columns.note_write()
+
+
+def export(select=None) -> Dict[str, int]:
+    return columns.export(select)
+
+
+def stats() -> Dict[str, Any]:
+    return columns.stats()
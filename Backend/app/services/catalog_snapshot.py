@@ -0,0 +1,398 @@
+# app/services/catalog_snapshot.py - Snapshot du catalogue partagé entre workers (mémoire partagée)
+
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de flock, le snapshot reste désactivé
+    fcntl = None
+
+from app.config import settings
+from app.services import embedded_store
+
+logger = logging.getLogger(__name__)
+
+# Segment pointeur : version publiée, début de sa construction, publication, dernière écriture SPARQL
+_POINTER = struct.Struct("<Qddd")
+_HEADER_SIZE = struct.Struct("<Q")
+
+
+class _Kind:
+    __slots__ = ("name", "query", "subject")
+
+    def __init__(self, name: str, query: Callable[[int], str], subject: str):
+        self.name = name
+        self.query = query      # limit -> SELECT de toutes les entités de la famille
+        self.subject = subject  # variable liée à l'IRI de l'entité
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Ouvre un segment existant sans l'inscrire au resource_tracker : sinon
+    l'arrêt d'un worker supprimerait un segment encore utilisé par les autres.
+    """
+    segment = SharedMemory(name=name)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _create(name: str, size: int) -> SharedMemory:
+    segment = SharedMemory(name=name, create=True, size=size)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class CatalogSnapshot:
+    """
+    Catalogue (activités, hébergements, transports, produits, lieux,
+    saisons) construit une seule fois par un processus meneur dans un
+    segment `multiprocessing.shared_memory`, et lu par tous les workers
+    uvicorn : la mémoire ne croît pas avec le nombre de workers, et un
+    worker qui démarre trouve le catalogue déjà prêt.
+
+    - Meneur : le premier processus qui obtient le verrou `flock` de
+      CATALOG_SNAPSHOT_LOCK_FILE ; s'il s'arrête, un autre worker le remplace.
+    - Chaque snapshot est un nouveau segment `<nom>-<version>` ; le segment
+      pointeur `<nom>` n'est mis à jour qu'une fois le snapshot écrit, puis
+      l'ancien segment est supprimé (les workers qui l'ont ouvert gardent
+      leur mapping jusqu'à leur prochaine lecture).
+    - Toute écriture SPARQL, dans n'importe quel worker, date le pointeur :
+      un snapshot commencé avant n'est plus servi (les endpoints repassent
+      par SPARQL) jusqu'à ce que le meneur en publie un nouveau.
+
+    Les lignes sont des bindings SPARQL JSON, décodés une fois par famille
+    et par version dans chaque worker (à la première lecture), puis servis
+    sans recopie : comme les résultats du cache, ils sont partagés et ne
+    doivent pas être modifiés. Les segments survivent à
+    l'arrêt des workers (/dev/shm) : un nouveau meneur ne sert l'ancien
+    snapshot qu'une fois le sien publié.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._kinds: Dict[str, _Kind] = {}
+        self._lock = threading.Lock()
+        self._pointer: Optional[SharedMemory] = None
+        self._segment: Optional[SharedMemory] = None
+        self._version = 0
+        self._index: Dict[str, Any] = {}
+        self._decoded: Dict[str, Dict[str, list]] = {}  # famille → lignes décodées de `_version`
+        self._lock_fd: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retry_at = 0.0
+        self.leader = False
+        self.hits = 0
+        self.fallbacks = 0
+        self.builds = 0
+        self.build_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def register(self, name: str, query: Callable[[int], str], subject: str):
+        """Déclare une famille du catalogue (appelé à l'import des routeurs)."""
+        self._kinds[name] = _Kind(name, query, subject)
+
+    # ----------------------------------------
+    # Cycle de vie
+    # ----------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Ouvre le pointeur partagé et lance le thread meneur / candidat (no-op si désactivé)."""
+        if not settings.CATALOG_SNAPSHOT_ENABLED or fcntl is None or self._thread is not None:
+            return
+        if embedded_store.enabled():
+            return  # un graphe rdflib par processus : rien à partager
+        try:
+            try:
+                self._pointer = _create(self.name, _POINTER.size)
+            except FileExistsError:
+                self._pointer = _attach(self.name)
+        except OSError as e:
+            logger.warning(f"Snapshot du catalogue désactivé (mémoire partagée indisponible) : {e}")
+            return
+        self._stop.clear()
+
+        def loop():
+            while True:
+                if not self.leader:
+                    self._try_lead()
+                if self.leader and self._due():
+                    self.build()
+                if self._stop.wait(settings.CATALOG_SNAPSHOT_POLL_SECONDS):
+                    return
+
+        self._thread = threading.Thread(target=loop, name="catalog-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le thread et libère le verrou ; les segments restent pour les autres workers."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+                self._version = 0
+                self._decoded = {}
+            if self._pointer is not None:
+                self._pointer.close()
+                self._pointer = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # libère le flock : un autre worker devient meneur
+            self._lock_fd = None
+            self.leader = False
+
+    def _try_lead(self):
+        path = settings.CATALOG_SNAPSHOT_LOCK_FILE or os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return
+        self._lock_fd = fd
+        self.leader = True
+        # Snapshot d'un meneur précédent (éventuellement d'un déploiement antérieur) :
+        # plus servi jusqu'à la publication du nôtre
+        self.note_write()
+        logger.info(f"Snapshot du catalogue : processus {os.getpid()} meneur")
+
+    # ----------------------------------------
+    # Pointeur partagé
+    # ----------------------------------------
+
+    def _read_pointer(self):
+        return _POINTER.unpack_from(self._pointer.buf)
+
+    def note_write(self):
+        """Appelé après chaque écriture SPARQL : les snapshots commencés avant ne sont plus servis."""
+        pointer = self._pointer
+        if pointer is not None:
+            struct.pack_into("<d", pointer.buf, 24, time.time())
+
+    def last_write(self) -> Optional[float]:
+        """Date de la dernière écriture SPARQL, tous workers confondus (None : pas de pointeur)."""
+        pointer = self._pointer
+        if pointer is None:
+            return None
+        return self._read_pointer()[3]
+
+    def _fresh(self, started: float, published: float, last_write: float) -> bool:
+        return last_write < started and time.time() - published < 2 * settings.CATALOG_SNAPSHOT_MAX_AGE_SECONDS
+
+    def _due(self) -> bool:
+        if time.monotonic() < self._retry_at:
+            return False
+        version, started, published, last_write = self._read_pointer()
+        return version == 0 or last_write >= started \
+            or time.time() - published >= settings.CATALOG_SNAPSHOT_MAX_AGE_SECONDS
+
+    # ----------------------------------------
+    # Construction (meneur)
+    # ----------------------------------------
+
+    def build(self) -> bool:
+        """Construit et publie un nouveau snapshot ; False (réessai plus tard) en cas d'échec."""
+        from app.services.sparql_breaker import CLOSED, breaker
+        from app.services.sparql_helpers import _fetch_select_primary, _guarded
+
+        if settings.SPARQL_BREAKER_ENABLED and breaker.state != CLOSED:
+            return False
+        start = time.perf_counter()
+        started = time.time()
+        try:
+            # Types déclarés (comme `?x a eco:T` côté SPARQL, super-classes si la fermeture est matérialisée)
+            namespace = settings.ONTOLOGY_NAMESPACE
+            types: Dict[str, set] = {}
+            typed = _guarded(_fetch_select_primary, f"""SELECT ?entity ?type WHERE {{
+  ?entity a ?type . FILTER(STRSTARTS(STR(?type), "{namespace}"))
+}}""", None)[0]["results"]["bindings"]
+            for row in typed:
+                types.setdefault(row["entity"]["value"], set()).add(row["type"]["value"][len(namespace):])
+
+            header: Dict[str, Any] = {}
+            blobs: List[bytes] = []
+            offset = 0
+            limit = settings.CATALOG_SNAPSHOT_MAX_ROWS
+            for kind in self._kinds.values():
+                bindings = _guarded(_fetch_select_primary, kind.query(limit), None)[0]["results"]["bindings"]
+                row_types = [sorted(types.get(b[kind.subject]["value"], ())) if kind.subject in b else []
+                             for b in bindings]
+                blob = json.dumps({"rows": bindings, "types": row_types},
+                                  ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                header[kind.name] = {
+                    "offset": offset, "size": len(blob), "count": len(bindings),
+                    "truncated": len(bindings) >= limit,
+                    "classes": sorted({name for names in row_types for name in names}),
+                }
+                blobs.append(blob)
+                offset += len(blob)
+        except Exception as e:
+            self.last_error = str(e)
+            self._retry_at = time.monotonic() + settings.CATALOG_SNAPSHOT_RETRY_SECONDS
+            logger.warning(f"Snapshot du catalogue non construit : {e}")
+            return False
+
+        head = json.dumps(header).encode("utf-8")
+        base = _HEADER_SIZE.size + len(head)
+        version, _, _, _ = self._read_pointer()
+        version += 1
+        segment = _create(f"{self.name}-{version}", base + offset)
+        _HEADER_SIZE.pack_into(segment.buf, 0, len(head))
+        segment.buf[_HEADER_SIZE.size:base] = head
+        position = base
+        for blob in blobs:
+            segment.buf[position:position + len(blob)] = blob
+            position += len(blob)
+        segment.close()
+
+        # Dates d'abord, version en dernier : un lecteur ne voit la version qu'une fois le snapshot complet
+        struct.pack_into("<dd", self._pointer.buf, 8, started, time.time())
+        struct.pack_into("<Q", self._pointer.buf, 0, version)
+        if version > 1:
+            try:
+                previous = SharedMemory(name=f"{self.name}-{version - 1}")  # inscrit, puis désinscrit par unlink
+            except FileNotFoundError:
+                pass
+            else:
+                previous.close()
+                previous.unlink()
+
+        self.builds += 1
+        self.build_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.last_error = None
+        logger.info(f"Snapshot du catalogue v{version} publié "
+                    f"({(base + offset) / 1024:.0f} Ko en {self.build_ms} ms)")
+        if settings.CATALOG_COLUMNS_AUTO_EXPORT and settings.CATALOG_COLUMNS_ENABLED:
+            from app.services import catalog_columns
+            try:
+                catalog_columns.export()
+            except Exception as e:
+                logger.warning(f"Catalogue en colonnes non exporté : {e}")
+        return True
+
+    # ----------------------------------------
+    # Lecture (tous les workers)
+    # ----------------------------------------
+
+    def _map(self, version: int) -> bool:
+        """Ouvre le segment de `version` (appelé sous verrou)."""
+        if self._version == version:
+            return True
+        try:
+            segment = _attach(f"{self.name}-{version}")
+        except FileNotFoundError:
+            return False  # remplacé entre-temps : la prochaine lecture prendra le suivant
+        (size,) = _HEADER_SIZE.unpack_from(segment.buf)
+        base = _HEADER_SIZE.size + size
+        index = json.loads(bytes(segment.buf[_HEADER_SIZE.size:base]))
+        for entry in index.values():
+            entry["offset"] += base
+        if self._segment is not None:
+            self._segment.close()
+        self._segment, self._version, self._index = segment, version, index
+        self._decoded = {}
+        return True
+
+    def rows(self, kind: str, rdf_type: Optional[str] = None,
+             where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+             limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Bindings de la famille `kind` (dans l'ordre du snapshot), filtrés sur
+        la classe `rdf_type` (nom local, super-classes comprises) et le
+        prédicat `where`, au plus `limit`. None si le snapshot n'est pas
+        utilisable (absent, antérieur à une écriture, classe inconnue,
+        famille tronquée) : l'appelant interroge alors SPARQL.
+        """
+        if self._pointer is None:
+            return None
+        version, started, published, last_write = self._read_pointer()
+        with self._lock:
+            if version == 0 or not self._fresh(started, published, last_write) or not self._map(version):
+                self.fallbacks += 1
+                return None
+            entry = self._index.get(kind)
+            if entry is None or (rdf_type is not None and rdf_type not in entry["classes"]):
+                self.fallbacks += 1
+                return None
+            data = self._decoded.get(kind)
+            if data is None:
+                data = json.loads(bytes(self._segment.buf[entry["offset"]:entry["offset"] + entry["size"]]))
+                self._decoded[kind] = data
+
+        selected = []
+        for binding, names in zip(data["rows"], data["types"]):
+            if (rdf_type is None or rdf_type in names) and (where is None or where(binding)):
+                selected.append(binding)
+                if limit is not None and len(selected) >= limit:
+                    break
+        if entry["truncated"] and (limit is None or len(selected) < limit):
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        result = {
+            "enabled": settings.CATALOG_SNAPSHOT_ENABLED and fcntl is not None,
+            "running": self.running,
+            "leader": self.leader,
+            "pid": os.getpid(),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "builds": self.builds,
+            "build_ms": self.build_ms,
+            "last_error": self.last_error,
+        }
+        if self._pointer is not None:
+            version, started, published, last_write = self._read_pointer()
+            with self._lock:
+                kinds = {name: entry["count"] for name, entry in self._index.items()} if self._version == version else None
+            result.update({
+                "version": version,
+                "fresh": version > 0 and self._fresh(started, published, last_write),
+                "age_seconds": round(time.time() - published, 1) if version else None,
+                "kinds": kinds,
+            })
+        return result
+
+
+# Snapshot unique du processus (segment partagé entre workers)
+snapshot = CatalogSnapshot(settings.CATALOG_SNAPSHOT_NAME)
+
+
+def stats() -> Dict[str, Any]:
+    return snapshot.stats()
+
+
+def register(name: str, query: Callable[[int], str], subject: str):
+    snapshot.register(name, query, subject)
+
+
+def rows(kind: str, rdf_type: Optional[str] = None,
+         where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+         limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    return snapshot.rows(kind, rdf_type, where, limit)
+
+
+def note_write():
+    snapshot.note_write()
+
+
+def last_write() -> Optional[float]:
+    return snapshot.last_write()
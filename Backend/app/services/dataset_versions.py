@@ -0,0 +1,110 @@
+# app/services/dataset_versions.py - Versions des données par famille d'entités (ETag HTTP)
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from app.config import settings
+from app.services import catalog_snapshot, request_context
+
+
+class DatasetVersions:
+    """
+    Compteurs de version des données, un par famille d'entités
+    (`activities`, `accommodations`, ...), plus un compteur global.
+
+    Chaque écriture SPARQL incrémente la version de la famille de la route
+    qui l'a faite (POST /activities/... → `activities`) ; une écriture hors
+    de ces familles (réservations, avis, administration, chargement en
+    masse, scripts lancés dans le processus) incrémente le compteur global,
+    qui entre dans toutes les versions. Une version est donc un majorant :
+    elle peut changer sans que la réponse change, jamais l'inverse.
+
+    Compteurs propres au processus, comme le cache de résultats : `epoch`
+    (tiré au démarrage) entre dans les ETag pour qu'un redémarrage ne
+    valide pas les copies servies par le processus précédent. Avec le
+    snapshot partagé actif, la date de la dernière écriture de son pointeur
+    (tous workers confondus) y entre aussi : une écriture faite par un autre
+    worker change l'ETag aussitôt. Sans lui, seule la fenêtre
+    HTTP_ETAG_TTL_SECONDS borne ce décalage.
+    """
+
+    def __init__(self):
+        self.epoch = os.urandom(8).hex()
+        self.global_version = 0
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.bumps: Dict[str, int] = {}
+        # Mis à jour par le middleware ETag (boucle d'événements)
+        self.tagged = 0
+        self.not_modified = 0
+
+    def bump(self, family: Optional[str] = None):
+        """Nouvelle version de `family` (None : de toutes les familles)."""
+        name = family or "*"
+        with self._lock:
+            if family is None:
+                self.global_version += 1
+            else:
+                self._versions[family] = self._versions.get(family, 0) + 1
+            self.bumps[name] = self.bumps.get(name, 0) + 1
+
+    def token(self, families: Iterable[str]) -> str:
+        """Version courante des familles lues par une route (entre dans l'ETag)."""
+        with self._lock:
+            parts = [self.epoch, str(self.global_version)]
+            parts.extend(f"{family}={self._versions.get(family, 0)}" for family in families)
+        shared_write = catalog_snapshot.last_write()
+        if shared_write is not None:
+            parts.append(repr(shared_write))
+        ttl = settings.HTTP_ETAG_TTL_SECONDS
+        if ttl > 0:
+            # Écritures faites hors du processus (autre worker, scripts, Fuseki direct) :
+            # une copie n'est revalidée que pendant une fenêtre de TTL au plus
+            parts.append(str(int(time.time() // ttl)))
+        return ":".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "global": self.global_version,
+                "versions": dict(self._versions),
+                "bumps": dict(self.bumps),
+                "tagged": self.tagged,
+                "not_modified": self.not_modified,
+            }
+
+
+versions = DatasetVersions()
+
+
+def family_of(path: str) -> Optional[str]:
+    """Famille d'entités d'un chemin (`/activities/stats/cheapest` → `activities`), si elle est suivie."""
+    prefix = "/" + path.lstrip("/").split("/", 1)[0]
+    return prefix[1:] if prefix in settings.HTTP_ETAG_ROUTES else None
+
+
+def note_write():
+    """
+    Appelé après chaque écriture SPARQL (réussie ou non) : incrémente la
+    version de la famille de la requête HTTP en cours, sinon la version globale.
+    """
+    state = request_context.current()
+    versions.bump(state.dataset if state is not None else None)
+
+
+def etag(path: str, query_string: bytes, families: Iterable[str]) -> str:
+    """ETag faible d'une réponse GET : route, paramètres (ordre indifférent) et version des données."""
+    params = b"&".join(sorted(query_string.split(b"&"))) if query_string else b""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(path.encode("utf-8"))
+    digest.update(b"\0" + params + b"\0")
+    digest.update(versions.token(families).encode("ascii"))
+    return f'W/"{digest.hexdigest()}"'
+
+
+def stats() -> Dict[str, Any]:
+    return versions.stats()
@@ -1,7 +1,7 @@
 # app/services/ecotourism_client.py - VERSION CORRIGÉE
 
-from SPARQLWrapper import SPARQLWrapper, JSON
 from app.config import settings
+from app.services.sparql_gateway import gateway
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,38 +15,30 @@ class EcotourismClient:
         # Endpoint pour les requêtes UPDATE (INSERT/DELETE)
         self.update_endpoint = settings.SPARQL_UPDATE_ENDPOINT
         
-        self.sparql_select = SPARQLWrapper(self.select_endpoint)
-        self.sparql_select.setReturnFormat(JSON)
-        
-        self.sparql_update = SPARQLWrapper(self.update_endpoint)
-        self.sparql_update.setMethod('POST')
-        
-        # ✅ CORRIGÉ: Utiliser le bon namespace
-        self.prefixes = f"""
-        PREFIX owl: <http://www.w3.org/2002/07/owl#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        PREFIX eco: <{settings.ONTOLOGY_NAMESPACE}>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        """
+        # Connexions, préfixes, timeouts et retries gérés par la passerelle partagée
+        self.gateway = gateway
+        self.prefixes = gateway.prefixes
     
     def execute_query(self, query):
         """Exécute une requête SELECT"""
-        self.sparql_select.setQuery(self.prefixes + query)
-        
         try:
-            results = self.sparql_select.query().convert()
-            return results["results"]["bindings"]
+            return self.gateway.bindings(query, caller="ecotourism_client")
+        except Exception as e:
+            logger.error(f"Erreur SELECT: {e}")
+            raise Exception(f"Erreur lors de l'exécution de la requête SELECT: {str(e)}")
+
+    def execute_query_raw(self, query):
+        """Exécute une requête SELECT ; bindings en octets JSON bruts (RawBindings)"""
+        try:
+            return self.gateway.select_raw(query, caller="ecotourism_client")
         except Exception as e:
             logger.error(f"Erreur SELECT: {e}")
             raise Exception(f"Erreur lors de l'exécution de la requête SELECT: {str(e)}")
     
     def update_data(self, query):
         """Exécute une requête UPDATE (INSERT/DELETE)"""
-        self.sparql_update.setQuery(self.prefixes + query)
-        
         try:
-            self.sparql_update.query()
+            self.gateway.update(query, caller="ecotourism_client")
             logger.info("Mise à jour réussie")
             return True
         except Exception as e:
@@ -0,0 +1,250 @@
+# app/services/embedded_store.py - Store RDF en mémoire (rdflib) à la place de Fuseki
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.plugins.sparql import prepareQuery, prepareUpdate
+
+from app.config import settings
+from app.services.sparql_errors import SparqlError
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = Path(__file__).resolve().parent.parent
+
+# Requêtes de préchauffage : parcours complet des index s/p/o du store mémoire
+_WARMUP_QUERIES = [
+    "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }",
+    "SELECT ?class (COUNT(?s) AS ?n) WHERE { ?s a ?class } GROUP BY ?class",
+    "SELECT ?p (COUNT(?o) AS ?n) WHERE { ?s ?p ?o } GROUP BY ?p",
+]
+
+
+class _ReadWriteLock:
+    """Lectures concurrentes, écriture exclusive (prioritaire sur les nouvelles lectures)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+def _term_json(term) -> Dict[str, str]:
+    """Terme rdflib → cellule au format application/sparql-results+json."""
+    if isinstance(term, URIRef):
+        return {"type": "uri", "value": str(term)}
+    if isinstance(term, Literal):
+        cell = {"type": "literal", "value": str(term)}
+        if term.language:
+            cell["xml:lang"] = term.language
+        elif term.datatype is not None:
+            cell["datatype"] = str(term.datatype)
+        return cell
+    if isinstance(term, BNode):
+        return {"type": "bnode", "value": str(term)}
+    return {"type": "literal", "value": str(term)}
+
+
+class EmbeddedStore:
+    """
+    Graphe rdflib chargé en mémoire depuis les fichiers de app/data.
+    Exécute SELECT / ASK / UPDATE et renvoie exactement la forme JSON de
+    Fuseki, pour que les routeurs fonctionnent sans changement.
+
+    Les requêtes analysées (prepareQuery) sont gardées dans un petit LRU :
+    avec rdflib, l'analyse coûte souvent plus cher que l'évaluation.
+    """
+
+    def __init__(self, files: List[str], prepared_cache_size: int = 256):
+        self.files = files
+        self.graph = Graph()
+        self._lock = _ReadWriteLock()
+        self._prepared: "OrderedDict[str, Any]" = OrderedDict()
+        self._prepared_lock = threading.Lock()
+        self._parse_lock = threading.Lock()  # le parseur SPARQL de rdflib (pyparsing) n'est pas thread-safe
+        self._prepared_cache_size = prepared_cache_size
+        self.report: Dict[str, Any] = {}
+
+    # ---------- Chargement ----------
+
+    def load(self) -> Dict[str, Any]:
+        """Charge les fichiers, préchauffe les index et retourne le rapport de chargement."""
+        started = time.perf_counter()
+        files = []
+        self._lock.acquire_write()
+        try:
+            for name in self.files:
+                path = Path(name)
+                if not path.is_absolute():
+                    path = _APP_DIR / path
+                before = len(self.graph)
+                t0 = time.perf_counter()
+                self.graph.parse(str(path))
+                files.append({
+                    "file": str(path.relative_to(_APP_DIR)) if path.is_relative_to(_APP_DIR) else str(path),
+                    "triples": len(self.graph) - before,
+                    "load_ms": round((time.perf_counter() - t0) * 1000, 1)
+                })
+            self.graph.bind("eco", settings.ONTOLOGY_NAMESPACE)
+        finally:
+            self._lock.release_write()
+        if settings.SPARQL_TYPE_CLOSURE_ENABLED:
+            from app.services import type_closure
+            self.update(type_closure.closure_update())
+
+        load_ms = (time.perf_counter() - started) * 1000
+        t0 = time.perf_counter()
+        for query in _WARMUP_QUERIES:
+            self.select(query)
+        warmup_ms = (time.perf_counter() - t0) * 1000
+
+        self.report = {
+            "backend": "embedded",
+            "files": files,
+            "triples": len(self.graph),
+            "load_ms": round(load_ms, 1),
+            "warmup_ms": round(warmup_ms, 1)
+        }
+        return self.report
+
+    # ---------- Exécution ----------
+
+    def _prepare(self, query: str):
+        with self._prepared_lock:
+            prepared = self._prepared.get(query)
+            if prepared is not None:
+                self._prepared.move_to_end(query)
+                return prepared
+        try:
+            with self._parse_lock:
+                prepared = prepareQuery(query)
+        except Exception as e:
+            raise SparqlError(f"Erreur lors de la requête SPARQL : Erreur SPARQL (400): {e}")
+        with self._prepared_lock:
+            self._prepared[query] = prepared
+            while len(self._prepared) > self._prepared_cache_size:
+                self._prepared.popitem(last=False)
+        return prepared
+
+    def select(self, query: str) -> Dict[str, Any]:
+        """SELECT (ou ASK) → résultat JSON au format Fuseki."""
+        prepared = self._prepare(query)
+        self._lock.acquire_read()
+        try:
+            result = self.graph.query(prepared)
+            if result.type == "ASK":
+                return {"head": {}, "boolean": bool(result.askAnswer)}
+            variables = [str(v) for v in result.vars]
+            bindings = []
+            for row in result:
+                binding = {}
+                for name, term in zip(variables, row):
+                    if term is not None:
+                        binding[name] = _term_json(term)
+                bindings.append(binding)
+        except SparqlError:
+            raise
+        except Exception as e:
+            raise SparqlError(f"Erreur lors de la requête SPARQL : {e}")
+        finally:
+            self._lock.release_read()
+        return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+    def update(self, query: str) -> Dict[str, Any]:
+        try:
+            with self._parse_lock:
+                prepared = prepareUpdate(query)
+        except Exception as e:
+            raise SparqlError(f"Erreur lors de la requête SPARQL UPDATE : Erreur SPARQL UPDATE (400): {e}")
+        self._lock.acquire_write()
+        try:
+            self.graph.update(prepared)
+        except Exception as e:
+            raise SparqlError(f"Erreur lors de la requête SPARQL UPDATE : Erreur SPARQL UPDATE (400): {e}")
+        finally:
+            self._lock.release_write()
+        return {"success": True}
+
+    def add_ntriples(self, data: str):
+        """Ajoute des triples N-Triples au graphe (chargement en masse)."""
+        self._lock.acquire_write()
+        try:
+            self.graph.parse(data=data, format="nt")
+        except Exception as e:
+            raise SparqlError(f"Erreur Graph Store (400): {e}")
+        finally:
+            self._lock.release_write()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._prepared_lock:
+            prepared = len(self._prepared)
+        return {**self.report, "triples": len(self.graph), "prepared_queries": prepared}
+
+
+_store: Optional[EmbeddedStore] = None
+_store_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return settings.SPARQL_BACKEND == "embedded"
+
+
+def get_store() -> EmbeddedStore:
+    """Store du processus, chargé au premier appel (ou au démarrage de l'API)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = EmbeddedStore([f.strip() for f in settings.SPARQL_EMBEDDED_FILES.split(",") if f.strip()])
+                report = store.load()
+                logger.info(f"Store embarqué chargé : {report}")
+                _store = store
+    return _store
+
+
+def stats() -> Dict[str, Any]:
+    """Rapport de chargement et état du store (vide tant qu'il n'est pas chargé)."""
+    if _store is None:
+        return {"backend": "embedded", "loaded": False}
+    return _store.stats()
+
+
+def estimate_size(result: Dict[str, Any]) -> int:
+    """Taille approximative (octets JSON) d'un résultat, pour le budget du cache."""
+    bindings = result.get("results", {}).get("bindings", [])
+    if not bindings:
+        return 64
+    sample = bindings[:20]
+    per_row = sum(sum(len(c["value"]) + 48 for c in b.values()) for b in sample) / len(sample)
+    return int(per_row * len(bindings)) + 64
@@ -1,29 +1,23 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
-from app.config import settings
+from app.services.sparql_gateway import gateway
+from app.services.sparql_entity_update import EntityUpdate, PLAIN
+from app.services.sparql_decoder import XSD_INTEGER
 import logging
+import threading
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Champs modifiables d'un feedback -> (propriété eco:, datatype)
+FEEDBACK_UPDATE = EntityUpdate({"rating": ("rating", XSD_INTEGER), "comment": ("comment", PLAIN)})
+
 
 class FeedbackManager:
     def __init__(self):
-        self.select_endpoint = settings.SPARQL_ENDPOINT
-        self.update_endpoint = settings.SPARQL_UPDATE_ENDPOINT
-
-        self.sparql_select = SPARQLWrapper(self.select_endpoint)
-        self.sparql_select.setReturnFormat(JSON)
+        self.gateway = gateway
 
-        self.sparql_update = SPARQLWrapper(self.update_endpoint)
-        self.sparql_update.setMethod('POST')
-
-        self.prefixes = f"""
-        PREFIX eco: <{settings.ONTOLOGY_NAMESPACE}>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        """
-
-        self._id_counter = self._fetch_max_feedback_id() or 0
+        # Compteur d'ID chargé paresseusement au premier ajout (pas de requête à la construction)
+        self._id_counter = None
+        self._id_lock = threading.Lock()
 
     def _fetch_max_feedback_id(self):
         query = """
@@ -42,24 +36,22 @@ class FeedbackManager:
         return 0
 
     def _generate_new_id(self):
-        self._id_counter += 1
-        return self._id_counter
+        with self._id_lock:
+            if self._id_counter is None:
+                self._id_counter = self._fetch_max_feedback_id() or 0
+            self._id_counter += 1
+            return self._id_counter
 
     def execute_query(self, query: str):
-        full_query = self.prefixes + query
-        self.sparql_select.setQuery(full_query)
         try:
-            results = self.sparql_select.query().convert()
-            return results["results"]["bindings"]
+            return self.gateway.bindings(query, caller="feedback_manager")
         except Exception as e:
             logger.error(f"Erreur SELECT: {e}")
             return []
 
     def update_data(self, query: str):
-        full_query = self.prefixes + query
-        self.sparql_update.setQuery(full_query)
         try:
-            self.sparql_update.query()
+            self.gateway.update(query, caller="feedback_manager")
             logger.info("Mise à jour réussie")
             return True
         except Exception as e:
@@ -309,31 +301,10 @@ class FeedbackManager:
             return False
         feedback_uri = found[0]['feedback']['value']
 
-        clauses_delete = []
-        clauses_insert = []
-
-        if 'rating' in updates:
-            clauses_delete.append(f"<{feedback_uri}> eco:rating ?oldRating .")
-            clauses_insert.append(f"<{feedback_uri}> eco:rating \"{updates['rating']}\"^^xsd:integer .")
-
-        if 'comment' in updates:
-            clauses_delete.append(f"<{feedback_uri}> eco:comment ?oldComment .")
-            clauses_insert.append(f"<{feedback_uri}> eco:comment \"{updates['comment']}\" .")
-
-        if not clauses_delete:
+        changes = FEEDBACK_UPDATE.changes(updates)
+        if not changes:
             return False
-
-        delete_clause = " ".join(clauses_delete)
-        insert_clause = " ".join(clauses_insert)
-
-        query_update = f"""
-        DELETE {{ {delete_clause} }}
-        INSERT {{ {insert_clause} }}
-        WHERE {{
-            {delete_clause}
-        }}
-        """
-        return self.update_data(query_update)
+        return self.update_data(FEEDBACK_UPDATE.build(changes, iri=feedback_uri))
 
     def delete_feedback(self, feedback_id: int):
         query_find = f"""
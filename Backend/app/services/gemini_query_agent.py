@@ -13,6 +13,8 @@ if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
 from app.config import settings
+from app.services import request_context
+from app.services.type_closure import type_pattern
 
 logger = logging.getLogger(__name__)
 
@@ -57,13 +59,22 @@ class GeminiQueryAgent:
 
                 logger.warning(f"Tentative {attempt + 1}/{max_retries} échouée")
 
+            except request_context.DeadlineExceeded:
+                raise
             except Exception as e:
+                if request_context.expired():
+                    # Appel coupé par l'échéance de la requête HTTP : inutile de rejouer
+                    raise request_context.deadline_exceeded("Gemini") from e
                 logger.error(f"Erreur tentative {attempt + 1}: {e}")
 
                 # Si erreur 500 ou timeout, attendre avant retry
                 if "500" in str(e) or "timeout" in str(e).lower():
                     import time
-                    time.sleep(2 ** attempt)  # Backoff exponentiel: 1s, 2s, 4s
+                    delay = 2 ** attempt  # Backoff exponentiel: 1s, 2s, 4s
+                    left = request_context.remaining()
+                    if left is not None and left <= delay:
+                        raise request_context.deadline_exceeded("Gemini") from e
+                    time.sleep(delay)
                     continue
                 break
 
@@ -74,6 +85,13 @@ class GeminiQueryAgent:
     def _attempt_generation(self, question: str, ontology_uri: str) -> Optional[str]:
         """Tente de générer une requête SPARQL."""
 
+        # Super-classes matérialisées : un seul triplet de type plutôt qu'une UNION
+        closure_rule = (
+            "\n8. Pour tous les types d'une famille, utiliser la super-classe sans UNION : "
+            "eco:Activity, eco:Accommodation, eco:Transport, eco:SustainabilityIndicator"
+            if settings.SPARQL_TYPE_CLOSURE_ENABLED else ""
+        )
+
         prompt = f"""Tu es un assistant SPARQL expert en tourisme écologique.
 L'ontologie principale utilise le namespace : <{ontology_uri}>
 
@@ -107,7 +125,7 @@ RÈGLES STRICTES :
 4. Ajouter FILTER pour les conditions (prix, rating, etc.)
 5. Limiter les résultats avec LIMIT 20
 6. Valeurs pour difficultyLevel: Easy, Moderate, Difficult
-7. Valeurs pour season: Spring, Summer, Autumn, Winter
+7. Valeurs pour season: Spring, Summer, Autumn, Winter{closure_rule}
 
 FORMAT DE SORTIE :
 PREFIX eco: <{ontology_uri}>
@@ -144,7 +162,9 @@ Génère UNIQUEMENT la requête SPARQL, sans explication ni texte additionnel.
                     "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
                     "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
                     "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE"
-                }
+                },
+                # Temps restant de la requête HTTP, au plus GEMINI_TIMEOUT_SECONDS
+                request_options={"timeout": request_context.budget(settings.GEMINI_TIMEOUT_SECONDS, "Gemini")}
             )
 
             if not hasattr(result, "text") or not result.text:
@@ -238,13 +258,7 @@ SELECT DISTINCT ?accommodation ?accommodationName ?accommodationDescription
                 ?pricePerNight ?accommodationRating ?ecoCertified 
                 ?hasSwimmingPool ?hasSpa ?maxGuests
 WHERE {{
-    {{
-        ?accommodation a eco:EcoLodge .
-    }} UNION {{
-        ?accommodation a eco:GuestHouse .
-    }} UNION {{
-        ?accommodation a eco:Hotel .
-    }}
+    {type_pattern("accommodation", "Accommodation")}
 
     ?accommodation eco:accommodationName ?accommodationName .
 
@@ -279,13 +293,7 @@ PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
 SELECT DISTINCT ?activity ?activityName ?activityDescription 
                 ?difficultyLevel ?pricePerPerson ?activityRating
 WHERE {{
-    {{
-        ?activity a eco:AdventureActivity .
-    }} UNION {{
-        ?activity a eco:CulturalActivity .
-    }} UNION {{
-        ?activity a eco:NatureActivity .
-    }}
+    {type_pattern("activity", "Activity")}
 
     ?activity eco:activityName ?activityName .
 
@@ -307,13 +315,7 @@ LIMIT 20
 SELECT DISTINCT ?transport ?transportName ?transportType 
                 ?carbonEmissionPerKm ?pricePerKm
 WHERE {{
-    {{
-        ?transport a eco:Bike .
-    }} UNION {{
-        ?transport a eco:ElectricVehicle .
-    }} UNION {{
-        ?transport a eco:PublicTransport .
-    }}
+    {type_pattern("transport", "Transport")}
 
     ?transport eco:transportName ?transportName .
 
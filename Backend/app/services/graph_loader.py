@@ -0,0 +1,346 @@
+# app/services/graph_loader.py - Chargement en masse de fichiers RDF (Graph Store Protocol)
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+from rdflib import Graph
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.util import guess_format
+
+from app.config import settings
+from app.services.sparql_errors import SparqlError
+from app.services import embedded_store
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = Path(__file__).resolve().parent.parent
+
+NTRIPLES = "application/n-triples"
+BLANK_CHUNK = "blank"  # identifiant du paquet des nœuds anonymes (étiquettes propres à chaque analyse)
+
+
+def _ntriples_lines(path: Path) -> Iterator[str]:
+    """Lignes d'un fichier N-Triples, lues au fil de l'eau (sans analyse)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
+                yield stripped + "\n"
+
+
+def _parsed_lines(path: Path) -> Iterator[str]:
+    """
+    Turtle / RDF-XML / ... : analyse rdflib puis réécriture en N-Triples,
+    triée (l'itération d'un Graph dépend du hachage, donc du processus).
+    """
+    graph = Graph()
+    graph.parse(str(path), format=guess_format(str(path)))
+    yield from sorted(_nt_row(triple) for triple in graph)
+
+
+def _digest(lines: List[str]) -> str:
+    return hashlib.blake2b("".join(lines).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def iter_chunks(path: Path, chunk_triples: int) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Découpe un fichier en paquets de `chunk_triples` lignes N-Triples,
+    dans un ordre déterministe (ordre du fichier .nt, ordre trié sinon),
+    identifiés par l'empreinte de leur contenu (base de la reprise).
+
+    Les nœuds anonymes n'ont de sens qu'à l'intérieur d'une même requête
+    Graph Store : tous les triples qui en contiennent sont envoyés dans un
+    dernier paquet unique (petit en pratique : restrictions OWL, listes),
+    identifié par BLANK_CHUNK puisque leurs étiquettes changent à chaque
+    analyse.
+    """
+    lines = _ntriples_lines(path) if guess_format(str(path)) == "nt" else _parsed_lines(path)
+    chunk, blank = [], []
+    for line in lines:
+        if "_:" in line:
+            blank.append(line)
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_triples:
+            yield _digest(chunk), chunk
+            chunk = []
+    if chunk:
+        yield _digest(chunk), chunk
+    if blank:
+        yield BLANK_CHUNK, blank
+
+
+class Checkpoint:
+    """
+    Paquets déjà envoyés (empreintes), par fichier, persistés en JSON après
+    chaque envoi. La clé inclut taille, date de modification et taille de
+    paquet : un fichier modifié (ou découpé autrement) repart de zéro.
+    Les entrées d'un chargement terminé sont effacées (`forget`) : seul un
+    chargement interrompu laisse des paquets à sauter.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done: Dict[str, List[str]] = {}
+        if path is not None and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self._done = json.load(f)
+
+    @staticmethod
+    def key(path: Path, chunk_triples: int, graph: Optional[str]) -> str:
+        stat = path.stat()
+        return f"{path.resolve()}|{stat.st_size}|{int(stat.st_mtime)}|{chunk_triples}|{graph or 'default'}"
+
+    def done(self, key: str) -> set:
+        with self._lock:
+            return set(self._done.get(key, []))
+
+    def mark(self, key: str, chunk_id: str):
+        with self._lock:
+            self._done.setdefault(key, []).append(chunk_id)
+            self._save()
+
+    def forget(self, keys: List[str]):
+        """Chargement terminé : efface ses entrées (le fichier s'il n'en reste aucune)."""
+        with self._lock:
+            for key in keys:
+                self._done.pop(key, None)
+            if self.path is not None and not self._done:
+                self.path.unlink(missing_ok=True)
+                return
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._done, f)
+        os.replace(tmp, self.path)
+
+
+class GraphLoader:
+    """
+    Charge des fichiers RDF dans Fuseki par le Graph Store Protocol
+    (POST N-Triples sur l'endpoint /data) plutôt qu'en INSERT DATA géants :
+    pas d'analyse SPARQL côté serveur, paquets envoyés en parallèle par
+    `workers` threads, mémoire bornée (au plus 2 × workers paquets en vol).
+
+    Reprise : les paquets de triples sans nœud anonyme déjà envoyés sont
+    sautés (et renvoyer l'un d'eux serait sans effet, un graphe RDF étant
+    un ensemble). Le paquet des nœuds anonymes, lui, créerait de nouveaux
+    nœuds à chaque envoi : il n'est jamais renvoyé une fois marqué. Avec
+    le backend embarqué, les paquets sont ajoutés directement au graphe
+    rdflib.
+    """
+
+    def __init__(self, files: List[Path], graph: Optional[str] = None, chunk_triples: int = 50000,
+                 workers: int = 4, checkpoint: Optional[Path] = None,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.files = files
+        self.graph = graph
+        self.chunk_triples = chunk_triples
+        self.workers = workers
+        self.checkpoint = Checkpoint(checkpoint)
+        self.progress = progress
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._cancel = threading.Event()
+        self.state = "pending"
+        self.current_file: Optional[str] = None
+        self.triples_sent = 0
+        self.bytes_sent = 0
+        self.chunks_sent = 0
+        self.chunks_skipped = 0
+        self.errors: List[str] = []
+
+    def _target(self) -> str:
+        endpoint = settings.SPARQL_GRAPH_STORE_ENDPOINT
+        if self.graph:
+            return f"{endpoint}?graph={quote(self.graph, safe='')}"
+        return f"{endpoint}?default"
+
+    def _send(self, data: bytes):
+        if embedded_store.enabled():
+            # Graphe unique en mode embarqué : `graph` est ignoré
+            embedded_store.get_store().add_ntriples(data.decode("utf-8"))
+            return
+        from app.services.sparql_helpers import get_session
+
+        delay = settings.SPARQL_RETRY_BACKOFF
+        for attempt in range(settings.SPARQL_MAX_RETRIES + 1):
+            try:
+                response = get_session().post(
+                    self._target(),
+                    data=data,
+                    headers={"Content-Type": NTRIPLES},
+                    timeout=(settings.SPARQL_CONNECT_TIMEOUT, settings.SPARQL_BULK_LOAD_TIMEOUT)
+                )
+                if response.status_code in (200, 201, 204):
+                    return
+                error = SparqlError(
+                    f"Erreur Graph Store ({response.status_code}): {response.text[:500]}",
+                    retryable=response.status_code >= 500
+                )
+            except requests.RequestException as e:
+                error = SparqlError(f"Erreur Graph Store : {e}", retryable=True)
+            if not error.retryable or attempt == settings.SPARQL_MAX_RETRIES:
+                raise error
+            time.sleep(delay)
+            delay *= 2
+
+    def _upload(self, key: str, chunk_id: str, lines: List[str]):
+        data = "".join(lines).encode("utf-8")
+        self._send(data)
+        self.checkpoint.mark(key, chunk_id)
+        with self._lock:
+            self.triples_sent += len(lines)
+            self.bytes_sent += len(data)
+            self.chunks_sent += 1
+        self._report()
+
+    def _report(self):
+        if self.progress is not None:
+            self.progress(self.stats())
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self) -> Dict[str, Any]:
+        """Charge tous les fichiers ; s'arrête au premier paquet en échec (reprise possible)."""
+        self._started = time.monotonic()
+        self.state = "running"
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="graph-loader") as pool:
+                for path in self.files:
+                    if self._cancel.is_set() or self.errors:
+                        break
+                    self.current_file = path.name
+                    self._load_file(pool, path)
+            if not self.errors and not self._cancel.is_set():
+                # Tous les fichiers chargés : un nouveau chargement repartira de zéro
+                self.checkpoint.forget([Checkpoint.key(p, self.chunk_triples, self.graph) for p in self.files])
+            if settings.SPARQL_TYPE_CLOSURE_ENABLED and not self.errors and not self._cancel.is_set():
+                # Nouvelles instances : types des super-classes à matérialiser
+                from app.services import type_closure
+                try:
+                    type_closure.materialize(timeout=(settings.SPARQL_CONNECT_TIMEOUT, settings.SPARQL_BULK_LOAD_TIMEOUT))
+                except SparqlError as e:
+                    self.errors.append(f"fermeture des types : {e}")
+        finally:
+            # Nouveau contenu : les SELECT en cache sont périmés (hors requête HTTP : version globale)
+            from app.services.sparql_helpers import after_write
+            after_write()
+
+        self.state = "failed" if self.errors else ("cancelled" if self._cancel.is_set() else "done")
+        report = self.stats()
+        self._report()
+        return report
+
+    def _load_file(self, pool: ThreadPoolExecutor, path: Path):
+        key = Checkpoint.key(path, self.chunk_triples, self.graph)
+        done = self.checkpoint.done(key)
+        in_flight = set()
+
+        def collect(return_when):
+            finished, pending = wait(in_flight, return_when=return_when)
+            for future in finished:
+                error = future.exception()
+                if error is not None:
+                    with self._lock:
+                        self.errors.append(f"{path.name}: {error}")
+            return pending
+
+        for chunk_id, lines in iter_chunks(path, self.chunk_triples):
+            if self._cancel.is_set() or self.errors:
+                break
+            if chunk_id in done:
+                with self._lock:
+                    self.chunks_skipped += 1
+                continue
+            if len(in_flight) >= 2 * self.workers:
+                in_flight = collect(FIRST_COMPLETED)
+            in_flight.add(pool.submit(self._upload, key, chunk_id, lines))
+        if in_flight:
+            collect(ALL_COMPLETED)
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        with self._lock:
+            return {
+                "state": self.state,
+                "current_file": self.current_file,
+                "files": [p.name for p in self.files],
+                "graph": self.graph or "default",
+                "triples_sent": self.triples_sent,
+                "chunks_sent": self.chunks_sent,
+                "chunks_skipped": self.chunks_skipped,
+                "megabytes_sent": round(self.bytes_sent / 1e6, 2),
+                "elapsed_s": round(elapsed, 2),
+                "triples_per_s": round(self.triples_sent / elapsed) if elapsed else 0,
+                "errors": list(self.errors)
+            }
+
+
+# ============================================
+# TÂCHES DE CHARGEMENT (endpoint d'administration)
+# ============================================
+
+_jobs: Dict[str, GraphLoader] = {}
+_jobs_lock = threading.Lock()
+
+
+def resolve_file(name: str) -> Path:
+    """Fichier à charger, limité au répertoire SPARQL_BULK_LOAD_DIR."""
+    root = Path(settings.SPARQL_BULK_LOAD_DIR)
+    if not root.is_absolute():
+        root = _APP_DIR / root
+    root = root.resolve()
+    path = (root / name).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"Fichier hors de {root} : {name}")
+    if not path.is_file():
+        raise FileNotFoundError(f"Fichier introuvable : {name}")
+    return path
+
+
+def start_job(loader: GraphLoader) -> str:
+    """Lance le chargement dans un thread ; un seul chargement à la fois."""
+    with _jobs_lock:
+        if any(job.state in ("pending", "running") for job in _jobs.values()):
+            raise RuntimeError("Un chargement est déjà en cours")
+        job_id = uuid.uuid4().hex[:12]
+        _jobs[job_id] = loader
+
+    def run():
+        try:
+            loader.run()
+        except Exception as e:
+            logger.exception("Chargement en masse interrompu")
+            loader.errors.append(str(e))
+            loader.state = "failed"
+
+    threading.Thread(target=run, name=f"bulk-load-{job_id}", daemon=True).start()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[GraphLoader]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> Dict[str, Dict[str, Any]]:
+    with _jobs_lock:
+        jobs = dict(_jobs)
+    return {job_id: job.stats() for job_id, job in jobs.items()}
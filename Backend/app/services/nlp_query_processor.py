@@ -5,6 +5,8 @@ import logging
 from typing import Dict, List, Optional
 from enum import Enum
 
+from app.services.type_closure import type_pattern
+
 logger = logging.getLogger(__name__)
 
 
@@ -313,13 +315,7 @@ class NLPQueryProcessor:
         if activity_type:
             type_clause = f"?activity a eco:{activity_type} ."
         else:
-            type_clause = """{
-        ?activity a eco:AdventureActivity .
-    } UNION {
-        ?activity a eco:CulturalActivity .
-    } UNION {
-        ?activity a eco:NatureActivity .
-    }"""
+            type_clause = type_pattern("activity", "Activity")
 
         return f"""PREFIX eco: <{self.ontology_namespace}>
 PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
@@ -380,13 +376,7 @@ LIMIT 20
         if accommodation_type:
             type_clause = f"?accommodation a eco:{accommodation_type} ."
         else:
-            type_clause = """{
-        ?accommodation a eco:EcoLodge .
-    } UNION {
-        ?accommodation a eco:GuestHouse .
-    } UNION {
-        ?accommodation a eco:Hotel .
-    }"""
+            type_clause = type_pattern("accommodation", "Accommodation")
 
         return f"""PREFIX eco: <{self.ontology_namespace}>
 
@@ -434,13 +424,7 @@ LIMIT 20
         if transport_type:
             type_clause = f"?transport a eco:{transport_type} ."
         else:
-            type_clause = """{
-        ?transport a eco:Bike .
-    } UNION {
-        ?transport a eco:ElectricVehicle .
-    } UNION {
-        ?transport a eco:PublicTransport .
-    }"""
+            type_clause = type_pattern("transport", "Transport")
 
         return f"""PREFIX eco: <{self.ontology_namespace}>
 
@@ -496,13 +480,7 @@ ORDER BY ?seasonName
 SELECT DISTINCT ?indicator ?indicatorName ?indicatorValue 
                 ?measurementUnit ?measurementDate ?targetValue
 WHERE {{
-    {{
-        ?indicator a eco:CarbonFootprint .
-    }} UNION {{
-        ?indicator a eco:RenewableEnergyUsage .
-    }} UNION {{
-        ?indicator a eco:WaterConsumption .
-    }}
+    {type_pattern("indicator", "SustainabilityIndicator")}
 
     ?indicator eco:indicatorName ?indicatorName ;
                eco:indicatorValue ?indicatorValue ;
@@ -0,0 +1,89 @@
+# app/services/request_context.py - État propre à la requête HTTP en cours
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Budget de temps de la requête HTTP épuisé : l'appel en aval est abandonné (504)."""
+
+
+class RequestState:
+    """
+    État mutable partagé entre le middleware et la couche SPARQL pendant
+    une requête HTTP. Le ContextVar est copié vers le threadpool des
+    endpoints synchrones ; l'objet référencé, lui, est le même.
+    """
+
+    __slots__ = ("stale", "started", "deadline", "deadline_from_header", "deadline_exceeded", "dataset")
+
+    def __init__(self):
+        self.stale = False  # au moins un résultat servi depuis le fallback "dernier bon résultat"
+        self.started = time.monotonic()
+        self.deadline: Optional[float] = None  # instant (monotonic) au-delà duquel on abandonne
+        self.deadline_from_header = False      # budget imposé par le client : prioritaire sur la route
+        self.deadline_exceeded = False
+        self.dataset: Optional[str] = None     # famille d'entités de la route (versions des ETag)
+
+    def set_budget(self, seconds: float):
+        """Fixe l'échéance à `seconds` après la réception de la requête."""
+        self.deadline = self.started + seconds
+
+
+_current: ContextVar[Optional[RequestState]] = ContextVar("request_state", default=None)
+
+
+def begin_request():
+    """Crée l'état de la requête ; retourne (state, token) pour `end_request`."""
+    state = RequestState()
+    return state, _current.set(state)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current() -> Optional[RequestState]:
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """Secondes restantes avant l'échéance de la requête en cours (None : pas d'échéance)."""
+    state = _current.get()
+    if state is None or state.deadline is None:
+        return None
+    return state.deadline - time.monotonic()
+
+
+def deadline_exceeded(what: str) -> DeadlineExceeded:
+    """Marque la requête comme hors délai et retourne l'exception à lever."""
+    state = _current.get()
+    if state is not None:
+        state.deadline_exceeded = True
+    return DeadlineExceeded(f"Délai de la requête dépassé ({what})")
+
+
+def budget(default: float, what: str) -> float:
+    """
+    Timeout à donner à un appel en aval : `default`, borné par le temps
+    restant de la requête. Lève DeadlineExceeded si le budget est épuisé.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise deadline_exceeded(what)
+    return min(default, left)
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def mark_stale():
+    """Signale que la réponse en cours contient des données potentiellement périmées."""
+    state = _current.get()
+    if state is not None:
+        state.stale = True
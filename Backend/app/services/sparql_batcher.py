@@ -0,0 +1,173 @@
+# app/services/sparql_batcher.py - Regroupement des INSERT DATA en une seule requête UPDATE
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.sparql_errors import SparqlError
+
+logger = logging.getLogger(__name__)
+
+# Prologue (PREFIX / BASE) puis INSERT DATA : seules ces opérations sont regroupées
+_PROLOGUE = re.compile(r"\s*(?:(?:PREFIX\s+[\w.\-]*:\s*<[^>]*>|BASE\s+<[^>]*>)\s*)*", re.IGNORECASE)
+_INSERT_DATA = re.compile(r"INSERT\s+DATA\b", re.IGNORECASE)
+
+
+def is_insert_data(query: str) -> bool:
+    """True si la requête est un INSERT DATA (après ses déclarations PREFIX/BASE)."""
+    return _INSERT_DATA.match(query, _PROLOGUE.match(query).end()) is not None
+
+
+class UpdateBatcher:
+    """
+    Regroupe les INSERT DATA arrivant dans une courte fenêtre (ou jusqu'à
+    `max_statements`) en une requête SPARQL Update multi-opérations
+    (`op1 ; op2 ; ...`, chaque opération gardant son prologue) : une seule
+    transaction Fuseki au lieu d'une par appelant.
+
+    Chaque appelant reçoit un Future résolu avec le résultat partagé. Si le
+    lot est rejeté par Fuseki (4xx), ses opérations sont rejouées une à une
+    pour que seule l'opération fautive échoue.
+    """
+
+    def __init__(self, window_seconds: float, max_statements: int,
+                 send: Optional[Callable[[str], Any]] = None):
+        self.window_seconds = window_seconds
+        self.max_statements = max_statements
+        self._send = send
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, Future, float]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.batches = 0
+        self.statements = 0
+        self.max_batch = 0
+        self.fallbacks = 0
+        self.flush_ms_total = 0.0
+        self.flush_ms_max = 0.0
+        self.wait_ms_total = 0.0
+
+    def _sender(self) -> Callable[[str], Any]:
+        if self._send is None:
+            from app.services.sparql_helpers import _guarded, _post_update
+            self._send = lambda query: _guarded(_post_update, query)
+        return self._send
+
+    # ---------- Soumission ----------
+
+    def submit(self, query: str) -> Future:
+        """Met l'opération en file ; le Future est résolu après l'envoi du lot."""
+        future: Future = Future()
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="sparql-update-batcher", daemon=True)
+                self._thread.start()
+            self._pending.append((query, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    # ---------- Boucle d'envoi ----------
+
+    def _next_batch(self) -> List[Tuple[str, Future, float]]:
+        with self._cond:
+            while not self._pending:
+                if self._stopping:
+                    return []
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.window_seconds
+            while len(self._pending) < self.max_statements and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_statements]
+            del self._pending[:self.max_statements]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Future, float]]):
+        send = self._sender()
+        started = time.monotonic()
+        try:
+            if len(batch) == 1:
+                outcomes = [self._call(send, batch[0][0])]
+            else:
+                outcome = self._call(send, " ;\n".join(query for query, _, _ in batch))
+                if isinstance(outcome, SparqlError) and not outcome.retryable:
+                    # Lot rejeté (syntaxe, données) : isoler l'opération fautive
+                    self.fallbacks += 1
+                    logger.warning(f"Lot de {len(batch)} INSERT DATA rejeté, envoi un par un : {outcome}")
+                    outcomes = [self._call(send, query) for query, _, _ in batch]
+                else:
+                    outcomes = [outcome] * len(batch)
+        except BaseException as e:
+            outcomes = [e] * len(batch)
+        elapsed_ms = (time.monotonic() - started) * 1000
+
+        with self._cond:
+            self.batches += 1
+            self.statements += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+            self.flush_ms_total += elapsed_ms
+            self.flush_ms_max = max(self.flush_ms_max, elapsed_ms)
+            self.wait_ms_total += sum(started - queued for _, _, queued in batch) * 1000
+
+        for (_, future, _), outcome in zip(batch, outcomes):
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    @staticmethod
+    def _call(send: Callable[[str], Any], query: str):
+        try:
+            return send(query)
+        except Exception as e:
+            return e
+
+    def close(self, timeout: float = 5.0):
+        """Envoie les opérations en attente puis arrête le thread (arrêt de l'API)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "enabled": settings.SPARQL_UPDATE_BATCH_ENABLED,
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "statements": self.statements,
+                "avg_batch_size": round(self.statements / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_batch,
+                "fallbacks": self.fallbacks,
+                "avg_flush_ms": round(self.flush_ms_total / self.batches, 1) if self.batches else 0.0,
+                "max_flush_ms": round(self.flush_ms_max, 1),
+                "avg_wait_ms": round(self.wait_ms_total / self.statements, 1) if self.statements else 0.0
+            }
+
+
+# Regroupeur unique du processus, partagé par les clients sync et async
+update_batcher = UpdateBatcher(
+    window_seconds=settings.SPARQL_UPDATE_BATCH_WINDOW_MS / 1000,
+    max_statements=settings.SPARQL_UPDATE_BATCH_MAX
+)
+
+
+def stats() -> Dict[str, Any]:
+    return update_batcher.stats()
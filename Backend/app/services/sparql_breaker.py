@@ -0,0 +1,235 @@
+# app/services/sparql_breaker.py - Disjoncteur autour du transport SPARQL
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+
+from app.config import settings
+from app.services.sparql_errors import SparqlError
+from app.services.sparql_cache import MISS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(SparqlError):
+    """Levée sans appeler Fuseki quand le disjoncteur est ouvert."""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à fenêtre glissante (en secondes).
+
+    - CLOSED : les appels passent ; s'il y a au moins `min_calls` appels dans
+      la fenêtre et que le taux d'erreurs ou d'appels lents dépasse son seuil,
+      le disjoncteur s'ouvre.
+    - OPEN : les appels échouent immédiatement pendant `open_seconds`.
+    - HALF_OPEN : au plus `half_open_calls` appels de sonde simultanés ;
+      un succès referme le circuit, un échec le rouvre. Seules les sondes
+      (jeton retourné par `before_call`) rendent ce verdict : un appel
+      admis avant l'ouverture et terminé pendant la sonde est ignoré.
+    """
+
+    def __init__(self, name: str, window_seconds: float, min_calls: int, error_rate: float,
+                 slow_call_seconds: float, slow_rate: float, open_seconds: float, half_open_calls: int):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, failed, slow)
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _prune(self, now: float):
+        limit = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < limit:
+            self._outcomes.popleft()
+
+    def _open(self, now: float, reason: str):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.times_opened += 1
+        logger.warning(f"⚡ Disjoncteur SPARQL '{self.name}' ouvert ({reason})")
+
+    def before_call(self) -> Optional[int]:
+        """
+        À appeler avant chaque requête ; lève CircuitOpenError si le circuit
+        est ouvert. Retourne le jeton à passer à `record` / `abandon` :
+        numéro de l'ouverture pour une sonde, None pour un appel ordinaire.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        f"Erreur lors de la requête SPARQL : disjoncteur '{self.name}' ouvert (Fuseki indisponible)"
+                    )
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        f"Erreur lors de la requête SPARQL : disjoncteur '{self.name}' en sonde (Fuseki indisponible)"
+                    )
+                self._probes += 1
+                return self.times_opened
+            return None
+
+    def _is_probe(self, probe: Optional[int]) -> bool:
+        """Sonde de la demi-ouverture en cours (pas d'une ouverture antérieure)."""
+        return probe is not None and self.state == HALF_OPEN and probe == self.times_opened
+
+    def record(self, elapsed: float, failed: bool, probe: Optional[int] = None):
+        """Enregistre l'issue d'un appel autorisé par `before_call` (`probe` : son jeton)."""
+        now = time.monotonic()
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if probe is not None or self.state == HALF_OPEN:
+                if not self._is_probe(probe):
+                    return  # sonde périmée, ou appel d'avant l'ouverture : pas de verdict
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._open(now, "sonde en échec")
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"✅ Disjoncteur SPARQL '{self.name}' refermé")
+                return
+
+            self._outcomes.append((now, failed, slow))
+            self._prune(now)
+            total = len(self._outcomes)
+            if self.state != CLOSED or total < self.min_calls:
+                return
+            failures = sum(1 for _, f, _ in self._outcomes if f)
+            slows = sum(1 for _, _, s in self._outcomes if s)
+            if failures / total >= self.error_rate:
+                self._open(now, f"{failures}/{total} erreurs")
+            elif slows / total >= self.slow_rate:
+                self._open(now, f"{slows}/{total} appels lents")
+
+    def abandon(self, probe: Optional[int] = None):
+        """Appel autorisé mais abandonné sans verdict (échéance de la requête) : libère la sonde."""
+        with self._lock:
+            if self._is_probe(probe):
+                self._probes = max(0, self._probes - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune(time.monotonic())
+            total = len(self._outcomes)
+            return {
+                "state": self.state,
+                "window_calls": total,
+                "window_errors": sum(1 for _, f, _ in self._outcomes if f),
+                "window_slow": sum(1 for _, _, s in self._outcomes if s),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+
+# Disjoncteur unique devant Fuseki, partagé par les clients sync et async
+breaker = CircuitBreaker(
+    name="fuseki",
+    window_seconds=settings.SPARQL_BREAKER_WINDOW_SECONDS,
+    min_calls=settings.SPARQL_BREAKER_MIN_CALLS,
+    error_rate=settings.SPARQL_BREAKER_ERROR_RATE,
+    slow_call_seconds=settings.SPARQL_BREAKER_SLOW_CALL_SECONDS,
+    slow_rate=settings.SPARQL_BREAKER_SLOW_RATE,
+    open_seconds=settings.SPARQL_BREAKER_OPEN_SECONDS,
+    half_open_calls=settings.SPARQL_BREAKER_HALF_OPEN_CALLS
+)
+
+
+class LastGoodStore:
+    """
+    Dernier résultat valide connu par requête, servi quand Fuseki est
+    indisponible. Contrairement au cache, pas de TTL ni d'invalidation
+    par écriture : seulement une borne mémoire (LRU).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def put(self, key: Hashable, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def get(self, key: Hashable) -> Any:
+        """Retourne le dernier bon résultat ou `MISS`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            self._entries.move_to_end(key)
+            self.served += 1
+            return entry[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "served": self.served
+            }
+
+
+last_good = LastGoodStore(max_bytes=settings.SPARQL_STALE_MAX_BYTES)
+
+
+def stale_or_raise(key: Hashable, error: SparqlError):
+    """
+    Fuseki indisponible (erreur transitoire ou circuit ouvert) : retourne
+    (dernier bon résultat, True) si on en a un, sinon relève `error`.
+    Une requête invalide (4xx) n'est jamais masquée.
+    """
+    if not settings.SPARQL_BREAKER_ENABLED or not (error.retryable or isinstance(error, CircuitOpenError)):
+        raise error
+    stale = last_good.get(key)
+    if stale is MISS:
+        raise error
+    logger.warning(f"⚠️ Fuseki indisponible, résultat périmé servi : {error}")
+    return stale, True
+
+
+def stats() -> Dict[str, Any]:
+    """État du disjoncteur et du repli "dernier bon résultat"."""
+    return {
+        "enabled": settings.SPARQL_BREAKER_ENABLED,
+        "breaker": breaker.stats(),
+        "stale_fallback": last_good.stats()
+    }
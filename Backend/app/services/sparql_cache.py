@@ -0,0 +1,218 @@
+# app/services/sparql_cache.py - Cache des résultats SPARQL SELECT
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config import settings
+from app.services import catalog_snapshot
+
+# Littéraux entre guillemets conservés tels quels, blancs compressés ailleurs
+_TOKEN_RE = re.compile(r'"""(?:[^"\\]|\\.|"(?!""))*"""|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|\s+', re.S)
+
+MISS = object()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalise le texte d'une requête pour en faire une clé de cache :
+    les suites de blancs sont réduites à un espace, sauf dans les littéraux.
+    """
+    def _sub(match):
+        token = match.group(0)
+        return " " if token[0].isspace() else token
+    return _TOKEN_RE.sub(_sub, query).strip()
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "generation", "refresh", "hits", "refreshing", "served_stale")
+
+    def __init__(self, value, size, expires_at, generation, refresh=None):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.generation = generation
+        self.refresh = refresh      # () -> (résultat, taille) : relecture en arrière-plan
+        self.hits = 0               # lectures depuis le dernier remplissage
+        self.refreshing = False
+        self.served_stale = False   # lue après expiration : relecture prioritaire
+
+
+class SparqlResultCache:
+    """
+    Cache LRU borné en mémoire (taille des réponses brutes) avec TTL.
+
+    Chaque écriture SPARQL incrémente `generation` : les entrées d'une
+    génération antérieure ne sont plus jamais servies, et un résultat lu
+    avant une écriture mais arrivé après n'est pas mis en cache. Les
+    écritures des autres workers sont vues par la date de dernière
+    écriture du pointeur du snapshot partagé (catalog_snapshot.last_write),
+    relue à chaque accès : un changement vaut écriture locale. Sans
+    snapshot partagé, l'invalidation reste propre au processus (TTL).
+
+    Les résultats mis en cache sont partagés entre requêtes : les appelants
+    doivent les traiter en lecture seule.
+
+    Tant que le rafraîchisseur tourne (`stale_window` > 0, voir
+    sparql_refresh), une entrée expirée qui sait se relire reste servie
+    pendant `stale_window` secondes au plus, le temps que sa relecture en
+    arrière-plan aboutisse. Une écriture invalide toujours immédiatement.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._generation = 0
+        self._shared_write: Optional[float] = None
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_window = 0.0
+        self.stale_hits = 0
+
+    @property
+    def generation(self) -> int:
+        self._sync_shared_writes()
+        return self._generation
+
+    def _sync_shared_writes(self):
+        # Y compris les écritures de ce processus : une invalidation de plus, sans effet
+        stamp = catalog_snapshot.last_write()
+        if stamp is None or stamp == self._shared_write:
+            return
+        with self._lock:
+            if stamp != self._shared_write:
+                self._shared_write = stamp
+                self._invalidate()
+
+    def get(self, key: Hashable) -> Any:
+        """Retourne la valeur en cache ou `MISS`."""
+        self._sync_shared_writes()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            if entry.generation != self._generation or entry.expires_at <= now:
+                if entry.generation == self._generation and entry.refresh is not None \
+                        and now < entry.expires_at + self.stale_window:
+                    # stale-while-revalidate : la relecture est planifiée par sparql_refresh
+                    entry.hits += 1
+                    entry.served_stale = True
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    return entry.value
+                self._drop(key, entry)
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, size: int, generation: int,
+            refresh: Optional[Callable[[], Tuple[Any, int]]] = None):
+        """
+        Met une valeur en cache si aucune écriture n'a eu lieu depuis
+        `generation` (la génération observée avant l'exécution de la requête).
+        `refresh` relit la valeur hors requête HTTP (rafraîchissement anticipé).
+        """
+        if size > self.max_bytes:
+            return
+        self._sync_shared_writes()
+        with self._lock:
+            if generation != self._generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(value, size, time.monotonic() + self.ttl_seconds, generation, refresh)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def refresh_candidates(self, ahead: float, min_hits: int, limit: int) -> List[Tuple[Hashable, Callable, int]]:
+        """
+        Jusqu'à `limit` entrées à relire : d'abord celles servies après
+        expiration (fenêtre de péremption), puis les plus lues de celles
+        qui expirent dans moins de `ahead` secondes et ont été lues au
+        moins `min_hits` fois depuis leur remplissage. Les entrées retournées sont marquées en cours de
+        relecture jusqu'à `put` ou `refresh_failed`.
+        """
+        if limit <= 0:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry.refresh is not None and not entry.refreshing
+                and (entry.served_stale or (entry.hits >= min_hits and entry.expires_at - now <= ahead))
+            ]
+            due.sort(key=lambda item: (item[1].served_stale, item[1].hits), reverse=True)
+            for _, entry in due[:limit]:
+                entry.refreshing = True
+            return [(key, entry.refresh, self._generation) for key, entry in due[:limit]]
+
+    def refresh_failed(self, key: Hashable):
+        """Relecture échouée : l'entrée redevient candidate (puis expire normalement)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def _drop(self, key, entry):
+        del self._entries[key]
+        self._bytes -= entry.size
+
+    def bump_generation(self):
+        """Invalide tout le cache (appelé après chaque écriture)."""
+        with self._lock:
+            self._invalidate()
+
+    def _invalidate(self):
+        self._generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.SPARQL_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_window_seconds": self.stale_window,
+                "stale_hits": self.stale_hits
+            }
+
+
+# Cache unique du processus, partagé par les clients sync et async
+result_cache = SparqlResultCache(
+    ttl_seconds=settings.SPARQL_CACHE_TTL_SECONDS,
+    max_bytes=settings.SPARQL_CACHE_MAX_BYTES
+)
+
+
+def cache_key(endpoint: str, query: str) -> Hashable:
+    return (endpoint, normalize_query(query))
@@ -0,0 +1,139 @@
+# app/services/sparql_decoder.py - Décodage déclaratif des bindings SPARQL JSON
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+XSD_STRING = XSD + "string"
+XSD_DECIMAL = XSD + "decimal"
+XSD_DOUBLE = XSD + "double"
+XSD_FLOAT = XSD + "float"
+XSD_INTEGER = XSD + "integer"
+XSD_INT = XSD + "int"
+XSD_BOOLEAN = XSD + "boolean"
+XSD_DATETIME = XSD + "dateTime"
+XSD_DATE = XSD + "date"
+AUTO = None  # conversion choisie d'après le `datatype` de chaque cellule
+
+
+def _to_float(value: str) -> float:
+    return float(value) if value else 0.0
+
+
+def _to_int(value: str) -> int:
+    return int(value) if value else 0
+
+
+def _to_bool(value: str) -> bool:
+    return value == "true"  # comme les anciens parseurs (`== 'true'`) : "1" reste False
+
+
+# Convertisseurs par type XSD (les types absents restent des chaînes)
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    XSD_DECIMAL: _to_float,
+    XSD_DOUBLE: _to_float,
+    XSD_FLOAT: _to_float,
+    XSD_INTEGER: _to_int,
+    XSD_INT: _to_int,
+    XSD + "long": _to_int,
+    XSD + "nonNegativeInteger": _to_int,
+    XSD + "positiveInteger": _to_int,
+    XSD_BOOLEAN: _to_bool,
+}
+
+
+def _auto(cell: Dict[str, str]) -> Any:
+    convert = CONVERTERS.get(cell.get("datatype"))
+    value = cell["value"]
+    return convert(value) if convert is not None else value
+
+
+class Column(NamedTuple):
+    """
+    Colonne d'un schéma de décodage.
+    - name : clé dans la ligne produite
+    - type : IRI XSD cible (XSD_STRING, XSD_DECIMAL, ...) ou AUTO
+    - var : variable SPARQL source (par défaut `name`)
+    - default : valeur si la variable n'est pas liée (OPTIONAL vide)
+    """
+    name: str
+    type: Optional[str] = XSD_STRING
+    var: Optional[str] = None
+    default: Any = None
+
+
+class BindingDecoder:
+    """
+    Décode les bindings SPARQL JSON selon un schéma de colonnes, en une
+    seule passe : une recherche par variable et par ligne, conversion par
+    type XSD, valeur par défaut pour les variables non liées.
+
+    La fonction de décodage d'une ligne est générée une fois pour le
+    schéma (comme namedtuple/dataclasses), sans boucle sur les colonnes
+    à l'exécution.
+    """
+
+    def __init__(self, columns: Iterable[Column]):
+        self.columns = tuple(columns)
+        names = [c.name for c in self.columns]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Colonnes en double dans le schéma : {names}")
+        for column in self.columns:
+            if column.type is not AUTO and column.type != XSD_STRING and column.type not in CONVERTERS:
+                raise ValueError(f"Type XSD non supporté pour '{column.name}' : {column.type}")
+        self.row = self._compile()
+        self._columns = self._compile_columns()
+
+    def _value_exprs(self, namespace: Dict[str, Any]) -> List[str]:
+        """Expression Python de la valeur de chaque colonne (cellule `c<i>`)."""
+        exprs = []
+        for i, column in enumerate(self.columns):
+            namespace[f"_d{i}"] = column.default
+            if column.type == XSD_STRING:
+                value = f"c{i}['value']"
+            elif column.type is AUTO:
+                value = f"_auto(c{i})"
+            else:
+                namespace[f"_f{i}"] = CONVERTERS[column.type]
+                value = f"_f{i}(c{i}['value'])"
+            exprs.append(f"_d{i} if c{i} is None else {value}")
+        return exprs
+
+    def _lookups(self, indent: str) -> List[str]:
+        return [f"{indent}c{i} = get({(c.var or c.name)!r})" for i, c in enumerate(self.columns)]
+
+    def _compile(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        namespace: Dict[str, Any] = {"_auto": _auto}
+        exprs = self._value_exprs(namespace)
+        fields = [f"{c.name!r}: {expr}" for c, expr in zip(self.columns, exprs)]
+        lines = ["def row(binding):", "    get = binding.get"] + self._lookups("    ")
+        lines.append("    return {" + ", ".join(fields) + "}")
+        exec("\n".join(lines), namespace)
+        return namespace["row"]
+
+    def _compile_columns(self) -> Callable[[Iterable[Dict[str, Any]]], Dict[str, List[Any]]]:
+        namespace: Dict[str, Any] = {"_auto": _auto}
+        exprs = self._value_exprs(namespace)
+        n = len(self.columns)
+        lines = ["def to_columns(bindings):"]
+        lines += [f"    l{i} = []; a{i} = l{i}.append" for i in range(n)]
+        lines.append("    for binding in bindings:")
+        lines.append("        get = binding.get")
+        lines += self._lookups("        ")
+        lines += [f"        a{i}({expr})" for i, expr in enumerate(exprs)]
+        lines.append("    return {" + ", ".join(f"{c.name!r}: l{i}" for i, c in enumerate(self.columns)) + "}")
+        exec("\n".join(lines), namespace)
+        return namespace["to_columns"]
+
+    def rows(self, bindings: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Une ligne (dict) par binding."""
+        row = self.row
+        return [row(b) for b in bindings]
+
+    def decode(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Décode un résultat SPARQL JSON complet (`{"results": {"bindings": [...]}}`)."""
+        bindings = result.get("results", {}).get("bindings", []) if isinstance(result, dict) else []
+        return self.rows(bindings)
+
+    def to_columns(self, bindings: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """Variante colonnaire : un tableau typé par colonne, dans l'ordre des bindings."""
+        return self._columns(bindings)
@@ -0,0 +1,167 @@
+# app/services/sparql_entity_update.py - Mise à jour partielle d'une entité en une seule requête SPARQL
+
+import math
+import typing
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.services.sparql_decoder import XSD_BOOLEAN, XSD_DATE, XSD_DATETIME, XSD_FLOAT, XSD_INTEGER
+from app.services.sparql_templates import iri_term, string_literal, TemplateParamError
+
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+PLAIN = None  # littéral sans datatype (chaînes)
+
+# Type Python (annotation Pydantic) → datatype XSD écrit dans le graphe
+_PYTHON_XSD = [
+    (bool, XSD_BOOLEAN),   # avant int : bool est un sous-type d'int
+    (int, XSD_INTEGER),
+    (float, XSD_FLOAT),
+    (datetime, XSD_DATETIME),
+    (date, XSD_DATE),
+]
+
+
+def _xsd_for(annotation: Any) -> Optional[str]:
+    """Datatype XSD d'une annotation (`Optional[X]` déballé) ; PLAIN pour le reste."""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+    if isinstance(annotation, type):
+        for python_type, xsd in _PYTHON_XSD:
+            if issubclass(annotation, python_type):
+                return xsd
+    return PLAIN
+
+
+def _literal(value: Any, xsd: Optional[str]) -> str:
+    if isinstance(value, Enum):
+        value = value.value
+    if xsd == XSD_BOOLEAN:
+        if not isinstance(value, bool):
+            raise TemplateParamError(f"Booléen attendu : {value!r}")
+        text = "true" if value else "false"
+    elif xsd == XSD_INTEGER:
+        if isinstance(value, bool):
+            raise TemplateParamError(f"Entier attendu : {value!r}")
+        try:
+            text = str(int(value))
+        except (TypeError, ValueError):
+            raise TemplateParamError(f"Entier attendu : {value!r}")
+    elif xsd == XSD_FLOAT:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise TemplateParamError(f"Nombre attendu : {value!r}")
+        if isinstance(value, bool) or not math.isfinite(number):
+            raise TemplateParamError(f"Nombre fini attendu : {value!r}")
+        text = repr(number)
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    else:
+        text = str(value)
+    if xsd is PLAIN:
+        return string_literal(text)
+    return f"{string_literal(text)}^^<{xsd}>"
+
+
+class EntityUpdate:
+    """
+    Transforme une mise à jour partielle (champs fournis d'un modèle Pydantic)
+    en une seule requête DELETE/INSERT/WHERE : une transaction Fuseki,
+    atomique, quel que soit le nombre de champs modifiés.
+
+    Le mapping champ → (propriété, datatype XSD) est calculé une fois à la
+    construction ; les valeurs sont validées et échappées selon leur type.
+
+    - fields : {champ: (propriété, xsd)} ; propriété = nom local ou IRI absolue
+    - namespace : namespace des noms locaux (eco par défaut)
+    - rdf_type : classe de l'entité ; une mise à jour désignée par IRI
+      exige alors `<iri> a <classe>` (sans effet sur une entité inconnue,
+      au lieu d'y créer des triplets orphelins)
+    """
+
+    def __init__(self, fields: Mapping[str, Tuple[str, Optional[str]]], namespace: Optional[str] = None,
+                 rdf_type: Optional[str] = None):
+        self.namespace = namespace
+        self.fields = {name: (iri_term(prop, namespace), xsd) for name, (prop, xsd) in fields.items()}
+        self.rdf_type = iri_term(rdf_type, namespace) if rdf_type else None
+
+    @classmethod
+    def from_model(cls, model: Type[BaseModel], properties: Optional[Mapping[str, str]] = None,
+                   types: Optional[Mapping[str, Optional[str]]] = None, exclude: Tuple[str, ...] = (),
+                   namespace: Optional[str] = None, rdf_type: Optional[str] = None) -> "EntityUpdate":
+        """
+        Mapping dérivé des annotations du modèle (bool → xsd:boolean, int →
+        xsd:integer, float → xsd:float, datetime → xsd:dateTime, str → littéral
+        simple). `properties` renomme des champs, `types` force un datatype
+        (ex. chaîne ISO stockée en xsd:dateTime).
+        """
+        properties = properties or {}
+        types = types or {}
+        fields = {}
+        for name, info in model.model_fields.items():
+            if name in exclude:
+                continue
+            xsd = types[name] if name in types else _xsd_for(info.annotation)
+            fields[name] = (properties.get(name, name), xsd)
+        return cls(fields, namespace, rdf_type)
+
+    def changes(self, data: Any) -> Dict[str, Any]:
+        """Champs fournis (non None) d'un modèle ou d'un dict, limités au mapping."""
+        values = data.model_dump(exclude_none=True) if isinstance(data, BaseModel) else data
+        return {name: value for name, value in values.items() if value is not None and name in self.fields}
+
+    def exists_query(self, iri: str) -> str:
+        """SELECT (une ligne au plus) vérifiant que l'entité `iri` existe, avec la classe `rdf_type` si fixée."""
+        subject = iri_term(iri, self.namespace)
+        typed = f" {subject} a {self.rdf_type} ." if self.rdf_type else ""
+        return f"SELECT ?p WHERE {{ {subject} ?p ?o .{typed} }} LIMIT 1"
+
+    def build(self, changes: Mapping[str, Any], iri: Optional[str] = None,
+              key: Optional[Tuple[str, Any]] = None, extra: Optional[Mapping[str, Any]] = None) -> str:
+        """
+        Requête SPARQL Update remplaçant les valeurs de tous les champs de
+        `changes` (plus `extra` : {propriété: valeur}, datatype déduit de la
+        valeur Python).
+
+        L'entité est désignée soit par son IRI (`iri`, nom local ou absolue ;
+        motif `a <rdf_type>` exigé si la classe est fixée), soit par un
+        identifiant (`key=(propriété, valeur)`) : la requête ne touche alors
+        que l'entité qui porte cette valeur.
+        """
+        if (iri is None) == (key is None):
+            raise ValueError("Indiquer soit `iri`, soit `key`")
+        assignments: List[Tuple[str, str]] = []
+        for name, value in changes.items():
+            prop, xsd = self.fields[name]
+            try:
+                assignments.append((prop, _literal(value, xsd)))
+            except TemplateParamError as e:
+                raise TemplateParamError(f"Champ '{name}' : {e}")
+        for prop, value in (extra or {}).items():
+            assignments.append((iri_term(prop, self.namespace), _literal(value, _xsd_for(type(value)))))
+        if not assignments:
+            raise ValueError("Aucun champ à mettre à jour")
+
+        if iri is not None:
+            subject = iri_term(iri, self.namespace)
+            where = [f"{subject} a {self.rdf_type} ."] if self.rdf_type else []
+        else:
+            subject = "?entity"
+            key_prop, key_value = key
+            where = [f"{subject} {iri_term(key_prop, self.namespace)} {string_literal(key_value)} ."]
+
+        deletes, inserts = [], []
+        for i, (prop, literal) in enumerate(assignments):
+            deletes.append(f"{subject} {prop} ?old{i} .")
+            inserts.append(f"{subject} {prop} {literal} .")
+            where.append(f"OPTIONAL {{ {subject} {prop} ?old{i} }}")
+
+        return (
+            "DELETE {\n  " + "\n  ".join(deletes) + "\n}\n"
+            "INSERT {\n  " + "\n  ".join(inserts) + "\n}\n"
+            "WHERE {\n  " + "\n  ".join(where) + "\n}\n"
+        )
@@ -0,0 +1,13 @@
+# app/services/sparql_errors.py - Exceptions de la couche SPARQL
+
+
+class SparqlError(RuntimeError):
+    """
+    Erreur d'exécution SPARQL.
+    `retryable` vaut True pour les échecs transitoires (réseau, timeout, 5xx)
+    qu'il est raisonnable de rejouer ; False pour une requête invalide (4xx).
+    """
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
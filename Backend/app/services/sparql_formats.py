@@ -0,0 +1,159 @@
+# app/services/sparql_formats.py - Formats de résultats SELECT compacts (TSV / CSV)
+
+import codecs
+import csv
+import io
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.services.sparql_errors import SparqlError
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# Format → type MIME demandé à Fuseki (en-tête Accept)
+ACCEPT = {
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+    "csv": "text/csv",
+}
+
+_NUMBER = re.compile(r"[+-]?(?:(\d+)|(\d*\.\d+)|((?:\d+\.?\d*|\.\d+)[eE][+-]?\d+))$")
+_ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+_URI_SCHEMES = ("http://", "https://", "urn:")
+
+
+def _unescape_match(match) -> str:
+    code = match.group(1) or match.group(2)
+    if code:
+        return chr(int(code, 16))
+    return _ESCAPES.get(match.group(3), match.group(3))
+
+
+def _tsv_term(cell: str) -> Dict[str, str]:
+    """Terme RDF au format TSV (syntaxe Turtle) → cellule du format JSON SPARQL."""
+    first = cell[0]
+    if first == "<":
+        return {"type": "uri", "value": cell[1:-1]}
+    if first == '"':
+        end = cell.rfind('"')
+        value = cell[1:end]
+        if "\\" in value:
+            value = _ESCAPE.sub(_unescape_match, value)
+        suffix = cell[end + 1:]
+        if not suffix:
+            return {"type": "literal", "value": value}
+        if suffix[0] == "@":
+            return {"type": "literal", "value": value, "xml:lang": suffix[1:]}
+        return {"type": "literal", "value": value, "datatype": suffix[3:-1]}  # ^^<...>
+    if first == "_":
+        return {"type": "bnode", "value": cell[2:]}
+    if cell == "true" or cell == "false":
+        return {"type": "literal", "value": cell, "datatype": XSD + "boolean"}
+    match = _NUMBER.match(cell)
+    if match is not None:
+        datatype = "integer" if match.group(1) else ("decimal" if match.group(2) else "double")
+        return {"type": "literal", "value": cell, "datatype": XSD + datatype}
+    raise SparqlError(f"Erreur lors de la requête SPARQL : terme TSV invalide : {cell[:80]}")
+
+
+class _TsvRows:
+    """
+    Décodeur de lignes TSV partagé par le parseur complet et le parseur
+    incrémental. Les cellules identiques (types, catégories, datatypes
+    répétés) sont décodées une seule fois : les bindings partagent alors
+    les mêmes dicts, comme ceux du cache (à ne pas modifier).
+    """
+
+    def __init__(self, header: str):
+        self.variables = [name[1:] if name[:1] in "?$" else name for name in header.rstrip("\r").split("\t")]
+        self._terms: Dict[str, Dict[str, str]] = {}
+
+    def binding(self, line: str) -> Dict[str, Dict[str, str]]:
+        cells = line.rstrip("\r").split("\t")
+        if len(cells) != len(self.variables):
+            raise SparqlError(
+                f"Erreur lors de la requête SPARQL : ligne TSV de {len(cells)} colonnes "
+                f"(attendu {len(self.variables)})"
+            )
+        terms = self._terms
+        get = terms.get
+        binding = {}
+        for name, cell in zip(self.variables, cells):
+            if cell:
+                term = get(cell)
+                if term is None:
+                    term = _tsv_term(cell)
+                    if len(terms) < 50000:
+                        terms[cell] = term
+                binding[name] = term
+        return binding
+
+
+def parse_tsv(text: str) -> Dict[str, Any]:
+    """Réponse `text/tab-separated-values` complète → même structure que le JSON SPARQL."""
+    lines = text.split("\n")
+    if not lines or not lines[0]:
+        return {"head": {"vars": []}, "results": {"bindings": []}}
+    rows = _TsvRows(lines[0])
+    bindings = [rows.binding(line) for line in lines[1:] if line]
+    return {"head": {"vars": rows.variables}, "results": {"bindings": bindings}}
+
+
+def iter_tsv_bindings(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Bindings d'une réponse TSV, produits ligne à ligne pendant la réception."""
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    rows: Optional[_TsvRows] = None
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + utf8.decode(chunk)).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            if rows is None:
+                rows = _TsvRows(line)
+            elif line:
+                yield rows.binding(line)
+    rest += utf8.decode(b"", final=True)
+    if rest:
+        if rows is None:
+            return
+        yield rows.binding(rest)
+
+
+def _csv_term(cell: str) -> Dict[str, str]:
+    if cell.startswith("_:"):
+        return {"type": "bnode", "value": cell[2:]}
+    if cell.startswith(_URI_SCHEMES) and " " not in cell:
+        return {"type": "uri", "value": cell}
+    return {"type": "literal", "value": cell}
+
+
+def parse_csv(text: str) -> Dict[str, Any]:
+    """
+    Réponse `text/csv` → structure JSON SPARQL. Le CSV ne porte ni datatype
+    ni langue, et une IRI n'y est reconnue qu'à son schéma (http, https,
+    urn) : à réserver aux requêtes qui n'exploitent que les valeurs.
+    """
+    reader = csv.reader(io.StringIO(text))
+    header: List[str] = next(reader, [])
+    terms: Dict[str, Dict[str, str]] = {}
+    bindings = []
+    for row in reader:
+        binding = {}
+        for name, cell in zip(header, row):
+            if cell:
+                term = terms.get(cell)
+                if term is None:
+                    term = terms[cell] = _csv_term(cell)
+                binding[name] = term
+        bindings.append(binding)
+    return {"head": {"vars": header}, "results": {"bindings": bindings}}
+
+
+def decode(fmt: str, content: bytes) -> Dict[str, Any]:
+    """Corps de réponse (déjà décompressé) → résultat au format JSON SPARQL."""
+    if fmt == "tsv":
+        return parse_tsv(content.decode("utf-8"))
+    if fmt == "csv":
+        return parse_csv(content.decode("utf-8"))
+    raise ValueError(f"Format de résultats inconnu : {fmt}")
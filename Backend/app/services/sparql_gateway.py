@@ -0,0 +1,134 @@
+# app/services/sparql_gateway.py - Point d'accès SPARQL unique du processus
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.sparql_helpers import execute_select_query, execute_select_raw, execute_update_query, SparqlError
+from app.services.sparql_raw import RawBindings
+from app.services import request_context
+
+logger = logging.getLogger(__name__)
+
+
+class SparqlGateway:
+    """
+    Passerelle SPARQL partagée par tous les services (clients, dashboards,
+    recommandeurs, scripts). Centralise :
+    - le transport HTTP mutualisé de sparql_helpers (pool keep-alive)
+    - l'injection des préfixes
+    - les timeouts et la politique de retry des lectures
+    - des métriques par appelant (`caller`)
+    """
+
+    def __init__(self, namespace: str = None):
+        namespace = namespace or settings.ONTOLOGY_NAMESPACE
+        self.prefixes = f"""
+        PREFIX owl: <http://www.w3.org/2002/07/owl#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX eco: <{namespace}>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+        """
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    # ---------- Métriques ----------
+
+    def _record(self, caller: str, kind: str, elapsed_ms: float, error: bool, retries: int = 0):
+        with self._lock:
+            m = self._metrics.setdefault(caller, {
+                "selects": 0, "updates": 0, "errors": 0, "retries": 0,
+                "total_ms": 0.0, "max_ms": 0.0
+            })
+            m[kind] += 1
+            m["retries"] += retries
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+            if error:
+                m["errors"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Métriques cumulées par appelant (nombre d'appels, erreurs, latences)."""
+        with self._lock:
+            snapshot = {}
+            for caller, m in self._metrics.items():
+                calls = m["selects"] + m["updates"]
+                snapshot[caller] = {
+                    **m,
+                    "total_ms": round(m["total_ms"], 1),
+                    "max_ms": round(m["max_ms"], 1),
+                    "avg_ms": round(m["total_ms"] / calls, 1) if calls else 0.0
+                }
+            return snapshot
+
+    # ---------- Exécution ----------
+
+    def _timeout(self, timeout: Optional[float]):
+        if timeout is None:
+            return None
+        return (settings.SPARQL_CONNECT_TIMEOUT, timeout)
+
+    def select(self, query: str, caller: str = "default", timeout: Optional[float] = None,
+               with_prefixes: bool = True) -> Dict[str, Any]:
+        """
+        Exécute une requête SELECT et retourne le résultat SPARQL JSON complet.
+        Les échecs transitoires (réseau, 5xx) sont rejoués avec un backoff exponentiel.
+        """
+        return self._select_with_retries(execute_select_query, query, caller, timeout, with_prefixes)
+
+    def select_raw(self, query: str, caller: str = "default", timeout: Optional[float] = None,
+                   with_prefixes: bool = True) -> RawBindings:
+        """Exécute un SELECT et retourne ses bindings en octets JSON bruts (renvoyés tels quels au client)."""
+        return self._select_with_retries(execute_select_raw, query, caller, timeout, with_prefixes)
+
+    def _select_with_retries(self, execute, query: str, caller: str, timeout: Optional[float],
+                             with_prefixes: bool):
+        full_query = self.prefixes + query if with_prefixes else query
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                result = execute(full_query, timeout=self._timeout(timeout))
+                self._record(caller, "selects", (time.perf_counter() - start) * 1000, False, attempt)
+                return result
+            except request_context.DeadlineExceeded:
+                self._record(caller, "selects", (time.perf_counter() - start) * 1000, True, attempt)
+                raise
+            except SparqlError as e:
+                if not e.retryable or attempt >= settings.SPARQL_MAX_RETRIES:
+                    self._record(caller, "selects", (time.perf_counter() - start) * 1000, True, attempt)
+                    raise
+                delay = settings.SPARQL_RETRY_BACKOFF * (2 ** attempt)
+                left = request_context.remaining()
+                if left is not None and left <= delay:
+                    # Plus le temps de rejouer avant l'échéance de la requête HTTP
+                    self._record(caller, "selects", (time.perf_counter() - start) * 1000, True, attempt)
+                    raise request_context.deadline_exceeded("SPARQL") from e
+                time.sleep(delay)
+                attempt += 1
+                logger.warning(f"[{caller}] Retry SPARQL {attempt}/{settings.SPARQL_MAX_RETRIES}: {e}")
+
+    def bindings(self, query: str, caller: str = "default", timeout: Optional[float] = None,
+                 with_prefixes: bool = True) -> List[Dict[str, Any]]:
+        """Raccourci : exécute un SELECT et retourne uniquement la liste des bindings."""
+        return self.select(query, caller, timeout, with_prefixes)["results"]["bindings"]
+
+    def update(self, query: str, caller: str = "default", timeout: Optional[float] = None,
+               with_prefixes: bool = True) -> Dict[str, Any]:
+        """Exécute une requête UPDATE (INSERT/DELETE). Jamais rejouée : une mise à jour n'est pas idempotente."""
+        full_query = self.prefixes + query if with_prefixes else query
+        start = time.perf_counter()
+        try:
+            result = execute_update_query(full_query, timeout=self._timeout(timeout))
+        except SparqlError:
+            self._record(caller, "updates", (time.perf_counter() - start) * 1000, True)
+            raise
+        self._record(caller, "updates", (time.perf_counter() - start) * 1000, False)
+        return result
+
+
+# Instance unique partagée par tout le processus
+gateway = SparqlGateway()
@@ -1,42 +1,336 @@
+import contextvars
+import time
+from functools import partial
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Dict, Iterator, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from app.config import settings
+from app.services.sparql_cache import result_cache, cache_key, MISS
+from app.services.sparql_singleflight import select_flight
+from app.services.sparql_errors import SparqlError
+from app.services.sparql_breaker import breaker, last_good, stale_or_raise
+from app.services.sparql_stream import iter_bindings
+from app.services import sparql_formats
+from app.services.sparql_raw import RawBindings
+from app.services import request_context, embedded_store, dataset_versions, catalog_snapshot, catalog_columns, type_closure
+from app.services.sparql_replicas import router as replica_router
+from app.services.sparql_batcher import update_batcher, is_insert_data
 
-def execute_select_query(query: str):
+
+# ============================================
+# TRANSPORT HTTP MUTUALISÉ (keep-alive)
+# ============================================
+
+def _build_session() -> requests.Session:
     """
-    Exécute une requête SPARQL SELECT sur Apache Fuseki.
-    Retourne une réponse JSON formatée.
+    Construit la session HTTP partagée par tous les helpers SPARQL.
+    Un pool urllib3 est conservé par hôte Fuseki, les connexions TCP
+    sont réutilisées (keep-alive) au lieu d'être rouvertes à chaque requête.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.SPARQL_POOL_CONNECTIONS,  # nombre d'hôtes gardés en cache
+        pool_maxsize=settings.SPARQL_POOL_MAXSIZE,          # connexions max par hôte
+        pool_block=settings.SPARQL_POOL_BLOCK,              # attendre plutôt que dépasser la limite
+        max_retries=0
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Connection": "keep-alive",
+        "Accept-Encoding": settings.SPARQL_ACCEPT_ENCODING  # réponses compressées (décompressées par urllib3)
+    })
+    return session
+
+
+_session = _build_session()
+
+
+def get_session() -> requests.Session:
+    """Retourne la session HTTP mutualisée."""
+    return _session
+
+
+def close_session():
+    """Ferme toutes les connexions du pool (appelé à l'arrêt de l'API)."""
+    _session.close()
+
+
+def _timeout(timeout=None):
     """
-    headers = {"Accept": "application/sparql-results+json"}
+    (connect, read) de l'appel, bornés par le temps restant de la requête
+    HTTP en cours ; lève DeadlineExceeded si ce budget est déjà épuisé.
+    """
+    connect, read = timeout or (settings.SPARQL_CONNECT_TIMEOUT, settings.SPARQL_READ_TIMEOUT)
+    read = request_context.budget(read, "SPARQL")
+    return (min(connect, read), read)
+
+
+def _transport_error(message: str, error: Exception) -> Exception:
+    """Erreur réseau : abandon sur échéance si le budget de la requête est écoulé, sinon transitoire."""
+    if request_context.expired():
+        return request_context.deadline_exceeded("SPARQL")
+    return SparqlError(f"{message} : {error}", retryable=True)
+
+
+# ============================================
+# EXÉCUTION DES REQUÊTES
+# ============================================
+
+def _post_select(query: str, timeout=None, stream=False, fmt: str = "json", primary=False) -> requests.Response:
+    """
+    Envoie le SELECT au réplica choisi par le routeur (ou à SPARQL_ENDPOINT
+    s'il n'y en a qu'un, ou avec `primary`) ; la latence jusqu'aux en-têtes
+    alimente l'EWMA.
+    """
+    replica = replica_router.acquire() if replica_router.enabled and not primary else None
+    url = replica.url if replica is not None else settings.SPARQL_ENDPOINT
+    start = time.monotonic()
+    failed = True
     try:
-        response = requests.post(
-            settings.SPARQL_ENDPOINT,
+        response = _session.post(
+            url,
             data={"query": query},
-            headers=headers,
-            timeout=10
+            headers={"Accept": sparql_formats.ACCEPT[fmt]},
+            timeout=_timeout(timeout),
+            stream=stream
         )
-        if response.status_code != 200:
-            raise ValueError(f"Erreur SPARQL ({response.status_code}): {response.text}")
-        return response.json()
-    except Exception as e:
-        raise RuntimeError(f"Erreur lors de la requête SPARQL : {e}")
+        failed = response.status_code >= 500
+        return response
+    except requests.RequestException as e:
+        failed = not request_context.expired()  # échéance du client : le réplica n'y est pour rien
+        raise _transport_error("Erreur lors de la requête SPARQL", e) from e
+    finally:
+        if replica is not None:
+            replica_router.release(replica, time.monotonic() - start, failed)
 
-def execute_update_query(query: str):
+def _fetch_select(query: str, timeout=None, primary=False):
+    """Envoie le SELECT à Fuseki ; retourne (résultat JSON, taille de la réponse en octets)."""
+    if embedded_store.enabled():
+        request_context.budget(settings.SPARQL_READ_TIMEOUT, "SPARQL")
+        result = embedded_store.get_store().select(query)
+        return result, embedded_store.estimate_size(result)
+    fmt = settings.SPARQL_RESULT_FORMAT
+    response = _post_select(query, timeout, fmt=fmt, primary=primary)
+    if response.status_code != 200:
+        raise SparqlError(
+            f"Erreur lors de la requête SPARQL : Erreur SPARQL ({response.status_code}): {response.text}",
+            retryable=response.status_code >= 500
+        )
+    try:
+        if fmt == "json":
+            return response.json(), len(response.content)
+        return sparql_formats.decode(fmt, response.content), len(response.content)
+    except ValueError as e:
+        raise SparqlError(f"Erreur lors de la requête SPARQL : {e}")
+
+def _fetch_select_primary(query: str, timeout=None):
     """
-    Exécute une requête SPARQL UPDATE (INSERT/DELETE) sur Apache Fuseki.
+    Comme _fetch_select, mais toujours sur le primaire : lectures qui doivent
+    voir toutes les écritures (snapshot partagé, export en colonnes), un
+    réplica en retard pouvant sinon figer des données périmées.
+    """
+    return _fetch_select(query, timeout, primary=True)
+
+def _guarded(fn, *args):
+    """
+    Appelle `fn` à travers le disjoncteur : échec immédiat s'il est ouvert,
+    sinon l'issue (erreur transitoire, durée) est comptabilisée.
+    """
+    if not settings.SPARQL_BREAKER_ENABLED:
+        return fn(*args)
+    probe = breaker.before_call()
+    start = time.monotonic()
+    try:
+        result = fn(*args)
+    except SparqlError as e:
+        breaker.record(time.monotonic() - start, failed=e.retryable, probe=probe)
+        raise
+    except BaseException:
+        # Échéance de la requête, annulation, erreur locale : ne dit rien de la
+        # santé de Fuseki, mais la sonde éventuelle doit être rendue
+        breaker.abandon(probe)
+        raise
+    breaker.record(time.monotonic() - start, failed=False, probe=probe)
+    return result
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _open_select_stream(query: str, timeout=None, fmt: str = "json"):
+    """Envoie le SELECT sans lire le corps ; retourne la réponse en mode streaming."""
+    response = _post_select(query, timeout, stream=True, fmt=fmt)
+    if response.status_code != 200:
+        text = response.text
+        response.close()
+        raise SparqlError(
+            f"Erreur lors de la requête SPARQL : Erreur SPARQL ({response.status_code}): {text}",
+            retryable=response.status_code >= 500
+        )
+    return response
+
+def _fetch_select_raw(query: str, timeout=None):
+    """SELECT dont le corps JSON est gardé en octets ; retourne (RawBindings, taille)."""
+    if embedded_store.enabled():
+        request_context.budget(settings.SPARQL_READ_TIMEOUT, "SPARQL")
+        raw = RawBindings.from_result(embedded_store.get_store().select(query))
+        return raw, raw.size
+    response = _post_select(query, timeout, fmt="json")
+    if response.status_code != 200:
+        raise SparqlError(
+            f"Erreur lors de la requête SPARQL : Erreur SPARQL ({response.status_code}): {response.text}",
+            retryable=response.status_code >= 500
+        )
+    raw = RawBindings.from_json(response.content)
+    return raw, raw.size
+
+def execute_select_query(query: str, timeout=None, key=None):
+    """
+    Exécute une requête SPARQL SELECT sur Apache Fuseki.
+    Retourne une réponse JSON formatée (servie depuis le cache si possible :
+    le résultat est partagé, ne pas le modifier).
+    `key` remplace la clé de cache dérivée du texte (requêtes préparées).
+    """
+    key = cache_key(settings.SPARQL_ENDPOINT, query) if key is None else (settings.SPARQL_ENDPOINT, key)
+    return _select_through_layers(key, _fetch_select, query, timeout)
+
+def execute_select_raw(query: str, timeout=None) -> RawBindings:
     """
+    Comme execute_select_query, mais les bindings restent les octets JSON
+    renvoyés par Fuseki (voir RawBindings) : pour les routes qui les
+    renvoient tels quels au client. Mis en cache à part des résultats décodés.
+    """
+    key = ("raw",) + cache_key(settings.SPARQL_ENDPOINT, query)
+    return _select_through_layers(key, _fetch_select_raw, query, timeout)
+
+def _select_through_layers(key, fetcher, query: str, timeout):
+    """Cache, coalescence des requêtes identiques, disjoncteur et repli sur la dernière réponse connue."""
+    if settings.SPARQL_CACHE_ENABLED:
+        cached = result_cache.get(key)
+        if cached is not MISS:
+            return cached
+    generation = result_cache.generation
+
+    def fetch():
+        try:
+            result, size = _guarded(fetcher, query, timeout)
+        except SparqlError as e:
+            return stale_or_raise(key, e)
+        if settings.SPARQL_CACHE_ENABLED:
+            # Relecture en arrière-plan (sparql_refresh) : timeouts par défaut, hors échéance HTTP
+            result_cache.put(key, result, size, generation, refresh=partial(_guarded, fetcher, query, None))
+        if settings.SPARQL_BREAKER_ENABLED:
+            last_good.put(key, result, size)
+        return result, False
+
+    if not settings.SPARQL_SINGLE_FLIGHT_ENABLED:
+        result, stale = fetch()
+    else:
+        # Les requêtes identiques concurrentes (même génération) partagent une seule exécution
+        result, stale = select_flight.do((key, generation), fetch)
+    if stale:
+        # Chaque requête HTTP coalescée porte son propre marqueur
+        request_context.mark_stale()
+    return result
+
+def _post_update(query: str, timeout=None):
+    if embedded_store.enabled():
+        request_context.budget(settings.SPARQL_READ_TIMEOUT, "SPARQL UPDATE")
+        return embedded_store.get_store().update(query)
     headers = {"Content-Type": "application/sparql-update"}
     try:
-        response = requests.post(
+        response = _session.post(
             settings.SPARQL_UPDATE_ENDPOINT,    # souvent SPARQL_UPDATE_ENDPOINT ≠ SPARQL_ENDPOINT, adapte si nécessaire
             data=query.encode("utf-8"),
             headers=headers,
-            timeout=10
+            timeout=_timeout(timeout)
+        )
+    except requests.RequestException as e:
+        raise _transport_error("Erreur lors de la requête SPARQL UPDATE", e) from e
+    if response.status_code not in (200, 204):
+        raise SparqlError(
+            f"Erreur lors de la requête SPARQL UPDATE : Erreur SPARQL UPDATE ({response.status_code}): {response.text}",
+            retryable=response.status_code >= 500
         )
-        if response.status_code not in (200, 204):
-            raise ValueError(f"Erreur SPARQL UPDATE ({response.status_code}): {response.text}")
-        return {"success": True}
-    except Exception as e:
-        raise RuntimeError(f"Erreur lors de la requête SPARQL UPDATE : {e}")
+    return {"success": True}
+
+def execute_update_query(query: str, timeout=None):
+    """
+    Exécute une requête SPARQL UPDATE (INSERT/DELETE) sur Apache Fuseki.
+    Échoue immédiatement si le disjoncteur est ouvert (pas de repli pour les écritures).
+    Avec SPARQL_UPDATE_BATCH_ENABLED, un INSERT DATA attend d'être envoyé
+    dans le même lot que ceux des autres requêtes HTTP concurrentes.
+    """
+    query = prepare_update(query)
+    if settings.SPARQL_UPDATE_BATCH_ENABLED and is_insert_data(query):
+        future = update_batcher.submit(query)
+        after_write_when_done(future)
+        try:
+            return future.result(timeout=request_context.remaining())
+        except FutureTimeout:
+            raise request_context.deadline_exceeded("SPARQL UPDATE (lot)")
+    try:
+        return _guarded(_post_update, query, timeout)
+    finally:
+        after_write()
+
+def prepare_update(query: str) -> str:
+    """Réécriture d'une UPDATE avant envoi, commune aux clients sync et async."""
+    if settings.SPARQL_TYPE_CLOSURE_ENABLED:
+        # Les entités créées reçoivent aussi les types de leurs super-classes
+        query = type_closure.with_superclass_types(query)
+    return query
+
+def after_write():
+    """
+    Toute écriture (même en échec partiel) invalide les lectures en cache
+    et épingle les lectures suivantes sur le primaire (read-your-writes).
+    """
+    result_cache.bump_generation()
+    replica_router.note_write()
+    dataset_versions.note_write()
+    catalog_snapshot.note_write()
+    catalog_columns.note_write()
+
+def after_write_when_done(future):
+    """
+    `after_write` une fois le lot de `future` envoyé, dans le contexte de la
+    requête appelante (famille de l'ETag) : même si l'appelant abandonne à
+    l'échéance, l'invalidation ne précède jamais l'écriture.
+    """
+    context = contextvars.copy_context()
+    future.add_done_callback(lambda _: context.run(after_write))
+
+def select_template(template, timeout=None, **params):
+    """
+    Exécute un template de sparql_templates : cache, coalescence et repli
+    sont indexés sur (template, paramètres) plutôt que sur le texte rendu.
+    """
+    return execute_select_query(template.render(**params), timeout, key=template.cache_key(**params))
+
+def select_two_phase(page, detail, subject: str, page_params: Dict[str, Any],
+                     detail_params: Optional[Dict[str, Any]] = None, timeout=None) -> Dict[str, Any]:
+    """
+    Exécution en deux temps d'une recherche paginée :
+    1. `page` ne calcule que la page ordonnée et limitée des sujets `?<subject>`
+       (avec les seules variables de filtre/tri) : Fuseki n'évalue pas les
+       OPTIONAL d'affichage pour des candidats écartés ensuite par LIMIT ;
+    2. `detail` lit toutes les propriétés de ces seuls sujets, liés par
+       `VALUES ?<subject> { ${subjects} }` (paramètre IRI `subjects`).
+    Les lignes du détail sont remises dans l'ordre de la page ; le résultat
+    a la forme JSON SPARQL d'un SELECT classique.
+    """
+    rank: Dict[str, int] = {}
+    for row in select_template(page, timeout, **page_params)["results"]["bindings"]:
+        cell = row.get(subject)
+        if cell is not None and cell["type"] == "uri" and cell["value"] not in rank:
+            rank[cell["value"]] = len(rank)
+    if not rank:
+        return {"head": {"vars": []}, "results": {"bindings": []}}
+    result = select_template(detail, timeout, subjects=list(rank), **(detail_params or {}))
+    last = len(rank)
+    bindings = sorted(result["results"]["bindings"], key=lambda b: rank.get(b.get(subject, {}).get("value"), last))
+    return {"head": result.get("head", {"vars": []}), "results": {"bindings": bindings}}
 
 # helpers utilisables dans tes endpoints
 def sparql_select(query: str):
@@ -53,3 +347,30 @@ def sparql_delete(query: str):
 def sparql_update(query: str):
     # Requête DELETE/INSERT WHERE (UPDATE)
     return execute_update_query(query)
+
+def stream_select(query: str, timeout=None) -> Iterator[Dict[str, Any]]:
+    """
+    Exécute un SELECT et retourne un itérateur sur les bindings, décodés au
+    fil de la réception (mémoire constante quelle que soit la taille du
+    résultat). Pas de cache ni de coalescence : réservé aux grandes listes.
+
+    La requête est envoyée immédiatement (les erreurs HTTP sont levées ici) ;
+    la connexion est rendue au pool quand l'itérateur est épuisé ou fermé.
+    """
+    if embedded_store.enabled():
+        # Graphe en mémoire : pas de transfert réseau à découper
+        return iter(_guarded(embedded_store.get_store().select, query)["results"]["bindings"])
+    # TSV : une ligne par binding, sans répéter "type"/"datatype" à chaque cellule
+    fmt = settings.SPARQL_SCAN_FORMAT
+    response = _guarded(_open_select_stream, query, timeout, fmt)
+    decode = sparql_formats.iter_tsv_bindings if fmt == "tsv" else iter_bindings
+
+    def bindings():
+        try:
+            yield from decode(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+        except requests.RequestException as e:
+            raise _transport_error("Erreur lors de la requête SPARQL", e) from e
+        finally:
+            response.close()
+
+    return bindings()
@@ -0,0 +1,71 @@
+# app/services/sparql_raw.py - Résultats SELECT bruts (octets JSON de Fuseki, sans décodage)
+
+import json
+import re
+from typing import Any, Dict
+
+from app.services.sparql_errors import SparqlError
+
+# Chaînes JSON, échappements compris (forme « déroulée », sans alternance par caractère)
+_STRINGS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SPACES = b" \t\r\n"
+_BINDINGS = re.compile(rb'"bindings"\s*:\s*\[')
+
+
+class RawBindings:
+    """
+    Tableau `results.bindings` d'une réponse SPARQL JSON, conservé sous
+    forme d'octets : `body[start:end]` est recopié tel quel dans la réponse
+    HTTP, sans json.loads ni réencodage des milliers de cellules.
+
+    Le nombre de lignes est compté sur la structure seule (chaînes et blancs
+    retirés en une passe `re`) : une cellule est un objet plat, une ligne
+    se termine donc par `}}` (ou vaut `{}` si toutes ses variables sont
+    non liées).
+    """
+
+    __slots__ = ("body", "start", "end", "count")
+
+    def __init__(self, body: bytes, start: int, end: int, count: int):
+        self.body = body
+        self.start = start
+        self.end = end
+        self.count = count
+
+    @property
+    def bindings(self) -> memoryview:
+        return memoryview(self.body)[self.start:self.end]
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    @classmethod
+    def from_json(cls, body: bytes) -> "RawBindings":
+        """Localise le tableau des bindings ; repli sur un décodage complet si la forme surprend."""
+        match = _BINDINGS.search(body)
+        end = body.rfind(b"]") + 1
+        if match is not None and end > match.end() and not body[end:].translate(None, b"}" + _SPACES):
+            start = match.end() - 1
+            structure = _STRINGS.sub(b"", body[start:end]).translate(None, _SPACES)
+            if structure == b"[]":
+                return cls(body, start, end, 0)
+            if structure.startswith(b"[{") and structure.endswith(b"}]"):
+                return cls(body, start, end, structure.count(b"}}") + structure.count(b"{}"))
+        return cls.from_result(_loads(body))
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> "RawBindings":
+        """Résultat déjà décodé (backend embarqué, repli) → octets JSON compacts."""
+        bindings = result["results"]["bindings"]
+        body = json.dumps(bindings, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls(body, 0, len(body), len(bindings))
+
+
+def _loads(body: bytes) -> Dict[str, Any]:
+    try:
+        result = json.loads(body)
+        result["results"]["bindings"]
+        return result
+    except (ValueError, KeyError, TypeError) as e:
+        raise SparqlError(f"Erreur lors de la requête SPARQL : réponse JSON invalide ({e})")
@@ -0,0 +1,134 @@
+# app/services/sparql_refresh.py - Relecture anticipée des SELECT les plus lus (stale-while-revalidate)
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.config import settings
+from app.services.sparql_breaker import CLOSED, breaker, last_good
+from app.services.sparql_cache import result_cache
+from app.services.sparql_singleflight import async_select_flight, select_flight
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Thread qui, toutes les SPARQL_REFRESH_INTERVAL_SECONDS, relit en
+    arrière-plan les entrées du cache de résultats :
+    - servies après expiration (fenêtre SPARQL_CACHE_MAX_STALE_SECONDS),
+    - ou « chaudes » (au moins SPARQL_REFRESH_MIN_HITS lectures depuis leur
+      remplissage) et expirant dans moins de SPARQL_REFRESH_AHEAD_SECONDS.
+
+    L'expiration d'une requête coûteuse (tableau de bord, candidats d'un
+    itinéraire) ne retombe ainsi plus sur l'utilisateur qui arrive juste
+    après : il reçoit la valeur en place pendant la relecture.
+
+    Le trafic des requêtes HTTP reste prioritaire : au plus
+    SPARQL_REFRESH_CONCURRENCY relectures simultanées, aucune tant que le
+    disjoncteur n'est pas fermé ou que SPARQL_REFRESH_MAX_FOREGROUND
+    SELECT de requêtes HTTP sont en cours.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.deferred = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Lance le thread de relecture (no-op si le cache ou la relecture est désactivé)."""
+        if not settings.SPARQL_CACHE_ENABLED or not settings.SPARQL_REFRESH_ENABLED or self._thread is not None:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=settings.SPARQL_REFRESH_CONCURRENCY,
+                                        thread_name_prefix="sparql-refresh")
+        # Le cache ne sert des entrées expirées que si quelqu'un les relit
+        result_cache.stale_window = settings.SPARQL_CACHE_MAX_STALE_SECONDS
+
+        def loop():
+            while not self._stop.wait(settings.SPARQL_REFRESH_INTERVAL_SECONDS):
+                self.tick()
+
+        self._thread = threading.Thread(target=loop, name="sparql-refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        result_cache.stale_window = 0.0
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def tick(self) -> int:
+        """Soumet les relectures dues, dans la limite des places libres ; retourne leur nombre."""
+        if self._pool is None:
+            return 0
+        if settings.SPARQL_BREAKER_ENABLED and breaker.state != CLOSED:
+            return 0  # Fuseki en difficulté : pas de charge supplémentaire
+        if select_flight.in_flight() + async_select_flight.in_flight() >= settings.SPARQL_REFRESH_MAX_FOREGROUND:
+            self.deferred += 1
+            return 0
+        with self._lock:
+            free = settings.SPARQL_REFRESH_CONCURRENCY - self._active
+        due = result_cache.refresh_candidates(
+            settings.SPARQL_REFRESH_AHEAD_SECONDS, settings.SPARQL_REFRESH_MIN_HITS, free
+        )
+        for key, refresh, generation in due:
+            with self._lock:
+                self._active += 1
+            self._pool.submit(self._refresh, key, refresh, generation)
+        return len(due)
+
+    def _refresh(self, key: Hashable, refresh: Callable, generation: int):
+        failed = True
+        try:
+            result, size = refresh()
+            # Écriture entre-temps (génération changée) : put ignore le résultat
+            result_cache.put(key, result, size, generation, refresh)
+            if settings.SPARQL_BREAKER_ENABLED:
+                last_good.put(key, result, size)
+            failed = False
+        except Exception as e:
+            result_cache.refresh_failed(key)
+            logger.warning(f"Relecture SPARQL en arrière-plan échouée : {e}")
+        finally:
+            with self._lock:
+                self._active -= 1
+                if failed:
+                    self.failed += 1
+                else:
+                    self.refreshed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self._active
+        return {
+            "enabled": settings.SPARQL_REFRESH_ENABLED,
+            "running": self.running,
+            "active": active,
+            "max_concurrent": settings.SPARQL_REFRESH_CONCURRENCY,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "deferred": self.deferred,
+        }
+
+
+# Rafraîchisseur unique du processus (démarré avec l'API)
+scheduler = RefreshScheduler()
+
+
+def stats() -> Dict[str, Any]:
+    return scheduler.stats()
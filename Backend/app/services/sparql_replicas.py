@@ -0,0 +1,220 @@
+# app/services/sparql_replicas.py - Répartition des lectures SPARQL entre réplicas Fuseki
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+HEALTH_QUERY = "ASK {}"
+
+
+class Replica:
+    """Endpoint de lecture et ses mesures (latence lissée, requêtes en cours, santé)."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ewma: Optional[float] = None  # secondes ; None tant qu'aucune mesure
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected = False
+        self.ejected_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.times_ejected = 0
+
+    def score(self) -> float:
+        """Coût estimé d'un appel supplémentaire : latence × (requêtes en cours + 1)."""
+        if self.ewma is None:
+            return 0.0  # jamais mesuré : à essayer en priorité
+        return self.ewma * (self.outstanding + 1)
+
+
+class ReplicaRouter:
+    """
+    Choisit l'endpoint de chaque lecture parmi les réplicas admis, au plus
+    faible score (EWMA de latence pondérée par les requêtes en cours).
+
+    - Un réplica est éjecté après `eject_after` échecs consécutifs ou un
+      health check en échec ; il est réadmis par un health check réussi, ou
+      remis à l'essai après `eject_seconds` si aucun health check ne tourne.
+    - Après une écriture, les lectures du processus sont épinglées sur le
+      primaire (`SPARQL_ENDPOINT`, même dataset que l'endpoint d'update)
+      pendant `pin_seconds` : un réplica en retard de réplication ne peut
+      pas servir (ni mettre en cache) l'état d'avant l'écriture.
+    """
+
+    def __init__(self, primary: str, read_endpoints: List[str], alpha: float, eject_after: int,
+                 eject_seconds: float, pin_seconds: float, failure_penalty: float):
+        self.primary = Replica(primary)
+        self.replicas = [self.primary if url == primary else Replica(url) for url in read_endpoints] or [self.primary]
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.pin_seconds = pin_seconds
+        self.failure_penalty = failure_penalty
+        self._lock = threading.Lock()
+        self._pinned_until = 0.0
+        self.pinned_reads = 0
+        self._health_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.replicas) > 1 or self.replicas[0] is not self.primary
+
+    # ---------- Routage ----------
+
+    def _admitted(self, replica: Replica, now: float) -> bool:
+        return not replica.ejected or now - replica.ejected_at >= self.eject_seconds
+
+    def acquire(self) -> Replica:
+        """Choisit le réplica de la prochaine lecture ; `release` doit suivre."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._pinned_until:
+                replica = self.primary
+                self.pinned_reads += 1
+            else:
+                candidates = [r for r in self.replicas if self._admitted(r, now)]
+                if not candidates:
+                    # Tous éjectés : le primaire reste la meilleure chance
+                    replica = self.primary
+                else:
+                    best = min(r.score() for r in candidates)
+                    replica = random.choice([r for r in candidates if r.score() == best])
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    def release(self, replica: Replica, elapsed: float, failed: bool):
+        """Enregistre l'issue d'une lecture : met à jour l'EWMA et l'état de santé."""
+        with self._lock:
+            replica.outstanding -= 1
+            self._observe(replica, elapsed, failed)
+            if not failed:
+                replica.consecutive_failures = 0
+                if replica.ejected:
+                    self._readmit(replica)
+                return
+            replica.failures += 1
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self.eject_after:
+                self._eject(replica, f"{replica.consecutive_failures} échecs consécutifs")
+
+    def _observe(self, replica: Replica, elapsed: float, failed: bool):
+        sample = max(elapsed, self.failure_penalty) if failed else elapsed
+        replica.ewma = sample if replica.ewma is None else (
+            self.alpha * sample + (1 - self.alpha) * replica.ewma
+        )
+
+    def note_write(self):
+        """Épingle les lectures sur le primaire pendant la fenêtre read-your-writes."""
+        if self.pin_seconds <= 0:
+            return
+        with self._lock:
+            self._pinned_until = time.monotonic() + self.pin_seconds
+
+    def _eject(self, replica: Replica, reason: str):
+        if not replica.ejected:
+            replica.times_ejected += 1
+            logger.warning(f"⛔ Réplica SPARQL éjecté : {replica.url} ({reason})")
+        replica.ejected = True
+        replica.ejected_at = time.monotonic()
+
+    def _readmit(self, replica: Replica):
+        replica.ejected = False
+        replica.consecutive_failures = 0
+        logger.info(f"✅ Réplica SPARQL réadmis : {replica.url}")
+
+    # ---------- Health checks ----------
+
+    def check(self, replica: Replica) -> bool:
+        """
+        Health check d'un réplica (ASK {}) ; éjecte ou réadmet selon le résultat.
+        La latence de la sonde alimente aussi l'EWMA, pour qu'un réplica
+        pénalisé par un échec puisse regagner du trafic.
+        """
+        from app.services.sparql_helpers import get_session
+
+        start = time.monotonic()
+        try:
+            response = get_session().post(
+                replica.url,
+                data={"query": HEALTH_QUERY},
+                headers={"Accept": "application/sparql-results+json"},
+                timeout=(settings.SPARQL_CONNECT_TIMEOUT, settings.SPARQL_CONNECT_TIMEOUT)
+            )
+            healthy = response.status_code == 200
+        except Exception:
+            healthy = False
+        with self._lock:
+            self._observe(replica, time.monotonic() - start, not healthy)
+            if healthy and replica.ejected:
+                self._readmit(replica)
+            elif not healthy:
+                self._eject(replica, "health check en échec")
+        return healthy
+
+    def start_health_checks(self, interval: float):
+        """Lance le thread de health checks (no-op avec un seul endpoint ou interval <= 0)."""
+        if not self.enabled or interval <= 0 or self._health_thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                for replica in self.replicas:
+                    self.check(replica)
+
+        self._health_thread = threading.Thread(target=loop, name="sparql-replica-health", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=5)
+            self._health_thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "primary": self.primary.url,
+                "pinned_to_primary": now < self._pinned_until,
+                "pinned_reads": self.pinned_reads,
+                "replicas": [{
+                    "url": r.url,
+                    "ewma_ms": round(r.ewma * 1000, 1) if r.ewma is not None else None,
+                    "outstanding": r.outstanding,
+                    "ejected": r.ejected,
+                    "requests": r.requests,
+                    "failures": r.failures,
+                    "times_ejected": r.times_ejected
+                } for r in self.replicas]
+            }
+
+
+def _read_endpoints() -> List[str]:
+    return [url.strip() for url in settings.SPARQL_READ_ENDPOINTS.split(",") if url.strip()]
+
+
+# Routeur unique du processus, partagé par les clients sync et async
+router = ReplicaRouter(
+    primary=settings.SPARQL_ENDPOINT,
+    read_endpoints=_read_endpoints(),
+    alpha=settings.SPARQL_REPLICA_EWMA_ALPHA,
+    eject_after=settings.SPARQL_REPLICA_EJECT_AFTER,
+    eject_seconds=settings.SPARQL_REPLICA_EJECT_SECONDS,
+    pin_seconds=settings.SPARQL_READ_YOUR_WRITES_SECONDS,
+    failure_penalty=settings.SPARQL_READ_TIMEOUT
+)
+
+
+def stats() -> Dict[str, Any]:
+    return router.stats()
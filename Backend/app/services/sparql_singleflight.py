@@ -0,0 +1,134 @@
+# app/services/sparql_singleflight.py - Coalescence des requêtes SPARQL identiques
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.services import request_context
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Single-flight pour les appelants synchrones (endpoints `def` exécutés
+    dans le threadpool) : tant qu'une exécution est en cours pour une clé,
+    les autres threads attendent son résultat au lieu d'interroger Fuseki.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Chaque appelant n'attend que dans la limite de sa propre échéance
+            left = request_context.remaining()
+            if not call.event.wait(None if left is None else max(left, 0)):
+                raise request_context.deadline_exceeded("SPARQL")
+            if isinstance(call.error, request_context.DeadlineExceeded):
+                return self.do(key, fn)  # échéance du meneur, pas la nôtre : relancer
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight pour les appelants asyncio : les coroutines concurrentes
+    d'une même boucle partagent le Future de la première exécution.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while key in self._calls:
+            future = self._calls[key]
+            self.coalesced += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), request_context.remaining())
+            except request_context.DeadlineExceeded:
+                continue  # échéance du meneur, pas la nôtre : relancer
+            except asyncio.TimeoutError:
+                raise request_context.deadline_exceeded("SPARQL")
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue  # l'exécution partagée a été annulée : relancer
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        # Évite l'avertissement "exception was never retrieved" sans attente
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+# Instances du processus : une pour le client sync, une pour le client async
+select_flight = SingleFlight()
+async_select_flight = AsyncSingleFlight()
+
+
+def stats() -> Dict[str, Any]:
+    """Exécutions réelles vs requêtes coalescées, par type d'appelant."""
+    result = {}
+    for name, flight in (("sync", select_flight), ("async", async_select_flight)):
+        total = flight.executions + flight.coalesced
+        result[name] = {
+            "executions": flight.executions,
+            "coalesced": flight.coalesced,
+            "in_flight": flight.in_flight(),
+            "coalesced_ratio": round(flight.coalesced / total, 3) if total else 0.0
+        }
+    return result
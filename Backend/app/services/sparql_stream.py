@@ -0,0 +1,59 @@
+# app/services/sparql_stream.py - Lecture incrémentale des résultats SPARQL JSON
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator
+
+from app.services.sparql_errors import SparqlError
+
+# Début du tableau des résultats : {"head": {...}, "results": {"bindings": [ ...
+_BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+_SEPARATOR = re.compile(r'[\s,]*')
+
+_decoder = json.JSONDecoder()
+
+
+def iter_bindings(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Produit les bindings d'une réponse `application/sparql-results+json`
+    au fur et à mesure que les octets arrivent. Seuls le binding en cours
+    de décodage et le morceau reçu sont gardés en mémoire.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    in_array = False
+    done = False
+
+    for chunk in chunks:
+        if done:
+            break
+        buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+
+        if not in_array:
+            match = _BINDINGS_START.search(buffer)
+            if match is None:
+                # Garder la fin : le marqueur peut être coupé entre deux morceaux
+                pos = max(0, len(buffer) - 64)
+                continue
+            in_array = True
+            pos = match.end()
+
+        while True:
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                done = True
+                break
+            try:
+                binding, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # binding incomplet : attendre le morceau suivant
+            pos = end
+            yield binding
+
+    if not done:
+        raise SparqlError("Erreur lors de la requête SPARQL : réponse JSON tronquée", retryable=True)
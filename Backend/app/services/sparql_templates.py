@@ -0,0 +1,236 @@
+# app/services/sparql_templates.py - Requêtes SPARQL préparées à paramètres typés
+
+import math
+import re
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.config import settings
+
+# Préfixes ajoutés à tous les templates
+PREFIXES = f"""PREFIX owl: <http://www.w3.org/2002/07/owl#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+PREFIX eco: <{settings.ONTOLOGY_NAMESPACE}>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
+
+IRI = "iri"            # nom local dans le namespace eco (ou IRI absolue)
+STRING = "string"      # littéral chaîne échappé
+INTEGER = "integer"
+DECIMAL = "decimal"
+BOOLEAN = "boolean"
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+_LOCAL_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.\-]*$")
+_ABSOLUTE_IRI = re.compile(r"^https?://[^\s<>\"{}|^`\\]+$")
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_ESCAPE_RE = re.compile(r'[\\"\n\r\t\b\f]')
+
+
+class TemplateParamError(ValueError):
+    """Valeur de paramètre invalide pour un template (à traduire en 400/404)."""
+
+
+# ---------- Rendu des termes ----------
+
+def iri_term(value: Any, namespace: Optional[str] = None) -> str:
+    """Nom local (dans `namespace`, eco par défaut) ou IRI absolue → `<...>` validé."""
+    text = str(value)
+    if _LOCAL_NAME.match(text):
+        return f"<{namespace or settings.ONTOLOGY_NAMESPACE}{text}>"
+    if _ABSOLUTE_IRI.match(text):
+        return f"<{text}>"
+    raise TemplateParamError(f"Identifiant invalide : {text!r}")
+
+
+def string_literal(value: Any) -> str:
+    """Littéral chaîne SPARQL échappé (guillemets inclus)."""
+    return '"' + _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group(0)], str(value)) + '"'
+
+
+def _integer(value: Any) -> str:
+    if isinstance(value, bool):
+        raise TemplateParamError(f"Entier attendu : {value!r}")
+    try:
+        return str(int(value))
+    except (TypeError, ValueError):
+        raise TemplateParamError(f"Entier attendu : {value!r}")
+
+
+def _decimal(value: Any) -> str:
+    if isinstance(value, bool):
+        raise TemplateParamError(f"Nombre attendu : {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise TemplateParamError(f"Nombre attendu : {value!r}")
+    if not math.isfinite(number):
+        raise TemplateParamError(f"Nombre fini attendu : {value!r}")
+    return repr(number)
+
+
+def _boolean(value: Any) -> str:
+    if not isinstance(value, bool):
+        raise TemplateParamError(f"Booléen attendu : {value!r}")
+    return "true" if value else "false"
+
+
+_RENDERERS = {IRI: iri_term, STRING: string_literal, INTEGER: _integer, DECIMAL: _decimal, BOOLEAN: _boolean}
+_SAMPLES = {IRI: "Sample", STRING: "sample", INTEGER: 1, DECIMAL: 1.5, BOOLEAN: True}
+
+
+class Param:
+    """
+    Paramètre typé d'un template.
+    - kind : IRI, STRING, INTEGER, DECIMAL ou BOOLEAN
+    - values : True pour une liste de termes à placer dans un bloc VALUES ;
+      None (ou liste vide) y est rendu `UNDEF` (aucune contrainte)
+    - separator : ", " pour une liste placée dans `IN (...)` (non vide)
+    - default : valeur utilisée si le paramètre n'est pas fourni
+    """
+
+    _REQUIRED = object()
+
+    def __init__(self, kind: str, values: bool = False, default: Any = _REQUIRED, separator: str = " "):
+        if kind not in _RENDERERS:
+            raise ValueError(f"Type de paramètre inconnu : {kind}")
+        self.kind = kind
+        self.values = values
+        self.default = default
+        self.separator = separator
+        self._render_term = _RENDERERS[kind]
+
+    @property
+    def required(self) -> bool:
+        return self.default is Param._REQUIRED
+
+    def render(self, value: Any) -> str:
+        if not self.values:
+            if value is None:
+                raise TemplateParamError("Valeur manquante")
+            return self._render_term(value)
+        if isinstance(value, (str, bytes)) or (value is not None and not hasattr(value, "__iter__")):
+            value = [value]
+        terms = [self._render_term(v) for v in value or ()]
+        if terms:
+            return self.separator.join(terms)
+        if self.separator != " ":
+            raise TemplateParamError("Liste vide")
+        return "UNDEF"
+
+    def sample(self) -> Any:
+        return [_SAMPLES[self.kind]] if self.values else _SAMPLES[self.kind]
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(value)
+    return value
+
+
+class SparqlTemplate:
+    """
+    Requête SPARQL déclarée une fois, avec des emplacements `${nom}` typés.
+    Le texte est découpé à la construction : le rendu n'est qu'une jointure
+    de morceaux fixes et de termes échappés.
+    """
+
+    def __init__(self, template_id: str, text: str, params: Dict[str, Param]):
+        self.id = template_id
+        self.params = params
+        full_text = PREFIXES + text
+        parts = _PLACEHOLDER.split(full_text)
+        self._segments: List[str] = parts[0::2]
+        self._names: List[str] = parts[1::2]
+
+        used = set(self._names)
+        undeclared = used - set(params)
+        if undeclared:
+            raise ValueError(f"Template '{template_id}' : paramètres non déclarés {sorted(undeclared)}")
+        unused = set(params) - used
+        if unused:
+            raise ValueError(f"Template '{template_id}' : paramètres inutilisés {sorted(unused)}")
+        self.renders = 0
+
+    def _values(self, given: Dict[str, Any]) -> Dict[str, Any]:
+        unknown = set(given) - set(self.params)
+        if unknown:
+            raise TemplateParamError(f"Template '{self.id}' : paramètres inconnus {sorted(unknown)}")
+        values = {}
+        for name, param in self.params.items():
+            if name in given:
+                values[name] = given[name]
+            elif param.required:
+                raise TemplateParamError(f"Template '{self.id}' : paramètre '{name}' manquant")
+            else:
+                values[name] = param.default
+        return values
+
+    def render(self, **given: Any) -> str:
+        """Produit le texte SPARQL, chaque valeur étant validée et échappée selon son type."""
+        values = self._values(given)
+        rendered = {}
+        for name, param in self.params.items():
+            try:
+                rendered[name] = param.render(values[name])
+            except TemplateParamError as e:
+                raise TemplateParamError(f"Template '{self.id}', paramètre '{name}' : {e}")
+        out = [self._segments[0]]
+        for name, segment in zip(self._names, self._segments[1:]):
+            out.append(rendered[name])
+            out.append(segment)
+        self.renders += 1
+        return "".join(out)
+
+    def cache_key(self, **given: Any) -> Tuple:
+        """Clé (template, paramètres) : indépendante du texte rendu."""
+        values = self._values(given)
+        return ("template", self.id) + tuple((name, _freeze(values[name])) for name in self.params)
+
+    def validate(self):
+        """Vérifie la syntaxe SPARQL avec des valeurs d'exemple (rdflib)."""
+        from rdflib.plugins.sparql.parser import parseQuery, parseUpdate
+
+        text = self.render(**{name: param.sample() for name, param in self.params.items()})
+        self.renders -= 1
+        body = text[len(PREFIXES):].lstrip().upper()
+        try:
+            if body.startswith(("INSERT", "DELETE", "WITH", "LOAD", "CLEAR", "CREATE", "DROP")):
+                parseUpdate(text)
+            else:
+                parseQuery(text)
+        except Exception as e:
+            raise ValueError(f"Template '{self.id}' : SPARQL invalide ({e})") from e
+
+
+# ---------- Registre ----------
+
+_registry: Dict[str, SparqlTemplate] = {}
+_lock = threading.Lock()
+
+
+def register(template_id: str, text: str, **params: Param) -> SparqlTemplate:
+    """
+    Déclare un template (au chargement du module appelant). Les emplacements
+    et les paramètres doivent correspondre ; la syntaxe SPARQL est vérifiée
+    si SPARQL_TEMPLATE_VALIDATE est actif.
+    """
+    template = SparqlTemplate(template_id, text, params)
+    if settings.SPARQL_TEMPLATE_VALIDATE:
+        template.validate()
+    with _lock:
+        if template_id in _registry:
+            raise ValueError(f"Template SPARQL déjà déclaré : {template_id}")
+        _registry[template_id] = template
+    return template
+
+
+def get(template_id: str) -> SparqlTemplate:
+    return _registry[template_id]
+
+
+def stats() -> Dict[str, Any]:
+    """Nombre de rendus par template déclaré."""
+    with _lock:
+        return {template_id: {"renders": t.renders} for template_id, t in sorted(_registry.items())}
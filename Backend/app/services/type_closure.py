@@ -0,0 +1,154 @@
+# app/services/type_closure.py - Fermeture de la hiérarchie de classes (rdf:type matérialisés)
+
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from rdflib import Graph, RDFS, URIRef
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = Path(__file__).resolve().parent.parent
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+# Déclaration de type dans un INSERT DATA : `<iri> a eco:Hotel`, `eco:X rdf:type <...#Hotel>`
+_TYPED_SUBJECT = re.compile(
+    r"(<[^<>\s]+>|eco:[\w\-.]*\w)\s+(?:a|rdf:type|<" + re.escape(RDF_TYPE) + r">)\s+(?:eco:([\w\-]+)|<([^<>\s]+)>)"
+)
+_INSERT_DATA = re.compile(r"^(?:\s*(?:PREFIX\s+\S*\s*<[^>]*>|BASE\s*<[^>]*>))*\s*INSERT\s+DATA\s*\{", re.IGNORECASE)
+_GRAPH_BLOCK = re.compile(r"\bGRAPH\s+(?:<[^<>\s]*>|[\w\-]*:[\w\-]*)\s*\{", re.IGNORECASE)
+_NEXT_OPERATION = re.compile(r"\}\s*;")
+
+
+@lru_cache(maxsize=1)
+def hierarchy() -> Dict[str, List[str]]:
+    """
+    Classe → toutes ses super-classes (rdfs:subClassOf transitif), limitées
+    au namespace eco, lues une fois dans SPARQL_TYPE_CLOSURE_ONTOLOGY.
+    """
+    path = Path(settings.SPARQL_TYPE_CLOSURE_ONTOLOGY)
+    if not path.is_absolute():
+        path = _APP_DIR / path
+    graph = Graph()
+    graph.parse(str(path))
+    namespace = settings.ONTOLOGY_NAMESPACE
+    direct: Dict[str, set] = {}
+    for sub, sup in graph.subject_objects(RDFS.subClassOf):
+        if isinstance(sub, URIRef) and isinstance(sup, URIRef) and sub != sup \
+                and str(sub).startswith(namespace) and str(sup).startswith(namespace):
+            direct.setdefault(str(sub), set()).add(str(sup))
+
+    closure = {}
+    for cls in direct:
+        seen, stack = set(), list(direct[cls])
+        while stack:
+            parent = stack.pop()
+            if parent not in seen and parent != cls:
+                seen.add(parent)
+                stack.extend(direct.get(parent, ()))
+        closure[cls] = sorted(seen)
+    return closure
+
+
+def subclasses(superclass: str) -> List[str]:
+    """Noms locaux des sous-classes (directes ou non) de eco:<superclass>."""
+    namespace = settings.ONTOLOGY_NAMESPACE
+    target = namespace + superclass
+    return sorted(cls[len(namespace):] for cls, parents in hierarchy().items() if target in parents)
+
+
+def type_pattern(var: str, superclass: str) -> str:
+    """
+    Motif « ?var est une instance de eco:<superclass> » (préfixe eco requis).
+    Fermeture matérialisée (SPARQL_TYPE_CLOSURE_ENABLED) : un seul triplet,
+    résolu par l'index des types ; sinon, UNION sur les sous-classes lues
+    dans l'ontologie.
+    """
+    if settings.SPARQL_TYPE_CLOSURE_ENABLED:
+        return f"?{var} a eco:{superclass} ."
+    branches = [f"{{ ?{var} a eco:{cls} . }}" for cls in subclasses(superclass)]
+    if not branches:
+        return f"?{var} a eco:{superclass} ."
+    return "{ " + " UNION ".join(branches) + " }"
+
+
+def subclass_pattern(var: str, superclass: str, type_var: str) -> str:
+    """
+    Variante de type_pattern qui lie aussi ?type_var à la sous-classe de
+    l'instance : un bloc VALUES sur les sous-classes et un seul motif de
+    triplet, au lieu d'une UNION de branches `?var a eco:X . BIND(eco:X ...)`.
+    """
+    classes = " ".join(f"eco:{cls}" for cls in subclasses(superclass)) or f"eco:{superclass}"
+    return f"VALUES ?{type_var} {{ {classes} }} ?{var} a ?{type_var} ."
+
+
+def closure_update() -> str:
+    """
+    Opération SPARQL Update qui ajoute les rdf:type de toutes les
+    super-classes manquants (idempotente : FILTER NOT EXISTS).
+    """
+    pairs = " ".join(f"(<{cls}> <{parent}>)" for cls, parents in sorted(hierarchy().items()) for parent in parents)
+    return f"""INSERT {{ ?instance a ?superclass }}
+WHERE {{
+  VALUES (?class ?superclass) {{ {pairs} }}
+  ?instance a ?class .
+  FILTER NOT EXISTS {{ ?instance a ?superclass }}
+}}"""
+
+
+def missing_query() -> str:
+    """SELECT comptant, par super-classe, les rdf:type que closure_update ajouterait."""
+    pairs = " ".join(f"(<{cls}> <{parent}>)" for cls, parents in sorted(hierarchy().items()) for parent in parents)
+    return f"""SELECT ?superclass (COUNT(DISTINCT ?instance) AS ?missing)
+WHERE {{
+  VALUES (?class ?superclass) {{ {pairs} }}
+  ?instance a ?class .
+  FILTER NOT EXISTS {{ ?instance a ?superclass }}
+}}
+GROUP BY ?superclass"""
+
+
+def with_superclass_types(update: str) -> str:
+    """
+    Complète un INSERT DATA (une seule opération, graphe par défaut) avec
+    les rdf:type des super-classes de chaque sujet dont le type suit
+    directement le sujet (`eco:X a eco:Hotel ; ...`, forme des routeurs) :
+    la fermeture reste à jour à chaque création d'entité, sans nouvelle
+    passe complète. Les autres mises à jour sont renvoyées telles quelles.
+    """
+    if not _INSERT_DATA.match(update) or _GRAPH_BLOCK.search(update) or _NEXT_OPERATION.search(update):
+        return update
+    namespace = settings.ONTOLOGY_NAMESPACE
+    closure = hierarchy()
+    extra = []
+    for subject, local, absolute in _TYPED_SUBJECT.findall(update):
+        cls = namespace + local if local else absolute
+        for parent in closure.get(cls, ()):
+            triple = f"{subject} a <{parent}> ."
+            if triple not in extra:
+                extra.append(triple)
+    if not extra:
+        return update
+    end = update.rfind("}")
+    return update[:end] + "\n  " + "\n  ".join(extra) + "\n" + update[end:]
+
+
+def materialize(timeout: Optional[Tuple[float, float]] = None) -> Dict[str, int]:
+    """
+    Passe complète : compte puis ajoute les rdf:type manquants
+    (`timeout` : (connexion, lecture), comme les helpers SPARQL).
+    Retourne le nombre de types ajoutés par super-classe (`eco:Nom`).
+    """
+    from app.services.sparql_helpers import execute_select_query, execute_update_query
+
+    namespace = settings.ONTOLOGY_NAMESPACE
+    rows = execute_select_query(missing_query(), timeout)["results"]["bindings"]
+    missing = {row["superclass"]["value"].replace(namespace, "eco:"): int(row["missing"]["value"]) for row in rows}
+    if any(missing.values()):
+        execute_update_query(closure_update(), timeout)
+        logger.info(f"Fermeture des types : {missing}")
+    return missing